@@ -47,6 +47,15 @@ def get_wallet_balance(address):
                 'message': 'Account not found'
             }), 404
         
+        # Audit queries: on-chain balance as of a past block
+        at_block = request.args.get('block', type=int)
+        if at_block is not None:
+            return jsonify({
+                'success': True,
+                'block': at_block,
+                'balance': blockchain.get_balance_at(address, at_block)
+            }), 200
+        
         return jsonify({
             'success': True,
             'balance': account.balance,
@@ -475,8 +484,9 @@ def get_transaction_history(address):
     try:
         blockchain = get_blockchain()
         limit = int(request.args.get('limit', 100))
+        before = request.args.get('before', type=int)
         
-        transactions = blockchain.get_transaction_history(address, limit)
+        transactions = blockchain.get_transaction_history(address, limit, before)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,99 @@
+"""
+Mining Benchmarks
+Legacy per-nonce JSON hashing against the midstate mining engine at several block sizes
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, Any, Sequence
+
+from mining_engine import ProofOfWorkMiner, search_nonces
+from unified_chain import Block, Transaction, TransactionType, InteractionType
+
+def _legacy_calculate_hash(block: Block) -> str:
+    """Block hash as computed before the mining engine: the whole block re-serialised per nonce"""
+    block_string = json.dumps({
+        'index': block.index,
+        'timestamp': block.timestamp,
+        'transactions': [tx.to_dict() for tx in block.transactions],
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce,
+        'validator': block.validator,
+        'interaction_weight': block.interaction_weight
+    }, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+def _make_block(n_transactions: int) -> Block:
+    transactions = [
+        Transaction(
+            id=f"tx-{i}",
+            from_address=f"uni_{i % 97:040x}",
+            to_address=f"uni_{(i * 31) % 89:040x}",
+            amount=1.0 + i,
+            transaction_type=TransactionType.TRANSFER,
+            interaction_type=InteractionType.COMMERCE,
+            metadata={'memo': f"payment {i}"},
+            timestamp=1_700_000_000.0 + i
+        )
+        for i in range(n_transactions)
+    ]
+    return Block(index=1, timestamp=1_700_000_000.0, transactions=transactions,
+                 previous_hash="0" * 64, validator="validator")
+
+def _hash_rate(function, attempts: int) -> float:
+    start = time.perf_counter()
+    function(attempts)
+    return attempts / (time.perf_counter() - start)
+
+def benchmark_mining(transaction_counts: Sequence[int] = (10, 100, 1000), difficulty: int = 4,
+                     workers: int = 4, legacy_attempts: int = 500,
+                     engine_attempts: int = 200_000) -> Dict[str, Any]:
+    """Hash rates of both miners, and the resulting expected and measured block times
+
+    Legacy block times are extrapolated from the hash rate (16 ** difficulty
+    attempts expected) because mining 1000-transaction blocks the old way
+    takes minutes.
+    """
+    expected_attempts = 16 ** difficulty
+    serial_miner = ProofOfWorkMiner(workers=1)
+    parallel_miner = ProofOfWorkMiner(workers=workers, parallel_threshold=0)
+    report = {}
+
+    try:
+        for count in transaction_counts:
+            block = _make_block(count)
+
+            def legacy(attempts):
+                for nonce in range(attempts):
+                    block.nonce = nonce
+                    _legacy_calculate_hash(block)
+
+            header = block.header_bytes()
+            legacy_rate = _hash_rate(legacy, legacy_attempts)
+            engine_rate = _hash_rate(lambda attempts: search_nonces(header, 64, 0, attempts), engine_attempts)
+
+            start = time.perf_counter()
+            serial_result = serial_miner.mine(block.header_bytes(), difficulty)
+            serial_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parallel_result = parallel_miner.mine(block.header_bytes(), difficulty)
+            parallel_seconds = time.perf_counter() - start
+
+            report[count] = {
+                'legacy_hashes_per_sec': legacy_rate,
+                'engine_hashes_per_sec': engine_rate,
+                'legacy_expected_block_seconds': expected_attempts / legacy_rate,
+                'engine_expected_block_seconds': expected_attempts / engine_rate,
+                'engine_serial_block_seconds': serial_seconds,
+                'engine_parallel_block_seconds': parallel_seconds,
+                'parallel_matches_serial': serial_result == parallel_result
+            }
+    finally:
+        parallel_miner.close()
+    return report
+
+if __name__ == "__main__":
+    for count, result in benchmark_mining().items():
+        print(f"{count} transactions: {result}")
@@ -0,0 +1,179 @@
+"""
+Proof-of-Work Mining Engine
+Midstate-based nonce search over a serialised block header, split across a process pool
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+NONCE_FORMAT = struct.Struct(">Q")
+MAX_NONCE = 2 ** 64 - 1
+
+def merkle_root(leaves: Iterable[bytes]) -> str:
+    """SHA-256 Merkle root of leaf digests (odd levels repeat their last node)"""
+    level = list(leaves)
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+def leaf_hash(item: Any) -> bytes:
+    """Leaf digest of a JSON-serialisable transaction"""
+    return hashlib.sha256(json.dumps(item, sort_keys=True, default=str).encode()).digest()
+
+def serialize_header(fields: Dict[str, Any]) -> bytes:
+    """Canonical header bytes; the 8-byte big-endian nonce is appended when hashing"""
+    return json.dumps(fields, sort_keys=True, separators=(",", ":")).encode()
+
+def hash_header(header: bytes, nonce: int) -> str:
+    return hashlib.sha256(header + NONCE_FORMAT.pack(nonce)).hexdigest()
+
+def search_nonces(header: bytes, difficulty: int, start: int, count: int) -> Optional[int]:
+    """Lowest nonce in [start, start + count) whose hash meets difficulty
+
+    The header is absorbed into a SHA-256 object once; each attempt copies
+    that midstate and feeds only the 8 nonce bytes.
+    """
+    midstate = hashlib.sha256(header)
+    zero_bytes, half_byte = divmod(difficulty, 2)
+    zero_prefix = bytes(zero_bytes)
+    pack = NONCE_FORMAT.pack
+    end = min(start + count, MAX_NONCE + 1)
+
+    for nonce in range(start, end):
+        attempt = midstate.copy()
+        attempt.update(pack(nonce))
+        digest = attempt.digest()
+        if digest[:zero_bytes] == zero_prefix and (not half_byte or digest[zero_bytes] < 16):
+            return nonce
+    return None
+
+class ProofOfWorkMiner:
+    """
+    Nonce search shared by the block types
+
+    Small searches (expected work below ``parallel_threshold`` hashes) run
+    inline. Larger ones split the nonce space into ``batch_size`` ranges
+    searched by a process pool; results are accepted in range order, so the
+    nonce found is always the lowest valid one, exactly as a serial search
+    would return.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 1 << 16,
+                 parallel_threshold: int = 1 << 18):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.parallel_threshold = parallel_threshold
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.stats = {'blocks': 0, 'hashes': 0, 'seconds': 0.0}
+
+    def mine(self, header: bytes, difficulty: int, start_nonce: int = 0,
+             timeout: Optional[float] = None) -> Optional[Tuple[int, str]]:
+        """Return (nonce, hash) for the first nonce >= start_nonce meeting difficulty,
+        or None on timeout or nonce exhaustion"""
+        started = time.perf_counter()
+        expected_hashes = 16 ** difficulty
+        if self.workers == 1 or expected_hashes < self.parallel_threshold:
+            nonce = self._mine_inline(header, difficulty, start_nonce, started, timeout)
+        else:
+            nonce = self._mine_parallel(header, difficulty, start_nonce, started, timeout)
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.stats['seconds'] += elapsed
+            if nonce is not None:
+                self.stats['blocks'] += 1
+                self.stats['hashes'] += nonce - start_nonce + 1
+        if nonce is None:
+            return None
+        return nonce, hash_header(header, nonce)
+
+    def close(self):
+        with self.lock:
+            if self.process_pool is not None:
+                self.process_pool.shutdown(wait=False, cancel_futures=True)
+                self.process_pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        stats['hashes_per_sec'] = stats['hashes'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
+    def _mine_inline(self, header: bytes, difficulty: int, start: int,
+                     started: float, timeout: Optional[float]) -> Optional[int]:
+        while start <= MAX_NONCE:
+            nonce = search_nonces(header, difficulty, start, self.batch_size)
+            if nonce is not None:
+                return nonce
+            start += self.batch_size
+            if timeout is not None and time.perf_counter() - started > timeout:
+                return None
+        return None
+
+    def _mine_parallel(self, header: bytes, difficulty: int, start: int,
+                       started: float, timeout: Optional[float]) -> Optional[int]:
+        pool = self._get_pool()
+        pending: Dict[Any, int] = {}
+        finished: Dict[int, Optional[int]] = {}
+        next_start = start
+        accept_from = start
+        found_at = None  # lowest range known to hold a valid nonce
+
+        try:
+            while True:
+                # Keep two ranges per worker queued so no process idles between batches
+                while (len(pending) < 2 * self.workers and next_start <= MAX_NONCE
+                       and (found_at is None or next_start < found_at)):
+                    future = pool.submit(search_nonces, header, difficulty, next_start, self.batch_size)
+                    pending[future] = next_start
+                    next_start += self.batch_size
+                if not pending:
+                    return None
+
+                remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - started))
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    return None
+                for future in done:
+                    range_start = pending.pop(future)
+                    finished[range_start] = future.result()
+                    if finished[range_start] is not None and (found_at is None or range_start < found_at):
+                        found_at = range_start
+
+                # Accept the lowest range once every range before it came back empty
+                while accept_from in finished:
+                    nonce = finished.pop(accept_from)
+                    if nonce is not None:
+                        return nonce
+                    accept_from += self.batch_size
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.process_pool is None:
+                self.process_pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self.process_pool
+
+_default_miner: Optional[ProofOfWorkMiner] = None
+_default_miner_lock = threading.Lock()
+
+def get_miner() -> ProofOfWorkMiner:
+    """Process-wide miner whose pool is started on first parallel search"""
+    global _default_miner
+    with _default_miner_lock:
+        if _default_miner is None:
+            _default_miner = ProofOfWorkMiner()
+        return _default_miner
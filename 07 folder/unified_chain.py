@@ -14,6 +14,10 @@ import uuid
 from collections import defaultdict
 import threading
 import queue
+from array import array
+from bisect import bisect_right
+
+from mining_engine import ProofOfWorkMiner, get_miner, hash_header, leaf_hash, merkle_root, serialize_header
 
 class TransactionType(Enum):
     TRANSFER = "transfer"
@@ -76,25 +80,42 @@ class Block:
     validator: str = ""
     interaction_weight: float = 0.0
     
-    def calculate_hash(self) -> str:
-        """Calculate block hash"""
-        block_string = json.dumps({
+    def merkle_root(self) -> str:
+        """Merkle root over the full contents of every transaction"""
+        return merkle_root(leaf_hash(tx.to_dict()) for tx in self.transactions)
+    
+    def header_bytes(self) -> bytes:
+        """Serialised header without the nonce; transactions enter through the Merkle root"""
+        return serialize_header({
             'index': self.index,
             'timestamp': self.timestamp,
-            'transactions': [tx.to_dict() for tx in self.transactions],
+            'merkle_root': self.merkle_root(),
             'previous_hash': self.previous_hash,
-            'nonce': self.nonce,
             'validator': self.validator,
             'interaction_weight': self.interaction_weight
-        }, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        })
+    
+    def calculate_hash(self) -> str:
+        """Calculate block hash"""
+        return hash_header(self.header_bytes(), self.nonce)
     
-    def mine_block(self, difficulty: int = 4):
-        """Mine block with proof-of-work (simplified for demo)"""
+    def mine_block(self, difficulty: int = 4, miner: Optional[ProofOfWorkMiner] = None):
+        """Mine block with proof-of-work
+        
+        The header is serialised once, so the cost per nonce does not depend
+        on the number of transactions. If every nonce is tried without a
+        match, the timestamp is bumped and the search restarts on the new
+        header.
+        """
         target = "0" * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if self.hash[:difficulty] == target and self.hash == self.calculate_hash():
+            return
+        miner = miner or get_miner()
+        mined = miner.mine(self.header_bytes(), difficulty, self.nonce + 1)
+        while mined is None:
+            self.timestamp = max(time.time(), self.timestamp + 1e-6)
+            mined = miner.mine(self.header_bytes(), difficulty)
+        self.nonce, self.hash = mined
 
 @dataclass
 class UserAccount:
@@ -117,6 +138,52 @@ class UserAccount:
         if self.courses_completed is None:
             self.courses_completed = []
 
+class AddressHistory:
+    """
+    Append-only transaction index of one address
+    
+    Parallel arrays hold the block index, position in the block and balance
+    change of every mined transaction touching the address. Every
+    ``checkpoint_interval`` entries the running balance is stored, so the
+    balance after any entry is a checkpoint plus a bounded number of deltas.
+    """
+    
+    def __init__(self, opening_balance: float = 0.0, checkpoint_interval: int = 64):
+        self.opening_balance = opening_balance
+        self.checkpoint_interval = checkpoint_interval
+        self.block_indexes = array('q')
+        self.positions = array('q')
+        self.deltas = array('d')
+        self.checkpoints = array('d')  # balance after entries interval-1, 2*interval-1, ...
+        self.running_balance = opening_balance
+    
+    def __len__(self) -> int:
+        return len(self.deltas)
+    
+    def append(self, block_index: int, position: int, delta: float):
+        self.block_indexes.append(block_index)
+        self.positions.append(position)
+        self.deltas.append(delta)
+        self.running_balance += delta
+        if len(self.deltas) % self.checkpoint_interval == 0:
+            self.checkpoints.append(self.running_balance)
+    
+    def balance_after(self, entry: int) -> float:
+        """Balance after the entry-th transaction (-1 for the opening balance)"""
+        checkpoint = (entry + 1) // self.checkpoint_interval
+        if checkpoint:
+            balance = self.checkpoints[checkpoint - 1]
+            start = checkpoint * self.checkpoint_interval
+        else:
+            balance = self.opening_balance
+            start = 0
+        for i in range(start, entry + 1):
+            balance += self.deltas[i]
+        return balance
+    
+    def balance_at_block(self, block_index: int) -> float:
+        return self.balance_after(bisect_right(self.block_indexes, block_index) - 1)
+
 class UnifiedChain:
     def __init__(self):
         self.chain: List[Block] = []
@@ -132,6 +199,12 @@ class UnifiedChain:
         self.transaction_pool = queue.Queue()
         self.consensus_lock = threading.Lock()
         
+        # Mined-history indexes, maintained by add_block
+        self.address_index: Dict[str, AddressHistory] = {}
+        self.tx_locations: Dict[str, tuple] = {}  # tx hash -> (block index, position)
+        self.opening_balances: Dict[str, float] = {}
+        self.checkpoint_interval = 64
+        
         # Create genesis block
         self.create_genesis_block()
         
@@ -164,6 +237,7 @@ class UnifiedChain:
                 address=account,
                 balance=self.total_supply * 0.1  # 10% each for system accounts
             )
+            self.opening_balances[account] = self.total_supply * 0.1
             self.circulating_supply += self.total_supply * 0.1
     
     def create_account(self, user_id: str) -> str:
@@ -430,5 +504,105 @@ class UnifiedChain:
         """Add a new block to the chain"""
         with self.consensus_lock:
             # Validate block
- 
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+            latest_block = self.chain[-1]
+            if block.index != latest_block.index + 1:
+                return False
+            if block.previous_hash != latest_block.hash:
+                return False
+            if block.hash != block.calculate_hash():
+                return False
+            if not block.hash.startswith("0" * self.difficulty):
+                return False
+            
+            self.chain.append(block)
+            self._index_block(block)
+            return True
+    
+    def _index_block(self, block: Block):
+        """Append a block's transactions to the per-address and tx-hash indexes"""
+        for position, transaction in enumerate(block.transactions):
+            self.tx_locations[transaction.calculate_hash()] = (block.index, position)
+            for address, delta in self._balance_deltas(transaction):
+                history = self.address_index.get(address)
+                if history is None:
+                    history = AddressHistory(self.opening_balances.get(address, 0.0),
+                                             self.checkpoint_interval)
+                    self.address_index[address] = history
+                history.append(block.index, position, delta)
+    
+    @staticmethod
+    def _balance_deltas(transaction: Transaction) -> List[tuple]:
+        """Balance changes a transaction records, including stake moves"""
+        if transaction.transaction_type == TransactionType.STAKING:
+            # Stake records carry the moved amount in metadata, not in amount
+            action = transaction.metadata.get('action')
+            amount = transaction.metadata.get('amount', 0.0)
+            if action == 'stake':
+                return [(transaction.from_address, -amount - transaction.gas_fee)]
+            if action == 'unstake':
+                return [(transaction.from_address, -transaction.gas_fee),
+                        (transaction.to_address, amount)]
+        if transaction.from_address == transaction.to_address:
+            return [(transaction.from_address, -transaction.gas_fee)]
+        return [(transaction.from_address, -transaction.amount - transaction.gas_fee),
+                (transaction.to_address, transaction.amount)]
+    
+    def get_transaction(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up a mined transaction by hash"""
+        location = self.tx_locations.get(tx_hash)
+        if location is None:
+            return None
+        return self._history_entry(*location)
+    
+    def get_transaction_history(self, address: str, limit: int = 100,
+                                before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Mined transactions of an address, newest first
+        
+        ``before`` is the ``cursor`` of the last entry of the previous page;
+        each page costs O(limit) regardless of chain length.
+        """
+        history = self.address_index.get(address)
+        if history is None:
+            return []
+        end = len(history) if before is None else max(0, min(before, len(history)))
+        entries = []
+        for cursor in range(end - 1, max(end - limit, 0) - 1, -1):
+            entry = self._history_entry(history.block_indexes[cursor], history.positions[cursor])
+            entry['cursor'] = cursor
+            entry['balance_after'] = history.balance_after(cursor)
+            entries.append(entry)
+        return entries
+    
+    def get_balance(self, address: str) -> float:
+        """Current spendable balance, including unmined transactions"""
+        account = self.accounts.get(address)
+        return account.balance if account else 0.0
+    
+    def get_balance_at(self, address: str, block_index: int) -> float:
+        """Balance recorded on chain as of block_index, for audits
+        
+        Resolved from the address index: a binary search for the last entry
+        at or before the block, then at most ``checkpoint_interval`` deltas
+        from the nearest checkpoint.
+        """
+        history = self.address_index.get(address)
+        if history is None:
+            return self.opening_balances.get(address, 0.0)
+        return history.balance_at_block(block_index)
+    
+    def _history_entry(self, block_index: int, position: int) -> Dict[str, Any]:
+        block = self.chain[block_index]
+        entry = block.transactions[position].to_dict()
+        entry.update({'block_index': block_index, 'block_hash': block.hash})
+        return entry
+
+_blockchain: Optional[UnifiedChain] = None
+_blockchain_lock = threading.Lock()
+
+def get_blockchain() -> UnifiedChain:
+    """Process-wide chain instance shared by the API routes"""
+    global _blockchain
+    with _blockchain_lock:
+        if _blockchain is None:
+            _blockchain = UnifiedChain()
+        return _blockchain
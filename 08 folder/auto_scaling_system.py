@@ -7,7 +7,7 @@ Advanced scalability management with intelligent resource allocation
 import asyncio
 import json
 import logging
-import sqlite3
+import os
 import threading
 import time
 import psutil
@@ -19,6 +19,8 @@ from enum import Enum
 import uuid
 import statistics
 
+from sqlite_store import get_database
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -111,8 +113,10 @@ class AutoScalingSystem:
     Intelligent resource allocation and service scaling
     """
     
-    def __init__(self):
-        self.db_path = "/home/ubuntu/unified-platform/scalability/auto_scaling.db"
+    def __init__(self, data_dir: str = "./auto_scaling_data"):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, "auto_scaling.db")
+        self.db = get_database(self.db_path)
         self.resource_metrics = []
         self.scaling_rules = {}
         self.service_instances = {}
@@ -200,89 +204,84 @@ class AutoScalingSystem:
     def _init_database(self):
         """Initialize the auto-scaling database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Resource metrics table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS resource_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME,
-                    cpu_usage REAL,
-                    memory_usage REAL,
-                    storage_usage REAL,
-                    network_io REAL,
-                    active_connections INTEGER,
-                    response_time REAL,
-                    error_rate REAL,
-                    throughput REAL
-                )
-            ''')
-            
-            # Scaling rules table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scaling_rules (
-                    rule_id TEXT PRIMARY KEY,
-                    service_type TEXT,
-                    resource_type TEXT,
-                    threshold_up REAL,
-                    threshold_down REAL,
-                    scale_up_amount INTEGER,
-                    scale_down_amount INTEGER,
-                    cooldown_period INTEGER,
-                    enabled BOOLEAN DEFAULT TRUE,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            with self.db.transaction() as cursor:
+                # Resource metrics table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resource_metrics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp DATETIME,
+                        cpu_usage REAL,
+                        memory_usage REAL,
+                        storage_usage REAL,
+                        network_io REAL,
+                        active_connections INTEGER,
+                        response_time REAL,
+                        error_rate REAL,
+                        throughput REAL
+                    )
+                ''')
             
-            # Service instances table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS service_instances (
-                    instance_id TEXT PRIMARY KEY,
-                    service_type TEXT,
-                    status TEXT,
-                    cpu_cores INTEGER,
-                    memory_gb INTEGER,
-                    storage_gb INTEGER,
-                    ip_address TEXT,
-                    port INTEGER,
-                    health_status TEXT,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_health_check DATETIME
-                )
-            ''')
+                # Scaling rules table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS scaling_rules (
+                        rule_id TEXT PRIMARY KEY,
+                        service_type TEXT,
+                        resource_type TEXT,
+                        threshold_up REAL,
+                        threshold_down REAL,
+                        scale_up_amount INTEGER,
+                        scale_down_amount INTEGER,
+                        cooldown_period INTEGER,
+                        enabled BOOLEAN DEFAULT TRUE,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Scaling events table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scaling_events (
-                    event_id TEXT PRIMARY KEY,
-                    service_type TEXT,
-                    scaling_direction TEXT,
-                    trigger_metric TEXT,
-                    trigger_value REAL,
-                    instances_before INTEGER,
-                    instances_after INTEGER,
-                    reason TEXT,
-                    success BOOLEAN,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Service instances table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS service_instances (
+                        instance_id TEXT PRIMARY KEY,
+                        service_type TEXT,
+                        status TEXT,
+                        cpu_cores INTEGER,
+                        memory_gb INTEGER,
+                        storage_gb INTEGER,
+                        ip_address TEXT,
+                        port INTEGER,
+                        health_status TEXT,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        last_health_check DATETIME
+                    )
+                ''')
             
-            # Performance analytics table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS performance_analytics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    service_type TEXT,
-                    metric_name TEXT,
-                    metric_value REAL,
-                    prediction_value REAL,
-                    accuracy_score REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Scaling events table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS scaling_events (
+                        event_id TEXT PRIMARY KEY,
+                        service_type TEXT,
+                        scaling_direction TEXT,
+                        trigger_metric TEXT,
+                        trigger_value REAL,
+                        instances_before INTEGER,
+                        instances_after INTEGER,
+                        reason TEXT,
+                        success BOOLEAN,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            conn.commit()
-            conn.close()
+                # Performance analytics table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS performance_analytics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        service_type TEXT,
+                        metric_name TEXT,
+                        metric_value REAL,
+                        prediction_value REAL,
+                        accuracy_score REAL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
@@ -313,10 +312,7 @@ class AutoScalingSystem:
     def _store_scaling_rule_in_db(self, rule: ScalingRule):
         """Store scaling rule in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.write('''
                 INSERT OR REPLACE INTO scaling_rules 
                 (rule_id, service_type, resource_type, threshold_up, threshold_down,
                  scale_up_amount, scale_down_amount, cooldown_period, enabled, created_timestamp)
@@ -328,9 +324,6 @@ class AutoScalingSystem:
                 rule.created_timestamp
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error storing scaling rule in database: {e}")
 
@@ -446,12 +439,9 @@ class AutoScalingSystem:
         return 1000.0  # requests per minute
 
     def _store_metrics_in_db(self, metrics: ResourceMetrics):
-        """Store resource metrics in database"""
+        """Queue resource metrics for the next group commit"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.write('''
                 INSERT INTO resource_metrics 
                 (timestamp, cpu_usage, memory_usage, storage_usage, network_io,
                  active_connections, response_time, error_rate, throughput)
@@ -459,5 +449,8 @@ class AutoScalingSystem:
             ''', (
                 metrics.timestamp, metrics.cpu_usage, metrics.memory_usage,
                 metrics.storage_usage, metrics.network_io, metrics.active_connections,
-                metrics.response_ti
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+                metrics.response_time, metrics.error_rate, metrics.throughput
+            ))
+            
+        except Exception as e:
+            logger.error(f"Error storing metrics in database: {e}")
@@ -20,13 +20,8 @@ currency_service = CurrencyService()
 currency_bp = Blueprint('currency', __name__)
 
 def run_async(coro):
-    """Helper to run async functions in Flask routes"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+    """Helper to run async functions in Flask routes on the service's shared event loop"""
+    return currency_service.run(coro)
 
 @currency_bp.route('/api/currency/rates/<from_currency>/<to_currency>', methods=['GET'])
 @cross_origin()
@@ -222,12 +217,13 @@ def get_historical_rates(from_currency: str, to_currency: str):
     """Get historical exchange rates"""
     try:
         days = int(request.args.get('days', 30))
+        max_points = request.args.get('points', type=int)
         
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
         rates = run_async(currency_service.get_historical_rates(
-            from_currency, to_currency, start_date, end_date
+            from_currency, to_currency, start_date, end_date, max_points
         ))
         
         rate_data = []
@@ -394,47 +390,53 @@ def bulk_convert():
         if not conversions:
             return jsonify({'error': 'No conversions provided'}), 400
         
-        results = []
+        results = [None] * len(conversions)
+        valid_positions = []
+        valid_conversions = []
         
-        for conversion in conversions:
+        for position, conversion in enumerate(conversions):
             amount = conversion.get('amount')
             from_currency = conversion.get('from_currency')
             to_currency = conversion.get('to_currency')
             
             if not all([amount, from_currency, to_currency]):
-                results.append({
+                results[position] = {
                     'error': 'Missing required fields',
                     'conversion': conversion
-                })
+                }
                 continue
             
             try:
                 amount_decimal = Decimal(str(amount))
-                result = run_async(currency_service.convert_amount(
-                    amount_decimal, from_currency, to_currency, user_id
-                ))
-                
-                if result:
-                    results.append({
-                        'amount': str(result.amount),
-                        'from_currency': result.from_currency,
-                        'to_currency': result.to_currency,
-                        'converted_amount': str(result.converted_amount),
-                        'exchange_rate': str(result.exchange_rate),
-                        'timestamp': result.timestamp.isoformat(),
-                        'provider': result.provider
-                    })
-                else:
-                    results.append({
-                        'error': 'Conversion not available',
-                        'conversion': conversion
-                    })
-                    
-            except (ValueError, TypeError):
-                results.append({
+            except (ValueError, TypeError, ArithmeticError):
+                results[position] = {
                     'error': 'Invalid amount format',
                     'conversion': conversion
-                })
+                }
+                continue
+            
+            valid_positions.append(position)
+            valid_conversions.append((amount_decimal, from_currency, to_currency))
+        
+        # Every valid conversion priced and converted in one service call
+        converted = run_async(currency_service.bulk_convert(valid_conversions, user_id))
+        
+        for position, result in zip(valid_positions, converted):
+            if result:
+                results[position] = {
+                    'amount': str(result.amount),
+                    'from_currency': result.from_currency,
+                    'to_currency': result.to_currency,
+                    'converted_amount': str(result.converted_amount),
+                    'exchange_rate': str(result.exchange_rate),
+                    'timestamp': result.timestamp.isoformat(),
+                    'provider': result.provider
+                }
+            else:
+                results[position] = {
+                    'error': 'Conversion not available',
+                    'conversion': conversions[position]
+                }
         
         return jsonify({
             'results': results,
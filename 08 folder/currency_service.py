@@ -5,6 +5,7 @@ Provides real-time exchange rates and multi-currency support for the unified pla
 
 import asyncio
 import aiohttp
+import contextlib
 import json
 import logging
 import time
@@ -12,10 +13,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
-import sqlite3
 import os
 from decimal import Decimal, ROUND_HALF_UP
 import hashlib
+import random
+import threading
+
+from rate_history import RateHistoryStore, from_epoch
+from sqlite_store import get_database
 
 class CurrencyProvider(Enum):
     EXCHANGERATE_API = "exchangerate-api"
@@ -57,17 +62,123 @@ class ConversionResult:
     provider: str
     fees: Optional[Decimal] = None
 
+class CrossRateMatrix:
+    """
+    Exchange rates for every supported pair derived from one base-currency vector
+
+    ``rates[i]`` is the amount of currency ``codes[i]`` bought by one unit of
+    the base currency, so any pair is ``rates[to] / rates[from]`` and a single
+    provider fetch prices every combination of the currencies it quotes.
+    """
+    
+    def __init__(self, base_currency: str = "USD"):
+        self.base_currency = base_currency
+        self.codes: List[str] = [base_currency]
+        self.index: Dict[str, int] = {base_currency: 0}
+        self.rates: List[Decimal] = [Decimal(1)]
+        self.timestamp: Optional[datetime] = None
+        self.provider: Optional[str] = None
+    
+    def update(self, rates: Dict[str, Decimal], timestamp: datetime, provider: str):
+        """Replace the vector with a fresh quote of base -> currency rates"""
+        codes = [self.base_currency] + sorted(code for code, rate in rates.items()
+                                              if code != self.base_currency and rate > 0)
+        self.rates = [Decimal(1)] + [rates[code] for code in codes[1:]]
+        self.codes = codes
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.timestamp = timestamp
+        self.provider = provider
+    
+    def is_fresh(self, max_age: timedelta) -> bool:
+        return self.timestamp is not None and datetime.utcnow() - self.timestamp < max_age
+    
+    def covers(self, *codes: str) -> bool:
+        return self.timestamp is not None and all(code in self.index for code in codes)
+    
+    def cross_rate(self, from_currency: str, to_currency: str) -> Optional[Decimal]:
+        if not self.covers(from_currency, to_currency):
+            return None
+        return self.rates[self.index[to_currency]] / self.rates[self.index[from_currency]]
+    
+    def exchange_rate(self, from_currency: str, to_currency: str) -> Optional[ExchangeRate]:
+        rate = self.cross_rate(from_currency, to_currency)
+        if rate is None:
+            return None
+        return ExchangeRate(
+            base_currency=from_currency,
+            target_currency=to_currency,
+            rate=rate,
+            timestamp=self.timestamp,
+            provider=self.provider
+        )
+
+class StubRateProvider:
+    """
+    Deterministic in-process rate source for tests and offline development
+    
+    Quotes every currency against USD from a seeded random walk that advances
+    one step per fetch, so refreshes produce moving but reproducible rates.
+    """
+    
+    name = "local-stub"
+    
+    def __init__(self, currencies: List[str], base_rates: Optional[Dict[str, Decimal]] = None,
+                 volatility: float = 0.002, latency: float = 0.0, seed: int = 0):
+        self.random = random.Random(seed)
+        self.volatility = volatility
+        self.latency = latency
+        self.usd_rates = {code: float(rate) for code, rate in (base_rates or {}).items()}
+        for code in currencies:
+            self.usd_rates.setdefault(code, 1.0 if code == "USD" else self.random.lognormvariate(0, 1.5))
+        self.calls = 0
+    
+    async def fetch_rates(self, base_currency: str) -> Optional[Dict[str, Decimal]]:
+        """All rates quoted against base_currency"""
+        await self._advance()
+        if base_currency not in self.usd_rates:
+            return None
+        base = self.usd_rates[base_currency]
+        return {code: Decimal(f"{rate / base:.10g}") for code, rate in self.usd_rates.items()}
+    
+    async def fetch_rate(self, from_currency: str, to_currency: str) -> Optional[Decimal]:
+        await self._advance()
+        if from_currency not in self.usd_rates or to_currency not in self.usd_rates:
+            return None
+        return Decimal(f"{self.usd_rates[to_currency] / self.usd_rates[from_currency]:.10g}")
+    
+    async def _advance(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for code in self.usd_rates:
+            if code != "USD":
+                self.usd_rates[code] *= 1 + self.random.gauss(0, self.volatility)
+
 class CurrencyService:
     """
     Comprehensive currency conversion service with multiple providers and caching
     """
     
-    def __init__(self, data_dir: str = "./currency_data"):
+    def __init__(self, data_dir: str = "./currency_data", rate_source: Optional[StubRateProvider] = None,
+                 auto_refresh: bool = True):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "currency.db")
         self.cache_duration = timedelta(minutes=5)  # Cache rates for 5 minutes
+        self.stale_duration = timedelta(hours=1)  # Serve stale rates while revalidating for 1 hour
         self.fallback_duration = timedelta(hours=24)  # Use fallback rates for 24 hours
         
+        # Background refresh of pairs requested recently, ahead of expiry
+        self.auto_refresh = auto_refresh
+        self.refresh_interval = 30.0  # seconds between refresher passes
+        self.refresh_ahead = 0.8  # refresh once a rate is this fraction of cache_duration old
+        self.hot_pair_window = timedelta(minutes=30)
+        self.max_hot_pairs = 256
+        self.pair_access: Dict[str, datetime] = {}
+        self.refresher_task: Optional[asyncio.Task] = None
+        
+        # Providers are bypassed entirely when a local rate source is given
+        self.rate_source = rate_source
+        
         # API configurations
         self.providers = {
             CurrencyProvider.EXCHANGERATE_API: {
@@ -102,6 +213,7 @@ class CurrencyService:
         
         # Initialize database
         os.makedirs(data_dir, exist_ok=True)
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # Rate cache
@@ -112,6 +224,23 @@ class CurrencyService:
         self.current_provider = CurrencyProvider.FRANKFURTER
         self.provider_failures = {}
         
+        # Every pair between currencies the providers quote against USD
+        self.rate_matrix = CrossRateMatrix(base_currency="USD")
+        
+        # Long-lived event loop and HTTP session shared by all requests; fetches
+        # in flight are keyed so concurrent misses for the same rates share one
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[threading.Thread] = None
+        self.loop_lock = threading.Lock()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.http_timeout = aiohttp.ClientTimeout(total=10)
+        self.inflight_fetches: Dict[str, asyncio.Task] = {}
+        self.fetch_stats = {'provider_requests': 0, 'coalesced': 0, 'cross_rates': 0,
+                            'stale_served': 0, 'background_refreshes': 0}
+        
+        # Columnar rate history behind the history and trend endpoints
+        self.history = RateHistoryStore(os.path.join(data_dir, "history"))
+        
     def _initialize_currencies(self) -> Dict[str, CurrencyInfo]:
         """Initialize supported currencies with detailed information"""
         return {
@@ -171,63 +300,58 @@ class CurrencyService:
     
     def _init_database(self):
         """Initialize SQLite database for caching rates and historical data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Exchange rates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exchange_rates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                base_currency TEXT NOT NULL,
-                target_currency TEXT NOT NULL,
-                rate DECIMAL(20, 10) NOT NULL,
-                timestamp DATETIME NOT NULL,
-                provider TEXT NOT NULL,
-                bid DECIMAL(20, 10),
-                ask DECIMAL(20, 10),
-                spread DECIMAL(20, 10),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(base_currency, target_currency, provider, timestamp)
-            )
-        ''')
-        
-        # Currency preferences table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_currency_preferences (
-                user_id TEXT PRIMARY KEY,
-                preferred_currency TEXT NOT NULL,
-                display_format TEXT DEFAULT 'symbol',
-                auto_detect_location BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Conversion history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversion_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                amount DECIMAL(20, 10) NOT NULL,
-                from_currency TEXT NOT NULL,
-                to_currency TEXT NOT NULL,
-                converted_amount DECIMAL(20, 10) NOT NULL,
-                exchange_rate DECIMAL(20, 10) NOT NULL,
-                provider TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                ip_address TEXT,
-                user_agent TEXT
-            )
-        ''')
+        with self.db.transaction() as cursor:
+            # Exchange rates table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS exchange_rates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    base_currency TEXT NOT NULL,
+                    target_currency TEXT NOT NULL,
+                    rate DECIMAL(20, 10) NOT NULL,
+                    timestamp DATETIME NOT NULL,
+                    provider TEXT NOT NULL,
+                    bid DECIMAL(20, 10),
+                    ask DECIMAL(20, 10),
+                    spread DECIMAL(20, 10),
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(base_currency, target_currency, provider, timestamp)
+                )
+            ''')
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rates_currencies ON exchange_rates(base_currency, target_currency)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rates_timestamp ON exchange_rates(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversion_user ON conversion_history(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversion_timestamp ON conversion_history(timestamp)')
+            # Currency preferences table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_currency_preferences (
+                    user_id TEXT PRIMARY KEY,
+                    preferred_currency TEXT NOT NULL,
+                    display_format TEXT DEFAULT 'symbol',
+                    auto_detect_location BOOLEAN DEFAULT TRUE,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # Conversion history table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conversion_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    amount DECIMAL(20, 10) NOT NULL,
+                    from_currency TEXT NOT NULL,
+                    to_currency TEXT NOT NULL,
+                    converted_amount DECIMAL(20, 10) NOT NULL,
+                    exchange_rate DECIMAL(20, 10) NOT NULL,
+                    provider TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    ip_address TEXT,
+                    user_agent TEXT
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
+            # Create indexes
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_rates_currencies ON exchange_rates(base_currency, target_currency)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_rates_timestamp ON exchange_rates(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversion_user ON conversion_history(user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversion_timestamp ON conversion_history(timestamp)')
     
     async def get_exchange_rate(self, from_currency: str, to_currency: str, 
                               force_refresh: bool = False) -> Optional[ExchangeRate]:
@@ -249,21 +373,22 @@ class CurrencyService:
             
             # Check cache first
             cache_key = f"{from_currency}_{to_currency}"
+            self.pair_access[cache_key] = datetime.utcnow()
             if not force_refresh and cache_key in self.rate_cache:
                 cached_rate = self.rate_cache[cache_key]
-                if datetime.utcnow() - cached_rate.timestamp < self.cache_duration:
+                age = datetime.utcnow() - cached_rate.timestamp
+                if age < self.cache_duration:
+                    return cached_rate
+                if age < self.stale_duration:
+                    # Serve the stale rate while a background fetch revalidates it
+                    self.fetch_stats['stale_served'] += 1
+                    self._start_fetch(f"refresh:{cache_key}",
+                                      lambda: self._refresh_pair(from_currency, to_currency))
                     return cached_rate
             
-            # Try to get fresh rate from API
-            rate = await self._fetch_rate_from_api(from_currency, to_currency)
-            
+            rate = await self._coalesce(f"refresh:{cache_key}",
+                                        lambda: self._refresh_pair(from_currency, to_currency, force_refresh))
             if rate:
-                # Cache the rate
-                self.rate_cache[cache_key] = rate
-                
-                # Store in database
-                await self._store_rate_in_db(rate)
-                
                 return rate
             
             # Fallback to database
@@ -273,8 +398,149 @@ class CurrencyService:
             logging.error(f"Error getting exchange rate {from_currency} to {to_currency}: {e}")
             return await self._get_rate_from_db(from_currency, to_currency)
     
+    async def _refresh_pair(self, from_currency: str, to_currency: str,
+                            force_refresh: bool = False) -> Optional[ExchangeRate]:
+        """Fresh rate for a pair, cached and stored; None if no source has it"""
+        # Derive the pair from the base-currency vector when it quotes both; the
+        # vector itself is already stored, so derived rates are only cached
+        rate = None
+        if await self._ensure_rate_matrix(force_refresh):
+            rate = self.rate_matrix.exchange_rate(from_currency, to_currency)
+            if rate:
+                self.fetch_stats['cross_rates'] += 1
+        
+        # Otherwise fetch the pair itself, sharing any fetch already in flight
+        if not rate:
+            rate = await self._coalesce(f"pair:{from_currency}_{to_currency}",
+                                        lambda: self._fetch_rate_from_api(from_currency, to_currency))
+            if rate:
+                # Store in database
+                await self._store_rate_in_db(rate)
+        
+        if rate:
+            # Cache the rate
+            self.rate_cache[f"{from_currency}_{to_currency}"] = rate
+        
+        return rate
+    
+    async def _ensure_rate_matrix(self, force_refresh: bool = False) -> bool:
+        """Refresh the cross-rate matrix when stale; True if it is usable
+        
+        A matrix past cache_duration but within stale_duration is still used
+        while a background refresh runs.
+        """
+        if force_refresh:
+            await self._coalesce("matrix", self._refresh_rate_matrix)
+        elif not self.rate_matrix.is_fresh(self.cache_duration):
+            if self.rate_matrix.is_fresh(self.stale_duration):
+                self._start_fetch("matrix", self._refresh_rate_matrix)
+            else:
+                await self._coalesce("matrix", self._refresh_rate_matrix)
+        return self.rate_matrix.is_fresh(self.stale_duration)
+    
+    async def _refresh_rate_matrix(self) -> bool:
+        """Fetch every rate against the matrix base currency in one provider request"""
+        base_currency = self.rate_matrix.base_currency
+        
+        if self.rate_source is not None:
+            rates = await self.rate_source.fetch_rates(base_currency)
+            if not rates:
+                return False
+            timestamp = datetime.utcnow()
+            self.rate_matrix.update(rates, timestamp, self.rate_source.name)
+            await self._store_rates_in_db([
+                ExchangeRate(base_currency, code, rate, timestamp, self.rate_source.name)
+                for code, rate in rates.items() if code != base_currency
+            ])
+            return True
+        
+        providers_to_try = [self.current_provider] + [p for p in CurrencyProvider if p != self.current_provider]
+        
+        for provider in providers_to_try:
+            try:
+                rates = await self._fetch_rates_from_provider(provider, base_currency)
+                if rates:
+                    timestamp = datetime.utcnow()
+                    self.rate_matrix.update(rates, timestamp, provider.value)
+                    self.current_provider = provider
+                    self.provider_failures.pop(provider, None)
+                    await self._store_rates_in_db([
+                        ExchangeRate(base_currency, code, rate, timestamp, provider.value)
+                        for code, rate in rates.items() if code != base_currency
+                    ])
+                    return True
+            except Exception as e:
+                logging.warning(f"Provider {provider.value} failed: {e}")
+                self.provider_failures[provider] = self.provider_failures.get(provider, 0) + 1
+        
+        return False
+    
+    async def _coalesce(self, key: str, fetch):
+        """Await fetch(), or the identical fetch another caller already started"""
+        # Shielded so one caller timing out doesn't cancel the fetch for the others
+        return await asyncio.shield(self._start_fetch(key, fetch))
+    
+    def _start_fetch(self, key: str, fetch) -> asyncio.Task:
+        """The in-flight task for key on the running loop, started if there is none"""
+        loop = asyncio.get_running_loop()
+        task = self.inflight_fetches.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.fetch_stats['coalesced'] += 1
+            return task
+        
+        task = loop.create_task(fetch())
+        self.inflight_fetches[key] = task
+        
+        def _forget(finished, key=key):
+            if self.inflight_fetches.get(key) is finished:
+                del self.inflight_fetches[key]
+            if not finished.cancelled() and finished.exception():
+                logging.warning(f"Rate fetch {key} failed: {finished.exception()}")
+        task.add_done_callback(_forget)
+        return task
+    
+    async def refresh_hot_rates(self) -> int:
+        """Refresh recently requested pairs nearing expiry; returns pairs refreshed"""
+        now = datetime.utcnow()
+        horizon = self.cache_duration * self.refresh_ahead
+        
+        for key, accessed in list(self.pair_access.items()):
+            if now - accessed > self.hot_pair_window:
+                del self.pair_access[key]
+        hot_pairs = sorted(self.pair_access, key=self.pair_access.get, reverse=True)[:self.max_hot_pairs]
+        
+        due = [key for key in hot_pairs
+               if key not in self.rate_cache or now - self.rate_cache[key].timestamp >= horizon]
+        if not due:
+            return 0
+        
+        # One vector fetch renews every pair the matrix quotes
+        if self.rate_matrix.timestamp is None or now - self.rate_matrix.timestamp >= horizon:
+            await self._coalesce("matrix", self._refresh_rate_matrix)
+        
+        await asyncio.gather(*(
+            self._coalesce(f"refresh:{key}", lambda pair=key.split("_", 1): self._refresh_pair(*pair))
+            for key in due
+        ), return_exceptions=True)
+        self.fetch_stats['background_refreshes'] += len(due)
+        return len(due)
+    
+    async def _run_refresher(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_hot_rates()
+            except Exception as e:
+                logging.error(f"Error refreshing exchange rates: {e}")
+    
     async def _fetch_rate_from_api(self, from_currency: str, to_currency: str) -> Optional[ExchangeRate]:
         """Fetch exchange rate from external API"""
+        if self.rate_source is not None:
+            rate = await self.rate_source.fetch_rate(from_currency, to_currency)
+            if rate is None:
+                return None
+            return ExchangeRate(from_currency, to_currency, rate, datetime.utcnow(), self.rate_source.name)
+        
         providers_to_try = [self.current_provider] + [p for p in CurrencyProvider if p != self.current_provider]
         
         for provider in providers_to_try:
@@ -296,7 +562,8 @@ class CurrencyService:
         """Fetch rate from specific provider"""
         config = self.providers[provider]
         
-        async with aiohttp.ClientSession() as session:
+        async with self._session_scope() as session:
+            self.fetch_stats['provider_requests'] += 1
             if provider == CurrencyProvider.FRANKFURTER:
                 url = f"{config['base_url']}latest?from={from_currency}&to={to_currency}"
                 
@@ -344,12 +611,278 @@ class CurrencyService:
         
         return None
     
+    async def _fetch_rates_from_provider(self, provider: CurrencyProvider,
+                                       base_currency: str) -> Optional[Dict[str, Decimal]]:
+        """Fetch all rates quoted against base_currency from specific provider"""
+        config = self.providers[provider]
+        
+        if provider == CurrencyProvider.FRANKFURTER:
+            url = f"{config['base_url']}latest?from={base_currency}"
+            field_name = 'rates'
+        elif provider == CurrencyProvider.EXCHANGERATE_API:
+            url = f"{config['base_url']}{base_currency}"
+            field_name = 'rates'
+        elif provider == CurrencyProvider.FREE_CURRENCY_API:
+            url = f"{config['base_url']}latest?apikey=fca_live_YOUR_API_KEY&base_currency={base_currency}"
+            field_name = 'data'
+        else:
+            return None
+        
+        async with self._session_scope() as session:
+            self.fetch_stats['provider_requests'] += 1
+            async with session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get(field_name):
+                        return {code: Decimal(str(rate)) for code, rate in data[field_name].items()}
+        
+        return None
+    
+    @contextlib.asynccontextmanager
+    async def _session_scope(self):
+        """The shared session on the service loop; a throwaway one on any other loop"""
+        if asyncio.get_running_loop() is not self.loop:
+            async with aiohttp.ClientSession(timeout=self.http_timeout) as session:
+                yield session
+            return
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=self.http_timeout,
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+            )
+        yield self.session
+    
     async def _store_rate_in_db(self, rate: ExchangeRate):
         """Store exchange rate in database"""
+        await self._store_rates_in_db([rate])
+    
+    async def _store_rates_in_db(self, rates: List[ExchangeRate]):
+        """Store exchange rates in database in one transaction"""
+        await asyncio.get_running_loop().run_in_executor(None, self._write_rates, rates)
+    
+    def _write_rates(self, rates: List[ExchangeRate]):
+        """Append rates to the history files and queue them for the database; blocks on file I/O"""
+        try:
+            self.history.append_many(
+                (rate.base_currency, rate.target_currency, rate.timestamp, rate.rate) for rate in rates
+            )
+        except Exception as e:
+            logging.error(f"Error appending rate history: {e}")
+        try:
+            self.db.write_many('''
+                INSERT OR IGNORE INTO exchange_rates
+                (base_currency, target_currency, rate, timestamp, provider, bid, ask, spread)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (rate.base_currency, rate.target_currency, str(rate.rate), rate.timestamp.isoformat(),
+                 rate.provider,
+                 str(rate.bid) if rate.bid is not None else None,
+                 str(rate.ask) if rate.ask is not None else None,
+                 str(rate.spread) if rate.spread is not None else None)
+                for rate in rates
+            ])
+        except Exception as e:
+            logging.error(f"Error storing exchange rates: {e}")
+    
+    async def _get_rate_from_db(self, from_currency: str, to_currency: str) -> Optional[ExchangeRate]:
+        """Most recent stored rate within the fallback window"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._read_rate, from_currency, to_currency)
+    
+    def _read_rate(self, from_currency: str, to_currency: str) -> Optional[ExchangeRate]:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cutoff = (datetime.utcnow() - self.fallback_duration).isoformat()
+            row = self.db.query_one('''
+                SELECT rate, timestamp, provider, bid, ask, spread FROM exchange_rates
+                WHERE base_currency = ? AND target_currency = ? AND timestamp >= ?
+                ORDER BY timestamp DESC LIMIT 1
+            ''', (from_currency.upper(), to_currency.upper(), cutoff))
             
-            cursor.execute('''
+            if not row:
+                # Cross pairs are only stored as their base-currency legs
+                timestamps, rates = self.history.series(from_currency.upper(), to_currency.upper(),
+                                                        datetime.utcnow() - self.fallback_duration)
+                if not len(rates):
+                    return None
+                return ExchangeRate(from_currency.upper(), to_currency.upper(), Decimal(f"{rates[-1]:.10g}"),
+                                    from_epoch(timestamps[-1]), "history")
             
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+            return ExchangeRate(
+                base_currency=from_currency.upper(),
+                target_currency=to_currency.upper(),
+                rate=Decimal(str(row[0])),
+                timestamp=datetime.fromisoformat(row[1]),
+                provider=row[2],
+                bid=Decimal(str(row[3])) if row[3] is not None else None,
+                ask=Decimal(str(row[4])) if row[4] is not None else None,
+                spread=Decimal(str(row[5])) if row[5] is not None else None
+            )
+        except Exception as e:
+            logging.error(f"Error reading exchange rate from database: {e}")
+            return None
+    
+    async def get_historical_rates(self, from_currency: str, to_currency: str, start_date: datetime,
+                                   end_date: datetime, max_points: Optional[int] = None) -> List[ExchangeRate]:
+        """Stored rates for a pair between two dates, oldest first
+        
+        With max_points the range is split into that many equal buckets and
+        each non-empty bucket is reported by its mean rate.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._read_historical_rates, from_currency, to_currency, start_date, end_date, max_points
+        )
+    
+    def _read_historical_rates(self, from_currency: str, to_currency: str, start_date: datetime,
+                               end_date: datetime, max_points: Optional[int]) -> List[ExchangeRate]:
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        
+        if max_points:
+            bucket_seconds = max((end_date - start_date).total_seconds() / max_points, 1.0)
+            return [
+                ExchangeRate(from_currency, to_currency, Decimal(f"{bucket['mean']:.10g}"),
+                             from_epoch(bucket['timestamp']), "history")
+                for bucket in self.history.downsample(from_currency, to_currency, start_date, end_date,
+                                                      bucket_seconds)
+            ]
+        
+        timestamps, rates = self.history.series(from_currency, to_currency, start_date, end_date)
+        return [
+            ExchangeRate(from_currency, to_currency, Decimal(f"{rate:.10g}"), from_epoch(timestamp), "history")
+            for timestamp, rate in zip(timestamps.tolist(), rates.tolist())
+        ]
+    
+    async def get_rate_trends(self, from_currency: str, to_currency: str, days: int = 30) -> Optional[Dict[str, Any]]:
+        """Current, min, max and average rate, change and volatility over the last days"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._read_rate_trends,
+                                                                from_currency, to_currency, days)
+    
+    def _read_rate_trends(self, from_currency: str, to_currency: str, days: int) -> Optional[Dict[str, Any]]:
+        end_date = datetime.utcnow()
+        summary = self.history.summary(from_currency.upper(), to_currency.upper(),
+                                       end_date - timedelta(days=days), end_date)
+        if not summary:
+            return None
+        
+        for key in ('current_rate', 'min_rate', 'max_rate', 'avg_rate'):
+            summary[key] = f"{summary[key]:.10g}"
+        summary['change_percent'] = round(summary['change_percent'], 4)
+        summary['volatility'] = round(summary['volatility'], 4)
+        return summary
+    
+    async def convert_amount(self, amount: Decimal, from_currency: str, to_currency: str,
+                             user_id: Optional[str] = None) -> Optional[ConversionResult]:
+        """Convert amount from one currency to another"""
+        results = await self.bulk_convert([(amount, from_currency, to_currency)], user_id)
+        return results[0]
+    
+    async def bulk_convert(self, conversions: List[Tuple[Decimal, str, str]],
+                           user_id: Optional[str] = None) -> List[Optional[ConversionResult]]:
+        """Convert many (amount, from_currency, to_currency) requests at once
+        
+        Each distinct pair is priced once, from the cross-rate matrix where it
+        quotes both currencies and otherwise by one coalesced fetch; the
+        amounts are then converted and rounded in a single pass. Results are
+        in request order, None where no rate is available.
+        """
+        normalized = [(amount, from_currency.upper(), to_currency.upper())
+                      for amount, from_currency, to_currency in conversions]
+        pairs = {(from_currency, to_currency) for _, from_currency, to_currency in normalized}
+        
+        rate_list = await asyncio.gather(*(self.get_exchange_rate(from_currency, to_currency)
+                                           for from_currency, to_currency in pairs))
+        rates = dict(zip(pairs, rate_list))
+        
+        # Rounding quantum per target currency, e.g. 0.01 for USD and 1 for JPY
+        quanta = {
+            to_currency: Decimal(1).scaleb(-self.currencies[to_currency].decimal_places
+                                           if to_currency in self.currencies else -2)
+            for _, to_currency in pairs
+        }
+        
+        results: List[Optional[ConversionResult]] = []
+        for amount, from_currency, to_currency in normalized:
+            rate = rates[(from_currency, to_currency)]
+            if rate is None:
+                results.append(None)
+                continue
+            results.append(ConversionResult(
+                amount=amount,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                converted_amount=(amount * rate.rate).quantize(quanta[to_currency], rounding=ROUND_HALF_UP),
+                exchange_rate=rate.rate,
+                timestamp=rate.timestamp,
+                provider=rate.provider
+            ))
+        
+        if user_id:
+            await self._record_conversions(user_id, [result for result in results if result])
+        return results
+    
+    async def _record_conversions(self, user_id: str, results: List[ConversionResult]):
+        """Append conversions to the user's history in one transaction"""
+        if not results:
+            return
+        try:
+            self.db.write_many('''
+                INSERT INTO conversion_history
+                (user_id, amount, from_currency, to_currency, converted_amount, exchange_rate, provider)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (user_id, str(result.amount), result.from_currency, result.to_currency,
+                 str(result.converted_amount), str(result.exchange_rate), result.provider)
+                for result in results
+            ])
+        except Exception as e:
+            logging.error(f"Error recording conversion history: {e}")
+    
+    def run(self, coro, timeout: Optional[float] = 30):
+        """Run a coroutine on the service's event loop from synchronous code"""
+        loop = self._get_loop()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            raise RuntimeError("CurrencyService.run() called from its own event loop; await instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use"""
+        with self.loop_lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever,
+                                                    name="currency-service-loop", daemon=True)
+                self.loop_thread.start()
+                if self.auto_refresh:
+                    self.loop.call_soon_threadsafe(self._start_refresher)
+            return self.loop
+    
+    def _start_refresher(self):
+        self.refresher_task = self.loop.create_task(self._run_refresher())
+    
+    async def _shutdown(self):
+        """Cancel the refresher and in-flight fetches, then close the HTTP session"""
+        tasks = list(self.inflight_fetches.values())
+        if self.refresher_task is not None:
+            tasks.append(self.refresher_task)
+            self.refresher_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    def close(self):
+        """Close the shared HTTP session, stop the event loop and flush queued database writes"""
+        with self.loop_lock:
+            loop, self.loop = self.loop, None
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(10)
+            loop.call_soon_threadsafe(loop.stop)
+            if self.loop_thread is not None:
+                self.loop_thread.join(timeout=10)
+            loop.close()
+        self.db.flush(timeout=10)
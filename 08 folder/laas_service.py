@@ -11,13 +11,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
-import sqlite3
 import os
 from decimal import Decimal
 import hashlib
 import aiohttp
 from pathlib import Path
 
+from sqlite_store import get_database
+
 class LearningType(Enum):
     COURSE = "course"
     WORKSHOP = "workshop"
@@ -152,6 +153,7 @@ class LaaS:
         
         # Initialize database
         os.makedirs(data_dir, exist_ok=True)
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # AI-powered features
@@ -174,221 +176,211 @@ class LaaS:
     
     def _init_database(self):
         """Initialize SQLite database for LaaS"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Learning paths table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_paths (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                description TEXT,
-                learning_type TEXT NOT NULL,
-                difficulty_level TEXT NOT NULL,
-                instructor_id TEXT NOT NULL,
-                category TEXT NOT NULL,
-                tags TEXT,
-                price DECIMAL(10, 2) DEFAULT 0,
-                currency TEXT DEFAULT 'USD',
-                duration_hours INTEGER DEFAULT 0,
-                max_participants INTEGER,
-                certification_available BOOLEAN DEFAULT FALSE,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Learning modules table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_modules (
-                id TEXT PRIMARY KEY,
-                learning_path_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                order_index INTEGER NOT NULL,
-                estimated_duration INTEGER DEFAULT 0,
-                learning_objectives TEXT,
-                prerequisites TEXT,
-                assessment_id TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
-            )
-        ''')
+        with self.db.transaction() as cursor:
+            # Learning paths table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_paths (
+                    id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    learning_type TEXT NOT NULL,
+                    difficulty_level TEXT NOT NULL,
+                    instructor_id TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    tags TEXT,
+                    price DECIMAL(10, 2) DEFAULT 0,
+                    currency TEXT DEFAULT 'USD',
+                    duration_hours INTEGER DEFAULT 0,
+                    max_participants INTEGER,
+                    certification_available BOOLEAN DEFAULT FALSE,
+                    is_active BOOLEAN DEFAULT TRUE,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # Learning content table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_content (
-                id TEXT PRIMARY KEY,
-                module_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                content_type TEXT NOT NULL,
-                content_url TEXT NOT NULL,
-                description TEXT,
-                duration_minutes INTEGER DEFAULT 0,
-                order_index INTEGER NOT NULL,
-                is_mandatory BOOLEAN DEFAULT TRUE,
-                prerequisites TEXT,
-                metadata TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (module_id) REFERENCES learning_modules (id)
-            )
-        ''')
+            # Learning modules table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_modules (
+                    id TEXT PRIMARY KEY,
+                    learning_path_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    order_index INTEGER NOT NULL,
+                    estimated_duration INTEGER DEFAULT 0,
+                    learning_objectives TEXT,
+                    prerequisites TEXT,
+                    assessment_id TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
+                )
+            ''')
         
-        # User progress table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_progress (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                learning_path_id TEXT NOT NULL,
-                status TEXT NOT NULL,
-                current_module_id TEXT,
-                current_content_id TEXT,
-                completion_percentage REAL DEFAULT 0,
-                time_spent_minutes INTEGER DEFAULT 0,
-                last_accessed DATETIME DEFAULT CURRENT_TIMESTAMP,
-                started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                completed_at DATETIME,
-                score REAL,
-                certificate_id TEXT,
-                UNIQUE(user_id, learning_path_id),
-                FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
-            )
-        ''')
+            # Learning content table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_content (
+                    id TEXT PRIMARY KEY,
+                    module_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    content_url TEXT NOT NULL,
+                    description TEXT,
+                    duration_minutes INTEGER DEFAULT 0,
+                    order_index INTEGER NOT NULL,
+                    is_mandatory BOOLEAN DEFAULT TRUE,
+                    prerequisites TEXT,
+                    metadata TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (module_id) REFERENCES learning_modules (id)
+                )
+            ''')
         
-        # Assessments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessments (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                description TEXT,
-                questions TEXT NOT NULL,
-                passing_score REAL NOT NULL,
-                time_limit_minutes INTEGER,
-                max_attempts INTEGER DEFAULT 3,
-                is_proctored BOOLEAN DEFAULT FALSE,
-                randomize_questions BOOLEAN DEFAULT TRUE,
-                show_results_immediately BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # User progress table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_progress (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    learning_path_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    current_module_id TEXT,
+                    current_content_id TEXT,
+                    completion_percentage REAL DEFAULT 0,
+                    time_spent_minutes INTEGER DEFAULT 0,
+                    last_accessed DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    completed_at DATETIME,
+                    score REAL,
+                    certificate_id TEXT,
+                    UNIQUE(user_id, learning_path_id),
+                    FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
+                )
+            ''')
         
-        # Assessment attempts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessment_attempts (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                assessment_id TEXT NOT NULL,
-                attempt_number INTEGER NOT NULL,
-                answers TEXT NOT NULL,
-                score REAL NOT NULL,
-                passed BOOLEAN NOT NULL,
-                started_at DATETIME NOT NULL,
-                completed_at DATETIME NOT NULL,
-                time_taken_minutes INTEGER NOT NULL,
-                FOREIGN KEY (assessment_id) REFERENCES assessments (id)
-            )
-        ''')
+            # Assessments table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS assessments (
+                    id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    questions TEXT NOT NULL,
+                    passing_score REAL NOT NULL,
+                    time_limit_minutes INTEGER,
+                    max_attempts INTEGER DEFAULT 3,
+                    is_proctored BOOLEAN DEFAULT FALSE,
+                    randomize_questions BOOLEAN DEFAULT TRUE,
+                    show_results_immediately BOOLEAN DEFAULT TRUE,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # Learning analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_analytics (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                learning_path_id TEXT NOT NULL,
-                engagement_score REAL DEFAULT 0,
-                completion_rate REAL DEFAULT 0,
-                average_session_duration INTEGER DEFAULT 0,
-                total_time_spent INTEGER DEFAULT 0,
-                quiz_scores TEXT,
-                last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
-                learning_velocity REAL DEFAULT 0,
-                retention_score REAL DEFAULT 0,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, learning_path_id),
-                FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
-            )
-        ''')
+            # Assessment attempts table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS assessment_attempts (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    assessment_id TEXT NOT NULL,
+                    attempt_number INTEGER NOT NULL,
+                    answers TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    passed BOOLEAN NOT NULL,
+                    started_at DATETIME NOT NULL,
+                    completed_at DATETIME NOT NULL,
+                    time_taken_minutes INTEGER NOT NULL,
+                    FOREIGN KEY (assessment_id) REFERENCES assessments (id)
+                )
+            ''')
         
-        # Certificates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS certificates (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                learning_path_id TEXT NOT NULL,
-                certificate_url TEXT NOT NULL,
-                issued_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                expires_at DATETIME,
-                verification_code TEXT UNIQUE,
-                is_valid BOOLEAN DEFAULT TRUE,
-                FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
-            )
-        ''')
+            # Learning analytics table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_analytics (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    learning_path_id TEXT NOT NULL,
+                    engagement_score REAL DEFAULT 0,
+                    completion_rate REAL DEFAULT 0,
+                    average_session_duration INTEGER DEFAULT 0,
+                    total_time_spent INTEGER DEFAULT 0,
+                    quiz_scores TEXT,
+                    last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    learning_velocity REAL DEFAULT 0,
+                    retention_score REAL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, learning_path_id),
+                    FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
+                )
+            ''')
         
-        # Learning sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_sessions (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                learning_path_id TEXT NOT NULL,
-                content_id TEXT,
-                session_start DATETIME NOT NULL,
-                session_end DATETIME,
-                duration_minutes INTEGER DEFAULT 0,
-                interactions INTEGER DEFAULT 0,
-                completion_status TEXT DEFAULT 'in_progress',
-                device_type TEXT,
-                ip_address TEXT,
-                user_agent TEXT,
-                FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
-            )
-        ''')
+            # Certificates table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS certificates (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    learning_path_id TEXT NOT NULL,
+                    certificate_url TEXT NOT NULL,
+                    issued_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    expires_at DATETIME,
+                    verification_code TEXT UNIQUE,
+                    is_valid BOOLEAN DEFAULT TRUE,
+                    FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
+                )
+            ''')
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_progress_user ON learning_progress(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_progress_path ON learning_progress(learning_path_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analytics_user ON learning_analytics(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON learning_sessions(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_certificates_user ON certificates(user_id)')
+            # Learning sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_sessions (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    learning_path_id TEXT NOT NULL,
+                    content_id TEXT,
+                    session_start DATETIME NOT NULL,
+                    session_end DATETIME,
+                    duration_minutes INTEGER DEFAULT 0,
+                    interactions INTEGER DEFAULT 0,
+                    completion_status TEXT DEFAULT 'in_progress',
+                    device_type TEXT,
+                    ip_address TEXT,
+                    user_agent TEXT,
+                    FOREIGN KEY (learning_path_id) REFERENCES learning_paths (id)
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
+            # Create indexes
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_progress_user ON learning_progress(user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_progress_path ON learning_progress(learning_path_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analytics_user ON learning_analytics(user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON learning_sessions(user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_certificates_user ON certificates(user_id)')
     
     async def create_learning_path(self, learning_path: LearningPath) -> str:
         """Create a new learning path"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO learning_paths 
-                (id, title, description, learning_type, difficulty_level, instructor_id, 
-                 category, tags, price, currency, duration_hours, max_participants, 
-                 certification_available, is_active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                learning_path.id,
-                learning_path.title,
-                learning_path.description,
-                learning_path.learning_type.value,
-                learning_path.difficulty_level.value,
-                learning_path.instructor_id,
-                learning_path.category,
-                json.dumps(learning_path.tags),
-                float(learning_path.price),
-                learning_path.currency,
-                learning_path.duration_hours,
-                learning_path.max_participants,
-                learning_path.certification_available,
-                learning_path.is_active
-            ))
-            
-            # Create modules
-            for module in learning_path.modules:
-                await self._create_module(cursor, learning_path.id, module)
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO learning_paths 
+                    (id, title, description, learning_type, difficulty_level, instructor_id, 
+                     category, tags, price, currency, duration_hours, max_participants, 
+                     certification_available, is_active)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    learning_path.id,
+                    learning_path.title,
+                    learning_path.description,
+                    learning_path.learning_type.value,
+                    learning_path.difficulty_level.value,
+                    learning_path.instructor_id,
+                    learning_path.category,
+                    json.dumps(learning_path.tags),
+                    float(learning_path.price),
+                    learning_path.currency,
+                    learning_path.duration_hours,
+                    learning_path.max_participants,
+                    learning_path.certification_available,
+                    learning_path.is_active
+                ))
             
-            conn.commit()
-            conn.close()
+                # Create modules
+                for module in learning_path.modules:
+                    await self._create_module(cursor, learning_path.id, module)
             
             logging.info(f"Created learning path: {learning_path.id}")
             return learning_path.id
@@ -440,16 +432,10 @@ class LaaS:
     async def enroll_user(self, user_id: str, learning_path_id: str) -> bool:
         """Enroll user in a learning path"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Check if already enrolled
-            cursor.execute('''
+            if self.db.query_one('''
                 SELECT id FROM learning_progress 
                 WHERE user_id = ? AND learning_path_id = ?
-            ''', (user_id, learning_path_id))
-            
-            if cursor.fetchone():
-                conn.close()
+            ''', (user_id, learning_path_id)):
                 return False  # Already e
 (Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
@@ -0,0 +1,379 @@
+"""
+Incremental Lexical Index
+BM25 inverted index with compressed posting lists and rank fusion for hybrid retrieval
+"""
+
+import math
+import re
+import threading
+import numpy as np
+from collections import Counter, defaultdict
+from operator import attrgetter
+from typing import Dict, List, Any, Optional, Iterable, Tuple, Sequence
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Tuple[str, float]]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None,
+                           limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Fuse ranked (id, score) lists by summing weight / (k + rank)
+
+    Only ranks are used, so lexical and dense scores on different scales can
+    be combined without normalisation.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] += weight / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ordered[:limit] if limit is not None else ordered
+
+def order_by_fused_score(results: Sequence[Any], limit: Optional[int] = None) -> List[Any]:
+    """Order retrieval results by their fused ``relevance_score``
+
+    Fused scores are rank based, so they are neither comparable to a
+    similarity threshold nor to the dense score of a hit, which is 0.0 for
+    documents only the lexical ranker found.
+    """
+    ordered = sorted(results, key=attrgetter('relevance_score'), reverse=True)
+    return ordered[:limit] if limit is not None else ordered
+
+def _narrowest_dtype(max_value: int) -> np.dtype:
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+class PostingList:
+    """
+    Document-ordered postings for one term
+
+    Postings are appended in increasing document number. Full blocks are
+    sealed as delta-encoded document gaps and term frequencies, each stored
+    at the narrowest unsigned width that fits the block, so a block of
+    128 postings typically takes 256 bytes. The last document of every
+    block is kept uncompressed as a skip pointer, and new postings collect
+    in an uncompressed tail until it fills a block.
+    """
+
+    def __init__(self, block_size: int = 128):
+        self.block_size = block_size
+        self.blocks: List[Tuple[int, bytes, np.dtype, bytes, np.dtype]] = []
+        self.block_last: List[int] = []
+        self.tail_docs: List[int] = []
+        self.tail_tfs: List[int] = []
+        self.max_tf = 0
+
+    def __len__(self) -> int:
+        return len(self.blocks) * self.block_size + len(self.tail_docs)
+
+    def append(self, doc: int, tf: int):
+        self.tail_docs.append(doc)
+        self.tail_tfs.append(tf)
+        self.max_tf = max(self.max_tf, tf)
+        if len(self.tail_docs) == self.block_size:
+            self._seal(np.array(self.tail_docs, dtype=np.int64), np.array(self.tail_tfs, dtype=np.int64))
+            self.tail_docs, self.tail_tfs = [], []
+
+    def decode(self) -> Tuple[np.ndarray, np.ndarray]:
+        """All postings as (doc numbers, term frequencies)"""
+        return self._decode_blocks(range(len(self.blocks)))
+
+    def lookup(self, docs: np.ndarray) -> np.ndarray:
+        """Term frequencies for sorted document numbers (0 where absent)
+
+        Only blocks whose document range can contain one of ``docs`` are
+        decompressed.
+        """
+        if not len(docs) or not len(self):
+            return np.zeros(len(docs), dtype=np.int64)
+        block_ids = np.unique(np.searchsorted(np.asarray(self.block_last), docs))
+        posting_docs, posting_tfs = self._decode_blocks(block_ids[block_ids < len(self.blocks)].tolist(),
+                                                        include_tail=bool(block_ids[-1] >= len(self.blocks)))
+        positions = np.searchsorted(posting_docs, docs)
+        positions = np.minimum(positions, max(len(posting_docs) - 1, 0))
+        found = (posting_docs[positions] == docs) if len(posting_docs) else np.zeros(len(docs), dtype=bool)
+        return np.where(found, posting_tfs[positions] if len(posting_tfs) else 0, 0)
+
+    def nbytes(self) -> int:
+        sealed = sum(len(gaps) + len(tfs) + 8 for _, gaps, _, tfs, _ in self.blocks)
+        return sealed + 16 * len(self.tail_docs)
+
+    @classmethod
+    def from_arrays(cls, docs: np.ndarray, tfs: np.ndarray, block_size: int = 128) -> "PostingList":
+        postings = cls(block_size)
+        full = len(docs) - len(docs) % block_size
+        for start in range(0, full, block_size):
+            postings._seal(docs[start:start + block_size], tfs[start:start + block_size])
+        postings.tail_docs = docs[full:].tolist()
+        postings.tail_tfs = tfs[full:].tolist()
+        postings.max_tf = int(tfs.max()) if len(tfs) else 0
+        return postings
+
+    def _seal(self, docs: np.ndarray, tfs: np.ndarray):
+        first = int(docs[0])
+        gaps = np.diff(docs)
+        gap_dtype = _narrowest_dtype(int(gaps.max()) if len(gaps) else 0)
+        tf_dtype = _narrowest_dtype(int(tfs.max()))
+        self.blocks.append((first, gaps.astype(gap_dtype).tobytes(), gap_dtype,
+                            tfs.astype(tf_dtype).tobytes(), tf_dtype))
+        self.block_last.append(int(docs[-1]))
+        self.max_tf = max(self.max_tf, int(tfs.max()))
+
+    def _decode_blocks(self, block_ids: Iterable[int], include_tail: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        block_ids = list(block_ids)
+        docs = np.empty((len(block_ids), self.block_size), dtype=np.int64)
+        tfs = np.empty((len(block_ids), self.block_size), dtype=np.int64)
+
+        # Blocks sharing a width are decoded together: one frombuffer and one cumsum per width
+        firsts = []
+        gap_groups: Dict[np.dtype, Tuple[List[int], List[bytes]]] = defaultdict(lambda: ([], []))
+        tf_groups: Dict[np.dtype, Tuple[List[int], List[bytes]]] = defaultdict(lambda: ([], []))
+        for row, block_id in enumerate(block_ids):
+            first, gaps, gap_dtype, block_tfs, tf_dtype = self.blocks[block_id]
+            firsts.append(first)
+            gap_rows, gap_bytes = gap_groups[gap_dtype]
+            gap_rows.append(row)
+            gap_bytes.append(gaps)
+            tf_rows, tf_bytes = tf_groups[tf_dtype]
+            tf_rows.append(row)
+            tf_bytes.append(block_tfs)
+
+        for dtype, (rows, chunks) in gap_groups.items():
+            docs[rows, 1:] = np.frombuffer(b"".join(chunks), dtype=dtype).reshape(len(rows), -1)
+        for dtype, (rows, chunks) in tf_groups.items():
+            tfs[rows] = np.frombuffer(b"".join(chunks), dtype=dtype).reshape(len(rows), -1)
+        docs[:, 0] = firsts
+        np.cumsum(docs, axis=1, out=docs)
+
+        docs, tfs = docs.ravel(), tfs.ravel()
+        if include_tail and self.tail_docs:
+            docs = np.concatenate([docs, np.asarray(self.tail_docs, dtype=np.int64)])
+            tfs = np.concatenate([tfs, np.asarray(self.tail_tfs, dtype=np.int64)])
+        return docs, tfs
+
+class BM25Index:
+    """
+    Incrementally updatable BM25 index
+
+    Adding a document appends to the posting lists of its terms and updates
+    the collection statistics (document count, lengths, document
+    frequencies) in place; nothing is refitted. Re-adding an ID replaces the
+    document and removals are tombstones, dropped from the postings by
+    ``compact`` once ``compaction_threshold`` of the postings are dead.
+
+    Queries are scored term-at-a-time in decreasing order of each term's
+    score upper bound (MaxScore). Once the remaining terms cannot lift a new
+    document into the current top k, they are only looked up for existing
+    candidates, decompressing just the blocks that hold them, so frequent
+    terms do not make latency grow with the corpus.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, block_size: int = 128,
+                 compaction_threshold: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.block_size = block_size
+        self.compaction_threshold = compaction_threshold
+
+        self.postings: Dict[str, PostingList] = {}
+        self.doc_freqs: Dict[str, int] = defaultdict(int)
+        self.doc_numbers: Dict[str, int] = {}
+        self.doc_ids: List[Optional[str]] = []
+        self.doc_terms: List[Optional[Tuple[str, ...]]] = []
+        self.doc_lengths = np.zeros(1024, dtype=np.float32)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.total_length = 0
+        self.dead_postings = 0
+        self.total_postings = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_numbers)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_numbers
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.doc_numbers) if self.doc_numbers else 0.0
+
+    def add_document(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version with the same ID"""
+        self.add_documents([(doc_id, text)])
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]]):
+        """Index (doc_id, text) pairs"""
+        prepared = [(doc_id, Counter(tokenize(text))) for doc_id, text in documents]
+        with self.lock:
+            for doc_id, term_counts in prepared:
+                if doc_id in self.doc_numbers:
+                    self._remove(doc_id)
+
+                doc = len(self.doc_ids)
+                self._ensure_capacity(doc + 1)
+                self.doc_numbers[doc_id] = doc
+                self.doc_ids.append(doc_id)
+                self.doc_terms.append(tuple(term_counts))
+                length = sum(term_counts.values())
+                self.doc_lengths[doc] = length
+                self.alive[doc] = True
+                self.total_length += length
+
+                for term, tf in term_counts.items():
+                    postings = self.postings.get(term)
+                    if postings is None:
+                        postings = self.postings[term] = PostingList(self.block_size)
+                    postings.append(doc, tf)
+                    self.doc_freqs[term] += 1
+                self.total_postings += len(term_counts)
+
+    def remove_document(self, doc_id: str) -> bool:
+        with self.lock:
+            if doc_id not in self.doc_numbers:
+                return False
+            self._remove(doc_id)
+            if self.needs_compaction():
+                self.compact()
+            return True
+
+    def needs_compaction(self) -> bool:
+        return (self.total_postings > 0
+                and self.dead_postings / self.total_postings >= self.compaction_threshold)
+
+    def compact(self) -> int:
+        """Rewrite the posting lists without removed documents"""
+        with self.lock:
+            removed = self.dead_postings
+            for term in list(self.postings):
+                if self.doc_freqs.get(term, 0) == 0:
+                    del self.postings[term]
+                    self.doc_freqs.pop(term, None)
+                    continue
+                docs, tfs = self.postings[term].decode()
+                live = self.alive[docs]
+                if not live.all():
+                    self.postings[term] = PostingList.from_arrays(docs[live], tfs[live], self.block_size)
+            self.total_postings -= removed
+            self.dead_postings = 0
+            return removed
+
+    def search(self, query: str, k: int = 10,
+               allowed: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, BM25 score) for a free-text query
+
+        With ``allowed``, only those document IDs are scored, so a filtered
+        query still returns up to k matching documents.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self.lock:
+            terms = [term for term in terms if self.doc_freqs.get(term, 0) > 0]
+            if not terms or k <= 0:
+                return []
+            scorable = self.alive if allowed is None else self._allowed_mask(allowed)
+
+            n_docs = len(self.doc_numbers)
+            average_length = self.average_length or 1.0
+            idfs = {term: self._idf(self.doc_freqs[term], n_docs) for term in terms}
+            bounds = {term: self._upper_bound(idfs[term], self.postings[term].max_tf) for term in terms}
+            terms.sort(key=lambda term: bounds[term], reverse=True)
+            remaining_bound = sum(bounds.values())
+
+            candidates = np.empty(0, dtype=np.int64)
+            scores = np.empty(0, dtype=np.float64)
+
+            for term in terms:
+                threshold = self._kth_score(scores, k)
+                postings = self.postings[term]
+                if threshold is not None and remaining_bound <= threshold:
+                    # Non-essential term: only refine candidates that can still reach the top k
+                    reachable = scores + remaining_bound >= threshold
+                    candidates, scores = candidates[reachable], scores[reachable]
+                    tfs = postings.lookup(candidates)
+                    scores += self._term_scores(idfs[term], tfs, candidates, average_length)
+                else:
+                    docs, tfs = postings.decode()
+                    live = scorable[docs]
+                    docs, tfs = docs[live], tfs[live]
+                    term_scores = self._term_scores(idfs[term], tfs, docs, average_length)
+                    candidates, scores = self._merge(candidates, scores, docs, term_scores)
+                remaining_bound -= bounds[term]
+
+            if not len(candidates):
+                return []
+            top = np.argsort(-scores, kind='stable')[:k]
+            return [(self.doc_ids[candidates[i]], float(scores[i])) for i in top]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'documents': len(self.doc_numbers),
+                'terms': len(self.postings),
+                'postings': self.total_postings,
+                'dead_postings': self.dead_postings,
+                'average_length': self.average_length,
+                'posting_bytes': sum(postings.nbytes() for postings in self.postings.values())
+            }
+
+    def _remove(self, doc_id: str):
+        doc = self.doc_numbers.pop(doc_id)
+        terms = self.doc_terms[doc]
+        for term in terms:
+            self.doc_freqs[term] -= 1
+        self.dead_postings += len(terms)
+        self.total_length -= int(self.doc_lengths[doc])
+        self.alive[doc] = False
+        self.doc_ids[doc] = None
+        self.doc_terms[doc] = None
+
+    def _allowed_mask(self, allowed: Iterable[str]) -> np.ndarray:
+        """Boolean mask over document numbers of the live documents in allowed"""
+        mask = np.zeros(len(self.alive), dtype=bool)
+        docs = [self.doc_numbers[doc_id] for doc_id in allowed if doc_id in self.doc_numbers]
+        mask[np.asarray(docs, dtype=np.int64)] = True
+        return mask
+
+    def _ensure_capacity(self, n_docs: int):
+        if n_docs <= len(self.alive):
+            return
+        capacity = max(n_docs, 2 * len(self.alive))
+        self.doc_lengths = np.resize(self.doc_lengths, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+
+    def _idf(self, doc_freq: int, n_docs: int) -> float:
+        return math.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _upper_bound(self, idf: float, max_tf: int) -> float:
+        # Shortest possible document (length 0) maximises the tf saturation
+        return idf * max_tf * (self.k1 + 1) / (max_tf + self.k1 * (1 - self.b))
+
+    def _term_scores(self, idf: float, tfs: np.ndarray, docs: np.ndarray,
+                     average_length: float) -> np.ndarray:
+        tfs = tfs.astype(np.float64)
+        norms = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / average_length)
+        return idf * tfs * (self.k1 + 1) / (tfs + norms)
+
+    @staticmethod
+    def _kth_score(scores: np.ndarray, k: int) -> Optional[float]:
+        if len(scores) < k:
+            return None
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+    @staticmethod
+    def _merge(candidates: np.ndarray, scores: np.ndarray,
+               docs: np.ndarray, term_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted union of two (doc, score) sets, summing scores of shared docs"""
+        if not len(candidates):
+            return docs, term_scores
+        merged = np.union1d(candidates, docs)
+        merged_scores = np.zeros(len(merged), dtype=np.float64)
+        merged_scores[np.searchsorted(merged, candidates)] += scores
+        merged_scores[np.searchsorted(merged, docs)] += term_scores
+        return merged, merged_scores
@@ -0,0 +1,53 @@
+"""
+Lexical Index Benchmarks
+Incremental indexing throughput and query latency of the BM25 index as the corpus grows
+"""
+
+import time
+import numpy as np
+from typing import Dict, Any, List, Sequence
+
+from lexical_index import BM25Index
+
+def _zipf_documents(n: int, vocabulary: int, length: int, rng: np.random.Generator) -> List[str]:
+    """Documents whose word frequencies follow Zipf's law, like natural text"""
+    probabilities = 1.0 / np.arange(1, vocabulary + 1)
+    probabilities /= probabilities.sum()
+    tokens = rng.choice(vocabulary, size=(n, length), p=probabilities)
+    return [" ".join(f"w{token}" for token in row) for row in tokens]
+
+def benchmark_corpus_growth(sizes: Sequence[int] = (10_000, 50_000, 100_000, 200_000),
+                            vocabulary: int = 50_000, length: int = 100,
+                            queries: int = 100, k: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """Grow one index in steps, timing the incremental adds and queries at each size"""
+    rng = np.random.default_rng(seed)
+    index = BM25Index()
+    # Queries mix frequent and rare terms; frequent ones dominate a naive scorer
+    query_terms = rng.integers(0, vocabulary // 10, size=(queries, 2)).tolist()
+    query_texts = [f"w0 w1 w{a} w{b}" for a, b in query_terms]
+
+    report = {}
+    indexed = 0
+    for size in sizes:
+        documents = _zipf_documents(size - indexed, vocabulary, length, rng)
+        start = time.perf_counter()
+        index.add_documents((f"doc-{indexed + i}", text) for i, text in enumerate(documents))
+        add_seconds = time.perf_counter() - start
+        indexed = size
+
+        start = time.perf_counter()
+        for text in query_texts:
+            index.search(text, k)
+        query_seconds = time.perf_counter() - start
+
+        stats = index.get_stats()
+        report[size] = {
+            'adds_per_sec': len(documents) / add_seconds,
+            'query_ms': 1000 * query_seconds / queries,
+            'posting_bytes_per_posting': stats['posting_bytes'] / max(stats['postings'], 1)
+        }
+    return report
+
+if __name__ == "__main__":
+    for size, result in benchmark_corpus_growth().items():
+        print(f"{size}: {result}")
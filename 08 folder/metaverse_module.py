@@ -8,7 +8,6 @@ import asyncio
 import json
 import logging
 import numpy as np
-import sqlite3
 import threading
 import time
 from datetime import datetime, timedelta
@@ -19,6 +18,8 @@ import uuid
 import math
 import random
 
+from sqlite_store import get_database
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -150,6 +151,7 @@ class MetaverseModule:
         }
         
         # Initialize database
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # Create default worlds
@@ -163,115 +165,110 @@ class MetaverseModule:
     def _init_database(self):
         """Initialize the metaverse database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Virtual worlds table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS virtual_worlds (
-                    world_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    world_type TEXT,
-                    owner_id TEXT,
-                    max_users INTEGER,
-                    current_users INTEGER DEFAULT 0,
-                    is_public BOOLEAN DEFAULT TRUE,
-                    physics_enabled BOOLEAN DEFAULT TRUE,
-                    voice_chat_enabled BOOLEAN DEFAULT TRUE,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    world_data TEXT
-                )
-            ''')
-            
-            # Virtual assets table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS virtual_assets (
-                    asset_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    asset_type TEXT,
-                    owner_id TEXT,
-                    creator_id TEXT,
-                    price REAL DEFAULT 0.0,
-                    currency TEXT DEFAULT 'USD',
-                    is_tradeable BOOLEAN DEFAULT TRUE,
-                    is_nft BOOLEAN DEFAULT FALSE,
-                    rarity TEXT DEFAULT 'common',
-                    metadata TEXT,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            with self.db.transaction() as cursor:
+                # Virtual worlds table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS virtual_worlds (
+                        world_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        description TEXT,
+                        world_type TEXT,
+                        owner_id TEXT,
+                        max_users INTEGER,
+                        current_users INTEGER DEFAULT 0,
+                        is_public BOOLEAN DEFAULT TRUE,
+                        physics_enabled BOOLEAN DEFAULT TRUE,
+                        voice_chat_enabled BOOLEAN DEFAULT TRUE,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        world_data TEXT
+                    )
+                ''')
             
-            # User avatars table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_avatars (
-                    avatar_id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    name TEXT,
-                    appearance TEXT,
-                    equipped_items TEXT,
-                    position_x REAL DEFAULT 0.0,
-                    position_y REAL DEFAULT 0.0,
-                    position_z REAL DEFAULT 0.0,
-                    rotation_x REAL DEFAULT 0.0,
-                    rotation_y REAL DEFAULT 0.0,
-                    rotation_z REAL DEFAULT 0.0,
-                    current_world TEXT,
-                    status TEXT DEFAULT 'offline',
-                    last_active DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Virtual assets table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS virtual_assets (
+                        asset_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        description TEXT,
+                        asset_type TEXT,
+                        owner_id TEXT,
+                        creator_id TEXT,
+                        price REAL DEFAULT 0.0,
+                        currency TEXT DEFAULT 'USD',
+                        is_tradeable BOOLEAN DEFAULT TRUE,
+                        is_nft BOOLEAN DEFAULT FALSE,
+                        rarity TEXT DEFAULT 'common',
+                        metadata TEXT,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # World interactions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS world_interactions (
-                    interaction_id TEXT PRIMARY KEY,
-                    world_id TEXT,
-                    user_id TEXT,
-                    interaction_type TEXT,
-                    target_user_id TEXT,
-                    target_object_id TEXT,
-                    interaction_data TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # User avatars table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS user_avatars (
+                        avatar_id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        name TEXT,
+                        appearance TEXT,
+                        equipped_items TEXT,
+                        position_x REAL DEFAULT 0.0,
+                        position_y REAL DEFAULT 0.0,
+                        position_z REAL DEFAULT 0.0,
+                        rotation_x REAL DEFAULT 0.0,
+                        rotation_y REAL DEFAULT 0.0,
+                        rotation_z REAL DEFAULT 0.0,
+                        current_world TEXT,
+                        status TEXT DEFAULT 'offline',
+                        last_active DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Asset transactions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS asset_transactions (
-                    transaction_id TEXT PRIMARY KEY,
-                    asset_id TEXT,
-                    seller_id TEXT,
-                    buyer_id TEXT,
-                    price REAL,
-                    currency TEXT,
-                    transaction_type TEXT,
-                    status TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # World interactions table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS world_interactions (
+                        interaction_id TEXT PRIMARY KEY,
+                        world_id TEXT,
+                        user_id TEXT,
+                        interaction_type TEXT,
+                        target_user_id TEXT,
+                        target_object_id TEXT,
+                        interaction_data TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # World events table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS world_events (
-                    event_id TEXT PRIMARY KEY,
-                    world_id TEXT,
-                    event_name TEXT,
-                    event_description TEXT,
-                    organizer_id TEXT,
-                    start_time DATETIME,
-                    end_time DATETIME,
-                    max_attendees INTEGER,
-                    current_attendees INTEGER DEFAULT 0,
-                    event_data TEXT,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Asset transactions table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS asset_transactions (
+                        transaction_id TEXT PRIMARY KEY,
+                        asset_id TEXT,
+                        seller_id TEXT,
+                        buyer_id TEXT,
+                        price REAL,
+                        currency TEXT,
+                        transaction_type TEXT,
+                        status TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            conn.commit()
-            conn.close()
+                # World events table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS world_events (
+                        event_id TEXT PRIMARY KEY,
+                        world_id TEXT,
+                        event_name TEXT,
+                        event_description TEXT,
+                        organizer_id TEXT,
+                        start_time DATETIME,
+                        end_time DATETIME,
+                        max_attendees INTEGER,
+                        current_attendees INTEGER DEFAULT 0,
+                        event_data TEXT,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
@@ -379,10 +376,7 @@ class MetaverseModule:
     def _store_world_in_db(self, world: VirtualWorld):
         """Store virtual world in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.write('''
                 INSERT OR REPLACE INTO virtual_worlds 
                 (world_id, name, description, world_type, owner_id, max_users, 
                  current_users, is_public, physics_enabled, voice_chat_enabled, 
@@ -395,9 +389,6 @@ class MetaverseModule:
                 world.last_updated, json.dumps(world.world_data)
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error storing world in database: {e}")
 
@@ -13,7 +13,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
-import sqlite3
 import os
 import subprocess
 import yaml
@@ -22,6 +21,8 @@ from pathlib import Path
 import shutil
 import tempfile
 
+from sqlite_store import get_database
+
 class PlatformType(Enum):
     WEB_APPLICATION = "web_application"
     API_SERVICE = "api_service"
@@ -130,6 +131,7 @@ class PaaS:
         
         # Initialize database
         os.makedirs(data_dir, exist_ok=True)
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # Container orchestration
@@ -207,123 +209,118 @@ class PaaS:
         
     def _init_database(self):
         """Initialize SQLite database for PaaS"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Platform services table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS platform_services (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                platform_type TEXT NOT NULL,
-                runtime TEXT NOT NULL,
-                version TEXT NOT NULL,
-                description TEXT,
-                user_id TEXT NOT NULL,
-                project_id TEXT NOT NULL,
-                source_code_url TEXT NOT NULL,
-                build_config TEXT NOT NULL,
-                deployment_config TEXT NOT NULL,
-                environment_variables TEXT,
-                secrets TEXT,
-                domains TEXT,
-                status TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Scaling configurations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scaling_configs (
-                id TEXT PRIMARY KEY,
-                service_id TEXT NOT NULL,
-                scaling_type TEXT NOT NULL,
-                min_instances INTEGER NOT NULL,
-                max_instances INTEGER NOT NULL,
-                target_cpu_percent INTEGER,
-                target_memory_percent INTEGER,
-                target_requests_per_second INTEGER,
-                scale_up_cooldown INTEGER DEFAULT 300,
-                scale_down_cooldown INTEGER DEFAULT 600,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (service_id) REFERENCES platform_services (id)
-            )
-        ''')
+        with self.db.transaction() as cursor:
+            # Platform services table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS platform_services (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    platform_type TEXT NOT NULL,
+                    runtime TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    description TEXT,
+                    user_id TEXT NOT NULL,
+                    project_id TEXT NOT NULL,
+                    source_code_url TEXT NOT NULL,
+                    build_config TEXT NOT NULL,
+                    deployment_config TEXT NOT NULL,
+                    environment_variables TEXT,
+                    secrets TEXT,
+                    domains TEXT,
+                    status TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # Build logs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS build_logs (
-                id TEXT PRIMARY KEY,
-                service_id TEXT NOT NULL,
-                build_number INTEGER NOT NULL,
-                status TEXT NOT NULL,
-                logs TEXT,
-                started_at DATETIME NOT NULL,
-                completed_at DATETIME,
-                artifacts TEXT,
-                FOREIGN KEY (service_id) REFERENCES platform_services (id)
-            )
-        ''')
+            # Scaling configurations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scaling_configs (
+                    id TEXT PRIMARY KEY,
+                    service_id TEXT NOT NULL,
+                    scaling_type TEXT NOT NULL,
+                    min_instances INTEGER NOT NULL,
+                    max_instances INTEGER NOT NULL,
+                    target_cpu_percent INTEGER,
+                    target_memory_percent INTEGER,
+                    target_requests_per_second INTEGER,
+                    scale_up_cooldown INTEGER DEFAULT 300,
+                    scale_down_cooldown INTEGER DEFAULT 600,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (service_id) REFERENCES platform_services (id)
+                )
+            ''')
         
-        # Deployment metrics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS deployment_metrics (
-                id TEXT PRIMARY KEY,
-                service_id TEXT NOT NULL,
-                timestamp DATETIME NOT NULL,
-                cpu_usage_percent REAL NOT NULL,
-                memory_usage_mb REAL NOT NULL,
-                disk_usage_mb REAL NOT NULL,
-                network_in_mb REAL NOT NULL,
-                network_out_mb REAL NOT NULL,
-                request_count INTEGER NOT NULL,
-                response_time_ms REAL NOT NULL,
-                error_rate_percent REAL NOT NULL,
-                FOREIGN KEY (service_id) REFERENCES platform_services (id)
-            )
-        ''')
+            # Build logs table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS build_logs (
+                    id TEXT PRIMARY KEY,
+                    service_id TEXT NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    logs TEXT,
+                    started_at DATETIME NOT NULL,
+                    completed_at DATETIME,
+                    artifacts TEXT,
+                    FOREIGN KEY (service_id) REFERENCES platform_services (id)
+                )
+            ''')
         
-        # Service instances table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS service_instances (
-                id TEXT PRIMARY KEY,
-                service_id TEXT NOT NULL,
-                instance_name TEXT NOT NULL,
-                container_id TEXT,
-                pod_name TEXT,
-                node_name TEXT,
-                status TEXT NOT NULL,
-                cpu_limit TEXT,
-                memory_limit TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (service_id) REFERENCES platform_services (id)
-            )
-        ''')
+            # Deployment metrics table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS deployment_metrics (
+                    id TEXT PRIMARY KEY,
+                    service_id TEXT NOT NULL,
+                    timestamp DATETIME NOT NULL,
+                    cpu_usage_percent REAL NOT NULL,
+                    memory_usage_mb REAL NOT NULL,
+                    disk_usage_mb REAL NOT NULL,
+                    network_in_mb REAL NOT NULL,
+                    network_out_mb REAL NOT NULL,
+                    request_count INTEGER NOT NULL,
+                    response_time_ms REAL NOT NULL,
+                    error_rate_percent REAL NOT NULL,
+                    FOREIGN KEY (service_id) REFERENCES platform_services (id)
+                )
+            ''')
         
-        # Service dependencies table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS service_dependencies (
-                id TEXT PRIMARY KEY,
-                service_id TEXT NOT NULL,
-                dependency_service_id TEXT NOT NULL,
-                dependency_type TEXT NOT NULL,
-                configuration TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (service_id) REFERENCES platform_services (id),
-                FOREIGN KEY (dependency_service_id) REFERENCES platform_services (id)
-            )
-        ''')
+            # Service instances table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS service_instances (
+                    id TEXT PRIMARY KEY,
+                    service_id TEXT NOT NULL,
+                    instance_name TEXT NOT NULL,
+                    container_id TEXT,
+                    pod_name TEXT,
+                    node_name TEXT,
+                    status TEXT NOT NULL,
+                    cpu_limit TEXT,
+                    memory_limit TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (service_id) REFERENCES platform_services (id)
+                )
+            ''')
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_services_user ON platform_services(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_services_project ON platform_services(project_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_service ON deployment_metrics(service_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON deployment_metrics(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_instances_service ON service_instances(service_id)')
+            # Service dependencies table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS service_dependencies (
+                    id TEXT PRIMARY KEY,
+                    service_id TEXT NOT NULL,
+                    dependency_service_id TEXT NOT NULL,
+                    dependency_type TEXT NOT NULL,
+                    configuration TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (service_id) REFERENCES platform_services (id),
+                    FOREIGN KEY (dependency_service_id) REFERENCES platform_services (id)
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
+            # Create indexes
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_services_user ON platform_services(user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_services_project ON platform_services(project_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_service ON deployment_metrics(service_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON deployment_metrics(timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_instances_service ON service_instances(service_id)')
     
     def _init_aws(self):
         """Initialize AWS services"""
@@ -358,10 +355,7 @@ class PaaS:
     async def create_service(self, service: PlatformService) -> str:
         """Create a new platform service"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.execute('''
                 INSERT INTO platform_services 
                 (id, name, platform_type, runtime, version, description, user_id, 
                  project_id, source_code_url, build_config, deployment_config,
@@ -385,9 +379,6 @@ class PaaS:
                 service.status.value
             ))
             
-            conn.commit()
-            conn.close()
-            
             # Start build process
             await self._trigger_build(service.id)
             
@@ -413,10 +404,7 @@ class PaaS:
             build_id = str(uuid.uuid4())
             build_number = await self._get_next_build_number(service_id)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.execute('''
                 INSERT INTO build_logs 
                 (id, service_id, build_number, status, logs, started_at)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -429,9 +417,6 @@ class PaaS:
                 datetime.utcnow()
             ))
             
-            conn.commit()
-            conn.close()
-            
             # Start build process asynchronously
             asyncio.create_task(self._execute_build(service_id, build_id))
             
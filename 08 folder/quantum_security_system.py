@@ -7,7 +7,7 @@ Advanced security implementation with quantum-safe encryption and multi-layer pr
 import asyncio
 import json
 import logging
-import sqlite3
+import os
 import threading
 import time
 import hashlib
@@ -28,6 +28,8 @@ import jwt
 import ipaddress
 import re
 
+from sqlite_store import get_database
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -117,8 +119,10 @@ class QuantumSecuritySystem:
     Advanced multi-layer security with quantum-safe encryption
     """
     
-    def __init__(self):
-        self.db_path = "/home/ubuntu/unified-platform/security/quantum_security.db"
+    def __init__(self, data_dir: str = "./security_data"):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, "quantum_security.db")
+        self.db = get_database(self.db_path)
         self.security_profiles = {}
         self.security_events = []
         self.encryption_keys = {}
@@ -187,108 +191,103 @@ class QuantumSecuritySystem:
     def _init_database(self):
         """Initialize the security database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Security profiles table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS security_profiles (
-                    user_id TEXT PRIMARY KEY,
-                    security_level TEXT,
-                    auth_methods TEXT,
-                    encryption_keys TEXT,
-                    biometric_hashes TEXT,
-                    access_permissions TEXT,
-                    security_clearance TEXT,
-                    last_security_audit DATETIME,
-                    failed_attempts INTEGER DEFAULT 0,
-                    account_locked BOOLEAN DEFAULT FALSE,
-                    quantum_entangled BOOLEAN DEFAULT FALSE,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Security events table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS security_events (
-                    event_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    event_type TEXT,
-                    threat_level TEXT,
-                    source_ip TEXT,
-                    user_agent TEXT,
-                    location TEXT,
-                    event_data TEXT,
-                    resolved BOOLEAN DEFAULT FALSE,
-                    response_actions TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            with self.db.transaction() as cursor:
+                # Security profiles table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS security_profiles (
+                        user_id TEXT PRIMARY KEY,
+                        security_level TEXT,
+                        auth_methods TEXT,
+                        encryption_keys TEXT,
+                        biometric_hashes TEXT,
+                        access_permissions TEXT,
+                        security_clearance TEXT,
+                        last_security_audit DATETIME,
+                        failed_attempts INTEGER DEFAULT 0,
+                        account_locked BOOLEAN DEFAULT FALSE,
+                        quantum_entangled BOOLEAN DEFAULT FALSE,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Encryption keys table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS encryption_keys (
-                    key_id TEXT PRIMARY KEY,
-                    key_type TEXT,
-                    public_key TEXT,
-                    private_key TEXT,
-                    quantum_safe BOOLEAN DEFAULT TRUE,
-                    expiry_date DATETIME,
-                    usage_count INTEGER DEFAULT 0,
-                    max_usage INTEGER DEFAULT 1000000,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Security events table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS security_events (
+                        event_id TEXT PRIMARY KEY,
+                        user_id TEXT,
+                        event_type TEXT,
+                        threat_level TEXT,
+                        source_ip TEXT,
+                        user_agent TEXT,
+                        location TEXT,
+                        event_data TEXT,
+                        resolved BOOLEAN DEFAULT FALSE,
+                        response_actions TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Active sessions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS active_sessions (
-                    session_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    location TEXT,
-                    security_level TEXT,
-                    encryption_key_id TEXT,
-                    last_activity DATETIME,
-                    expires_at DATETIME,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Encryption keys table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS encryption_keys (
+                        key_id TEXT PRIMARY KEY,
+                        key_type TEXT,
+                        public_key TEXT,
+                        private_key TEXT,
+                        quantum_safe BOOLEAN DEFAULT TRUE,
+                        expiry_date DATETIME,
+                        usage_count INTEGER DEFAULT 0,
+                        max_usage INTEGER DEFAULT 1000000,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Threat intelligence table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS threat_intelligence (
-                    threat_id TEXT PRIMARY KEY,
-                    threat_type TEXT,
-                    source_ip TEXT,
-                    threat_level TEXT,
-                    description TEXT,
-                    indicators TEXT,
-                    mitigation_actions TEXT,
-                    first_seen DATETIME,
-                    last_seen DATETIME,
-                    active BOOLEAN DEFAULT TRUE
-                )
-            ''')
+                # Active sessions table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS active_sessions (
+                        session_id TEXT PRIMARY KEY,
+                        user_id TEXT,
+                        ip_address TEXT,
+                        user_agent TEXT,
+                        location TEXT,
+                        security_level TEXT,
+                        encryption_key_id TEXT,
+                        last_activity DATETIME,
+                        expires_at DATETIME,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
-            # Audit logs table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS audit_logs (
-                    log_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    action TEXT,
-                    resource TEXT,
-                    result TEXT,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    additional_data TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                # Threat intelligence table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS threat_intelligence (
+                        threat_id TEXT PRIMARY KEY,
+                        threat_type TEXT,
+                        source_ip TEXT,
+                        threat_level TEXT,
+                        description TEXT,
+                        indicators TEXT,
+                        mitigation_actions TEXT,
+                        first_seen DATETIME,
+                        last_seen DATETIME,
+                        active BOOLEAN DEFAULT TRUE
+                    )
+                ''')
             
-            conn.commit()
-            conn.close()
+                # Audit logs table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS audit_logs (
+                        log_id TEXT PRIMARY KEY,
+                        user_id TEXT,
+                        action TEXT,
+                        resource TEXT,
+                        result TEXT,
+                        ip_address TEXT,
+                        user_agent TEXT,
+                        additional_data TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
             
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
@@ -372,10 +371,7 @@ class QuantumSecuritySystem:
     def _store_encryption_key_in_db(self, key: EncryptionKey):
         """Store encryption key in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.execute('''
                 INSERT OR REPLACE INTO encryption_keys 
                 (key_id, key_type, public_key, private_key, quantum_safe,
                  expiry_date, usage_count, max_usage, created_timestamp)
@@ -386,9 +382,6 @@ class QuantumSecuritySystem:
                 key.max_usage, key.created_timestamp
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error storing encryption key in database: {e}")
 
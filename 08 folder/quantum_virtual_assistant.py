@@ -9,7 +9,6 @@ import asyncio
 import json
 import logging
 import numpy as np
-import sqlite3
 import threading
 import time
 from datetime import datetime, timedelta
@@ -21,6 +20,8 @@ import uuid
 import math
 import random
 
+from sqlite_store import get_database
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -135,6 +136,7 @@ class QuantumVirtualAssistant:
         self.consciousness_interfaces = {}
         
         # Initialize database
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # Load Rife frequency database
@@ -148,115 +150,110 @@ class QuantumVirtualAssistant:
     def _init_database(self):
         """Initialize the quantum assistant database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Quantum states table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS quantum_states (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    coherence REAL,
-                    entanglement_data TEXT,
-                    amplitude_real REAL,
-                    amplitude_imag REAL,
-                    phase REAL,
-                    fidelity REAL,
-                    decoherence_time REAL
-                )
-            ''')
-            
-            # System metrics table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS system_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    quantum_coherence REAL,
-                    time_crystal_stability REAL,
-                    nanobrain_efficiency REAL,
-                    wbe_integration REAL,
-                    energy_levels TEXT,
-                    processing_speed REAL,
-                    memory_usage REAL,
-                    network_latency REAL
-                )
-            ''')
+            with self.db.transaction() as cursor:
+                # Quantum states table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS quantum_states (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        coherence REAL,
+                        entanglement_data TEXT,
+                        amplitude_real REAL,
+                        amplitude_imag REAL,
+                        phase REAL,
+                        fidelity REAL,
+                        decoherence_time REAL
+                    )
+                ''')
             
-            # Biometric registry table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS biometric_registry (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    biometric_type TEXT,
-                    data_hash TEXT,
-                    confidence REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    dna_sequence TEXT,
-                    family_tree_hash TEXT,
-                    access_level INTEGER
-                )
-            ''')
+                # System metrics table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS system_metrics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        quantum_coherence REAL,
+                        time_crystal_stability REAL,
+                        nanobrain_efficiency REAL,
+                        wbe_integration REAL,
+                        energy_levels TEXT,
+                        processing_speed REAL,
+                        memory_usage REAL,
+                        network_latency REAL
+                    )
+                ''')
             
-            # Rife frequencies table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS rife_frequencies (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    frequency REAL,
-                    name TEXT,
-                    category TEXT,
-                    database TEXT,
-                    description TEXT,
-                    proven BOOLEAN,
-                    safety_level INTEGER
-                )
-            ''')
+                # Biometric registry table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS biometric_registry (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT,
+                        biometric_type TEXT,
+                        data_hash TEXT,
+                        confidence REAL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        dna_sequence TEXT,
+                        family_tree_hash TEXT,
+                        access_level INTEGER
+                    )
+                ''')
             
-            # Conversation history table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT,
-                    user_id TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    user_input TEXT,
-                    assistant_response TEXT,
-                    ai_model TEXT,
-                    processing_time REAL,
-                    quantum_enhanced BOOLEAN
-                )
-            ''')
+                # Rife frequencies table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS rife_frequencies (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        frequency REAL,
+                        name TEXT,
+                        category TEXT,
+                        database TEXT,
+                        description TEXT,
+                        proven BOOLEAN,
+                        safety_level INTEGER
+                    )
+                ''')
             
-            # Interdimensional gateways table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS interdimensional_gateways (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    gateway_id TEXT UNIQUE,
-                    dimension_coordinates TEXT,
-                    stability REAL,
-                    energy_requirement REAL,
-                    status TEXT,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_accessed DATETIME
-                )
-            ''')
+                # Conversation history table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS conversations (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_id TEXT,
+                        user_id TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        user_input TEXT,
+                        assistant_response TEXT,
+                        ai_model TEXT,
+                        processing_time REAL,
+                        quantum_enhanced BOOLEAN
+                    )
+                ''')
             
-            # Matter synthesis table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS matter_synthesis (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    synthesis_id TEXT UNIQUE,
-                    target_material TEXT,
-                    atomic_structure TEXT,
-                    quantum_state_config TEXT,
-                    progress REAL,
-                    status TEXT,
-                    created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    completion_timestamp DATETIME
-                )
-            ''')
+                # Interdimensional gateways table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS interdimensional_gateways (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        gateway_id TEXT UNIQUE,
+                        dimension_coordinates TEXT,
+                        stability REAL,
+                        energy_requirement REAL,
+                        status TEXT,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        last_accessed DATETIME
+                    )
+                ''')
             
-            conn.commit()
-            conn.close()
+                # Matter synthesis table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS matter_synthesis (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        synthesis_id TEXT UNIQUE,
+                        target_material TEXT,
+                        atomic_structure TEXT,
+                        quantum_state_config TEXT,
+                        progress REAL,
+                        status TEXT,
+                        created_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        completion_timestamp DATETIME
+                    )
+                ''')
             
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
@@ -300,21 +297,16 @@ class QuantumVirtualAssistant:
         
         # Store in database and memory
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for freq in sample_frequencies:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO rife_frequencies 
-                    (frequency, name, category, database, description, proven, safety_level)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (freq.frequency, freq.name, freq.category, freq.database, 
-                     freq.description, freq.proven, freq.safety_level))
+            with self.db.transaction() as cursor:
+                for freq in sample_frequencies:
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO rife_frequencies 
+                        (frequency, name, category, database, description, proven, safety_level)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (freq.frequency, freq.name, freq.category, freq.database, 
+                         freq.description, freq.proven, freq.safety_level))
                 
-                self.rife_frequencies[freq.frequency] = freq
-            
-            conn.commit()
-            conn.close()
+                    self.rife_frequencies[freq.frequency] = freq
             
             logger.info(f"Loaded {len(sample_frequencies)} Rife frequencies")
             
@@ -399,9 +391,6 @@ class QuantumVirtualAssistant:
     def _store_system_metrics(self):
         """Store current system metrics to database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.write('''
                 INSERT INTO sys
 (Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Shared Query Result Cache
+Byte-budgeted LRU + TTL cache with generation-based invalidation for vector and RAG queries
+"""
+
+import hashlib
+import json
+import sys
+import threading
+import time
+import numpy as np
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, is_dataclass
+from typing import Dict, Any, Optional, Tuple
+
+@dataclass(frozen=True)
+class CacheKey:
+    """Cache key bound to the generation of the index it was built against"""
+    index_name: str
+    generation: int
+    params_digest: str
+    vector_digest: str = ""
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size_bytes: int
+    expires_at: float
+    vector: Optional[np.ndarray] = None
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    approximate_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'approximate_hits': self.approximate_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
+
+class QueryResultCache:
+    """
+    Bounded query result cache shared by CustomVectorDatabase and AdvancedRAGSystem
+
+    Entries are evicted least-recently-used first once their estimated size
+    exceeds ``max_bytes`` and expire after ``ttl_seconds``. Every index has a
+    generation counter that is part of each key; ``invalidate`` bumps it, so
+    a write makes all dependent entries unreachable in O(1) and they age out
+    of the LRU. With ``approximate=True`` a lookup may reuse the entry of a
+    cached query vector within ``epsilon`` (cosine distance) of the new one.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300.0,
+                 approximate: bool = False, epsilon: float = 1e-3,
+                 max_approximate_candidates: int = 1024):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.approximate = approximate
+        self.epsilon = epsilon
+        self.max_approximate_candidates = max_approximate_candidates
+
+        self.entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self.current_bytes = 0
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.metrics = CacheMetrics()
+        self.lock = threading.Lock()
+
+        # Approximate mode: normalized query vectors per (index, generation, params)
+        self.vector_buckets: Dict[Tuple[str, int, str], "OrderedDict[CacheKey, np.ndarray]"] = {}
+
+    def make_key(self, index_name: str, params: Dict[str, Any],
+                 query_vector: Optional[np.ndarray] = None) -> CacheKey:
+        """Build a key from query parameters and, when given, the exact query vector bytes"""
+        params_digest = hashlib.blake2b(
+            json.dumps(params, sort_keys=True, default=str).encode('utf-8'), digest_size=16
+        ).hexdigest()
+        vector_digest = ""
+        if query_vector is not None:
+            vector_bytes = np.ascontiguousarray(query_vector, dtype=np.float32).tobytes()
+            vector_digest = hashlib.blake2b(vector_bytes, digest_size=16).hexdigest()
+        with self.lock:
+            generation = self.generations[index_name]
+        return CacheKey(index_name, generation, params_digest, vector_digest)
+
+    async def get(self, key: CacheKey, query_vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        return self.lookup(key, query_vector)
+
+    async def set(self, key: CacheKey, value: Any, query_vector: Optional[np.ndarray] = None):
+        self.store(key, value, query_vector)
+
+    def lookup(self, key: CacheKey, query_vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        """Return the cached value for key, or an approximate match, or None"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self.metrics.hits += 1
+                return entry.value
+
+            if self.approximate and query_vector is not None:
+                near_key = self._nearest_key(key, query_vector)
+                entry = self._live_entry(near_key, now) if near_key is not None else None
+                if entry is not None:
+                    self.metrics.hits += 1
+                    self.metrics.approximate_hits += 1
+                    return entry.value
+
+            self.metrics.misses += 1
+            return None
+
+    def store(self, key: CacheKey, value: Any, query_vector: Optional[np.ndarray] = None):
+        """Insert a value, evicting least-recently-used entries beyond the byte budget"""
+        size_bytes = _estimate_size(value)
+        if size_bytes > self.max_bytes:
+            return
+
+        with self.lock:
+            # Results computed against an older generation are already stale
+            if key.generation != self.generations[key.index_name]:
+                return
+
+            if key in self.entries:
+                self._remove(key)
+
+            vector = None
+            if self.approximate and query_vector is not None:
+                vector = _normalize(query_vector)
+                bucket = self.vector_buckets.setdefault(self._bucket_id(key), OrderedDict())
+                bucket[key] = vector
+                if len(bucket) > self.max_approximate_candidates:
+                    bucket.popitem(last=False)
+
+            self.entries[key] = CacheEntry(value, size_bytes, time.monotonic() + self.ttl_seconds, vector)
+            self.current_bytes += size_bytes
+
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.metrics.evictions += 1
+
+    def invalidate(self, index_name: str):
+        """Make every cached result for index_name unreachable"""
+        with self.lock:
+            old_generation = self.generations[index_name]
+            self.generations[index_name] = old_generation + 1
+            self.metrics.invalidations += 1
+
+            # Candidate vectors of the old generation can never match again
+            for bucket_id in [b for b in self.vector_buckets if b[0] == index_name and b[1] == old_generation]:
+                del self.vector_buckets[bucket_id]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.vector_buckets.clear()
+            self.current_bytes = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            metrics = self.metrics.to_dict()
+            metrics.update({
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            })
+            return metrics
+
+    def _live_entry(self, key: CacheKey, now: float) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self.metrics.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _nearest_key(self, key: CacheKey, query_vector: np.ndarray) -> Optional[CacheKey]:
+        bucket = self.vector_buckets.get(self._bucket_id(key))
+        if not bucket:
+            return None
+        keys = list(bucket.keys())
+        distances = 1.0 - np.stack(list(bucket.values())) @ _normalize(query_vector)
+        best = int(np.argmin(distances))
+        return keys[best] if distances[best] <= self.epsilon else None
+
+    def _remove(self, key: CacheKey):
+        entry = self.entries.pop(key)
+        self.current_bytes -= entry.size_bytes
+        if entry.vector is not None:
+            bucket = self.vector_buckets.get(self._bucket_id(key))
+            if bucket is not None:
+                bucket.pop(key, None)
+
+    @staticmethod
+    def _bucket_id(key: CacheKey) -> Tuple[str, int, str]:
+        return (key.index_name, key.generation, key.params_digest)
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate in-memory size of a cached result"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if _depth > 8:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k, _depth + 1) + _estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(_estimate_size(item, _depth + 1) for item in value)
+    if is_dataclass(value) or hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + _estimate_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
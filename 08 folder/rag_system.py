@@ -17,10 +17,15 @@ from collections import defaultdict, deque
 import pickle
 import sqlite3
 import networkx as nx
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import re
 import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from query_cache import QueryResultCache
+from lexical_index import BM25Index, order_by_fused_score, reciprocal_rank_fusion
+from text_chunker import ChunkingEngine, materialize
 
 class RAGType(Enum):
     BASIC_RAG = "basic_rag"
@@ -49,6 +54,7 @@ class Document:
     doc_type: DocumentType
     embeddings: Optional[np.ndarray] = None
     chunks: List[str] = field(default_factory=list)
+    chunk_spans: List[Tuple[int, int]] = field(default_factory=list)
     chunk_embeddings: List[np.ndarray] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
@@ -78,15 +84,99 @@ class RetrievalResult:
     chunk_index: Optional[int] = None
     reasoning: Optional[str] = None
 
+# Document preparation
+#
+# Chunking and extraction are CPU-bound, so they are plain module-level
+# functions that can run in a process pool as well as inline.
+
+ENTITY_PATTERNS = {
+    'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    'url': re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'),
+    'phone': re.compile(r'\b\d{3}-\d{3}-\d{4}\b'),
+    'date': re.compile(r'\b\d{1,2}/\d{1,2}/\d{4}\b')
+}
+
+RELATIONSHIP_PATTERNS = [
+    re.compile(r'(\w+)\s+is\s+a\s+(\w+)', re.IGNORECASE),
+    re.compile(r'(\w+)\s+has\s+(\w+)', re.IGNORECASE),
+    re.compile(r'(\w+)\s+uses\s+(\w+)', re.IGNORECASE),
+    re.compile(r'(\w+)\s+contains\s+(\w+)', re.IGNORECASE)
+]
+
+CHUNKING_ENGINE = ChunkingEngine(max_tokens=512, overlap=50)
+
+def chunk_spans(content: str, doc_type: DocumentType) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the chunks of a document"""
+    return list(CHUNKING_ENGINE.spans(content, doc_type.value))
+
+def chunk_texts(content: str, spans: List[Tuple[int, int]], doc_type: DocumentType) -> List[str]:
+    """Chunk strings for spans; structured chunks are prefixed with their JSON key path"""
+    if doc_type == DocumentType.STRUCTURED:
+        return materialize(content, spans, CHUNKING_ENGINE.json_key_paths(content, spans))
+    return materialize(content, spans)
+
+def chunk_document(content: str, doc_type: DocumentType) -> List[str]:
+    """Chunk document based on type"""
+    return chunk_texts(content, chunk_spans(content, doc_type), doc_type)
+
+def extract_entities(content: str) -> List[Dict[str, Any]]:
+    """Extract entities from content"""
+    # Placeholder implementation - would use NER models in practice
+    entities = []
+    
+    # Simple regex-based entity extraction
+    for entity_type, pattern in ENTITY_PATTERNS.items():
+        for match in pattern.findall(content):
+            entities.append({
+                'type': entity_type,
+                'value': match,
+                'confidence': 0.8
+            })
+    
+    return entities
+
+def extract_relationships(content: str) -> List[Dict[str, Any]]:
+    """Extract relationships from content"""
+    # Placeholder implementation
+    relationships = []
+    
+    # Simple pattern-based relationship extraction
+    for pattern in RELATIONSHIP_PATTERNS:
+        for match in pattern.findall(content):
+            relationships.append({
+                'subject': match[0],
+                'predicate': 'relationship',
+                'object': match[1],
+                'confidence': 0.7
+            })
+    
+    return relationships
+
+def prepare_document(content: str, doc_type_value: str) -> Dict[str, Any]:
+    """Chunk a document and extract graph facts; picklable for process pools
+
+    Only chunk offsets are returned, so process pools send back a few
+    integers per chunk instead of the chunk text.
+    """
+    doc_type = DocumentType(doc_type_value)
+    prepared = {'spans': chunk_spans(content, doc_type)}
+    if doc_type in (DocumentType.TECHNICAL, DocumentType.STRUCTURED):
+        prepared['entities'] = extract_entities(content)
+        prepared['relationships'] = extract_relationships(content)
+    return prepared
+
 class AdvancedRAGSystem:
     """
     Advanced RAG System with multiple retrieval strategies
     """
     
+    CACHE_INDEX = "documents"
+    
     def __init__(self):
         # Core components
         self.document_store = DocumentStore()
         self.vector_store = VectorStore()
+        self.lexical_index = BM25Index()
         self.knowledge_graph = KnowledgeGraph()
         self.context_manager = ContextManager()
         self.task_analyzer = TaskAnalyzer()
@@ -103,7 +193,7 @@ class AdvancedRAGSystem:
         self.hybrid_rag = HybridRAG(self)
         
         # Performance optimization
-        self.query_cache = QueryCache()
+        self.query_cache = QueryResultCache()
         self.performance_monitor = RAGPerformanceMonitor()
         self.adaptive_retriever = AdaptiveRetriever()
         
@@ -114,8 +204,9 @@ class AdvancedRAGSystem:
         """Main retrieval method that routes to appropriate RAG implementation"""
         
         # Check cache first
-        cached_results = await self.query_cache.get(query)
-        if cached_results:
+        cache_key = self._get_cache_key(query)
+        cached_results = await self.query_cache.get(cache_key)
+        if cached_results is not None:
             return cached_results
         
         # Route to appropriate RAG system
@@ -128,13 +219,27 @@ class AdvancedRAGSystem:
         results = await self._post_process_results(results, query)
         
         # Cache results
-        await self.query_cache.set(query, results)
+        await self.query_cache.set(cache_key, results)
         
         # Log performance
         await self.performance_monitor.log_retrieval(query, results)
         
         return results
     
+    def _get_cache_key(self, query: RetrievalQuery):
+        """Cache key over everything that shapes the retrieval result"""
+        return self.query_cache.make_key(self.CACHE_INDEX, {
+            'query_text': query.query_text,
+            'query_type': query.query_type,
+            'rag_type': query.rag_type.value,
+            'filters': query.filters,
+            'context': query.context,
+            'max_results': query.max_results,
+            'similarity_threshold': query.similarity_threshold,
+            'user_id': query.user_id,
+            'session_id': query.session_id
+        })
+    
     def _get_rag_system(self, rag_type: RAGType):
         """Get the appropriate RAG system based on type"""
         rag_systems = {
@@ -162,19 +267,34 @@ class AdvancedRAGSystem:
             # Add to vector store
             await self.vector_store.add_document(document)
             
+            # Add to lexical index (incremental, no refit)
+            self.lexical_index.add_document(document.doc_id, document.content)
+            
             # Update knowledge graph
             await self.knowledge_graph.add_document(document)
             
+            # Cached retrievals may now be missing this document
+            self.query_cache.invalidate(self.CACHE_INDEX)
+            
             return True
             
         except Exception as e:
             logging.error(f"Failed to add document: {e}")
             return False
     
+    async def add_documents(self, documents, **pipeline_options) -> "IngestionStats":
+        """Bulk-load documents through the streaming ingestion pipeline"""
+        pipeline = DocumentIngestionPipeline(self, **pipeline_options)
+        try:
+            return await pipeline.ingest(documents)
+        finally:
+            pipeline.close()
+    
     async def _process_document(self, document: Document):
         """Process document for RAG system"""
-        # Chunk document
-        document.chunks = await self._chunk_document(document.content, document.doc_type)
+        prepared = prepare_document(document.content, document.doc_type.value)
+        document.chunk_spans = prepared['spans']
+        document.chunks = chunk_texts(document.content, document.chunk_spans, document.doc_type)
         
         # Generate embeddings
         document.embeddings = await self.embedding_model.encode(document.content)
@@ -184,141 +304,52 @@ class AdvancedRAGSystem:
             chunk_embedding = await self.embedding_model.encode(chunk)
             document.chunk_embeddings.append(chunk_embedding)
         
-        # Extract entities and relationships for knowledge graph
-        if document.doc_type in [DocumentType.TECHNICAL, DocumentType.STRUCTURED]:
-            entities = await self._extract_entities(document.content)
-            relationships = await self._extract_relationships(document.content)
+        # Entities and relationships for knowledge graph
+        if 'entities' in prepared:
             document.metadata.update({
-                'entities': entities,
-                'relationships': relationships
+                'entities': prepared['entities'],
+                'relationships': prepared['relationships']
             })
     
     async def _chunk_document(self, content: str, doc_type: DocumentType) -> List[str]:
         """Chunk document based on type"""
-        if doc_type == DocumentType.CODE:
-            return await self._chunk_code(content)
-        elif doc_type == DocumentType.STRUCTURED:
-            return await self._chunk_structured(content)
-        else:
-            return await self._chunk_text(content)
+        return chunk_document(content, doc_type)
     
     async def _chunk_text(self, content: str, chunk_size: int = 512, overlap: int = 50) -> List[str]:
-        """Chunk text content"""
-        words = content.split()
-        chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            chunks.append(chunk)
-        
-        return chunks
+        """Chunk text content into token windows"""
+        return materialize(content, ChunkingEngine(chunk_size, overlap).text_spans(content))
     
     async def _chunk_code(self, content: str) -> List[str]:
         """Chunk code content by functions/classes"""
-        # Simple implementation - would be more sophisticated in practice
-        chunks = []
-        current_chunk = ""
-        
-        for line in content.split('\n'):
-            if line.strip().startswith(('def ', 'class ', 'function ', 'const ', 'let ', 'var ')):
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = line + '\n'
-            else:
-                current_chunk += line + '\n'
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+        return materialize(content, CHUNKING_ENGINE.code_spans(content))
     
     async def _chunk_structured(self, content: str) -> List[str]:
-        """Chunk structured content (JSON, XML, etc.)"""
-        # Simple implementation for JSON
-        try:
-            data = json.loads(content)
-            chunks = []
-            
-            def extract_chunks(obj, path=""):
-                if isinstance(obj, dict):
-                    for key, value in obj.items():
-                        new_path = f"{path}.{key}" if path else key
-                        if isinstance(value, (dict, list)):
-                            extract_chunks(value, new_path)
-                        else:
-                            chunks.append(f"{new_path}: {value}")
-                elif isinstance(obj, list):
-                    for i, item in enumerate(obj):
-                        new_path = f"{path}[{i}]"
-                        extract_chunks(item, new_path)
-            
-            extract_chunks(data)
-            return chunks
-            
-        except json.JSONDecodeError:
-            # Fallback to text chunking
-            return await self._chunk_text(content)
+        """Chunk structured content by JSON members"""
+        return chunk_document(content, DocumentType.STRUCTURED)
     
     async def _extract_entities(self, content: str) -> List[Dict[str, Any]]:
         """Extract entities from content"""
-        # Placeholder implementation - would use NER models in practice
-        entities = []
-        
-        # Simple regex-based entity extraction
-        patterns = {
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'url': r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
-            'phone': r'\b\d{3}-\d{3}-\d{4}\b',
-            'date': r'\b\d{1,2}/\d{1,2}/\d{4}\b'
-        }
-        
-        for entity_type, pattern in patterns.items():
-            matches = re.findall(pattern, content)
-            for match in matches:
-                entities.append({
-                    'type': entity_type,
-                    'value': match,
-                    'confidence': 0.8
-                })
-        
-        return entities
+        return extract_entities(content)
     
     async def _extract_relationships(self, content: str) -> List[Dict[str, Any]]:
         """Extract relationships from content"""
-        # Placeholder implementation
-        relationships = []
-        
-        # Simple pattern-based relationship extraction
-        relationship_patterns = [
-            r'(\w+)\s+is\s+a\s+(\w+)',
-            r'(\w+)\s+has\s+(\w+)',
-            r'(\w+)\s+uses\s+(\w+)',
-            r'(\w+)\s+contains\s+(\w+)'
-        ]
-        
-        for pattern in relationship_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                relationships.append({
-                    'subject': match[0],
-                    'predicate': 'relationship',
-                    'object': match[1],
-                    'confidence': 0.7
-                })
-        
-        return relationships
+        return extract_relationships(content)
     
     async def _post_process_results(self, results: List[RetrievalResult], 
                                   query: RetrievalQuery) -> List[RetrievalResult]:
         """Post-process retrieval results"""
-        # Re-rank results
-        results = await self._rerank_results(results, query)
-        
-        # Filter by threshold
-        results = [r for r in results if r.similarity_score >= query.similarity_threshold]
-        
-        # Limit results
-        results = results[:query.max_results]
+        if query.rag_type == RAGType.HYBRID_RAG:
+            # Fused ranks already order the results; lexical-only hits have no dense score
+            results = order_by_fused_score(results, query.max_results)
+        else:
+            # Re-rank results
+            results = await self._rerank_results(results, query)
+            
+            # Filter by threshold
+            results = [r for r in results if r.similarity_score >= query.similarity_threshold]
+            
+            # Limit results
+            results = results[:query.max_results]
         
         # Add reasoning
         for result in results:
@@ -363,6 +394,210 @@ class AdvancedRAGSystem:
         
         return ", ".join(reasoning_parts)
 
+# Bulk Ingestion
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    chunks: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': self.documents,
+            'chunks': self.chunks,
+            'failed': self.failed,
+            'elapsed_seconds': self.elapsed_seconds,
+            'docs_per_second': self.docs_per_second,
+            'stage_ms_per_doc': {
+                stage: 1000 * seconds / max(self.documents, 1)
+                for stage, seconds in self.stage_seconds.items()
+            }
+        }
+
+class DocumentIngestionPipeline:
+    """
+    Streaming bulk ingestion for AdvancedRAGSystem
+    
+    Documents flow prepare -> embed -> write through bounded queues, so a
+    slow stage applies backpressure all the way to the input iterator.
+    Chunking and extraction run in a process pool, embeddings are requested
+    in batches, and store writes are grouped into bulk batches.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, rag_system: "AdvancedRAGSystem", workers: Optional[int] = None,
+                 embed_batch_size: int = 64, write_batch_size: int = 256,
+                 queue_size: int = 128):
+        self.rag_system = rag_system
+        self.workers = workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.queue_size = queue_size
+        self.process_pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.stats = IngestionStats()
+    
+    def close(self):
+        self.process_pool.shutdown(wait=True)
+    
+    async def ingest(self, documents) -> IngestionStats:
+        """Ingest a (sync or async) iterable of documents"""
+        prepared_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embedded_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        started = time.perf_counter()
+        
+        await asyncio.gather(
+            self._prepare_stage(documents, prepared_queue),
+            self._embed_stage(prepared_queue, embedded_queue),
+            self._write_stage(embedded_queue)
+        )
+        
+        self.stats.elapsed_seconds = time.perf_counter() - started
+        if self.stats.documents:
+            self.rag_system.query_cache.invalidate(self.rag_system.CACHE_INDEX)
+        logging.info(f"Ingestion finished: {self.stats.to_dict()}")
+        return self.stats
+    
+    async def _prepare_stage(self, documents, output: asyncio.Queue):
+        """Fan documents out to the process pool, at most queue_size in flight"""
+        loop = asyncio.get_running_loop()
+        in_flight: deque = deque()
+        
+        async def drain_one():
+            document, started, future = in_flight.popleft()
+            try:
+                prepared = await future
+            except Exception as e:
+                logging.error(f"Failed to prepare document {document.doc_id}: {e}")
+                self.stats.failed += 1
+                return
+            self.stats.stage_seconds['prepare'] += time.perf_counter() - started
+            await output.put((document, prepared))
+        
+        async for document in self._iterate(documents):
+            future = loop.run_in_executor(
+                self.process_pool, prepare_document, document.content, document.doc_type.value
+            )
+            in_flight.append((document, time.perf_counter(), future))
+            if len(in_flight) >= self.queue_size:
+                await drain_one()
+        
+        while in_flight:
+            await drain_one()
+        await output.put(self._DONE)
+    
+    async def _embed_stage(self, source: asyncio.Queue, output: asyncio.Queue):
+        """Group prepared documents and embed their texts in batches"""
+        batch = []
+        text_count = 0
+        while True:
+            item = await source.get()
+            if item is self._DONE:
+                break
+            document, prepared = item
+            prepared['chunks'] = chunk_texts(document.content, prepared['spans'], document.doc_type)
+            batch.append((document, prepared))
+            text_count += 1 + len(prepared['chunks'])
+            if text_count >= self.embed_batch_size:
+                await self._embed_batch(batch, output)
+                batch, text_count = [], 0
+        
+        if batch:
+            await self._embed_batch(batch, output)
+        await output.put(self._DONE)
+    
+    async def _embed_batch(self, batch: List[Tuple[Document, Dict[str, Any]]], output: asyncio.Queue):
+        started = time.perf_counter()
+        texts = []
+        for document, prepared in batch:
+            texts.append(document.content)
+            texts.extend(prepared['chunks'])
+        
+        embeddings = await self._encode_batch(texts)
+        
+        position = 0
+        for document, prepared in batch:
+            document.chunks = prepared['chunks']
+            document.chunk_spans = prepared['spans']
+            document.embeddings = embeddings[position]
+            document.chunk_embeddings = list(embeddings[position + 1:position + 1 + len(document.chunks)])
+            position += 1 + len(document.chunks)
+            if 'entities' in prepared:
+                document.metadata.update({
+                    'entities': prepared['entities'],
+                    'relationships': prepared['relationships']
+                })
+        
+        self.stats.stage_seconds['embed'] += time.perf_counter() - started
+        for document, _ in batch:
+            await output.put(document)
+    
+    async def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """One batched model call when the embedding model supports it"""
+        embedding_model = self.rag_system.embedding_model
+        encode_batch = getattr(embedding_model, 'encode_batch', None)
+        if encode_batch is not None:
+            return list(await encode_batch(texts))
+        return list(await asyncio.gather(*(embedding_model.encode(text) for text in texts)))
+    
+    async def _write_stage(self, source: asyncio.Queue):
+        """Write embedded documents to the stores in bulk batches"""
+        batch = []
+        while True:
+            document = await source.get()
+            if document is self._DONE:
+                break
+            batch.append(document)
+            if len(batch) >= self.write_batch_size:
+                await self._write_batch(batch)
+                batch = []
+        
+        if batch:
+            await self._write_batch(batch)
+    
+    async def _write_batch(self, batch: List[Document]):
+        started = time.perf_counter()
+        rag = self.rag_system
+        try:
+            await asyncio.gather(*(rag.document_store.add_document(document) for document in batch))
+            
+            add_documents = getattr(rag.vector_store, 'add_documents', None)
+            if add_documents is not None:
+                await add_documents(batch)
+            else:
+                await asyncio.gather(*(rag.vector_store.add_document(document) for document in batch))
+            
+            rag.lexical_index.add_documents((document.doc_id, document.content) for document in batch)
+            
+            for document in batch:
+                await rag.knowledge_graph.add_document(document)
+            
+            self.stats.documents += len(batch)
+            self.stats.chunks += sum(len(document.chunks) for document in batch)
+        except Exception as e:
+            logging.error(f"Failed to write ingestion batch: {e}")
+            self.stats.failed += len(batch)
+        
+        self.stats.stage_seconds['write'] += time.perf_counter() - started
+    
+    @staticmethod
+    async def _iterate(documents):
+        if hasattr(documents, '__aiter__'):
+            async for document in documents:
+                yield document
+        else:
+            for document in documents:
+                yield document
+                # Let the downstream stages run between items of a sync generator
+                await asyncio.sleep(0)
+
 # RAG Implementation Classes
 
 class BasicRAG:
@@ -404,6 +639,46 @@ class BasicRAG:
         # Placeholder - would use actual embedding model
         return np.random.rand(768)
 
+class HybridRAG:
+    """Hybrid RAG: BM25 and dense retrieval fused by reciprocal rank fusion"""
+    
+    def __init__(self, rag_system: "AdvancedRAGSystem", lexical_weight: float = 1.0,
+                 dense_weight: float = 1.0, rrf_k: int = 60, candidate_multiplier: int = 4):
+        self.rag_system = rag_system
+        self.lexical_weight = lexical_weight
+        self.dense_weight = dense_weight
+        self.rrf_k = rrf_k
+        self.candidate_multiplier = candidate_multiplier
+    
+    async def retrieve(self, query: RetrievalQuery) -> List[RetrievalResult]:
+        """Retrieve with both rankers and fuse their ranks in one pass"""
+        rag = self.rag_system
+        candidates = query.max_results * self.candidate_multiplier
+        
+        lexical_hits = rag.lexical_index.search(query.query_text, candidates)
+        query_embedding = await rag.embedding_model.encode(query.query_text)
+        dense_hits = await rag.vector_store.similarity_search(query_embedding, k=candidates)
+        
+        fused = reciprocal_rank_fusion(
+            [lexical_hits, dense_hits], k=self.rrf_k,
+            weights=[self.lexical_weight, self.dense_weight], limit=query.max_results
+        )
+        
+        dense_scores = dict(dense_hits)
+        results = []
+        for doc_id, fused_score in fused:
+            doc = await rag.document_store.get_document(doc_id)
+            if doc:
+                results.append(RetrievalResult(
+                    doc_id=doc_id,
+                    content=doc.content,
+                    similarity_score=dense_scores.get(doc_id, 0.0),
+                    relevance_score=fused_score,
+                    metadata=doc.metadata
+                ))
+        
+        return results
+
 class ContextAwareRAG:
     """Context-Aware Generation (CAG) implementation"""
     
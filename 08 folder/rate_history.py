@@ -0,0 +1,215 @@
+"""
+Exchange Rate History Store
+Append-only columnar time series of exchange rates with range, downsampling and trend queries
+"""
+
+import bisect
+import math
+import os
+import threading
+import numpy as np
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Observation = Tuple[str, str, datetime, Any]  # base, target, timestamp, rate
+
+def to_epoch(timestamp: datetime) -> float:
+    """Epoch seconds; naive datetimes are UTC, as the currency service records them"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+def from_epoch(seconds: float) -> datetime:
+    """Naive UTC datetime for epoch seconds"""
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+class RateHistoryStore:
+    """
+    Rate observations per currency pair, stored as two parallel columns
+
+    Each pair keeps epoch-second timestamps and float64 rates in ``array('d')``
+    columns, sorted by time, mirrored to ``<BASE>-<TARGET>.ts`` and ``.rate``
+    files that are appended to on every write. A million observations take
+    16 MB and range queries are two binary searches over the timestamp column.
+
+    Pairs that were never stored are derived on read: from the inverse pair,
+    or from two pairs quoted against the same base at the same timestamps
+    (the cross-rate matrix writes its whole vector at one timestamp).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.timestamps: Dict[Tuple[str, str], array] = {}
+        self.rates: Dict[Tuple[str, str], array] = {}
+        self.lock = threading.RLock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    def append(self, base_currency: str, target_currency: str, timestamp: datetime, rate: Any):
+        self.append_many([(base_currency, target_currency, timestamp, rate)])
+
+    def append_many(self, observations: Iterable[Observation]):
+        """Add observations; appends in time order, inserts older ones in place"""
+        appended: Dict[Tuple[str, str], int] = {}
+        rewritten = set()
+        with self.lock:
+            for base_currency, target_currency, timestamp, rate in observations:
+                pair = (base_currency, target_currency)
+                seconds = to_epoch(timestamp)
+                timestamps = self.timestamps.get(pair)
+                if timestamps is None:
+                    timestamps = self.timestamps[pair] = array('d')
+                    self.rates[pair] = array('d')
+                rates = self.rates[pair]
+
+                if not timestamps or seconds > timestamps[-1]:
+                    timestamps.append(seconds)
+                    rates.append(float(rate))
+                    appended[pair] = appended.get(pair, 0) + 1
+                elif seconds != timestamps[-1]:
+                    position = bisect.bisect_left(timestamps, seconds)
+                    if position < len(timestamps) and timestamps[position] == seconds:
+                        continue  # already recorded
+                    timestamps.insert(position, seconds)
+                    rates.insert(position, float(rate))
+                    rewritten.add(pair)
+
+            if self.directory:
+                for pair, count in appended.items():
+                    if pair not in rewritten:
+                        self._write(pair, count)
+                for pair in rewritten:
+                    self._write(pair)
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        with self.lock:
+            return list(self.timestamps)
+
+    def series(self, base_currency: str, target_currency: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(epoch seconds, rates) within [start, end], stored or derived; empty if unknown"""
+        start_seconds = to_epoch(start) if start else -math.inf
+        end_seconds = to_epoch(end) if end else math.inf
+        with self.lock:
+            pair = (base_currency, target_currency)
+            if pair in self.timestamps:
+                return self._slice(pair, start_seconds, end_seconds)
+
+            inverse = (target_currency, base_currency)
+            if inverse in self.timestamps:
+                timestamps, rates = self._slice(inverse, start_seconds, end_seconds)
+                return timestamps, 1.0 / rates
+
+            # Cross pair through a shared quote currency, aligned on timestamp
+            for quote, target in self.timestamps:
+                if target != base_currency or (quote, target_currency) not in self.timestamps:
+                    continue
+                from_times, from_rates = self._slice((quote, base_currency), start_seconds, end_seconds)
+                to_times, to_rates = self._slice((quote, target_currency), start_seconds, end_seconds)
+                timestamps, from_positions, to_positions = np.intersect1d(
+                    from_times, to_times, assume_unique=True, return_indices=True)
+                if len(timestamps):
+                    return timestamps, to_rates[to_positions] / from_rates[from_positions]
+
+        return np.empty(0), np.empty(0)
+
+    def downsample(self, base_currency: str, target_currency: str, start: datetime, end: datetime,
+                   bucket_seconds: float) -> List[Dict[str, float]]:
+        """OHLC, mean and count per time bucket of the range, skipping empty buckets"""
+        timestamps, rates = self.series(base_currency, target_currency, start, end)
+        if not len(timestamps):
+            return []
+
+        buckets = ((timestamps - to_epoch(start)) // bucket_seconds).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.concatenate((starts[1:], [len(rates)]))
+        counts = ends - starts
+        means = np.add.reduceat(rates, starts) / counts
+        highs = np.maximum.reduceat(rates, starts)
+        lows = np.minimum.reduceat(rates, starts)
+        bucket_starts = to_epoch(start) + buckets[starts] * bucket_seconds
+
+        return [
+            {
+                'timestamp': float(bucket_starts[i]),
+                'open': float(rates[starts[i]]),
+                'high': float(highs[i]),
+                'low': float(lows[i]),
+                'close': float(rates[ends[i] - 1]),
+                'mean': float(means[i]),
+                'count': int(counts[i])
+            }
+            for i in range(len(starts))
+        ]
+
+    def summary(self, base_currency: str, target_currency: str, start: datetime,
+                end: datetime) -> Optional[Dict[str, float]]:
+        """Current, min, max and mean rate, percent change and volatility over a range
+
+        Volatility is the standard deviation of log returns between consecutive
+        observations, in percent.
+        """
+        timestamps, rates = self.series(base_currency, target_currency, start, end)
+        if not len(rates):
+            return None
+
+        returns = np.diff(np.log(rates))
+        return {
+            'current_rate': float(rates[-1]),
+            'min_rate': float(rates.min()),
+            'max_rate': float(rates.max()),
+            'avg_rate': float(rates.mean()),
+            'change_percent': float((rates[-1] - rates[0]) / rates[0] * 100),
+            'volatility': float(returns.std() * 100) if len(returns) else 0.0,
+            'data_points': int(len(rates)),
+            'first_timestamp': float(timestamps[0]),
+            'last_timestamp': float(timestamps[-1])
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            observations = sum(len(timestamps) for timestamps in self.timestamps.values())
+            return {
+                'pairs': len(self.timestamps),
+                'observations': observations,
+                'bytes': observations * 16
+            }
+
+    def _slice(self, pair: Tuple[str, str], start_seconds: float,
+               end_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        timestamps = self.timestamps[pair]
+        low = bisect.bisect_left(timestamps, start_seconds)
+        high = bisect.bisect_right(timestamps, end_seconds)
+        # Copies, so callers never see the buffers move under a later append
+        return (np.array(timestamps[low:high], dtype=np.float64),
+                np.array(self.rates[pair][low:high], dtype=np.float64))
+
+    def _path(self, pair: Tuple[str, str], column: str) -> str:
+        return os.path.join(self.directory, f"{pair[0]}-{pair[1]}.{column}")
+
+    def _write(self, pair: Tuple[str, str], tail: Optional[int] = None):
+        """Append the last ``tail`` observations of a pair, or rewrite it entirely"""
+        mode = 'ab' if tail is not None else 'wb'
+        for column, values in (('ts', self.timestamps[pair]), ('rate', self.rates[pair])):
+            with open(self._path(pair, column), mode) as handle:
+                (values[-tail:] if tail is not None else values).tofile(handle)
+
+    def _load(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith('.ts'):
+                continue
+            base_currency, _, target_currency = name[:-3].partition('-')
+            pair = (base_currency, target_currency)
+            timestamps, rates = array('d'), array('d')
+            with open(self._path(pair, 'ts'), 'rb') as handle:
+                timestamps.frombytes(handle.read())
+            with open(self._path(pair, 'rate'), 'rb') as handle:
+                rates.frombytes(handle.read())
+            # A crash between the two column writes leaves one column longer
+            length = min(len(timestamps), len(rates))
+            self.timestamps[pair] = timestamps[:length]
+            self.rates[pair] = rates[:length]
+            if len(timestamps) != len(rates):
+                self._write(pair)
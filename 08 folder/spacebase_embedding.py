@@ -8,7 +8,6 @@ import json
 import logging
 import uuid
 import numpy as np
-import sqlite3
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union, Tuple
@@ -35,6 +34,8 @@ from sklearn.metrics.pairwise import cosine_similarity
 import threading
 import time
 
+from sqlite_store import get_database
+
 class EmbeddingType(Enum):
     TEXT = "text"
     IMAGE = "image"
@@ -106,6 +107,7 @@ class SpacebaseEmbeddingSystem:
             os.makedirs(directory, exist_ok=True)
         
         # Initialize database
+        self.db = get_database(self.db_path)
         self._init_database()
         
         # Initialize models
@@ -132,115 +134,110 @@ class SpacebaseEmbeddingSystem:
     
     def _init_database(self):
         """Initialize SQLite database for embedding system"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Embedding spaces table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS embedding_spaces (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                embedding_types TEXT NOT NULL,
-                dimension INTEGER NOT NULL,
-                index_type TEXT NOT NULL,
-                similarity_metric TEXT NOT NULL,
-                model_configs TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Embeddings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS embeddings (
-                id TEXT PRIMARY KEY,
-                space_id TEXT NOT NULL,
-                content_id TEXT NOT NULL,
-                embedding_type TEXT NOT NULL,
-                vector_data BLOB NOT NULL,
-                metadata TEXT NOT NULL,
-                content_hash TEXT NOT NULL,
-                model_name TEXT NOT NULL,
-                dimension INTEGER NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (space_id) REFERENCES embedding_spaces (id),
-                UNIQUE(space_id, content_id, embedding_type)
-            )
-        ''')
+        with self.db.transaction() as cursor:
+            # Embedding spaces table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS embedding_spaces (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    embedding_types TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    index_type TEXT NOT NULL,
+                    similarity_metric TEXT NOT NULL,
+                    model_configs TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # Search history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS search_history (
-                id TEXT PRIMARY KEY,
-                space_id TEXT NOT NULL,
-                query_text TEXT,
-                query_vector BLOB,
-                embedding_type TEXT NOT NULL,
-                similarity_metric TEXT NOT NULL,
-                top_k INTEGER NOT NULL,
-                results_count INTEGER NOT NULL,
-                search_time REAL NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (space_id) REFERENCES embedding_spaces (id)
-            )
-        ''')
+            # Embeddings table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    id TEXT PRIMARY KEY,
+                    space_id TEXT NOT NULL,
+                    content_id TEXT NOT NULL,
+                    embedding_type TEXT NOT NULL,
+                    vector_data BLOB NOT NULL,
+                    metadata TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (space_id) REFERENCES embedding_spaces (id),
+                    UNIQUE(space_id, content_id, embedding_type)
+                )
+            ''')
         
-        # Clustering results table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clustering_results (
-                id TEXT PRIMARY KEY,
-                space_id TEXT NOT NULL,
-                embedding_type TEXT NOT NULL,
-                num_clusters INTEGER NOT NULL,
-                cluster_centers BLOB NOT NULL,
-                cluster_assignments TEXT NOT NULL,
-                silhouette_score REAL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (space_id) REFERENCES embedding_spaces (id)
-            )
-        ''')
+            # Search history table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS search_history (
+                    id TEXT PRIMARY KEY,
+                    space_id TEXT NOT NULL,
+                    query_text TEXT,
+                    query_vector BLOB,
+                    embedding_type TEXT NOT NULL,
+                    similarity_metric TEXT NOT NULL,
+                    top_k INTEGER NOT NULL,
+                    results_count INTEGER NOT NULL,
+                    search_time REAL NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (space_id) REFERENCES embedding_spaces (id)
+                )
+            ''')
         
-        # Similarity cache table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS similarity_cache (
-                id TEXT PRIMARY KEY,
-                content_id_1 TEXT NOT NULL,
-                content_id_2 TEXT NOT NULL,
-                similarity_score REAL NOT NULL,
-                similarity_metric TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                expires_at DATETIME NOT NULL,
-                UNIQUE(content_id_1, content_id_2, similarity_metric)
-            )
-        ''')
+            # Clustering results table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS clustering_results (
+                    id TEXT PRIMARY KEY,
+                    space_id TEXT NOT NULL,
+                    embedding_type TEXT NOT NULL,
+                    num_clusters INTEGER NOT NULL,
+                    cluster_centers BLOB NOT NULL,
+                    cluster_assignments TEXT NOT NULL,
+                    silhouette_score REAL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (space_id) REFERENCES embedding_spaces (id)
+                )
+            ''')
         
-        # Model performance table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS model_performance (
-                id TEXT PRIMARY KEY,
-                model_name TEXT NOT NULL,
-                embedding_type TEXT NOT NULL,
-                avg_embedding_time REAL NOT NULL,
-                avg_search_time REAL NOT NULL,
-                accuracy_score REAL,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # Similarity cache table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS similarity_cache (
+                    id TEXT PRIMARY KEY,
+                    content_id_1 TEXT NOT NULL,
+                    content_id_2 TEXT NOT NULL,
+                    similarity_score REAL NOT NULL,
+                    similarity_metric TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    expires_at DATETIME NOT NULL,
+                    UNIQUE(content_id_1, content_id_2, similarity_metric)
+                )
+            ''')
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_space ON embeddings(space_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_content ON embeddings(content_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_type ON embeddings(embedding_type)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_hash ON embeddings(content_hash)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_space ON search_history(space_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_type ON search_history(embedding_type)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_clustering_space ON clustering_results(space_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_similarity_content1 ON similarity_cache(content_id_1)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_similarity_content2 ON similarity_cache(content_id_2)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_performance_model ON model_performance(model_name)')
+            # Model performance table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS model_performance (
+                    id TEXT PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    embedding_type TEXT NOT NULL,
+                    avg_embedding_time REAL NOT NULL,
+                    avg_search_time REAL NOT NULL,
+                    accuracy_score REAL,
+                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
+            # Create indexes
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_space ON embeddings(space_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_content ON embeddings(content_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_type ON embeddings(embedding_type)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_hash ON embeddings(content_hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_space ON search_history(space_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_type ON search_history(embedding_type)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_clustering_space ON clustering_results(space_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_similarity_content1 ON similarity_cache(content_id_1)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_similarity_content2 ON similarity_cache(content_id_2)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_performance_model ON model_performance(model_name)')
     
     def _load_embedding_models(self):
         """Load pre-trained embedding models"""
@@ -326,10 +323,7 @@ class SpacebaseEmbeddingSystem:
     async def create_embedding_space(self, space: EmbeddingSpace) -> str:
         """Create a new embedding space"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.db.execute('''
                 INSERT INTO embedding_spaces 
                 (id, name, description, embedding_types, dimension, index_type,
                  similarity_metric, model_configs)
@@ -345,9 +339,6 @@ class SpacebaseEmbeddingSystem:
                 json.dumps(space.model_configs)
             ))
             
-            conn.commit()
-            conn.close()
-            
             # Create FAISS index
             await self._create_faiss_index(space)
             
@@ -0,0 +1,438 @@
+"""
+SQLite Storage Layer
+Shared bounded connection pool with WAL, group-committed write-behind queue and statement latency metrics
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers no longer block on the writer
+    'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+    'busy_timeout': 5000,  # ms to wait on a lock instead of failing
+    'cache_size': -16000,  # 16 MB page cache per connection
+    'temp_store': 'MEMORY',
+    'mmap_size': 1 << 28
+}
+
+class StatementStats:
+    """Latency of one statement shape: totals plus a window of recent samples"""
+
+    def __init__(self, window: int = 512):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float, failed: bool = False):
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        samples = sorted(self.samples)
+        def percentile(fraction: float) -> float:
+            return 1000 * samples[min(len(samples) - 1, int(fraction * len(samples)))] if samples else 0.0
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': 1000 * self.total_seconds / self.count if self.count else 0.0,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': 1000 * self.max_seconds
+        }
+
+class TimedCursor:
+    """sqlite3 cursor whose execute calls are timed per statement"""
+
+    def __init__(self, database: 'SQLiteDatabase', cursor: sqlite3.Cursor):
+        self.database = database
+        self.cursor = cursor
+
+    def execute(self, sql: str, parameters: Sequence[Any] = ()) -> 'TimedCursor':
+        with self.database._timed(sql):
+            self.cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Sequence[Any]]) -> 'TimedCursor':
+        with self.database._timed(sql):
+            self.cursor.executemany(sql, seq_of_parameters)
+        return self
+
+    def fetchone(self) -> Optional[Tuple]:
+        return self.cursor.fetchone()
+
+    def fetchall(self) -> List[Tuple]:
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size: int = 1) -> List[Tuple]:
+        return self.cursor.fetchmany(size)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(self.cursor)
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self.cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self.cursor.rowcount
+
+class StatementResult:
+    """Rows and counters of a statement run outside a transaction, read before its connection went back"""
+
+    def __init__(self, cursor: TimedCursor):
+        self.rows = cursor.fetchall()
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = cursor.rowcount
+        self.position = 0
+
+    def fetchone(self) -> Optional[Tuple]:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self) -> List[Tuple]:
+        return self.fetchmany(len(self.rows))
+
+    def fetchmany(self, size: int = 1) -> List[Tuple]:
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(self.fetchall())
+
+class SQLiteDatabase:
+    """
+    One SQLite file shared by every service and thread that uses it
+
+    Connections are pooled: at most ``max_connections`` are open, each opened
+    with WAL and the pragmas above. A thread checks one out for a statement
+    or a transaction and returns it afterwards, so statements stay in the
+    connection's prepared-statement cache instead of being re-parsed by a
+    fresh connection, and a server starting a thread per request does not
+    open a connection per thread. When all are in use, callers wait up to
+    ``pool_timeout`` seconds.
+
+    ``write``/``write_many`` are write-behind: statements are queued and a
+    single writer thread commits them in batches of up to ``batch_size``,
+    waiting at most ``flush_interval`` seconds for a batch to fill. Use them
+    for append-only data (metrics, history, logs); anything read back right
+    away goes through ``execute`` or ``transaction``, or call ``flush`` first.
+    Every statement's latency is recorded by normalised SQL in ``get_stats``.
+    """
+
+    def __init__(self, path: str, pragmas: Optional[Dict[str, Any]] = None, batch_size: int = 512,
+                 flush_interval: float = 0.01, statement_cache_size: int = 256, max_connections: int = 8,
+                 pool_timeout: float = 30.0):
+        self.path = path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.statement_cache_size = statement_cache_size
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.pool_changed = threading.Condition(threading.Lock())
+        self.idle: List[sqlite3.Connection] = []
+        self.open_connections = 0
+        self.checkouts = 0
+        self.waits = 0
+
+        self.write_queue: queue.Queue = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+        self.writes_done = threading.Condition()
+        self.writes_queued = 0
+        self.writes_committed = 0
+        self.batches = 0
+
+        self.statement_stats: Dict[str, StatementStats] = {}
+        self.closed = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    # Connections
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the block; nested blocks on a thread share it"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+        connection = self._checkout()
+        self.local.connection = connection
+        self.local.depth = 0
+        try:
+            yield connection
+        finally:
+            self.local.connection = None
+            self._checkin(connection)
+
+    def execute(self, sql: str, parameters: Sequence[Any] = ()) -> Union[TimedCursor, StatementResult]:
+        """Run one statement now; outside a transaction it commits on its own
+
+        Inside a transaction the cursor is returned; outside one the rows are
+        read first, so the connection can go back to the pool.
+        """
+        if getattr(self.local, 'connection', None) is not None:
+            return TimedCursor(self, self.local.connection.cursor()).execute(sql, parameters)
+        with self.connection() as connection:
+            return StatementResult(TimedCursor(self, connection.cursor()).execute(sql, parameters))
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Sequence[Any]]):
+        with self.transaction() as cursor:
+            cursor.executemany(sql, seq_of_parameters)
+
+    def query(self, sql: str, parameters: Sequence[Any] = ()) -> List[Tuple]:
+        return self.execute(sql, parameters).fetchall()
+
+    def query_one(self, sql: str, parameters: Sequence[Any] = ()) -> Optional[Tuple]:
+        return self.execute(sql, parameters).fetchone()
+
+    @contextmanager
+    def transaction(self) -> Iterator[TimedCursor]:
+        """Commit everything run on the yielded cursor together, or roll it all back
+
+        Nested blocks on the same thread join the outermost transaction.
+        """
+        with self.connection() as connection:
+            outermost = self.local.depth == 0
+            if outermost:
+                connection.execute("BEGIN IMMEDIATE")
+            self.local.depth += 1
+            try:
+                yield TimedCursor(self, connection.cursor())
+            except BaseException:
+                self.local.depth -= 1
+                if outermost:
+                    connection.execute("ROLLBACK")
+                raise
+            else:
+                self.local.depth -= 1
+                if outermost:
+                    connection.execute("COMMIT")
+
+    def _checkout(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.pool_timeout
+        with self.pool_changed:
+            while True:
+                if self.closed:
+                    raise sqlite3.ProgrammingError(f"Database {self.path} is closed")
+                if self.idle:
+                    self.checkouts += 1
+                    return self.idle.pop()
+                if self.open_connections < self.max_connections:
+                    self.open_connections += 1
+                    self.checkouts += 1
+                    break
+                self.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.pool_changed.wait(remaining):
+                    raise sqlite3.OperationalError(
+                        f"No free connection to {self.path} after {self.pool_timeout}s")
+        try:
+            return self._open()
+        except BaseException:
+            with self.pool_changed:
+                self.open_connections -= 1
+                self.pool_changed.notify()
+            raise
+
+    def _checkin(self, connection: sqlite3.Connection):
+        if connection.in_transaction:
+            connection.rollback()
+        with self.pool_changed:
+            if self.closed:
+                connection.close()
+                self.open_connections -= 1
+            else:
+                self.idle.append(connection)
+            self.pool_changed.notify()
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                     cached_statements=self.statement_cache_size,
+                                     timeout=self.pragmas['busy_timeout'] / 1000)
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+    # Write-behind queue
+
+    def write(self, sql: str, parameters: Sequence[Any] = ()):
+        """Queue a statement for the next group commit"""
+        self._enqueue((sql, parameters, False))
+
+    def write_many(self, sql: str, seq_of_parameters: Iterable[Sequence[Any]]):
+        """Queue a statement once per parameter row, committed in one batch"""
+        rows = list(seq_of_parameters)
+        if rows:
+            self._enqueue((sql, rows, True))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write queued so far is committed; False on timeout"""
+        with self.writes_done:
+            target = self.writes_queued
+            return self.writes_done.wait_for(lambda: self.writes_committed >= target, timeout)
+
+    def close(self):
+        """Commit queued writes, stop the writer and close every connection"""
+        if self.closed:
+            return
+        if self.writer_thread is not None:
+            self.write_queue.put(None)
+            self.writer_thread.join(timeout=30)
+        # Idle connections close now, checked-out ones when they come back
+        with self.pool_changed:
+            self.closed = True
+            for connection in self.idle:
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self.open_connections -= len(self.idle)
+            self.idle.clear()
+            self.pool_changed.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            statements = {sql: stats.summary() for sql, stats in self.statement_stats.items()}
+        return {
+            'path': self.path,
+            'connections': self.open_connections,
+            'idle_connections': len(self.idle),
+            'checkouts': self.checkouts,
+            'pool_waits': self.waits,
+            'writes_queued': self.writes_queued - self.writes_committed,
+            'writes_committed': self.writes_committed,
+            'batches': self.batches,
+            'mean_batch_size': self.writes_committed / self.batches if self.batches else 0.0,
+            'statements': statements
+        }
+
+    def _enqueue(self, item: Tuple[str, Any, bool]):
+        if self.closed:
+            raise sqlite3.ProgrammingError(f"Database {self.path} is closed")
+        with self.writes_done:
+            self.writes_queued += 1
+        if self.writer_thread is None:
+            with self.lock:
+                if self.writer_thread is None:
+                    self.writer_thread = threading.Thread(target=self._writer, daemon=True,
+                                                          name=f"sqlite-writer-{os.path.basename(self.path)}")
+                    self.writer_thread.start()
+        self.write_queue.put(item)
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            rows = len(item[1]) if item[2] else 1
+            deadline = time.monotonic() + self.flush_interval
+            while rows < self.batch_size:
+                try:
+                    item = self.write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item[1]) if item[2] else 1
+
+            self._commit_batch(batch)
+            with self.writes_done:
+                self.writes_committed += len(batch)
+                self.batches += 1
+                self.writes_done.notify_all()
+
+    def _commit_batch(self, batch: List[Tuple[str, Any, bool]]):
+        try:
+            with self.transaction() as cursor:
+                for sql, parameters, many in batch:
+                    if many:
+                        cursor.executemany(sql, parameters)
+                    else:
+                        cursor.execute(sql, parameters)
+        except sqlite3.Error as e:
+            # One bad statement shouldn't drop the rest of the batch
+            logger.warning(f"Group commit failed on {self.path}, retrying statements individually: {e}")
+            for sql, parameters, many in batch:
+                try:
+                    with self.transaction() as cursor:
+                        if many:
+                            cursor.executemany(sql, parameters)
+                        else:
+                            cursor.execute(sql, parameters)
+                except sqlite3.Error as statement_error:
+                    logger.error(f"Dropped write to {self.path}: {statement_error}")
+
+    @contextmanager
+    def _timed(self, sql: str):
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            key = _normalize_sql(sql)
+            with self.lock:
+                stats = self.statement_stats.get(key)
+                if stats is None:
+                    stats = self.statement_stats[key] = StatementStats()
+                stats.record(elapsed, failed)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(" ", sql).strip()[:160]
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+def get_database(path: str, **options) -> SQLiteDatabase:
+    """The process-wide SQLiteDatabase for a file, created on first request
+
+    Options only apply to the call that creates it. Queued writes are
+    flushed at interpreter exit.
+    """
+    key = os.path.abspath(path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None or database.closed:
+            database = _databases[key] = SQLiteDatabase(path, **options)
+        return database
+
+@atexit.register
+def _close_databases():
+    with _databases_lock:
+        databases = list(_databases.values())
+    for database in databases:
+        database.close()
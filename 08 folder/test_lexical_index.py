@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Lexical Index Tests
+BM25 filtering and the ordering of rank-fused hybrid results
+"""
+
+import unittest
+from dataclasses import dataclass
+
+from lexical_index import BM25Index, order_by_fused_score, reciprocal_rank_fusion
+
+@dataclass
+class FusedResult:
+    doc_id: str
+    similarity_score: float
+    relevance_score: float
+
+class TestHybridOrdering(unittest.TestCase):
+    """A hit only BM25 found must survive post-processing in fused order"""
+
+    def test_lexical_only_hit_survives(self):
+        lexical_hits = [('error-code-E42', 12.5), ('manual', 3.1)]
+        dense_hits = [('manual', 0.91), ('faq', 0.88)]
+        fused = reciprocal_rank_fusion([lexical_hits, dense_hits], limit=3)
+        dense_scores = dict(dense_hits)
+        results = [FusedResult(doc_id, dense_scores.get(doc_id, 0.0), score) for doc_id, score in fused]
+
+        ordered = order_by_fused_score(results, limit=3)
+
+        self.assertEqual([result.doc_id for result in ordered], ['manual', 'error-code-E42', 'faq'])
+        lexical_only = ordered[1]
+        self.assertEqual(lexical_only.similarity_score, 0.0)
+
+    def test_limit(self):
+        results = [FusedResult(str(i), 0.0, 1.0 / (60 + i)) for i in range(5, 0, -1)]
+        self.assertEqual([result.doc_id for result in order_by_fused_score(results, limit=2)], ['1', '2'])
+
+class TestFilteredSearch(unittest.TestCase):
+    """Restricting BM25 to allowed IDs before ranking still yields k hits"""
+
+    def setUp(self):
+        self.index = BM25Index(block_size=4)
+        # The best matches are all outside the allowed set
+        self.index.add_documents((f'blocked-{i}', 'vector vector vector search') for i in range(50))
+        self.index.add_documents((f'allowed-{i}', 'vector search ' + 'filler ' * i) for i in range(10))
+        self.allowed = {f'allowed-{i}' for i in range(10)}
+
+    def test_returns_k_allowed_hits(self):
+        hits = self.index.search('vector search', k=5, allowed=self.allowed)
+        self.assertEqual(len(hits), 5)
+        self.assertTrue(all(doc_id in self.allowed for doc_id, _ in hits))
+        self.assertEqual(hits[0][0], 'allowed-0')
+
+    def test_removed_documents_stay_excluded(self):
+        self.index.remove_document('allowed-0')
+        hits = self.index.search('vector search', k=20, allowed=self.allowed)
+        self.assertEqual(len(hits), 9)
+        self.assertNotIn('allowed-0', [doc_id for doc_id, _ in hits])
+
+    def test_empty_allowed_set(self):
+        self.assertEqual(self.index.search('vector search', k=5, allowed=[]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+SQLite Store Tests
+Bounded connection pool shared by short-lived threads
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from sqlite_store import SQLiteDatabase
+
+class TestConnectionPool(unittest.TestCase):
+    """Connections are checked out per statement or transaction and reused across threads"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = SQLiteDatabase(os.path.join(self.directory, 'pool.db'), max_connections=3)
+        self.db.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)')
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def test_thread_per_request_stays_bounded(self):
+        def request(number):
+            self.db.execute('INSERT INTO items (value) VALUES (?)', (str(number),))
+            self.db.query_one('SELECT COUNT(*) FROM items')
+
+        threads = [threading.Thread(target=request, args=(number,)) for number in range(100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.db.query_one('SELECT COUNT(*) FROM items'), (100,))
+        self.assertLessEqual(self.db.get_stats()['connections'], 3)
+
+    def test_nested_transaction_rolls_back_together(self):
+        with self.assertRaises(ValueError):
+            with self.db.transaction() as cursor:
+                cursor.execute("INSERT INTO items (value) VALUES ('outer')")
+                with self.db.transaction() as inner:
+                    inner.execute("INSERT INTO items (value) VALUES ('inner')")
+                raise ValueError
+        self.assertEqual(self.db.query('SELECT value FROM items'), [])
+        self.assertEqual(self.db.execute("INSERT INTO items (value) VALUES ('x')").lastrowid, 1)
+
+    def test_close_releases_connections(self):
+        self.db.close()
+        self.assertEqual(self.db.get_stats()['connections'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
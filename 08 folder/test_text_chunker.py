@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Text Chunker Tests
+Key paths of JSON chunks split below the top level
+"""
+
+import json
+import random
+import unittest
+
+from text_chunker import ChunkingEngine, materialize
+
+class TestJsonKeyPaths(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ChunkingEngine(max_tokens=20, overlap=2)
+        self.document = json.dumps({
+            "title": "x",
+            "config": {
+                "servers": [{"host": "a", "port": 1}, {"host": "b", "port": 2}],
+                "limits": {"cpu": 4, "desc": "word " * 40}
+            }
+        }, indent=1)
+
+    def _chunks(self, buffer):
+        spans = list(self.engine.json_spans(buffer))
+        return materialize(buffer, spans, self.engine.json_key_paths(buffer, spans))
+
+    def test_nested_chunks_carry_their_path(self):
+        chunks = self._chunks(self.document)
+        self.assertEqual(chunks[0], '"title": "x"')
+        self.assertTrue(chunks[1].startswith('config.servers[0]: '))
+        self.assertTrue(chunks[2].startswith('config.servers[1]: '))
+        self.assertTrue(chunks[3].startswith('config.limits: "cpu": 4'))
+        # Windows of a long value name the member they belong to
+        self.assertTrue(all(chunk.startswith('config.limits.desc: word') for chunk in chunks[5:]))
+
+    def test_bytes_match_str(self):
+        self.assertEqual(self._chunks(self.document.encode('utf-8')), self._chunks(self.document))
+
+    def test_plain_text_has_no_paths(self):
+        text = "not json, just {braces} and [brackets]"
+        spans = list(self.engine.json_spans(text))
+        self.assertEqual(self.engine.json_key_paths(text, spans), [""] * len(spans))
+
+class TestTokenBudget(unittest.TestCase):
+    """Packed chunks count the separators between merged pieces"""
+
+    def setUp(self):
+        self.engine = ChunkingEngine(max_tokens=8, overlap=1)
+
+    def _assert_within_budget(self, buffer, doc_type):
+        for start, end in self.engine.spans(buffer, doc_type):
+            self.assertLessEqual(self.engine.count_tokens(buffer, start, end), 8, buffer[start:end])
+
+    def test_json_array(self):
+        buffer = json.dumps(list(range(1, 13)))
+        spans = list(self.engine.json_spans(buffer))
+        self.assertGreater(len(spans), 1)
+        self._assert_within_budget(buffer, "structured")
+
+    def test_random_documents(self):
+        rng = random.Random(0)
+        words = ["alpha", "b", "x1", "42", "word"]
+        for _ in range(200):
+            value = {f"k{i}": [rng.choice(words) for _ in range(rng.randint(0, 6))] for i in range(rng.randint(1, 6))}
+            self._assert_within_budget(json.dumps(value), "structured")
+            lines = "\n".join(" ".join(rng.choice(words) for _ in range(rng.randint(0, 9)))
+                              for _ in range(rng.randint(1, 12)))
+            self._assert_within_budget(lines, "code")
+            self._assert_within_budget(lines, "text")
+
+if __name__ == '__main__':
+    unittest.main()
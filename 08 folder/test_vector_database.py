@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Vector Index Tests
+Tombstone compaction and snapshot segments of VectorIndex
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from vector_database import IndexConfig, IndexType, MetricType, VectorIndex
+
+DIMENSION = 16
+
+def make_index(index_type: IndexType, **parameters) -> VectorIndex:
+    parameters = {'nlist': 16, 'm': 4, 'min_compaction_size': 1, **parameters}
+    return VectorIndex(IndexConfig(index_type, DIMENSION, MetricType.EUCLIDEAN, parameters))
+
+class TestSealedCompaction(unittest.TestCase):
+    """Dead vectors in sealed, memory-mapped segments are reclaimed by compact()"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.vectors = np.random.default_rng(0).random((3000, DIMENSION), dtype=np.float32)
+        self.ids = [f'vec-{i}' for i in range(len(self.vectors))]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _build(self, index_type: IndexType) -> VectorIndex:
+        index = make_index(index_type)
+        self.assertTrue(index.add_vectors(self.vectors[:2000], self.ids[:2000]))
+        self.assertTrue(index.save(self.directory))
+        self.assertTrue(index.add_vectors(self.vectors[2000:], self.ids[2000:]))
+        self.assertTrue(index.save(self.directory))
+        self.assertTrue(index.remove_vectors(self.ids[::3]))
+        return index
+
+    def _assert_compacts(self, index_type: IndexType):
+        index = self._build(index_type)
+        queries = self.vectors[1::3][:20]
+        before = index.search_batch(queries, k=5)
+        self.assertTrue(index.needs_compaction())
+
+        self.assertEqual(index.compact(), 1000)
+        stats = index.get_stats()
+        self.assertEqual(stats['dead_vectors'], 0)
+        self.assertEqual(stats['total_vectors'], 2000)
+        self.assertFalse(index.needs_compaction())
+        self.assertEqual(index.search_batch(queries, k=5), before)
+
+        # The rebuilt segment snapshots and reloads like any other
+        self.assertTrue(index.save(self.directory))
+        reloaded = make_index(index_type)
+        self.assertTrue(reloaded.load(self.directory))
+        self.assertEqual(reloaded.search_batch(queries, k=5), before)
+
+    def test_ivf_flat(self):
+        self._assert_compacts(IndexType.IVF_FLAT)
+
+    def test_ivf_pq(self):
+        self._assert_compacts(IndexType.IVF_PQ)
+
+    def test_flat(self):
+        self._assert_compacts(IndexType.FLAT)
+
+    def test_ivf_filtered_search_reconstructs(self):
+        index = self._build(IndexType.IVF_FLAT)
+        index.add_vectors(self.vectors[:1], ['tagged'], [{'tag': 'x'}])
+        self.assertEqual([hit[0] for hit in index.search(self.vectors[0], k=3, filters={'tag': 'x'})], ['tagged'])
+
+class TestSegmentMerge(unittest.TestCase):
+    """Repeated delta snapshots are merged by size tier"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_segment_count_stays_logarithmic(self):
+        vectors = np.random.default_rng(1).random((2000, DIMENSION), dtype=np.float32)
+        index = make_index(IndexType.IVF_FLAT)
+        for start in range(0, len(vectors), 20):
+            index.add_vectors(vectors[start:start + 20], [f'vec-{i}' for i in range(start, start + 20)])
+            self.assertTrue(index.save(self.directory))
+            sizes = [segment.ntotal for segment in index.sealed_segments]
+            self.assertTrue(all(older > 2 * newer for older, newer in zip(sizes, sizes[1:])), sizes)
+        self.assertLessEqual(len(index.sealed_segments), 7)
+
+        # Only the segments in the manifest are left on disk
+        with open(os.path.join(self.directory, VectorIndex.MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        on_disk = {name.split('.')[0] for name in os.listdir(self.directory) if name.startswith('segment-')}
+        self.assertEqual(on_disk, set(manifest['segments']))
+
+        reloaded = make_index(IndexType.IVF_FLAT)
+        self.assertTrue(reloaded.load(self.directory))
+        self.assertEqual(reloaded.get_stats()['total_vectors'], 2000)
+        self.assertEqual(reloaded.search(vectors[1234], k=1)[0][0], 'vec-1234')
+
+    def test_merge_drops_dead_vectors(self):
+        vectors = np.random.default_rng(2).random((200, DIMENSION), dtype=np.float32)
+        index = make_index(IndexType.FLAT)
+        index.add_vectors(vectors[:100], [f'vec-{i}' for i in range(100)])
+        index.save(self.directory)
+        index.remove_vectors([f'vec-{i}' for i in range(50)])
+        index.add_vectors(vectors[100:], [f'vec-{i}' for i in range(100, 200)])
+        index.save(self.directory)
+
+        stats = index.get_stats()
+        self.assertEqual(len(index.sealed_segments), 1)
+        self.assertEqual((stats['total_vectors'], stats['dead_vectors']), (150, 0))
+
+class TestSnapshotLoad(unittest.TestCase):
+    """Loading maps IDs from arrays and defers metadata until it is used"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.vectors = np.random.default_rng(3).random((300, DIMENSION), dtype=np.float32)
+        index = make_index(IndexType.FLAT)
+        index.add_vectors(self.vectors, [f'vec-{i}' for i in range(300)],
+                          [{'group': i % 3, 'name': f'vec-{i}'} for i in range(300)])
+        index.save(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_metadata_is_loaded_on_first_use(self):
+        index = make_index(IndexType.FLAT)
+        self.assertTrue(index.load(self.directory))
+        self.assertEqual(len(index.metadata_index), 0)
+        self.assertEqual(index.search(self.vectors[7], k=1)[0][0], 'vec-7')
+
+        # Deleted before the metadata was parsed, so it never enters the index
+        index.remove_vectors(['vec-1'])
+        hits = index.search(self.vectors[1], k=100, filters={'group': 1})
+        self.assertEqual(len(hits), 99)
+        self.assertNotIn('vec-1', [vector_id for vector_id, _ in hits])
+        self.assertEqual(index.get_metadata(['vec-4'])['vec-4'], {'group': 1, 'name': 'vec-4'})
+
+    def test_snapshot_elsewhere_keeps_unparsed_metadata(self):
+        index = make_index(IndexType.FLAT)
+        index.load(self.directory)
+        copy_directory = os.path.join(self.directory, 'copy')
+        self.assertTrue(index.save(copy_directory))
+
+        copy = make_index(IndexType.FLAT)
+        self.assertTrue(copy.load(copy_directory))
+        self.assertEqual(copy.get_metadata(['vec-299'])['vec-299'], {'group': 2, 'name': 'vec-299'})
+
+if __name__ == '__main__':
+    unittest.main()
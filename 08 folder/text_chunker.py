@@ -0,0 +1,324 @@
+"""
+Offset-Based Chunking Engine
+Token-budget aware, zero-copy chunking of text, source code and JSON for the RAG system
+"""
+
+import mmap
+import re
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+Span = Tuple[int, int]
+Buffer = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+_WHITESPACE_BYTES = frozenset(b" \t\r\n\x0b\x0c")
+
+class _Patterns:
+    """Regexes compiled for both str and bytes-like buffers"""
+
+    def __init__(self, token: str):
+        self.token = re.compile(token)
+        self.definition = re.compile(
+            r'^[ \t]*(?:async[ \t]+def|def|class|function|const|let|var)[ \t]', re.MULTILINE
+        )
+        # Each match runs up to the next structural character outside a string (group 1)
+        self.json_structure = re.compile(r'[^"\[\]{},]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{},]*)*([\[\]{},])')
+        # Object member key right after "{" or ","
+        self.json_key = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*:')
+        self.non_space = re.compile(r'\S')
+
+        self.bytes_token = re.compile(token.encode('utf-8'))
+        self.bytes_definition = re.compile(self.definition.pattern.encode('utf-8'), re.MULTILINE)
+        self.bytes_json_structure = re.compile(self.json_structure.pattern.encode('utf-8'))
+        self.bytes_json_key = re.compile(self.json_key.pattern.encode('utf-8'))
+        self.bytes_non_space = re.compile(rb'\S')
+
+    def select(self, buffer: Buffer):
+        if isinstance(buffer, str):
+            return self.token, self.definition, self.json_structure, self.non_space
+        return self.bytes_token, self.bytes_definition, self.bytes_json_structure, self.bytes_non_space
+
+class ChunkingEngine:
+    """
+    Chunker that yields ``(start, end)`` offsets into the original buffer
+
+    Offsets are character offsets for ``str`` input and byte offsets for
+    bytes-like input (``bytes``, ``memoryview``, ``mmap``). No chunk text is
+    built while chunking; callers slice only the spans they need, and
+    ``chunks`` returns zero-copy memoryviews for bytes-like buffers.
+
+    Chunks hold at most ``max_tokens`` tokens as counted by ``token_pattern``
+    (words and punctuation by default). Text is windowed with ``overlap``
+    tokens of overlap; code is split at definitions and JSON at members, with
+    small neighbours packed together and oversized pieces split further.
+    """
+
+    DEFAULT_TOKEN_PATTERN = r'\w+|[^\w\s]'
+
+    def __init__(self, max_tokens: int = 512, overlap: int = 50,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN):
+        if overlap >= max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.patterns = _Patterns(token_pattern)
+
+    def spans(self, buffer: Buffer, doc_type: str = "text") -> Iterator[Span]:
+        """Chunk spans for a document type ("code", "structured" or any text type)"""
+        if doc_type == "code":
+            return self.code_spans(buffer)
+        if doc_type == "structured":
+            return self.json_spans(buffer)
+        return self.text_spans(buffer)
+
+    def chunks(self, buffer: Buffer, doc_type: str = "text") -> Iterator[Union[str, memoryview]]:
+        """Chunk contents: str slices for str input, memoryviews otherwise"""
+        view = buffer if isinstance(buffer, str) else memoryview(buffer)
+        for start, end in self.spans(buffer, doc_type):
+            yield view[start:end]
+
+    def file_spans(self, path: str, doc_type: str = "text") -> Iterator[Span]:
+        """Stream byte-offset spans over a memory-mapped file"""
+        with open(path, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return  # empty file
+            with mapped:
+                yield from self.spans(mapped, doc_type)
+
+    def count_tokens(self, buffer: Buffer, start: int = 0, end: Optional[int] = None,
+                     limit: Optional[int] = None) -> int:
+        """Tokens in buffer[start:end]; with a limit, counting stops just past it"""
+        token, _, _, _ = self.patterns.select(buffer)
+        end = len(buffer) if end is None else end
+        if limit is None or end - start <= 16 * limit:
+            return len(token.findall(buffer, start, end))
+        return sum(1 for _ in islice(token.finditer(buffer, start, end), limit + 1))
+
+    # Text
+
+    def text_spans(self, buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Span]:
+        """Sliding token windows of max_tokens with overlap"""
+        token, _, _, _ = self.patterns.select(buffer)
+        end = len(buffer) if end is None else end
+        step = self.max_tokens - self.overlap
+        window: deque = deque()
+        fresh = 0
+
+        for match in token.finditer(buffer, start, end):
+            window.append(match.span())
+            fresh += 1
+            if len(window) == self.max_tokens:
+                yield (window[0][0], window[-1][1])
+                for _ in range(step):
+                    window.popleft()
+                fresh = 0
+
+        # Trailing tokens not yet covered by an emitted window
+        if fresh:
+            yield (window[0][0], window[-1][1])
+
+    # Code
+
+    def code_spans(self, buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Span]:
+        """Split at function/class definitions, packing small ones up to the budget"""
+        _, definition, _, _ = self.patterns.select(buffer)
+        end = len(buffer) if end is None else end
+
+        def segments() -> Iterator[Span]:
+            segment_start = start
+            for match in definition.finditer(buffer, start, end):
+                if match.start() > segment_start:
+                    yield (segment_start, match.start())
+                segment_start = match.start()
+            if segment_start < end:
+                yield (segment_start, end)
+
+        return self._pack(buffer, segments(), self.text_spans)
+
+    # JSON
+
+    def json_spans(self, buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Span]:
+        """Split JSON at container members, descending into members over budget"""
+        _, _, _, non_space = self.patterns.select(buffer)
+        end = len(buffer) if end is None else end
+        first = non_space.search(buffer, start, end)
+        if first is None:
+            return iter(())
+        if self._char(buffer, first.start()) not in ('{', '['):
+            # Not a JSON container; fall back to text chunking
+            return self.text_spans(buffer, start, end)
+        return self._pack(buffer, self._json_members(buffer, first.start(), end), self._split_json_member)
+
+    def _json_members(self, buffer: Buffer, start: int, end: int) -> Iterator[Span]:
+        """Spans of the members of the first container at or after start"""
+        _, _, structure, _ = self.patterns.select(buffer)
+        if isinstance(buffer, str):
+            opening, closing = ('{', '['), ('}', ']')
+        else:
+            opening, closing = (b'{', b'['), (b'}', b']')
+        depth = 0
+        item_start = start
+
+        for match in structure.finditer(buffer, start, end):
+            position = match.start(1)
+            char = match.group(1)
+            if char in opening:
+                depth += 1
+                if depth == 1:
+                    item_start = position + 1
+            elif char in closing:
+                depth -= 1
+                if depth == 0:
+                    yield (item_start, position)
+                    return
+            elif depth == 1:  # comma between members
+                yield (item_start, position)
+                item_start = position + 1
+
+        # Truncated document: emit what is left of the open member
+        if depth > 0:
+            yield (item_start, end)
+
+    def json_key_paths(self, buffer: Buffer, spans: Sequence[Span]) -> List[str]:
+        """Dotted key path of the container holding each span, e.g. "config.servers[2]"
+
+        Array paths end in the index of the span's first element. Spans that
+        start part-way into an object member, such as token windows of a long
+        value, also get the member's own key. Top-level object members get "".
+        Paths are found in one forward pass over the structure of the buffer.
+        """
+        paths = [""] * len(spans)
+        _, _, structure, non_space = self.patterns.select(buffer)
+        first = non_space.search(buffer)
+        if first is None or self._char(buffer, first.start()) not in ('{', '['):
+            return paths
+
+        # One frame per open container: [is_object, current key or index, start of current member]
+        stack: List[list] = []
+        matches = structure.finditer(buffer)
+        match = next(matches, None)
+        for index in sorted(range(len(spans)), key=lambda i: spans[i][0]):
+            start = spans[index][0]
+            while match is not None and match.start(1) < start:
+                self._enter_json_member(buffer, stack, match.start(1))
+                match = next(matches, None)
+            paths[index] = self._key_path(buffer, stack, start)
+        return paths
+
+    def _enter_json_member(self, buffer: Buffer, stack: List[list], position: int):
+        char = self._char(buffer, position)
+        if char in '}]':
+            if stack:
+                stack.pop()
+            return
+        if char in '{[':
+            stack.append([char == '{', -1, position + 1])
+        elif not stack:
+            return
+        frame = stack[-1]
+        frame[2] = position + 1
+        frame[1] = self._json_key(buffer, position + 1) if frame[0] else frame[1] + 1
+
+    def _json_key(self, buffer: Buffer, position: int) -> Optional[str]:
+        pattern = self.patterns.json_key if isinstance(buffer, str) else self.patterns.bytes_json_key
+        match = pattern.match(buffer, position)
+        if match is None:
+            return None
+        key = match.group(1)
+        return key if isinstance(key, str) else key.decode('utf-8', errors='replace')
+
+    def _key_path(self, buffer: Buffer, stack: List[list], start: int) -> str:
+        _, _, _, non_space = self.patterns.select(buffer)
+        frames = stack
+        if stack and stack[-1][0] and non_space.search(buffer, stack[-1][2], start) is None:
+            # The span starts at an object member, whose text already shows its key
+            frames = stack[:-1]
+        path = ""
+        for is_object, key, _ in frames:
+            if key is None:
+                continue
+            if is_object:
+                path = f"{path}.{key}" if path else key
+            else:
+                path = f"{path}[{key}]"
+        return path
+
+    def _split_json_member(self, buffer: Buffer, start: int, end: int) -> Iterator[Span]:
+        """Break a member over budget into its own members, else by token windows"""
+        _, _, structure, _ = self.patterns.select(buffer)
+        match = structure.search(buffer, start, end)
+        if match is not None and self._char(buffer, match.start(1)) in ('{', '['):
+            yield from self._pack(buffer, self._json_members(buffer, match.start(1), end),
+                                  self._split_json_member)
+            return
+        yield from self.text_spans(buffer, start, end)
+
+    # Packing
+
+    def _pack(self, buffer: Buffer, pieces: Iterator[Span],
+              split: Callable[[Buffer, int, int], Iterator[Span]]) -> Iterator[Span]:
+        """Merge consecutive pieces while they fit in max_tokens; split pieces over it"""
+        pack_start = pack_end = None
+
+        for piece_start, piece_end in pieces:
+            piece_start, piece_end = self._trim(buffer, piece_start, piece_end)
+            if piece_start >= piece_end:
+                continue
+            tokens = self.count_tokens(buffer, piece_start, piece_end, limit=self.max_tokens)
+
+            if tokens > self.max_tokens:
+                if pack_start is not None:
+                    yield (pack_start, pack_end)
+                    pack_start = None
+                yield from split(buffer, piece_start, piece_end)
+                continue
+
+            # Count the merged span as a whole, so separators between pieces are included
+            if pack_start is not None and \
+                    self.count_tokens(buffer, pack_start, piece_end, limit=self.max_tokens) <= self.max_tokens:
+                pack_end = piece_end
+            else:
+                if pack_start is not None:
+                    yield (pack_start, pack_end)
+                pack_start, pack_end = piece_start, piece_end
+
+        if pack_start is not None:
+            yield (pack_start, pack_end)
+
+    @staticmethod
+    def _char(buffer: Buffer, position: int) -> str:
+        if isinstance(buffer, str):
+            return buffer[position]
+        return chr(buffer[position])
+
+    @staticmethod
+    def _trim(buffer: Buffer, start: int, end: int) -> Span:
+        if isinstance(buffer, str):
+            while start < end and buffer[start].isspace():
+                start += 1
+            while end > start and buffer[end - 1].isspace():
+                end -= 1
+        else:
+            while start < end and buffer[start] in _WHITESPACE_BYTES:
+                start += 1
+            while end > start and buffer[end - 1] in _WHITESPACE_BYTES:
+                end -= 1
+        return start, end
+
+def materialize(buffer: Buffer, spans: Iterator[Span], prefixes: Optional[Sequence[str]] = None) -> List[str]:
+    """Decode spans to strings, e.g. for an embedding model
+
+    With prefixes (such as ``json_key_paths``), each non-empty prefix is
+    prepended to its chunk as "prefix: chunk".
+    """
+    if isinstance(buffer, str):
+        texts = [buffer[start:end] for start, end in spans]
+    else:
+        view = memoryview(buffer)
+        texts = [str(view[start:end], 'utf-8', errors='replace') for start, end in spans]
+    if prefixes is not None:
+        texts = [f"{prefix}: {text}" if prefix else text for prefix, text in zip(prefixes, texts)]
+    return texts
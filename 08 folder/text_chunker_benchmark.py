@@ -0,0 +1,113 @@
+"""
+Chunking Benchmarks
+Throughput of the offset-based chunking engine on multi-MB source and JSON files
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from text_chunker import ChunkingEngine
+
+def _legacy_chunk_code(content: str) -> List[str]:
+    """Line-by-line string concatenation chunker the engine replaced"""
+    chunks = []
+    current_chunk = ""
+    for line in content.split('\n'):
+        if line.strip().startswith(('def ', 'class ', 'function ', 'const ', 'let ', 'var ')):
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = line + '\n'
+        else:
+            current_chunk += line + '\n'
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+def _legacy_chunk_structured(content: str) -> List[str]:
+    """Recursive parsed-JSON chunker the engine replaced"""
+    chunks = []
+
+    def extract_chunks(obj, path=""):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                new_path = f"{path}.{key}" if path else key
+                if isinstance(value, (dict, list)):
+                    extract_chunks(value, new_path)
+                else:
+                    chunks.append(f"{new_path}: {value}")
+        elif isinstance(obj, list):
+            for i, item in enumerate(obj):
+                extract_chunks(item, f"{path}[{i}]")
+
+    extract_chunks(json.loads(content))
+    return chunks
+
+def _generate_source(target_bytes: int) -> str:
+    function = (
+        "def handler_{n}(request, context):\n"
+        "    payload = request.get('payload', {{}})\n"
+        "    for key, value in payload.items():\n"
+        "        context.log(key, value)\n"
+        "    return {{'status': 'ok', 'id': {n}}}\n\n"
+    )
+    parts, size, n = [], 0, 0
+    while size < target_bytes:
+        part = function.format(n=n)
+        parts.append(part)
+        size += len(part)
+        n += 1
+    # One very long function to exercise the oversized path
+    parts.append("def generated_table():\n" + "    row = [1, 2, 3, 4]\n" * 5_000)
+    return "".join(parts)
+
+def _generate_json(target_bytes: int) -> str:
+    records, size, n = [], 0, 0
+    while size < target_bytes:
+        record = {'id': n, 'name': f"user-{n}", 'tags': ['alpha', 'beta'],
+                  'profile': {'bio': "lorem ipsum dolor sit amet " * 4, 'score': n % 97}}
+        records.append(record)
+        size += 160
+        n += 1
+    return json.dumps({'records': records, 'count': n})
+
+def _time(function, *args) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = function(*args)
+    count = len(result) if isinstance(result, list) else sum(1 for _ in result)
+    return {'seconds': time.perf_counter() - start, 'chunks': count}
+
+def benchmark_chunking(target_mb: float = 8.0, max_tokens: int = 512) -> Dict[str, Any]:
+    """Compare the engine with the legacy chunkers on in-memory and memory-mapped input"""
+    engine = ChunkingEngine(max_tokens=max_tokens, overlap=50)
+    target_bytes = int(target_mb * 2 ** 20)
+    source = _generate_source(target_bytes)
+    document = _generate_json(target_bytes)
+
+    report = {
+        'source_mb': len(source) / 2 ** 20,
+        'json_mb': len(document) / 2 ** 20,
+        'code_legacy': _time(_legacy_chunk_code, source),
+        'code_engine': _time(lambda text: list(engine.code_spans(text)), source),
+        'json_legacy': _time(_legacy_chunk_structured, document),
+        'json_engine': _time(lambda text: list(engine.json_spans(text)), document)
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, content, doc_type in (('source.py', source, 'code'), ('data.json', document, 'structured')):
+            path = os.path.join(directory, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            report[f"{doc_type}_engine_mmap"] = _time(lambda p: list(engine.file_spans(p, doc_type)), path)
+
+    for key, value in report.items():
+        if isinstance(value, dict):
+            size_mb = report['source_mb'] if key.startswith('code') else report['json_mb']
+            value['mb_per_sec'] = size_mb / value['seconds'] if value['seconds'] else 0.0
+    return report
+
+if __name__ == "__main__":
+    for key, value in benchmark_chunking().items():
+        print(f"{key}: {value}")
@@ -24,6 +24,10 @@ import struct
 from concurrent.futures import ThreadPoolExecutor
 import heapq
 import math
+from contextlib import contextmanager
+
+from query_cache import QueryResultCache
+from lexical_index import BM25Index, reciprocal_rank_fusion
 
 class IndexType(Enum):
     FLAT = "flat"
@@ -66,8 +70,259 @@ class IndexConfig:
     metric: MetricType
     parameters: Dict[str, Any] = field(default_factory=dict)
     
+class ReadWriteLock:
+    """Reader-writer lock: searches share the lock, mutations hold it exclusively
+
+    ``with lock:`` takes the (re-entrant) write side, ``with lock.read():`` the
+    read side. Waiting writers block new readers so upserts are not starved.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+    
+    def __enter__(self):
+        self.acquire_write()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release_write()
+    
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+    
+    def release_write(self):
+        with self._condition:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+    
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._condition:
+            # A writer may read its own state without releasing the write side
+            shared = self._writer != me
+            if shared:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        try:
+            yield self
+        finally:
+            if shared:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+class NumericColumn:
+    """Sorted numeric column with an unsorted append buffer for range lookups"""
+    
+    def __init__(self, merge_threshold: int = 4096):
+        self.sorted_values = np.empty(0, dtype=np.float64)
+        self.sorted_ids = np.empty(0, dtype=np.int64)
+        self.pending_values: List[float] = []
+        self.pending_ids: List[int] = []
+        self.dead: Set[int] = set()
+        self.merge_threshold = merge_threshold
+    
+    def add(self, int_id: int, value: float):
+        self.pending_values.append(float(value))
+        self.pending_ids.append(int_id)
+        if len(self.pending_ids) >= self.merge_threshold:
+            self._merge()
+    
+    def remove(self, int_id: int):
+        self.dead.add(int_id)
+        if len(self.dead) >= self.merge_threshold:
+            self._merge()
+    
+    def range(self, low: float = -math.inf, high: float = math.inf,
+              include_low: bool = True, include_high: bool = True) -> np.ndarray:
+        """IDs whose value lies within the given bounds"""
+        left = np.searchsorted(self.sorted_values, low, side='left' if include_low else 'right')
+        right = np.searchsorted(self.sorted_values, high, side='right' if include_high else 'left')
+        ids = self.sorted_ids[left:right]
+        
+        if self.pending_ids:
+            values = np.asarray(self.pending_values)
+            mask = (values >= low) if include_low else (values > low)
+            mask &= (values <= high) if include_high else (values < high)
+            ids = np.concatenate([ids, np.asarray(self.pending_ids, dtype=np.int64)[mask]])
+        
+        if self.dead:
+            ids = ids[~np.isin(ids, np.fromiter(self.dead, dtype=np.int64, count=len(self.dead)))]
+        return ids
+    
+    def _merge(self):
+        """Fold pending appends into the sorted arrays and drop dead IDs"""
+        values = np.concatenate([self.sorted_values, np.asarray(self.pending_values, dtype=np.float64)])
+        ids = np.concatenate([self.sorted_ids, np.asarray(self.pending_ids, dtype=np.int64)])
+        if self.dead:
+            live = ~np.isin(ids, np.fromiter(self.dead, dtype=np.int64, count=len(self.dead)))
+            values, ids = values[live], ids[live]
+        order = np.argsort(values, kind='stable')
+        self.sorted_values, self.sorted_ids = values[order], ids[order]
+        self.pending_values, self.pending_ids = [], []
+        self.dead = set()
+
+class MetadataIndex:
+    """Columnar in-memory metadata index keyed by integer vector ID
+
+    Scalar and list values are indexed as inverted postings, numeric values
+    additionally as sorted columns so that range filters are answered with a
+    binary search. ``select`` turns a filter dict into the array of allowed
+    IDs that is handed to FAISS before the vector search runs.
+    """
+    
+    RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte'}
+    
+    def __init__(self):
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[Any, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self.numeric_columns: Dict[str, NumericColumn] = defaultdict(NumericColumn)
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def add(self, int_id: int, metadata: Dict[str, Any]):
+        """Index the metadata of a live vector"""
+        self.records[int_id] = metadata
+        for field_name, value in metadata.items():
+            for term in self._terms(value):
+                self.postings[field_name][term].add(int_id)
+            if self._is_number(value):
+                self.numeric_columns[field_name].add(int_id, value)
+    
+    def remove(self, int_id: int):
+        """Drop a vector from all postings and columns"""
+        metadata = self.records.pop(int_id, None)
+        if metadata is None:
+            return
+        for field_name, value in metadata.items():
+            field_postings = self.postings[field_name]
+            for term in self._terms(value):
+                ids = field_postings.get(term)
+                if ids is not None:
+                    ids.discard(int_id)
+                    if not ids:
+                        del field_postings[term]
+            if self._is_number(value):
+                self.numeric_columns[field_name].remove(int_id)
+    
+    def get(self, int_id: int) -> Dict[str, Any]:
+        return self.records.get(int_id, {})
+    
+    def select(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted array of IDs matching every filter, or None when unfiltered"""
+        if not filters:
+            return None
+        
+        allowed: Optional[np.ndarray] = None
+        for field_name, condition in filters.items():
+            ids = self._select_field(field_name, condition)
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids, assume_unique=True)
+            if len(allowed) == 0:
+                break
+        return allowed
+    
+    def _select_field(self, field_name: str, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        
+        allowed: Optional[np.ndarray] = None
+        range_bounds = {op: condition[op] for op in self.RANGE_OPERATORS if op in condition}
+        if range_bounds:
+            column = self.numeric_columns.get(field_name, NumericColumn())
+            allowed = column.range(
+                low=range_bounds.get('$gte', range_bounds.get('$gt', -math.inf)),
+                high=range_bounds.get('$lte', range_bounds.get('$lt', math.inf)),
+                include_low='$gt' not in range_bounds,
+                include_high='$lt' not in range_bounds
+            )
+            allowed = np.unique(allowed)
+        
+        for operator, operand in condition.items():
+            if operator in self.RANGE_OPERATORS:
+                continue
+            if operator == '$eq':
+                ids = self._postings_union(field_name, [operand])
+            elif operator == '$in':
+                ids = self._postings_union(field_name, operand)
+            elif operator == '$ne':
+                ids = np.setdiff1d(self._all_ids(), self._postings_union(field_name, [operand]), assume_unique=True)
+            elif operator == '$nin':
+                ids = np.setdiff1d(self._all_ids(), self._postings_union(field_name, operand), assume_unique=True)
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids, assume_unique=True)
+        
+        return allowed if allowed is not None else np.empty(0, dtype=np.int64)
+    
+    def _postings_union(self, field_name: str, values: List[Any]) -> np.ndarray:
+        field_postings = self.postings.get(field_name, {})
+        ids: Set[int] = set()
+        for value in values:
+            for term in self._terms(value):
+                ids |= field_postings.get(term, set())
+        return np.sort(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+    
+    def _all_ids(self) -> np.ndarray:
+        return np.sort(np.fromiter(self.records.keys(), dtype=np.int64, count=len(self.records)))
+    
+    @staticmethod
+    def _terms(value: Any) -> List[Any]:
+        """Hashable posting terms for a metadata value"""
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        terms = []
+        for item in values:
+            try:
+                hash(item)
+                terms.append(item)
+            except TypeError:
+                terms.append(json.dumps(item, sort_keys=True, default=str))
+        return terms
+    
+    @staticmethod
+    def _is_number(value: Any) -> bool:
+        return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
 class VectorIndex:
-    """High-performance vector index with multiple algorithm support"""
+    """High-performance vector index with multiple algorithm support
+
+    Vectors are stored in an ID-mapped FAISS index keyed by monotonically
+    increasing integer IDs. Deletes and updates set a bit in a tombstone
+    bitmap that searches skip; dead vectors are physically dropped by
+    ``compact()`` once they cross ``compaction_threshold`` of the index.
+    Metadata filters are resolved against a ``MetadataIndex`` before the
+    FAISS search so that filtered queries still return ``k`` results.
+
+    ``save`` writes a snapshot directory of immutable segments. Only vectors
+    added since the previous snapshot are written, as a new delta segment,
+    and ``load`` memory-maps the segment files instead of reading them;
+    segment metadata is only parsed when a filter or lookup first needs it.
+    Delta segments are merged by size tier as they are sealed, so the
+    number of segments stays logarithmic in the number of vectors.
+    Writes always go to the in-memory segment in ``self.index``.
+    """
+    
+    MANIFEST_FILE = "manifest.json"
+    SNAPSHOT_VERSION = 2
     
     def __init__(self, config: IndexConfig):
         self.config = config
@@ -77,63 +332,156 @@ class VectorIndex:
         self.id_map: Dict[int, str] = {}
         self.reverse_id_map: Dict[str, int] = {}
         self.next_id = 0
-        self.lock = threading.RLock()
+        self.lock = ReadWriteLock()
+        
+        # Tombstones: one bit per integer ID, set when the ID is deleted or superseded
+        self.tombstones = np.zeros(1024, dtype=np.uint8)
+        self.dead_count = 0
+        self.compaction_threshold = config.parameters.get('compaction_threshold', 0.2)
+        self.min_compaction_size = config.parameters.get('min_compaction_size', 1000)
+        self.compacting = False
+        
+        # Pre-filtering: allowed-ID sets at or below this size are scored exactly
+        self.metadata_index = MetadataIndex()
+        self.brute_force_threshold = config.parameters.get('brute_force_threshold', 4096)
+        
+        # Persistence: sealed segments are immutable and usually memory-mapped
+        self.sealed_segments: List[Any] = []
+        self.segment_files: List[str] = []
+        self.id_segments = np.full(len(self.tombstones) * 8, -1, dtype=np.int32)
+        self.pending_metadata: List[str] = []
+        self.snapshot_dir: Optional[str] = None
+        self.needs_full_snapshot = False
+        self.merge_ratio = config.parameters.get('segment_merge_ratio', 2.0)
         
         self._initialize_index()
     
     def _initialize_index(self):
         """Initialize the appropriate FAISS index"""
+        self.index = self._create_index()
+    
+    def _create_index(self):
+        """Create an empty ID-mapped FAISS index for the configured type"""
         if self.config.index_type == IndexType.FLAT:
             if self.metric == MetricType.COSINE:
-                self.index = faiss.IndexFlatIP(self.dimension)
+                base = faiss.IndexFlatIP(self.dimension)
             elif self.metric == MetricType.EUCLIDEAN:
-                self.index = faiss.IndexFlatL2(self.dimension)
+                base = faiss.IndexFlatL2(self.dimension)
             else:
-                self.index = faiss.IndexFlatIP(self.dimension)
+                base = faiss.IndexFlatIP(self.dimension)
                 
         elif self.config.index_type == IndexType.IVF_FLAT:
             nlist = self.config.parameters.get('nlist', 100)
             quantizer = faiss.IndexFlatL2(self.dimension)
             if self.metric == MetricType.COSINE:
-                self.index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+                base = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
             else:
-                self.index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_L2)
+                base = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_L2)
                 
         elif self.config.index_type == IndexType.IVF_PQ:
             nlist = self.config.parameters.get('nlist', 100)
             m = self.config.parameters.get('m', 8)
             quantizer = faiss.IndexFlatL2(self.dimension)
-            self.index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, m, 8)
+            base = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, m, 8)
             
         elif self.config.index_type == IndexType.HNSW:
             m = self.config.parameters.get('m', 16)
-            self.index = faiss.IndexHNSWFlat(self.dimension, m)
+            base = faiss.IndexHNSWFlat(self.dimension, m)
             
         else:
             # Default to flat index
-            self.index = faiss.IndexFlatIP(self.dimension)
+            base = faiss.IndexFlatIP(self.dimension)
+        
+        if self.is_ivf:
+            # Inverted lists reconstruct vectors through a direct map
+            base.set_direct_map_type(faiss.DirectMap.Array)
+        
+        # IndexIDMap2 keeps the reverse map needed for reconstruct()
+        return faiss.IndexIDMap2(base)
     
-    def add_vectors(self, vectors: np.ndarray, ids: List[str]) -> bool:
-        """Add vectors to the index"""
+    def _empty_segment(self):
+        """Create an empty mutable segment
+
+        IVF segments copy the coarse centroids (and PQ codebook) of the
+        current trained segment, so that segments share one quantizer and
+        their inverted lists can be merged code for code.
+        """
+        index = self._create_index()
+        if not self.is_ivf:
+            return index
+        template = next((segment for segment in [self.index] + self.sealed_segments[::-1]
+                         if segment is not None and segment.is_trained), None)
+        if template is not None:
+            source = faiss.downcast_index(template.index)
+            target = faiss.downcast_index(index.index)
+            target.quantizer.add(source.quantizer.reconstruct_n(0, source.nlist))
+            if self.config.index_type == IndexType.IVF_PQ:
+                target.pq = source.pq
+                target.precompute_table()
+            target.is_trained = index.is_trained = True
+        return index
+    
+    @property
+    def segments(self) -> List[Any]:
+        """Sealed segments followed by the mutable segment"""
+        return self.sealed_segments + [self.index]
+    
+    @property
+    def total_vectors(self) -> int:
+        return sum(segment.ntotal for segment in self.segments)
+    
+    @property
+    def is_ivf(self) -> bool:
+        return self.config.index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ)
+    
+    @property
+    def supports_removal(self) -> bool:
+        """Whether the mutable segment can drop vectors in place
+
+        HNSW graphs cannot drop nodes, and IVF entries must keep dense inner
+        IDs for the direct map, so both are rebuilt instead.
+        """
+        return self.config.index_type != IndexType.HNSW and not self.is_ivf
+    
+    def add_vectors(self, vectors: np.ndarray, ids: List[str],
+                   metadata: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """Add vectors to the index, superseding any existing vectors with the same IDs"""
         try:
             with self.lock:
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+                
                 # Normalize vectors for cosine similarity
                 if self.metric == MetricType.COSINE:
                     vectors = self._normalize_vectors(vectors)
                 
-                # Map string IDs to integer IDs
-                int_ids = []
-                for str_id in ids:
-                    if str_id not in self.reverse_id_map:
-                        self.id_map[self.next_id] = str_id
-                        self.reverse_id_map[str_id] = self.next_id
-                        int_ids.append(self.next_id)
-                        self.next_id += 1
-                    else:
-                        int_ids.append(self.reverse_id_map[str_id])
+                # Last write wins for IDs repeated within one batch
+                positions: Dict[str, int] = {}
+                for position, str_id in enumerate(ids):
+                    positions[str_id] = position
+                if len(positions) != len(ids):
+                    vectors = vectors[list(positions.values())]
+                
+                # Existing IDs get a fresh integer ID; the old one is tombstoned
+                int_ids = np.empty(len(positions), dtype=np.int64)
+                for i, (str_id, position) in enumerate(positions.items()):
+                    old_id = self.reverse_id_map.get(str_id)
+                    if old_id is not None:
+                        self._tombstone(old_id)
+                    self.metadata_index.add(self.next_id, metadata[position] if metadata else {})
+                    self.id_map[self.next_id] = str_id
+                    self.reverse_id_map[str_id] = self.next_id
+                    int_ids[i] = self.next_id
+                    self.next_id += 1
                 
-                # Add to index
-                self.index.add(vectors.astype(np.float32))
+                self._ensure_id_capacity(self.next_id)
+                
+                # IVF quantizers are trained on the first batch; later segments inherit them
+                if not self.index.is_trained:
+                    self.index.train(np.ascontiguousarray(vectors))
+                
+                # Add to the mutable segment
+                self.index.add_with_ids(np.ascontiguousarray(vectors), int_ids)
+                self.id_segments[int_ids] = len(self.sealed_segments)
                 
                 return True
                 
@@ -143,42 +491,145 @@ class VectorIndex:
     
     def search(self, query_vector: np.ndarray, k: int = 10, 
               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
-        """Search for similar vectors"""
+        """Search for similar vectors, restricted to vectors whose metadata matches filters"""
+        results = self.search_batch(query_vector.reshape(1, -1), k, filters)
+        return results[0] if results else []
+    
+    def search_batch(self, query_vectors: np.ndarray, k: int = 10,
+                    filters: Optional[Dict[str, Any]] = None) -> List[List[Tuple[str, float]]]:
+        """Search an (n, d) matrix of query vectors in a single FAISS call
+
+        Searches share a read lock, and FAISS releases the GIL while it
+        scans, so batches issued from several threads run in parallel.
+        """
         try:
-            with self.lock:
-                # Normalize query vector for cosine similarity
-                if self.metric == MetricType.COSINE:
-                    query_vector = self._normalize_vectors(query_vector.reshape(1, -1))
-                else:
-                    query_vector = query_vector.reshape(1, -1)
+            query_vectors = np.ascontiguousarray(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+            
+            # Normalize query vectors for cosine similarity
+            if self.metric == MetricType.COSINE:
+                query_vectors = self._normalize_vectors(query_vectors)
+            
+            if filters:
+                self._load_pending_metadata()
+            with self.lock.read():
+                allowed = self.metadata_index.select(filters)
+                if allowed is None:
+                    # Perform search, skipping tombstoned vectors
+                    selector = self._live_selector()
+                    params = None if selector is None else self._search_params(selector)
+                    scores, indices = self._search_segments(query_vectors, k, params)
+                    return [self._to_results(row_scores, row_indices)
+                            for row_scores, row_indices in zip(scores, indices)]
                 
-                # Perform search
-                scores, indices = self.index.search(query_vector.astype(np.float32), k)
+                if len(allowed) == 0:
+                    return [[] for _ in range(len(query_vectors))]
                 
-                # Convert results
-                results = []
-                for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                    if idx != -1 and idx in self.id_map:
-                        str_id = self.id_map[idx]
-                        results.append((str_id, float(score)))
+                # Very selective filters: exact scoring over the allowed vectors only
+                if len(allowed) <= self.brute_force_threshold:
+                    return self._brute_force_search(query_vectors, allowed, k)
+                
+                # Allowed IDs never include tombstones, so they replace the tombstone selector
+                selector = faiss.IDSelectorBatch(allowed)
+                selectivity = len(allowed) / max(len(self.metadata_index), 1)
+                scores, indices = self._search_segments(
+                    query_vectors, k, self._search_params(selector, selectivity, k)
+                )
+                results = [self._to_results(row_scores, row_indices)
+                           for row_scores, row_indices in zip(scores, indices)]
                 
+                # Approximate search can exhaust its candidate list under a filter
+                expected = min(k, len(allowed))
+                short_rows = [row for row, hits in enumerate(results) if len(hits) < expected]
+                if short_rows:
+                    exact = self._brute_force_search(query_vectors[short_rows], allowed, k)
+                    for row, hits in zip(short_rows, exact):
+                        results[row] = hits
                 return results
                 
         except Exception as e:
             logging.error(f"Error searching index: {e}")
             return []
     
+    def get_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Indexed metadata for a batch of string IDs"""
+        self._load_pending_metadata()
+        with self.lock.read():
+            return {
+                str_id: self.metadata_index.get(self.reverse_id_map[str_id])
+                for str_id in ids if str_id in self.reverse_id_map
+            }
+    
+    def select_ids(self, filters: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+        """String IDs of the live vectors whose metadata matches filters, or None when unfiltered"""
+        if filters:
+            self._load_pending_metadata()
+        with self.lock.read():
+            allowed = self.metadata_index.select(filters)
+            if allowed is None:
+                return None
+            return [self.id_map[int_id] for int_id in allowed.tolist() if int_id in self.id_map]
+    
+    def _search_segments(self, query_vectors: np.ndarray, k: int, params=None):
+        """Search every segment and merge the per-segment top-k lists"""
+        segments = [segment for segment in self.segments if segment.ntotal]
+        if len(segments) <= 1:
+            return (segments or [self.index])[0].search(query_vectors, k, params=params)
+        
+        per_segment = [segment.search(query_vectors, k, params=params) for segment in segments]
+        scores = np.hstack([segment_scores for segment_scores, _ in per_segment])
+        indices = np.hstack([segment_indices for _, segment_indices in per_segment])
+        order_keys = -scores if self.index.metric_type == faiss.METRIC_INNER_PRODUCT else scores.copy()
+        order_keys[indices == -1] = np.inf
+        top = np.argsort(order_keys, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(scores, top, axis=1), np.take_along_axis(indices, top, axis=1)
+    
+    def _reconstruct(self, int_ids: np.ndarray) -> np.ndarray:
+        """Reconstruct vectors for integer IDs spread across segments"""
+        vectors = np.empty((len(int_ids), self.dimension), dtype=np.float32)
+        owners = self.id_segments[int_ids]
+        for segment_no, segment in enumerate(self.segments):
+            mask = owners == segment_no
+            if mask.any():
+                vectors[mask] = segment.reconstruct_batch(int_ids[mask])
+        return vectors
+    
+    def _brute_force_search(self, query_vectors: np.ndarray, allowed: np.ndarray,
+                            k: int) -> List[List[Tuple[str, float]]]:
+        """Exact top-k over an explicit set of integer IDs for every query row"""
+        vectors = self._reconstruct(allowed)
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = query_vectors @ vectors.T
+            order_keys = -scores
+        else:
+            scores = (
+                (query_vectors ** 2).sum(axis=1, keepdims=True)
+                - 2 * query_vectors @ vectors.T
+                + (vectors ** 2).sum(axis=1)
+            )
+            order_keys = scores
+        
+        k = min(k, len(allowed))
+        top = np.argpartition(order_keys, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(order_keys, top, axis=1), axis=1), axis=1)
+        return [self._to_results(row_scores[row_top], allowed[row_top])
+                for row_scores, row_top in zip(scores, top)]
+    
+    def _to_results(self, scores: np.ndarray, indices: np.ndarray) -> List[Tuple[str, float]]:
+        """Convert FAISS integer IDs to string IDs"""
+        results = []
+        for score, idx in zip(scores, indices):
+            if idx != -1 and idx in self.id_map:
+                results.append((self.id_map[idx], float(score)))
+        return results
+    
     def remove_vectors(self, ids: List[str]) -> bool:
         """Remove vectors from index"""
         try:
             with self.lock:
-                # FAISS doesn't support direct removal, so we'd need to rebuild
-                # For now, mark as removed in metadata
                 for str_id in ids:
-                    if str_id in self.reverse_id_map:
-                        int_id = self.reverse_id_map[str_id]
-                        del self.id_map[int_id]
-                        del self.reverse_id_map[str_id]
+                    int_id = self.reverse_id_map.pop(str_id, None)
+                    if int_id is not None:
+                        self._tombstone(int_id)
                 
                 return True
                 
@@ -188,15 +639,200 @@ class VectorIndex:
     
     def update_vector(self, id: str, vector: np.ndarray) -> bool:
         """Update a vector in the index"""
-        # For FAISS, we'd need to remove and re-add
-        # This is a simplified implementation
         return self.add_vectors(vector.reshape(1, -1), [id])
     
+    def needs_compaction(self) -> bool:
+        """Whether dead vectors have crossed the compaction threshold"""
+        with self.lock.read():
+            if self.compacting or self.dead_count < self.min_compaction_size:
+                return False
+            return self.dead_count >= self.compaction_threshold * self.total_vectors
+    
+    def compact(self) -> int:
+        """Physically drop tombstoned vectors, returning the number removed"""
+        with self.lock:
+            if self.compacting or self.dead_count == 0:
+                return 0
+            self.compacting = True
+        
+        try:
+            if self.sealed_segments or not self.supports_removal:
+                return self._compact_rebuild()
+            return self._compact_in_place()
+        except Exception as e:
+            logging.error(f"Error compacting index: {e}")
+            return 0
+        finally:
+            with self.lock:
+                self.compacting = False
+    
+    def _compact_in_place(self) -> int:
+        """Remove dead IDs directly from the mutable segment"""
+        with self.lock:
+            stored_ids = faiss.vector_to_array(self.index.id_map)
+            dead_ids = stored_ids[self._is_tombstoned(stored_ids)]
+            removed = self.index.remove_ids(dead_ids) if len(dead_ids) else 0
+            self.dead_count -= removed
+            return removed
+    
+    def _compact_rebuild(self) -> int:
+        """Merge all segments into one rebuilt from live vectors without blocking searches
+
+        Flat and HNSW vectors are gathered under the read lock and re-added
+        outside it. IVF entries are copied code for code into lists that
+        share the existing quantizer, so nothing is re-encoded.
+        """
+        with self.lock.read():
+            segments = self.segments
+            old_index = self.index
+            snapshot_total = old_index.ntotal
+            new_index = self._empty_segment()
+            live_ids, vectors = [], []
+            for segment in segments:
+                keep = ~self._is_tombstoned(self._stored_ids(segment))
+                if self.is_ivf:
+                    self._append_segment(new_index, segment, keep)
+                else:
+                    segment_ids, segment_vectors = self._segment_vectors(segment, keep)
+                    live_ids.append(segment_ids)
+                    vectors.append(segment_vectors)
+        
+        # Build the replacement segment outside the lock; searches continue on the old ones
+        if live_ids:
+            live_ids = np.concatenate(live_ids)
+            if len(live_ids):
+                new_index.add_with_ids(np.vstack(vectors), live_ids)
+        
+        with self.lock:
+            if self.index is not old_index:
+                # A snapshot sealed the mutable segment meanwhile; retry on the next compaction
+                return 0
+            
+            # Carry over vectors appended while the rebuild was running
+            if old_index.ntotal > snapshot_total:
+                tail = np.zeros(old_index.ntotal, dtype=bool)
+                tail[snapshot_total:] = True
+                self._append_segment(new_index, old_index, tail)
+            
+            new_ids = self._stored_ids(new_index)
+            removed = self.total_vectors - new_index.ntotal
+            self.index = new_index
+            self.sealed_segments = []
+            self.id_segments[new_ids] = 0
+            self.dead_count = int(self._is_tombstoned(new_ids).sum())
+            
+            # Existing segment files still hold the dead vectors
+            self.needs_full_snapshot = True
+            return removed
+    
+    @staticmethod
+    def _stored_ids(segment) -> np.ndarray:
+        """Integer IDs of a segment in storage order"""
+        return faiss.vector_to_array(segment.id_map)[:segment.ntotal]
+    
+    def _segment_vectors(self, segment, keep: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """IDs and reconstructed vectors at the kept storage positions of a segment"""
+        stored_ids = self._stored_ids(segment)
+        if not keep.any():
+            return stored_ids[:0], np.empty((0, self.dimension), dtype=np.float32)
+        return stored_ids[keep], segment.index.reconstruct_n(0, segment.ntotal)[keep]
+    
+    def _append_segment(self, target, segment, keep: np.ndarray):
+        """Append the entries of segment at its kept storage positions to target"""
+        if not self.is_ivf:
+            segment_ids, vectors = self._segment_vectors(segment, keep)
+            if len(segment_ids):
+                target.add_with_ids(vectors, segment_ids)
+            return
+        
+        # Inner IVF IDs are storage positions; kept entries are renumbered after target's
+        source = faiss.downcast_index(segment.index)
+        destination = faiss.downcast_index(target.index)
+        offset = target.ntotal
+        new_positions = np.cumsum(keep, dtype=np.int64) - 1 + offset
+        for list_no in range(source.nlist):
+            size = source.invlists.list_size(list_no)
+            if not size:
+                continue
+            positions = faiss.rev_swig_ptr(source.invlists.get_ids(list_no), size).copy()
+            kept = keep[positions]
+            if not kept.any():
+                continue
+            codes = faiss.rev_swig_ptr(source.invlists.get_codes(list_no), size * source.code_size)
+            kept_codes = np.ascontiguousarray(codes.reshape(size, source.code_size)[kept])
+            kept_positions = np.ascontiguousarray(new_positions[positions[kept]])
+            destination.invlists.add_entries(list_no, len(kept_positions), faiss.swig_ptr(kept_positions),
+                                             faiss.swig_ptr(kept_codes))
+        
+        added = int(keep.sum())
+        destination.ntotal += added
+        target.ntotal += added
+        faiss.copy_array_to_vector(
+            np.concatenate([self._stored_ids(target)[:offset], self._stored_ids(segment)[keep]]), target.id_map
+        )
+        target.construct_rev_map()
+        destination.make_direct_map(True)
+    
+    def _tombstone(self, int_id: int):
+        """Mark an integer ID as dead"""
+        if self.id_map.pop(int_id, None) is None:
+            return
+        self.metadata_index.remove(int_id)
+        self.tombstones[int_id >> 3] |= np.uint8(1 << (int_id & 7))
+        self.dead_count += 1
+    
+    def _is_tombstoned(self, int_ids: np.ndarray) -> np.ndarray:
+        """Vectorised tombstone lookup for an array of integer IDs"""
+        int_ids = np.asarray(int_ids, dtype=np.int64)
+        return ((self.tombstones[int_ids >> 3] >> (int_ids & 7).astype(np.uint8)) & 1).astype(bool)
+    
+    def _ensure_id_capacity(self, n_ids: int):
+        """Grow the tombstone bitmap and segment map geometrically"""
+        needed = (n_ids >> 3) + 1
+        if needed > len(self.tombstones):
+            grown = np.zeros(max(needed, 2 * len(self.tombstones)), dtype=np.uint8)
+            grown[:len(self.tombstones)] = self.tombstones
+            self.tombstones = grown
+        if len(self.id_segments) < len(self.tombstones) * 8:
+            grown_segments = np.full(len(self.tombstones) * 8, -1, dtype=np.int32)
+            grown_segments[:len(self.id_segments)] = self.id_segments
+            self.id_segments = grown_segments
+    
+    def _live_selector(self):
+        """Selector excluding tombstoned IDs, or None when nothing is dead"""
+        if self.dead_count == 0:
+            return None
+        bitmap = faiss.IDSelectorBitmap(len(self.tombstones), faiss.swig_ptr(self.tombstones))
+        selector = faiss.IDSelectorNot(bitmap)
+        selector.referenced_objects = [bitmap]
+        return selector
+    
+    def _search_params(self, selector, selectivity: float = 1.0, k: int = 10):
+        """Search parameters of the type the underlying index expects
+
+        Under a selective filter the candidate list is widened in proportion
+        to 1/selectivity so that enough allowed vectors are visited.
+        """
+        over_fetch = 1.0 / max(selectivity, 1e-6)
+        if self.is_ivf:
+            base = faiss.downcast_index(self.index.index)
+            nprobe = min(base.nlist, int(math.ceil(base.nprobe * over_fetch)))
+            return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        if self.config.index_type == IndexType.HNSW:
+            base = faiss.downcast_index(self.index.index)
+            ef_search = max(base.hnsw.efSearch, int(math.ceil(k * over_fetch)))
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=min(ef_search, max(self.total_vectors, k)))
+        return faiss.SearchParameters(sel=selector)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
-        with self.lock:
+        with self.lock.read():
+            total_vectors = self.total_vectors
             return {
-                'total_vectors': self.index.ntotal,
+                'total_vectors': total_vectors,
+                'live_vectors': total_vectors - self.dead_count,
+                'dead_vectors': self.dead_count,
+                'segments': len(self.sealed_segments) + 1,
                 'dimension': self.dimension,
                 'index_type': self.config.index_type.value,
                 'metric': self.metric.value,
@@ -204,20 +840,57 @@ class VectorIndex:
             }
     
     def save(self, filepath: str) -> bool:
-        """Save index to file"""
+        """Snapshot the index into the directory at filepath
+
+        Saving again to the same directory only appends a delta segment with
+        the vectors added since the last snapshot, then rewrites the small
+        tombstone bitmap and manifest. The new segment is re-opened
+        memory-mapped so its vectors stop occupying heap memory, and merged
+        with its predecessors when they are of a similar size.
+        """
         try:
             with self.lock:
-                faiss.write_index(self.index, filepath)
+                os.makedirs(filepath, exist_ok=True)
+                full_snapshot = self.needs_full_snapshot or self.snapshot_dir != filepath
+                segment_files = [] if full_snapshot else list(self.segment_files)
+                
+                # A full snapshot rewrites sealed segments that belong to another directory
+                if full_snapshot:
+                    for segment in self.sealed_segments:
+                        segment_files.append(self._write_segment(filepath, segment))
+                
+                merged_away: List[str] = []
+                if self.index.ntotal:
+                    segment_files.append(self._write_segment(filepath, self.index))
+                    self.sealed_segments.append(self._open_segment(filepath, segment_files[-1]))
+                    self.index = self._empty_segment()
+                    merged_away = self._merge_sealed_segments(filepath, segment_files)
                 
-                # Save ID mappings
-                mapping_file = filepath + ".mapping"
-                with open(mapping_file, 'wb') as f:
-                    pickle.dump({
-                        'id_map': self.id_map,
-                        'reverse_id_map': self.reverse_id_map,
-                        'next_id': self.next_id
-                    }, f)
+                np.save(os.path.join(filepath, "tombstones.npy"), self.tombstones[:(self.next_id >> 3) + 1])
+                manifest = {
+                    'version': self.SNAPSHOT_VERSION,
+                    'index_type': self.config.index_type.value,
+                    'metric': self.metric.value,
+                    'dimension': self.dimension,
+                    'next_id': self.next_id,
+                    'dead_count': self.dead_count,
+                    'segments': segment_files
+                }
+                manifest_path = os.path.join(filepath, self.MANIFEST_FILE)
+                with open(manifest_path + ".tmp", 'w') as f:
+                    json.dump(manifest, f)
+                os.replace(manifest_path + ".tmp", manifest_path)
+                
+                # Merged and dropped segments are unreferenced once the manifest is replaced
+                for stale in merged_away:
+                    self._remove_segment_files(filepath, stale)
+                if full_snapshot and self.snapshot_dir == filepath:
+                    for stale in set(self.segment_files) - set(segment_files) - set(merged_away):
+                        self._remove_segment_files(filepath, stale)
                 
+                self.segment_files = segment_files
+                self.snapshot_dir = filepath
+                self.needs_full_snapshot = False
                 return True
                 
         except Exception as e:
@@ -225,26 +898,133 @@ class VectorIndex:
             return False
     
     def load(self, filepath: str) -> bool:
-        """Load index from file"""
+        """Load a snapshot directory, memory-mapping its segments"""
         try:
             with self.lock:
-                self.index = faiss.read_index(filepath)
+                with open(os.path.join(filepath, self.MANIFEST_FILE)) as f:
+                    manifest = json.load(f)
+                if manifest.get('version') != self.SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported snapshot version {manifest.get('version')}")
+                if manifest['dimension'] != self.dimension:
+                    raise ValueError(f"Snapshot dimension {manifest['dimension']} != {self.dimension}")
+                
+                self.next_id = manifest['next_id']
+                self.dead_count = manifest['dead_count']
+                self.tombstones = np.zeros(1024, dtype=np.uint8)
+                self.id_segments = np.full(len(self.tombstones) * 8, -1, dtype=np.int32)
+                self._ensure_id_capacity(self.next_id)
+                stored_tombstones = np.load(os.path.join(filepath, "tombstones.npy"))
+                self.tombstones[:len(stored_tombstones)] = stored_tombstones
                 
-                # Load ID mappings
-                mapping_file = filepath + ".mapping"
-                if os.path.exists(mapping_file):
-                    with open(mapping_file, 'rb') as f:
-                        mappings = pickle.load(f)
-                        self.id_map = mappings['id_map']
-                        self.reverse_id_map = mappings['reverse_id_map']
-                        self.next_id = mappings['next_id']
+                self.id_map, self.reverse_id_map = {}, {}
+                self.metadata_index = MetadataIndex()
+                self.pending_metadata = []
+                self.sealed_segments = []
+                self.index = self._create_index()
+                for segment_no, name in enumerate(manifest['segments']):
+                    self.sealed_segments.append(self._open_segment(filepath, name))
+                    self._load_segment_ids(filepath, name, segment_no)
                 
+                self.index = self._empty_segment()
+                self.segment_files = list(manifest['segments'])
+                self.snapshot_dir = filepath
+                self.needs_full_snapshot = False
                 return True
                 
         except Exception as e:
             logging.error(f"Error loading index: {e}")
             return False
     
+    def _merge_sealed_segments(self, directory: str, segment_files: List[str]) -> List[str]:
+        """Size-tiered merge of the newest sealed segments, returning the merged-away files
+
+        While the newest segment holds at least 1/merge_ratio of the vectors
+        of the one before it, the two are rewritten as one without their
+        dead vectors. Segment sizes then fall geometrically from oldest to
+        newest, so a vector is rewritten O(log n) times over the life of
+        the index.
+        """
+        merged_away = []
+        while len(self.sealed_segments) >= 2:
+            older, newer = self.sealed_segments[-2:]
+            if older.ntotal > self.merge_ratio * newer.ntotal:
+                break
+            
+            merged = self._empty_segment()
+            for segment in (older, newer):
+                self._append_segment(merged, segment, ~self._is_tombstoned(self._stored_ids(segment)))
+            self.dead_count -= older.ntotal + newer.ntotal - merged.ntotal
+            merged_away.extend(segment_files[-2:])
+            
+            name = self._write_segment(directory, merged)
+            self.sealed_segments[-2:] = [self._open_segment(directory, name)]
+            segment_files[-2:] = [name]
+            self.id_segments[self._stored_ids(merged)] = len(self.sealed_segments) - 1
+        return merged_away
+    
+    def _write_segment(self, directory: str, segment) -> str:
+        """Write a segment with its ID arrays and metadata"""
+        # Metadata of lazily loaded segments must be in memory before it is rewritten
+        self._load_pending_metadata()
+        name = f"segment-{uuid.uuid4().hex[:12]}"
+        base_path = os.path.join(directory, name)
+        faiss.write_index(segment, base_path + ".faiss")
+        
+        int_ids = self._stored_ids(segment).astype(np.int64)
+        keys = np.array([self.id_map.get(int_id, "") for int_id in int_ids.tolist()], dtype=str)
+        np.save(base_path + ".ids.npy", int_ids)
+        np.save(base_path + ".keys.npy", keys)
+        with open(base_path + ".meta.jsonl", 'w') as f:
+            for int_id in int_ids.tolist():
+                f.write(json.dumps(self.metadata_index.records.get(int_id, {}), default=str))
+                f.write("\n")
+        return name
+    
+    def _open_segment(self, directory: str, name: str):
+        """Open a segment read-only with its vector data memory-mapped"""
+        # Memory-mapped inverted lists need a plain file reader, so IVF cannot use IO_FLAG_MMAP_IFC
+        if self.is_ivf:
+            flags = faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP
+        else:
+            flags = faiss.IO_FLAG_READ_ONLY | getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+        return faiss.read_index(os.path.join(directory, name + ".faiss"), flags)
+    
+    def _load_segment_ids(self, directory: str, name: str, segment_no: int):
+        """Restore live string IDs for one segment; its metadata is queued for first use"""
+        base_path = os.path.join(directory, name)
+        int_ids = np.load(base_path + ".ids.npy", mmap_mode='r')
+        keys = np.load(base_path + ".keys.npy", mmap_mode='r')
+        live = ~self._is_tombstoned(int_ids)
+        self.id_segments[int_ids] = segment_no
+        
+        # Bulk dict construction from arrays instead of one Python statement per vector
+        live_ids = int_ids[live].tolist()
+        live_keys = keys[live].tolist()
+        self.id_map.update(zip(live_ids, live_keys))
+        self.reverse_id_map.update(zip(live_keys, live_ids))
+        self.pending_metadata.append(base_path)
+    
+    def _load_pending_metadata(self):
+        """Index the metadata of segments loaded since the last metadata access"""
+        if not self.pending_metadata:
+            return
+        with self.lock:
+            for base_path in self.pending_metadata:
+                int_ids = np.load(base_path + ".ids.npy", mmap_mode='r')
+                # Vectors deleted or superseded since the load stay out of the index
+                live = ~self._is_tombstoned(int_ids)
+                with open(base_path + ".meta.jsonl") as f:
+                    for position, line in enumerate(f):
+                        if live[position]:
+                            self.metadata_index.add(int(int_ids[position]), json.loads(line))
+            self.pending_metadata = []
+    
+    def _remove_segment_files(self, directory: str, name: str):
+        for suffix in (".faiss", ".ids.npy", ".keys.npy", ".meta.jsonl"):
+            path = os.path.join(directory, name + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+    
     def _normalize_vectors(self, vectors: np.ndarray) -> np.ndarray:
         """Normalize vectors for cosine similarity"""
         norms = np.linalg.norm(vectors, axis=1, keepdims=True)
@@ -259,9 +1039,11 @@ class CustomVectorDatabase:
     def __init__(self, data_dir: str = "./vector_db"):
         self.data_dir = data_dir
         self.namespaces: Dict[str, VectorIndex] = {}
+        self.lexical_indexes: Dict[str, BM25Index] = {}
+        self.text_field = "text"
         self.metadata_store = MetadataStore(data_dir)
         self.vector_store = VectorStore(data_dir)
-        self.query_cache = VectorQueryCache()
+        self.query_cache = QueryResultCache()
         self.performance_monitor = VectorPerformanceMonitor()
         self.replication_manager = ReplicationManager()
         
@@ -289,6 +1071,7 @@ class CustomVectorDatabase:
             # Create index
             index = VectorIndex(config)
             self.namespaces[index_name] = index
+            self.lexical_indexes[index_name] = BM25Index()
             
             # Initialize metadata
             await self.metadata_store.create_namespace(index_name)
@@ -300,6 +1083,19 @@ class CustomVectorDatabase:
             logging.error(f"Error creating index {index_name}: {e}")
             return False
     
+    def _schedule_compaction(self, index_name: str):
+        """Compact an index on the background executor once enough vectors are dead"""
+        index = self.namespaces.get(index_name)
+        if index is None or not index.needs_compaction():
+            return
+        
+        def run_compaction():
+            removed = index.compact()
+            if removed:
+                logging.info(f"Compacted vector index {index_name}: removed {removed} dead vectors")
+        
+        self.executor.submit(run_compaction)
+    
     async def upsert(self, index_name: str, vectors: List[VectorRecord]) -> Dict[str, Any]:
         """Insert or update vectors"""
         try:
@@ -311,11 +1107,21 @@ class CustomVectorDatabase:
             # Prepare data
             vector_data = np.array([v.vector for v in vectors])
             ids = [v.id for v in vectors]
+            metadata = [{**v.metadata, 'namespace': v.namespace} for v in vectors]
             
             # Add to index
-            success = index.add_vectors(vector_data, ids)
+            success = index.add_vectors(vector_data, ids, metadata)
             
             if success:
+                # Records carrying text are searchable lexically; others drop any stale text
+                lexical_index = self.lexical_indexes[index_name]
+                lexical_index.add_documents(
+                    (v.id, v.metadata[self.text_field]) for v in vectors if self.text_field in v.metadata
+                )
+                for v in vectors:
+                    if self.text_field not in v.metadata:
+                        lexical_index.remove_document(v.id)
+                
                 # Store metadata
                 for vector in vectors:
                     await self.metadata_store.store_metadata(
@@ -328,6 +1134,12 @@ class CustomVectorDatabase:
                 # Update performance metrics
                 await self.performance_monitor.log_upsert(index_name, len(vectors))
                 
+                # Cached results for this index are now stale
+                self.query_cache.invalidate(index_name)
+                
+                # Superseded vectors are tombstones until compaction
+                self._schedule_compaction(index_name)
+                
                 return {
                     'upserted_count': len(vectors),
                     'status': 'success'
@@ -354,9 +1166,15 @@ class CustomVectorDatabase:
         """Query for similar vectors"""
         try:
             # Check cache first
-            cache_key = self._get_cache_key(index_name, query_vector, k, filters, namespace)
-            cached_results = await self.query_cache.get(cache_key)
-            if cached_results:
+            cache_key = self.query_cache.make_key(index_name, {
+                'k': k,
+                'filters': filters,
+                'namespace': namespace,
+                'include_metadata': include_metadata,
+                'include_vectors': include_vectors
+            }, query_vector)
+            cached_results = await self.query_cache.get(cache_key, query_vector)
+            if cached_results is not None:
                 return cached_results
             
             if index_name not in self.namespaces:
@@ -364,51 +1182,171 @@ class CustomVectorDatabase:
             
             index = self.namespaces[index_name]
             
+            # Namespace and custom filters are applied inside the index, before the search
+            search_filters = dict(filters or {})
+            if namespace != "default":
+                search_filters['namespace'] = namespace
+            
             # Perform search
-            raw_results = index.search(query_vector, k, filters)
+            raw_results = index.search(query_vector, k, search_filters or None)
             
-            # Enhance results with metadata
+            # Enhance results with metadata from the in-memory metadata index
+            metadata_by_id = index.get_metadata([vector_id for vector_id, _ in raw_results])
             results = []
             for vector_id, score in raw_results:
-                metadata = {}
+                record_metadata = metadata_by_id.get(vector_id, {})
                 vector_data = None
                 
-                if include_metadata:
-                    metadata = await self.metadata_store.get_metadata(index_name, vector_id)
-                
                 if include_vectors:
                     vector_data = await self.vector_store.get_vector(index_name, vector_id)
                 
-                # Apply namespace filter
-                record_namespace = metadata.get('namespace', 'default')
-                if namespace != "default" and record_namespace != namespace:
-                    continue
-                
-                # Apply custom filters
-                if filters and not self._matches_filters(metadata, filters):
-                    continue
-                
                 result = SearchResult(
                     id=vector_id,
                     score=score,
-                    metadata=metadata,
+                    metadata=record_metadata if include_metadata else {},
                     vector=vector_data,
-                    namespace=record_namespace
+                    namespace=record_metadata.get('namespace', 'default')
                 )
                 results.append(result)
             
             # Cache results
-            await self.query_cache.set(cache_key, results)
+            await self.query_cache.set(cache_key, results, query_vector)
             
             # Update performance metrics
             await self.performance_monitor.log_query(index_name, len(results))
             
-            return results[:k]  # Ensure we don't exceed k results after filtering
+            return results
             
         except Exception as e:
             logging.error(f"Error querying vectors: {e}")
             return []
     
+    async def query_batch(self, index_name: str, query_vectors: np.ndarray,
+                         k: int = 10, filters: Optional[Dict[str, Any]] = None,
+                         namespace: str = "default", include_metadata: bool = True,
+                         include_vectors: bool = False) -> List[List[SearchResult]]:
+        """Query an (n, d) matrix of vectors in one index call
+
+        The FAISS search runs on the executor so concurrent batches use
+        separate cores, and metadata for all hits is joined in one lookup.
+        """
+        try:
+            if index_name not in self.namespaces:
+                return [[] for _ in range(len(query_vectors))]
+            
+            index = self.namespaces[index_name]
+            query_vectors = np.ascontiguousarray(query_vectors, dtype=np.float32)
+            
+            search_filters = dict(filters or {})
+            if namespace != "default":
+                search_filters['namespace'] = namespace
+            
+            loop = asyncio.get_running_loop()
+            raw_batches = await loop.run_in_executor(
+                self.executor,
+                lambda: index.search_batch(query_vectors, k, search_filters or None)
+            )
+            
+            # One metadata join for every hit in the batch
+            hit_ids = list({vector_id for raw_results in raw_batches for vector_id, _ in raw_results})
+            metadata_by_id = index.get_metadata(hit_ids)
+            vectors_by_id = {}
+            if include_vectors:
+                for vector_id in hit_ids:
+                    vectors_by_id[vector_id] = await self.vector_store.get_vector(index_name, vector_id)
+            
+            batch_results = []
+            for raw_results in raw_batches:
+                results = []
+                for vector_id, score in raw_results:
+                    record_metadata = metadata_by_id.get(vector_id, {})
+                    results.append(SearchResult(
+                        id=vector_id,
+                        score=score,
+                        metadata=record_metadata if include_metadata else {},
+                        vector=vectors_by_id.get(vector_id),
+                        namespace=record_metadata.get('namespace', 'default')
+                    ))
+                batch_results.append(results)
+            
+            # Update performance metrics
+            await self.performance_monitor.log_query(index_name, sum(len(r) for r in batch_results))
+            
+            return batch_results
+            
+        except Exception as e:
+            logging.error(f"Error batch querying vectors: {e}")
+            return [[] for _ in range(len(query_vectors))]
+    
+    async def hybrid_query(self, index_name: str, query_text: str,
+                          query_vector: Optional[np.ndarray] = None, k: int = 10,
+                          filters: Optional[Dict[str, Any]] = None,
+                          namespace: str = "default", include_metadata: bool = True,
+                          lexical_weight: float = 1.0, dense_weight: float = 1.0,
+                          rrf_k: int = 60, candidates: Optional[int] = None) -> List[SearchResult]:
+        """Fuse BM25 and vector rankings with reciprocal rank fusion
+
+        Both retrievers return ``candidates`` hits (default ``4 * k``) and
+        the fused score of each result is its RRF score. Filters restrict
+        both retrievers before they rank, through the same metadata index
+        the vector search uses. Records are searchable lexically when their metadata has a
+        ``text_field`` ("text") entry.
+        """
+        try:
+            if index_name not in self.namespaces:
+                return []
+            
+            cache_key = self.query_cache.make_key(index_name, {
+                'hybrid': query_text,
+                'k': k,
+                'filters': filters,
+                'namespace': namespace,
+                'include_metadata': include_metadata,
+                'weights': [lexical_weight, dense_weight],
+                'rrf_k': rrf_k,
+                'candidates': candidates
+            }, query_vector)
+            cached_results = await self.query_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results
+            
+            index = self.namespaces[index_name]
+            candidates = candidates or 4 * k
+            search_filters = dict(filters or {})
+            if namespace != "default":
+                search_filters['namespace'] = namespace
+            
+            # Restrict BM25 to the filtered IDs up front so it still returns its full candidate list
+            lexical_hits = self.lexical_indexes[index_name].search(
+                query_text, candidates, index.select_ids(search_filters or None)
+            )
+            
+            rankings, weights = [lexical_hits], [lexical_weight]
+            if query_vector is not None:
+                rankings.append(index.search(query_vector, candidates, search_filters or None))
+                weights.append(dense_weight)
+            fused = reciprocal_rank_fusion(rankings, k=rrf_k, weights=weights, limit=k)
+            
+            metadata_by_id = index.get_metadata([vector_id for vector_id, _ in fused])
+            results = []
+            for vector_id, score in fused:
+                record_metadata = metadata_by_id.get(vector_id, {})
+                results.append(SearchResult(
+                    id=vector_id,
+                    score=score,
+                    metadata=record_metadata if include_metadata else {},
+                    namespace=record_metadata.get('namespace', 'default')
+                ))
+            
+            await self.query_cache.set(cache_key, results)
+            await self.performance_monitor.log_query(index_name, len(results))
+            
+            return results
+            
+        except Exception as e:
+            logging.error(f"Error running hybrid query: {e}")
+            return []
+    
     async def delete(self, index_name: str, ids: List[str], 
                     namespace: str = "default") -> Dict[str, Any]:
         """Delete vectors by IDs"""
@@ -422,6 +1360,11 @@ class CustomVectorDatabase:
             success = index.remove_vectors(ids)
             
             if success:
+                lexical_index = self.lexical_indexes.get(index_name)
+                if lexical_index is not None:
+                    for vector_id in ids:
+                        lexical_index.remove_document(vector_id)
+                
                 # Remove metadata
                 for vector_id in ids:
                     await self.metadata_store.delete_metadata(index_name, vector_id)
@@ -429,11 +1372,24 @@ class CustomVectorDatabase:
                 # Remove vectors
                 await self.vector_store.delete_vectors(index_name, ids)
                 
+                self.query_cache.invalidate(index_name)
+                self._schedule_compaction(index_name)
+                
                 return {
                     'deleted_count': len(ids),
                     'status': 'success'
                 }
             else:
                 return {
-                    'deleted_co
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+                    'deleted_count': 0,
+                    'status': 'error',
+                    'message': 'Failed to remove vectors from index'
+                }
+                
+        except Exception as e:
+            logging.error(f"Error deleting vectors: {e}")
+            return {
+                'deleted_count': 0,
+                'status': 'error',
+                'message': str(e)
+            }
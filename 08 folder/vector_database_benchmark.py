@@ -0,0 +1,181 @@
+"""
+Vector Database Benchmarks
+Micro-benchmarks for index churn and query throughput of the custom vector database
+"""
+
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+
+from vector_database import VectorIndex, IndexConfig, IndexType, MetricType
+
+def _random_vectors(n: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.standard_normal((n, dimension)).astype(np.float32)
+
+def benchmark_upsert_delete_churn(index_type: IndexType = IndexType.HNSW,
+                                  dimension: int = 128, initial_size: int = 100_000,
+                                  rounds: int = 20, batch_size: int = 5_000,
+                                  seed: int = 0) -> Dict[str, Any]:
+    """Repeatedly upsert and delete a slice of the index, compacting when required"""
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(IndexConfig(index_type=index_type, dimension=dimension,
+                                    metric=MetricType.COSINE,
+                                    parameters={'m': 16, 'compaction_threshold': 0.2}))
+    ids = [f"vec-{i}" for i in range(initial_size)]
+    index.add_vectors(_random_vectors(initial_size, dimension, rng), ids)
+
+    upsert_time = delete_time = compaction_time = 0.0
+    compactions = 0
+    queries = _random_vectors(100, dimension, rng)
+
+    for _ in range(rounds):
+        chosen = rng.choice(initial_size, size=batch_size, replace=False)
+
+        start = time.perf_counter()
+        index.add_vectors(_random_vectors(batch_size, dimension, rng), [ids[i] for i in chosen])
+        upsert_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.remove_vectors([ids[i] for i in chosen[:batch_size // 10]])
+        delete_time += time.perf_counter() - start
+
+        if index.needs_compaction():
+            start = time.perf_counter()
+            index.compact()
+            compaction_time += time.perf_counter() - start
+            compactions += 1
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, k=10)
+    query_time = time.perf_counter() - start
+
+    stats = index.get_stats()
+    return {
+        'index_type': index_type.value,
+        'upserts_per_sec': rounds * batch_size / upsert_time,
+        'deletes_per_sec': rounds * (batch_size // 10) / delete_time,
+        'compactions': compactions,
+        'compaction_seconds': compaction_time,
+        'query_ms': 1000 * query_time / len(queries),
+        'total_vectors': stats['total_vectors'],
+        'dead_vectors': stats['dead_vectors']
+    }
+
+def benchmark_filtered_search(index_type: IndexType = IndexType.HNSW, dimension: int = 128,
+                              size: int = 100_000, categories: int = 1_000,
+                              queries: int = 200, k: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """Latency and result completeness of pre-filtered queries at several selectivities"""
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(IndexConfig(index_type=index_type, dimension=dimension,
+                                    metric=MetricType.COSINE, parameters={'m': 16}))
+    metadata = [{'category': f"cat-{i % categories}", 'price': float(i % 10_000)} for i in range(size)]
+    index.add_vectors(_random_vectors(size, dimension, rng), [f"vec-{i}" for i in range(size)], metadata)
+    query_vectors = _random_vectors(queries, dimension, rng)
+
+    filter_sets = {
+        'unfiltered': None,
+        'price_range_10pct': {'price': {'$gte': 0, '$lt': 1_000}},
+        'category_0.1pct': {'category': 'cat-7'},
+        'category_and_range': {'category': {'$in': ['cat-1', 'cat-2']}, 'price': {'$lt': 5_000}}
+    }
+
+    report = {'index_type': index_type.value}
+    for name, filters in filter_sets.items():
+        start = time.perf_counter()
+        counts = [len(index.search(query, k=k, filters=filters)) for query in query_vectors]
+        elapsed = time.perf_counter() - start
+        report[name] = {
+            'query_ms': 1000 * elapsed / queries,
+            'mean_results': float(np.mean(counts))
+        }
+    return report
+
+def benchmark_batch_query_throughput(index_type: IndexType = IndexType.HNSW, dimension: int = 128,
+                                     size: int = 100_000, queries: int = 2_000, k: int = 10,
+                                     batch_size: int = 256, threads: int = 4,
+                                     seed: int = 0) -> Dict[str, Any]:
+    """Queries/sec of the single-query path against search_batch, serial and threaded"""
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(IndexConfig(index_type=index_type, dimension=dimension,
+                                    metric=MetricType.COSINE, parameters={'m': 16}))
+    index.add_vectors(_random_vectors(size, dimension, rng), [f"vec-{i}" for i in range(size)])
+    query_vectors = _random_vectors(queries, dimension, rng)
+    batches = [query_vectors[i:i + batch_size] for i in range(0, queries, batch_size)]
+
+    start = time.perf_counter()
+    for query in query_vectors:
+        index.search(query, k=k)
+    single_qps = queries / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches:
+        index.search_batch(batch, k=k)
+    batch_qps = queries / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda batch: index.search_batch(batch, k=k), batches))
+    threaded_qps = queries / (time.perf_counter() - start)
+
+    return {
+        'index_type': index_type.value,
+        'single_qps': single_qps,
+        'batch_qps': batch_qps,
+        'threaded_batch_qps': threaded_qps,
+        'batch_speedup': batch_qps / single_qps
+    }
+
+def benchmark_snapshot_and_cold_start(index_type: IndexType = IndexType.HNSW, dimension: int = 128,
+                                      size: int = 200_000, delta_size: int = 5_000,
+                                      seed: int = 0) -> Dict[str, Any]:
+    """Full snapshot, incremental delta snapshot and memory-mapped cold start timings"""
+    rng = np.random.default_rng(seed)
+    config = IndexConfig(index_type=index_type, dimension=dimension,
+                         metric=MetricType.COSINE, parameters={'m': 16})
+    index = VectorIndex(config)
+    index.add_vectors(_random_vectors(size, dimension, rng), [f"vec-{i}" for i in range(size)])
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        start = time.perf_counter()
+        index.save(snapshot_dir)
+        full_seconds = time.perf_counter() - start
+
+        index.add_vectors(_random_vectors(delta_size, dimension, rng),
+                          [f"delta-{i}" for i in range(delta_size)])
+        index.remove_vectors([f"vec-{i}" for i in range(delta_size)])
+        start = time.perf_counter()
+        index.save(snapshot_dir)
+        delta_seconds = time.perf_counter() - start
+
+        restored = VectorIndex(config)
+        start = time.perf_counter()
+        restored.load(snapshot_dir)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored.search(_random_vectors(1, dimension, rng)[0], k=10)
+        first_query_ms = 1000 * (time.perf_counter() - start)
+
+        snapshot_bytes = sum(entry.stat().st_size for entry in os.scandir(snapshot_dir))
+
+    return {
+        'index_type': index_type.value,
+        'full_snapshot_seconds': full_seconds,
+        'delta_snapshot_seconds': delta_seconds,
+        'cold_start_seconds': load_seconds,
+        'first_query_ms': first_query_ms,
+        'snapshot_mb': snapshot_bytes / 2 ** 20
+    }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for index_type in (IndexType.FLAT, IndexType.HNSW):
+        print(benchmark_upsert_delete_churn(index_type))
+        print(benchmark_filtered_search(index_type))
+        print(benchmark_batch_query_throughput(index_type))
+        print(benchmark_snapshot_and_cold_start(index_type))
@@ -28,12 +28,17 @@ from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import warnings
+from monte_carlo_engine import MonteCarloEngine
+from agent_based_kernel import run_agent_simulation
 warnings.filterwarnings('ignore')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Agent-based runs above this size always use the array kernel
+ARRAY_KERNEL_AGENT_THRESHOLD = 2000
+
 class SimulationType(Enum):
     """Types of simulations supported"""
     MONTE_CARLO = "monte_carlo"
@@ -79,6 +84,8 @@ class SimulationParameters:
     variables: Dict[str, Any] = None
     constraints: Dict[str, Any] = None
     objectives: List[str] = None
+    model: Optional[Any] = None  # vectorised model: expression string or callable on {variable: column}
+    workers: Optional[int] = None
     
     def __post_init__(self):
         if self.variables is None:
@@ -234,6 +241,8 @@ class AdvancedSimulationEngine:
 
     async def _run_monte_carlo_simulation(self, parameters: SimulationParameters) -> Dict[str, Any]:
         """Run Monte Carlo simulation"""
+        if parameters.model is not None:
+            return await self._run_batched_monte_carlo(parameters)
         try:
             iterations = parameters.iterations
             variables = parameters.variables
@@ -315,8 +324,28 @@ class AdvancedSimulationEngine:
             logger.error(f"Error in Monte Carlo simulation: {str(e)}")
             raise
 
+    async def _run_batched_monte_carlo(self, parameters: SimulationParameters) -> Dict[str, Any]:
+        """Run Monte Carlo simulation on the batched engine, off the event loop"""
+        try:
+            engine = MonteCarloEngine(parameters.variables, parameters.model, workers=parameters.workers)
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, engine.run, parameters.iterations, parameters.random_seed, parameters.confidence_level
+            )
+            
+            performance = results['performance']
+            logger.info(f"Monte Carlo: {parameters.iterations} iterations at "
+                        f"{performance['iterations_per_second']:,.0f}/s on {performance['workers']} workers")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batched Monte Carlo simulation: {str(e)}")
+            raise
+
     async def _run_agent_based_simulation(self, parameters: SimulationParameters) -> Dict[str, Any]:
         """Run agent-based simulation"""
+        if parameters.variables.get('kernel', 'legacy') == 'array' or \
+                parameters.variables.get('num_agents', 100) > ARRAY_KERNEL_AGENT_THRESHOLD:
+            return await self._run_array_agent_simulation(parameters)
         try:
             # Agent-based modeling implementation
             results = {
@@ -388,6 +417,22 @@ class AdvancedSimulationEngine:
             logger.error(f"Error in agent-based simulation: {str(e)}")
             raise
 
+    async def _run_array_agent_simulation(self, parameters: SimulationParameters) -> Dict[str, Any]:
+        """Run agent-based simulation on the array kernel, off the event loop"""
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, run_agent_simulation, parameters.variables, parameters.time_horizon, parameters.random_seed
+            )
+            
+            performance = results['performance']
+            logger.info(f"Agent kernel: {performance['agents']} agents x {performance['steps']} steps at "
+                        f"{performance['agent_steps_per_second']:,.0f} agent-steps/s")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in array agent-based simulation: {str(e)}")
+            raise
+
     async def _run_system_dynamics_simulation(self, parameters: SimulationParameters) -> Dict[str, Any]:
         """Run system dynamics simulation"""
         try:
@@ -0,0 +1,64 @@
+"""
+Agent Kernel Benchmarks
+Per-agent dict loop against the array kernel on the same network
+"""
+
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from agent_based_kernel import AgentKernel, STATE_NAMES, random_network
+
+def _legacy_agent_loop(neighbors, susceptibility, states, steps: int) -> Dict[str, int]:
+    """The dict-per-agent loop from AdvancedSimulationEngine._run_agent_based_simulation"""
+    agents = [{'id': i, 'state': STATE_NAMES[states[i]], 'attributes': {'susceptibility': susceptibility[i]},
+               'history': []} for i in range(len(neighbors))]
+    for t in range(steps):
+        for agent in agents:
+            agent_neighbors = neighbors[agent['id']]
+            if agent_neighbors:
+                neighbor_states = [agents[n]['state'] for n in agent_neighbors]
+                if agent['state'] == 'inactive' and 'active' in neighbor_states:
+                    if np.random.random() < agent['attributes']['susceptibility']:
+                        agent['state'] = 'active'
+            agent['history'].append({'time': t, 'state': agent['state']})
+        counts = {name: sum(1 for a in agents if a['state'] == name) for name in STATE_NAMES}
+    return counts
+
+def benchmark_agent_kernel(legacy_agents: int = 2000, agents: int = 200_000, steps: int = 100,
+                           average_degree: float = 10, seed: int = 0) -> Dict[str, Any]:
+    """Agent-steps per second for the legacy loop and the array kernel"""
+    report: Dict[str, Any] = {'steps': steps, 'average_degree': average_degree}
+
+    rng = np.random.default_rng(seed)
+    adjacency = random_network(legacy_agents, rng, average_degree=average_degree)
+    kernel = AgentKernel(adjacency, rng)
+    neighbors = [adjacency.indices[adjacency.indptr[i]:adjacency.indptr[i + 1]].tolist()
+                 for i in range(legacy_agents)]
+    start = time.perf_counter()
+    legacy_counts = _legacy_agent_loop(neighbors, kernel.susceptibility.tolist(), kernel.states.tolist(), steps)
+    elapsed = time.perf_counter() - start
+    report['legacy'] = {'agents': legacy_agents, 'agent_steps_per_second': round(legacy_agents * steps / elapsed),
+                        'final_counts': legacy_counts}
+
+    run = kernel.run(steps)
+    report['array_same_network'] = {'agents': legacy_agents,
+                                    'agent_steps_per_second': round(run['agent_steps_per_second']),
+                                    'final_counts': dict(zip(STATE_NAMES, run['state_counts'][-1].tolist()))}
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    kernel = AgentKernel(random_network(agents, rng, average_degree=average_degree), rng)
+    build_seconds = time.perf_counter() - start
+    run = kernel.run(steps, history_sample=1000)
+    report['array_large'] = {'agents': agents, 'network_build_seconds': round(build_seconds, 2),
+                             'agent_steps_per_second': round(run['agent_steps_per_second']),
+                             'history_bytes': run['history'].nbytes}
+    return report
+
+if __name__ == "__main__":
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    for name, result in benchmark_agent_kernel(agents=agents).items():
+        print(f"{name}: {result}")
@@ -0,0 +1,63 @@
+"""
+Monte Carlo Benchmarks
+Scalar per-iteration sampling loop against the batched engine, single process and sharded
+"""
+
+import os
+import resource
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from monte_carlo_engine import MonteCarloEngine
+
+VARIABLES = {
+    'revenue': {'distribution': 'normal', 'mean': 100, 'std': 15},
+    'cost': {'distribution': 'uniform', 'min': 40, 'max': 80},
+    'churn': {'distribution': 'beta', 'alpha': 2, 'beta': 8},
+    'shock': {'distribution': 'exponential', 'scale': 5}
+}
+MODEL = "revenue * (1 - churn) - cost - shock"
+
+def _legacy_monte_carlo(iterations: int, seed: int) -> Dict[str, float]:
+    """The per-iteration loop from AdvancedSimulationEngine._run_monte_carlo_simulation"""
+    np.random.seed(seed)
+    outcomes = []
+    for _ in range(iterations):
+        sample = {
+            'revenue': np.random.normal(100, 15),
+            'cost': np.random.uniform(40, 80),
+            'churn': np.random.beta(2, 8),
+            'shock': np.random.exponential(5)
+        }
+        outcomes.append(sample['revenue'] * (1 - sample['churn']) - sample['cost'] - sample['shock'])
+    outcomes = np.array(outcomes)
+    return {'mean': float(np.mean(outcomes)), 'p95': float(np.percentile(outcomes, 95))}
+
+def benchmark_monte_carlo(iterations: int = 10_000_000, legacy_iterations: int = 200_000,
+                          seed: int = 0) -> Dict[str, Any]:
+    """Iterations per second for the legacy loop and the batched engine, plus peak memory"""
+    report: Dict[str, Any] = {'iterations': iterations}
+
+    start = time.perf_counter()
+    legacy = _legacy_monte_carlo(legacy_iterations, seed)
+    report['legacy'] = {'iterations_per_second': round(legacy_iterations / (time.perf_counter() - start)),
+                        **legacy}
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        result = MonteCarloEngine(VARIABLES, MODEL, workers=workers).run(iterations, seed=seed)
+        report[f'batched_{workers}_workers'] = {
+            'iterations_per_second': round(result['performance']['iterations_per_second']),
+            'mean': result['distributions']['mean'],
+            'p95': result['distributions']['percentiles']['95th']
+        }
+    # ru_maxrss is in kilobytes on Linux; it stays flat as iterations grow
+    report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return report
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    for name, result in benchmark_monte_carlo(iterations=iterations).items():
+        print(f"{name}: {result}")
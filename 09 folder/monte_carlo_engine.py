@@ -0,0 +1,373 @@
+"""
+Batched Monte Carlo Engine
+Vectorised sampling and model evaluation, sharded across processes, with constant-memory statistics
+"""
+
+import ast
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+# name -> (sampler, required config keys); samplers draw n values from a Generator
+DISTRIBUTIONS: Dict[str, Tuple[Callable[[np.random.Generator, Dict[str, Any], int], np.ndarray], Tuple[str, ...]]] = {
+    'normal': (lambda rng, config, n: rng.normal(config['mean'], config['std'], n), ('mean', 'std')),
+    'uniform': (lambda rng, config, n: rng.uniform(config['min'], config['max'], n), ('min', 'max')),
+    'exponential': (lambda rng, config, n: rng.exponential(config['scale'], n), ('scale',)),
+    'beta': (lambda rng, config, n: rng.beta(config['alpha'], config['beta'], n), ('alpha', 'beta')),
+    'lognormal': (lambda rng, config, n: rng.lognormal(config['mean'], config['sigma'], n), ('mean', 'sigma')),
+    'triangular': (lambda rng, config, n: rng.triangular(config['min'], config['mode'], config['max'], n),
+                   ('min', 'mode', 'max')),
+    'poisson': (lambda rng, config, n: rng.poisson(config['lam'], n).astype(np.float64), ('lam',))
+}
+
+# Names a model expression may use besides its variables
+MODEL_FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log1p': np.log1p,
+    'sin': np.sin, 'cos': np.cos, 'tanh': np.tanh, 'minimum': np.minimum, 'maximum': np.maximum,
+    'where': np.where, 'clip': np.clip, 'floor': np.floor, 'ceil': np.ceil, 'pi': np.pi, 'e': np.e
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq, ast.BitAnd, ast.BitOr, ast.Invert
+)
+
+class ModelExpression:
+    """
+    Arithmetic over whole sample columns, e.g. "revenue * (1 - churn) - costs"
+
+    Only arithmetic, comparisons (combine them with & and |), numeric
+    constants, the variables and MODEL_FUNCTIONS are accepted, so the
+    expression can come from configuration. The source string is what
+    gets pickled to worker processes.
+    """
+
+    def __init__(self, expression: str, variables: List[str]):
+        self.expression = expression
+        self.variables = list(variables)
+        self.code = self._compile()
+
+    def _compile(self):
+        tree = ast.parse(self.expression, mode='eval')
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax in model: {type(node).__name__}")
+            if isinstance(node, ast.Name) and node.id not in MODEL_FUNCTIONS and node.id not in self.variables:
+                raise ValueError(f"Unknown name in model: {node.id}")
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in MODEL_FUNCTIONS):
+                raise ValueError("Models may only call the built-in math functions")
+        return compile(tree, '<model>', 'eval')
+
+    def __call__(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        return eval(self.code, {'__builtins__': {}, **MODEL_FUNCTIONS}, columns)
+
+    def __getstate__(self):
+        return {'expression': self.expression, 'variables': self.variables}
+
+    def __setstate__(self, state):
+        self.expression, self.variables = state['expression'], state['variables']
+        self.code = self._compile()
+
+class StreamingMoments:
+    """Count, mean, variance, min and max merged batch by batch (Chan et al.)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, values: np.ndarray):
+        if values.size:
+            self._combine(values.size, float(values.mean()), float(((values - values.mean()) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other: 'StreamingMoments'):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+
+    def _combine(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+class StreamingHistogram:
+    """
+    Quantiles from fixed-width bins over a range set by a pilot run
+
+    Every shard uses the same layout, so merging is adding counts. Values
+    outside the range are counted as tails and quantiles falling there are
+    interpolated towards the exact min or max. Inside the range the error
+    is at most one bin width.
+    """
+
+    def __init__(self, low: float, high: float, bins: int = 16384):
+        self.low, self.high, self.bins = low, high, bins
+        self.scale = bins / (high - low)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.below = 0
+        self.above = 0
+
+    def update(self, values: np.ndarray):
+        positions = np.floor((values - self.low) * self.scale)
+        inside = (positions >= 0) & (positions < self.bins)
+        self.below += int(np.count_nonzero(positions < 0))
+        self.above += int(np.count_nonzero(positions >= self.bins))
+        self.counts += np.bincount(positions[inside].astype(np.int64), minlength=self.bins)
+
+    def merge(self, other: 'StreamingHistogram'):
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+
+    def quantile(self, q: float, minimum: float, maximum: float) -> float:
+        total = self.below + int(self.counts.sum()) + self.above
+        if not total:
+            return math.nan
+        rank = q * total
+        if rank < self.below:
+            return minimum + (self.low - minimum) * rank / self.below
+        cumulative = np.cumsum(self.counts)
+        inside_rank = rank - self.below
+        if inside_rank >= cumulative[-1]:
+            if not self.above:
+                return min(self.high, maximum)
+            return float(self.high + (maximum - self.high) * (inside_rank - cumulative[-1]) / self.above)
+        index = int(np.searchsorted(cumulative, inside_rank, side='right'))
+        before = cumulative[index - 1] if index else 0
+        fraction = (inside_rank - before) / self.counts[index]
+        return float(self.low + (index + fraction) / self.scale)
+
+class StreamingCorrelation:
+    """Pearson correlation of each input column with the outcome, from shifted running sums"""
+
+    def __init__(self, shifts: np.ndarray, outcome_shift: float):
+        self.shifts = shifts
+        self.outcome_shift = outcome_shift
+        width = len(shifts)
+        self.count = 0
+        self.sum_x = np.zeros(width)
+        self.sum_xx = np.zeros(width)
+        self.sum_xy = np.zeros(width)
+        self.sum_y = 0.0
+        self.sum_yy = 0.0
+
+    def update(self, samples: np.ndarray, outcomes: np.ndarray):
+        x = samples - self.shifts
+        y = outcomes - self.outcome_shift
+        self.count += len(y)
+        self.sum_x += x.sum(axis=0)
+        self.sum_xx += np.einsum('ij,ij->j', x, x)
+        self.sum_xy += y @ x
+        self.sum_y += float(y.sum())
+        self.sum_yy += float(y @ y)
+
+    def merge(self, other: 'StreamingCorrelation'):
+        self.count += other.count
+        self.sum_x += other.sum_x
+        self.sum_xx += other.sum_xx
+        self.sum_xy += other.sum_xy
+        self.sum_y += other.sum_y
+        self.sum_yy += other.sum_yy
+
+    def correlations(self) -> np.ndarray:
+        if self.count < 2:
+            return np.zeros(len(self.shifts))
+        n = self.count
+        covariance = self.sum_xy - self.sum_x * self.sum_y / n
+        variance_x = self.sum_xx - self.sum_x ** 2 / n
+        variance_y = self.sum_yy - self.sum_y ** 2 / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = covariance / np.sqrt(variance_x * variance_y)
+        return np.nan_to_num(result)
+
+class MonteCarloAccumulator:
+    """Everything a shard reports; mergeable, and its size does not grow with iterations"""
+
+    def __init__(self, layout: Dict[str, Any]):
+        self.moments = StreamingMoments()
+        self.histogram = StreamingHistogram(layout['low'], layout['high'], layout['bins'])
+        self.correlation = StreamingCorrelation(layout['shifts'], layout['outcome_shift'])
+        self.non_finite = 0
+        self.sample: List[np.ndarray] = []
+        self.sample_size = layout['sample_size']
+
+    def update(self, samples: np.ndarray, outcomes: np.ndarray):
+        finite = np.isfinite(outcomes)
+        if not finite.all():
+            self.non_finite += int(np.count_nonzero(~finite))
+            samples, outcomes = samples[finite], outcomes[finite]
+        self.moments.update(outcomes)
+        self.histogram.update(outcomes)
+        self.correlation.update(samples, outcomes)
+        kept = sum(len(part) for part in self.sample)
+        if kept < self.sample_size:
+            self.sample.append(outcomes[:self.sample_size - kept].copy())
+
+    def merge(self, other: 'MonteCarloAccumulator'):
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        self.correlation.merge(other.correlation)
+        self.non_finite += other.non_finite
+        self.sample.extend(other.sample)
+
+def _sample_batch(rng: np.random.Generator, variables: Dict[str, Dict[str, Any]], size: int) -> np.ndarray:
+    samples = np.empty((size, len(variables)))
+    for column, config in enumerate(variables.values()):
+        samples[:, column] = DISTRIBUTIONS[config['distribution']][0](rng, config, size)
+    return samples
+
+def _evaluate(model: Callable, names: List[str], samples: np.ndarray) -> np.ndarray:
+    outcomes = model({name: samples[:, column] for column, name in enumerate(names)})
+    return np.broadcast_to(np.asarray(outcomes, dtype=np.float64), (len(samples),))
+
+def _run_chunk(variables: Dict[str, Dict[str, Any]], model: Callable, iterations: int,
+               seed: np.random.SeedSequence, batch_size: int, layout: Dict[str, Any]) -> MonteCarloAccumulator:
+    """One shard: its own Generator, batches of at most batch_size rows"""
+    rng = np.random.default_rng(seed)
+    names = list(variables)
+    accumulator = MonteCarloAccumulator(layout)
+    remaining = iterations
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        samples = _sample_batch(rng, variables, size)
+        accumulator.update(samples, _evaluate(model, names, samples))
+        remaining -= size
+    return accumulator
+
+class MonteCarloEngine:
+    """
+    Monte Carlo runs of 10^7+ iterations in constant memory
+
+    Iterations are split into fixed-size chunks, each with its own seed
+    spawned from one SeedSequence, so results for a seed do not depend on
+    the number of workers. A chunk draws (batch x variables) matrices from
+    its Generator and evaluates the model on whole columns. Chunks run in a
+    process pool when workers > 1.
+
+    The model is either an expression string (see ModelExpression) or a
+    callable taking {variable: column} and returning an array. To run in
+    worker processes a callable must be defined at module level.
+
+    A pilot batch fixes the shared histogram range and the shifts for the
+    correlation sums; results keep moments, a fixed-bin histogram for
+    quantiles, input/outcome correlations and a small outcome sample.
+    """
+
+    def __init__(self, variables: Dict[str, Dict[str, Any]], model: Union[str, Callable],
+                 batch_size: int = 65536, chunk_size: int = 1_000_000, workers: Optional[int] = None,
+                 bins: int = 16384, pilot_size: int = 65536, sample_size: int = 10000):
+        if not variables:
+            raise ValueError("Monte Carlo simulation needs at least one variable")
+        for name, config in variables.items():
+            distribution = config.get('distribution')
+            if distribution not in DISTRIBUTIONS:
+                raise ValueError(f"Unsupported distribution for {name}: {distribution}")
+            missing = [key for key in DISTRIBUTIONS[distribution][1] if key not in config]
+            if missing:
+                raise ValueError(f"Variable {name} is missing {', '.join(missing)}")
+        self.variables = variables
+        self.model = ModelExpression(model, list(variables)) if isinstance(model, str) else model
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.bins = bins
+        self.pilot_size = pilot_size
+        self.sample_size = sample_size
+
+    def run(self, iterations: int, seed: Optional[int] = None, confidence_level: float = 0.95) -> Dict[str, Any]:
+        start = time.perf_counter()
+        chunks = [self.chunk_size] * (iterations // self.chunk_size)
+        if iterations % self.chunk_size:
+            chunks.append(iterations % self.chunk_size)
+        pilot_seed, *chunk_seeds = np.random.SeedSequence(seed).spawn(1 + len(chunks))
+        layout = self._layout(pilot_seed)
+        # Each chunk keeps its share of the outcome sample
+        layout['sample_size'] = -(-self.sample_size // max(1, len(chunks)))
+
+        arguments = [(self.variables, self.model, size, chunk_seed, self.batch_size, layout)
+                     for size, chunk_seed in zip(chunks, chunk_seeds)]
+        workers = max(1, min(self.workers, len(chunks)))
+        total = MonteCarloAccumulator(layout)
+        if workers == 1:
+            for chunk in arguments:
+                total.merge(_run_chunk(*chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for accumulator in pool.map(_run_chunk, *zip(*arguments)):
+                    total.merge(accumulator)
+
+        elapsed = time.perf_counter() - start
+        report = self._summarize(total, confidence_level)
+        report['iterations'] = iterations
+        report['performance'] = {
+            'elapsed_seconds': elapsed,
+            'iterations_per_second': iterations / elapsed if elapsed else math.inf,
+            'workers': workers,
+            'chunks': len(chunks),
+            'batch_size': self.batch_size
+        }
+        return report
+
+    def _layout(self, seed: np.random.SeedSequence) -> Dict[str, Any]:
+        samples = _sample_batch(np.random.default_rng(seed), self.variables, self.pilot_size)
+        outcomes = _evaluate(self.model, list(self.variables), samples)
+        finite = outcomes[np.isfinite(outcomes)]
+        low, high = (float(finite.min()), float(finite.max())) if finite.size else (0.0, 1.0)
+        margin = (high - low) * 0.05 or max(abs(low), 1.0) * 0.05
+        return {
+            'low': low - margin,
+            'high': high + margin,
+            'bins': self.bins,
+            'shifts': samples.mean(axis=0),
+            'outcome_shift': float(finite.mean()) if finite.size else 0.0
+        }
+
+    def _summarize(self, total: MonteCarloAccumulator, confidence_level: float) -> Dict[str, Any]:
+        moments, histogram = total.moments, total.histogram
+
+        def quantile(q: float) -> float:
+            return histogram.quantile(q, moments.minimum, moments.maximum)
+
+        alpha = 1 - confidence_level
+        correlations = total.correlation.correlations()
+        sample = np.concatenate(total.sample)[:self.sample_size] if total.sample else np.empty(0)
+        return {
+            'outcomes': sample.tolist(),
+            'distributions': {
+                'mean': moments.mean,
+                'std': moments.std,
+                'min': moments.minimum,
+                'max': moments.maximum,
+                'median': quantile(0.5),
+                'percentiles': {
+                    '5th': quantile(0.05),
+                    '25th': quantile(0.25),
+                    '75th': quantile(0.75),
+                    '95th': quantile(0.95)
+                },
+                'non_finite': total.non_finite
+            },
+            'confidence_intervals': {
+                f'{confidence_level*100}%': {'lower': quantile(alpha / 2), 'upper': quantile(1 - alpha / 2)}
+            },
+            'sensitivity_analysis': {
+                name: {'correlation': float(correlation), 'rank': rank + 1}
+                for rank, (name, correlation) in enumerate(sorted(
+                    zip(self.variables, correlations), key=lambda item: abs(item[1]), reverse=True))
+            }
+        }
@@ -13,11 +13,13 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
-import networkx as nx
 from collections import defaultdict
 import threading
 import queue
 
+from spatial_index import SpatialIndex
+from routing_graph import RoutingGraph
+
 class RunestoneType(Enum):
     FEHU = "fehu"          # Wealth, prosperity
     URUZ = "uruz"          # Strength, vitality
@@ -189,6 +191,9 @@ class SmartMesh:
         self.mesh_topology = NetworkTopology.MESH
         self.adaptive_routing = True
         self.load_balancing = True
+        self.connection_range = 100.0  # Adjustable range
+        self.spatial_index = SpatialIndex(cell_size=self.connection_range)
+        self.routing_graph = RoutingGraph()
         
     def add_node(self, node_id: str, position: Coordinate3D, capabilities: Dict[str, Any]):
         """Add node to smart mesh"""
@@ -202,25 +207,37 @@ class SmartMesh:
             'last_seen': datetime.now()
         }
         
+        self.spatial_index.insert(node_id, (position.x, position.y, position.z))
+        self.routing_graph.add_node(node_id)
+        
         # Auto-connect to nearby nodes
         self._auto_connect_node(node_id)
     
     def _auto_connect_node(self, node_id: str):
         """Automatically connect node to optimal neighbors"""
         new_node = self.nodes[node_id]
+        position = new_node['position']
         
-        # Find nearby nodes within connection range
-        connection_range = 100.0  # Adjustable range
-        
-        for other_id, other_node in self.nodes.items():
+        # Find nearby nodes within connection range; 3D candidates from the
+        # spatial index are re-checked since distance_to may include w
+        for other_id in self.spatial_index.query_radius((position.x, position.y, position.z),
+                                                        self.connection_range):
             if other_id == node_id:
                 continue
             
-            distance = new_node['position'].distance_to(other_node['position'])
+            distance = position.distance_to(self.nodes[other_id]['position'])
             
-            if distance <= connection_range:
+            if distance <= self.connection_range:
                 self._create_connection(node_id, other_id, distance)
     
+    def get_nodes_in_radius(self, center: Coordinate3D, radius: float) -> List[str]:
+        """IDs of nodes within a 3D radius, in insertion order"""
+        return self.spatial_index.query_radius((center.x, center.y, center.z), radius)
+    
+    def get_nearest_nodes(self, center: Coordinate3D, k: int = 10) -> List[Tuple[str, float]]:
+        """The k nodes closest to center (3D distance), nearest first"""
+        return self.spatial_index.nearest((center.x, center.y, center.z), k)
+    
     def _create_connection(self, node1_id: str, node2_id: str, distance: float):
         """Create bidirectional connection between nodes"""
         connection_strength = max(0.1, 1.0 - (distance / 100.0))
@@ -240,26 +257,24 @@ class SmartMesh:
             'bandwidth': connection_strength * 1000,
             'latency': distance * 0.01
         })
+        
+        # Weight based on latency and inverse of bandwidth
+        weight = distance * 0.01 + 1000 / (connection_strength * 1000)
+        self.routing_graph.add_edge(node1_id, node2_id, weight)
     
     def find_optimal_path(self, source: str, destination: str) -> List[str]:
         """Find optimal path between nodes using smart routing"""
         if source not in self.nodes or destination not in self.nodes:
             return []
         
-        # Use Dijkstra's algorithm with custom weights
-        graph = nx.Graph()
-        
-        for node_id, connections in self.connections.items():
-            for conn in connections:
-                # Weight based on latency and inverse of bandwidth
-                weight = conn['latency'] + (1000 / conn['bandwidth'])
-                graph.add_edge(node_id, conn['target'], weight=weight)
-        
-        try:
-            path = nx.shortest_path(graph, source, destination, weight='weight')
-            return path
-        except nx.NetworkXNoPath:
-            return []
+        # Landmark A* over the persistent routing graph; routes are cached
+        # until the topology changes
+        return self.routing_graph.shortest_path(source, destination)
+    
+    def find_optimal_paths(self, pairs: List[Tuple[str, str]]) -> List[List[str]]:
+        """Optimal paths for many (source, destination) pairs, in order"""
+        # Pairs sharing a source are served by a single search
+        return self.routing_graph.shortest_paths(pairs)
     
     def balance_load(self):
         """Balance load across mesh network"""
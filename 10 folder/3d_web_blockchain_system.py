@@ -43,6 +43,9 @@ from flask_cors import CORS
 import websocket
 import ssl
 
+from mining_engine import ProofOfWorkMiner, get_miner, hash_header, leaf_hash, merkle_root, serialize_header
+from spatial_index import SpatialIndex
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -112,16 +115,20 @@ class Block3D:
         # Calculate initial hash
         self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
-        """Calculate block hash using 3D coordinates and content"""
+    def header_bytes(self) -> bytes:
+        """Serialised header without the nonce
         
+        Content is committed through its hash, and transactions and smart
+        contracts through Merkle roots, so the header stays small however
+        large the block is.
+        """
         content_str = ""
         if isinstance(self.content, WebPageContent):
             content_str = json.dumps(self.content.to_dict(), sort_keys=True)
         else:
             content_str = json.dumps(self.content, sort_keys=True)
         
-        block_data = {
+        return serialize_header({
             'coordinates': self.coordinates.to_dict(),
             'block_type': self.block_type.value,
             'content_hash': hashlib.sha256(content_str.encode()).hexdigest(),
@@ -129,28 +136,27 @@ class Block3D:
             'website_address': self.website_address,
             'page_url': self.page_url,
             'timestamp': self.timestamp,
-            'nonce': self.nonce,
-            'transactions': [str(tx) for tx in self.transactions],
-            'smart_contracts': [str(sc) for sc in self.smart_contracts]
-        }
-        
-        block_string = json.dumps(block_data, sort_keys=True).encode()
-        return hashlib.sha256(block_string).hexdigest()
+            'transactions_root': merkle_root(leaf_hash(str(tx)) for tx in self.transactions),
+            'smart_contracts_root': merkle_root(leaf_hash(str(sc)) for sc in self.smart_contracts)
+        })
+    
+    def calculate_hash(self) -> str:
+        """Calculate block hash using 3D coordinates and content"""
+        return hash_header(self.header_bytes(), self.nonce)
     
-    def mine_block(self, difficulty: int = 4) -> bool:
+    def mine_block(self, difficulty: int = 4, miner: Optional[ProofOfWorkMiner] = None) -> bool:
         """Mine the block using Proof of Work"""
         
         target = "0" * difficulty
         start_time = time.time()
         
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-            
-            # Prevent infinite mining
-            if time.time() - start_time > 300:  # 5 minutes timeout
+        if self.hash[:difficulty] != target:
+            # Prevent infinite mining: 5 minutes timeout
+            mined = (miner or get_miner()).mine(self.header_bytes(), difficulty, self.nonce + 1, timeout=300)
+            if mined is None:
                 logger.warning(f"Mining timeout for block at {self.coordinates.to_dict()}")
                 return False
+            self.nonce, self.hash = mined
         
         mining_time = time.time() - start_time
         self.mining_reward = self._calculate_mining_reward(mining_time, difficulty)
@@ -209,6 +215,12 @@ class Website3DBlockchain:
         self.owner_address = owner_address
         self.difficulty = difficulty
         self.chain: List[Block3D] = []
+        
+        # Lookup indexes over the chain, maintained by _append_block
+        self.spatial_index = SpatialIndex()  # chain position by coordinates
+        self.url_index: Dict[str, str] = {}  # page URL -> hash of its first block
+        self.hash_index: Dict[str, int] = {}  # block hash -> chain position
+        
         self.pending_transactions = []
         self.mining_reward = 10.0
         self.staking_pool = {}
@@ -257,7 +269,7 @@ class Website3DBlockchain:
         )
         
         genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+        self._append_block(genesis_block)
         
         logger.info(f"Genesis block created for website {self.domain_name}")
     
@@ -288,7 +300,7 @@ class Website3DBlockchain:
         
         # Mine the block
         if new_block.mine_block(self.difficulty):
-            self.chain.append(new_block)
+            self._append_block(new_block)
             
             # Store in IPFS if available
             if self.ipfs_client:
@@ -317,23 +329,33 @@ class Website3DBlockchain:
         """Get the latest block in the chain"""
         return self.chain[-1] if self.chain else None
     
+    def _append_block(self, block: Block3D):
+        """Append a mined block and index it"""
+        position = len(self.chain)
+        self.chain.append(block)
+        self.hash_index[block.hash] = position
+        self.url_index.setdefault(block.page_url, block.hash)
+        coordinates = block.coordinates
+        self.spatial_index.insert(position, (coordinates.x, coordinates.y, coordinates.z))
+    
+    def get_block_by_hash(self, block_hash: str) -> Optional[Block3D]:
+        position = self.hash_index.get(block_hash)
+        return self.chain[position] if position is not None else None
+    
     def get_webpage_by_url(self, page_url: str) -> Optional[Block3D]:
         """Retrieve a webpage block by URL"""
-        
-        for block in self.chain:
-            if block.page_url == page_url:
-                return block
-        return None
+        block_hash = self.url_index.get(page_url)
+        return self.get_block_by_hash(block_hash) if block_hash is not None else None
     
     def get_blocks_in_radius(self, center: Coordinate3D, radius: float) -> List[Block3D]:
-        """Get all blocks within a 3D radius"""
-        
-        blocks_in_radius = []
-        for block in self.chain:
-            if block.coordinates.distance_to(center) <= radius:
-                blocks_in_radius.append(block)
-        
-        return blocks_in_radius
+        """Get all blocks within a 3D radius, in chain order"""
+        positions = self.spatial_index.query_radius((center.x, center.y, center.z), radius)
+        return [self.chain[position] for position in positions]
+    
+    def get_nearest_blocks(self, center: Coordinate3D, k: int = 10) -> List[Tuple[Block3D, float]]:
+        """The k blocks closest to center with their distances, nearest first"""
+        nearest = self.spatial_index.nearest((center.x, center.y, center.z), k)
+        return [(self.chain[position], distance) for position, distance in nearest]
     
     def validate_chain(self) -> bool:
         """Validate the entire blockchain"""
@@ -20,6 +20,8 @@ from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
 import networkx as nx
 
+from streaming_analysis import analyze_source
+
 class SimulationType(Enum):
     MONTE_CARLO = "monte_carlo"
     AGENT_BASED = "agent_based"
@@ -83,6 +85,26 @@ class DataAnalysisEngine:
         
         return results
     
+    def analyze_dataset_streaming(self, source: Union[str, pd.DataFrame], analysis_config: Dict) -> Dict:
+        """
+        One-pass analysis of a CSV, Parquet or Arrow file too large for memory
+        
+        Covers dataset info, descriptive statistics with sketched quartiles,
+        correlations and outlier counts. Sections that need every row at once
+        (patterns, trends, clustering, feature importance) are left to
+        analyze_dataset on a sample. analysis_config may set chunksize,
+        workers, sketch_k and isolation_forest.
+        """
+        results = analyze_source(
+            source,
+            chunksize=analysis_config.get('chunksize', 100_000),
+            workers=analysis_config.get('workers', 1),
+            sketch_k=analysis_config.get('sketch_k', 2000),
+            isolation_forest=analysis_config.get('isolation_forest', True)
+        )
+        results['analysis_id'] = str(uuid.uuid4())
+        return results
+    
     def _get_dataset_info(self, data: pd.DataFrame) -> Dict:
         """Get basic dataset information"""
         return {
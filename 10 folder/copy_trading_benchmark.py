@@ -0,0 +1,96 @@
+"""
+Copy Trading Benchmarks
+Per-relationship mirroring loop against the vectorised fan-out with batched submission
+"""
+
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from copy_trading_engine import CopyTradingEngine, LeaderFill
+from order_matching_engine import MatchingEngine, to_ticks
+
+POLL_INTERVAL = 5.0
+
+def _legacy_mirror(relationships: List[Dict[str, Any]], fill: LeaderFill, engine: MatchingEngine) -> int:
+    """One copier at a time: size from the relationship dict, then submit its order on its own"""
+    submitted = 0
+    for relationship in relationships:
+        if relationship['leader_id'] != fill.leader_id or relationship['status'] != 'active':
+            continue
+        notional = relationship['amount'] * relationship['copy_ratio'] * fill.quantity * fill.price / fill.leader_equity
+        notional = min(notional, relationship['max_trade_amount'], relationship['remaining'])
+        if notional < 1.0:
+            continue
+        relationship['remaining'] -= notional
+        engine.submit(('legacy', relationship['copier_id'], fill.order_id), fill.symbol, fill.side, 'market', None,
+                      notional / fill.price, to_ticks(fill.price))
+        submitted += 1
+    return submitted
+
+def benchmark_copy_trading(copiers: int = 100_000, leader_fills: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """Time from a leader fill to the submission of every mirrored order, for one leader with many copiers"""
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(200, 20_000, copiers).round(2)
+    ratios = rng.choice([0.5, 1.0, 2.0], copiers)
+    caps = np.where(rng.random(copiers) < 0.2, rng.uniform(50, 500, copiers), np.inf)
+    report: Dict[str, Any] = {'copiers': copiers, 'leader_fills': leader_fills}
+
+    fills, position = [], 0.0
+    for index in range(leader_fills):
+        side = 'buy' if index % 3 else 'sell'
+        quantity = float(rng.uniform(1, 20)) if side == 'buy' else min(position, float(rng.uniform(1, 20)))
+        fills.append(LeaderFill('leader', f'order-{index}', 'stocks', 'AAPL', side, quantity,
+                                float(rng.uniform(150, 200)), 100_000.0, position, 0.0))
+        position += quantity if side == 'buy' else -quantity
+
+    relationships = [{'leader_id': 'leader', 'copier_id': copier, 'status': 'active', 'amount': amount,
+                      'copy_ratio': ratio, 'max_trade_amount': cap, 'remaining': amount}
+                     for copier, (amount, ratio, cap) in enumerate(zip(amounts.tolist(), ratios.tolist(),
+                                                                       caps.tolist()))]
+    matching = MatchingEngine()
+    legacy_fills = [fill for fill in fills if fill.side == 'buy'][:max(1, leader_fills // 20)]
+    start = time.perf_counter()
+    for fill in legacy_fills:
+        _legacy_mirror(relationships, fill, matching)
+    processing = (time.perf_counter() - start) / len(legacy_fills)
+    report['legacy'] = {
+        'processing_ms_per_fill': round(processing * 1000, 2),
+        # A fill waits for the next poll, half an interval on average, then for the pass itself
+        'expected_lag_ms': round((POLL_INTERVAL / 2 + processing) * 1000, 1)
+    }
+
+    engine = CopyTradingEngine()
+    for copier, (amount, ratio, cap) in enumerate(zip(amounts.tolist(), ratios.tolist(), caps.tolist())):
+        engine.add_copier('leader', copier, amount, ratio, None if np.isinf(cap) else cap)
+    matching = MatchingEngine()
+    allocate_seconds, submit_seconds, mirrored = [], [], 0
+    for fill in fills:
+        fill = fill._replace(published_at=time.perf_counter())
+        start = time.perf_counter()
+        allocation = engine.allocate(fill)
+        allocated = time.perf_counter()
+        keys = [(copier, fill.order_id) for copier in allocation.copier_ids]
+        matching.submit_batch(keys, fill.symbol, fill.side, 'market', allocation.quantities.tolist(),
+                              market_price=to_ticks(fill.price))
+        engine.record_submission(fill)
+        engine.settle(fill, allocation.copier_ids, allocation.quantities, np.full(len(keys), fill.price))
+        allocate_seconds.append(allocated - start)
+        submit_seconds.append(time.perf_counter() - allocated)
+        mirrored += len(keys)
+
+    stats = engine.get_stats()
+    report['fanout'] = {
+        'mirrored_orders': mirrored,
+        'allocate_ms_p50': round(float(np.percentile(allocate_seconds, 50)) * 1000, 2),
+        'submit_batch_ms_p50': round(float(np.percentile(submit_seconds, 50)) * 1000, 2),
+        'fill_to_submit_ms': {name: round(value, 2) for name, value in stats['fill_to_submit_ms'].items()}
+    }
+    return report
+
+if __name__ == "__main__":
+    copiers = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, result in benchmark_copy_trading(copiers=copiers).items():
+        print(f"{name}: {result}")
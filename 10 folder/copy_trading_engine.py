@@ -0,0 +1,215 @@
+"""
+Copy Trading Engine
+Leader fills published as events and fanned out to every copier in one vectorised allocation
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+class LeaderFill(NamedTuple):
+    leader_id: Hashable
+    order_id: str
+    asset_type: str
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    leader_equity: float
+    leader_position: float  # the leader's quantity of symbol just before this fill
+    published_at: float
+
+class Allocation(NamedTuple):
+    fill: LeaderFill
+    copier_ids: List[Hashable]
+    quantities: np.ndarray
+
+class CopierTable:
+    """
+    Copiers of one leader as parallel arrays, one row per copier
+
+    amount is what the copier put into the copy and remaining the part of
+    it not yet in open mirrored positions. ratio scales every mirrored
+    trade, max_trade caps the notional of one (inf for no cap). holdings
+    maps symbol -> mirrored quantity per row, so a leader sell closes the
+    same fraction of each copier's mirrored position.
+
+    allocate only sizes the mirrored orders. remaining and holdings change
+    in settle, from the quantities and prices the orders executed at, so a
+    rejected or partly filled order leaves the unfilled part untouched.
+    """
+
+    COLUMNS = ('amount', 'remaining', 'ratio', 'max_trade')
+
+    def __init__(self, capacity: int = 16):
+        self.size = 0
+        self.copier_ids: List[Hashable] = []
+        self.rows: Dict[Hashable, int] = {}
+        self.amount = np.zeros(capacity)
+        self.remaining = np.zeros(capacity)
+        self.ratio = np.zeros(capacity)
+        self.max_trade = np.zeros(capacity)
+        self.holdings: Dict[str, np.ndarray] = {}
+
+    def _grow(self):
+        capacity = 2 * len(self.amount)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros(capacity - len(column))]))
+        for symbol, held in self.holdings.items():
+            self.holdings[symbol] = np.concatenate([held, np.zeros(capacity - len(held))])
+
+    def add(self, copier_id: Hashable, amount: float, ratio: float, max_trade: Optional[float]):
+        if copier_id in self.rows:
+            raise ValueError("Already copying this trader")
+        if self.size == len(self.amount):
+            self._grow()
+        row = self.size
+        self.rows[copier_id] = row
+        self.copier_ids.append(copier_id)
+        self.amount[row] = self.remaining[row] = amount
+        self.ratio[row] = ratio
+        self.max_trade[row] = np.inf if max_trade is None else max_trade
+        for held in self.holdings.values():
+            held[row] = 0.0
+        self.size += 1
+
+    def remove(self, copier_id: Hashable) -> Dict[str, Any]:
+        """Drop a copier by moving the last row into its place; returns its unused amount and mirrored holdings"""
+        row = self.rows.pop(copier_id)
+        last = self.size - 1
+        released = {
+            'remaining': float(self.remaining[row]),
+            'holdings': {symbol: float(column[row]) for symbol, column in self.holdings.items() if column[row]}
+        }
+        if row != last:
+            moved = self.copier_ids[last]
+            self.copier_ids[row] = moved
+            self.rows[moved] = row
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            for column in self.holdings.values():
+                column[row] = column[last]
+        self.copier_ids.pop()
+        self.size = last
+        return released
+
+    def allocate(self, fill: LeaderFill, min_trade: float) -> Allocation:
+        """Mirrored quantities for every copier, sized and limited with whole-array operations"""
+        n = self.size
+        held = self.holdings.get(fill.symbol)
+        if held is None:
+            held = self.holdings[fill.symbol] = np.zeros(len(self.amount))
+
+        if fill.side == 'buy':
+            # Same share of the copy amount as the trade is of the leader's equity
+            fraction = fill.quantity * fill.price / fill.leader_equity if fill.leader_equity > 0 else 0.0
+            notional = self.amount[:n] * self.ratio[:n] * fraction
+            notional = np.minimum(np.minimum(notional, self.max_trade[:n]), self.remaining[:n])
+            notional[notional < min_trade] = 0.0
+            quantities = notional / fill.price
+        else:
+            # Close the same fraction of each mirrored position as the leader closed of theirs
+            fraction = min(1.0, fill.quantity / fill.leader_position) if fill.leader_position > 0 else 0.0
+            quantities = held[:n] * fraction
+
+        selected = np.flatnonzero(quantities > 0)
+        return Allocation(fill, [self.copier_ids[row] for row in selected.tolist()], quantities[selected])
+
+    def settle(self, fill: LeaderFill, copier_ids: List[Hashable], quantities: np.ndarray, prices: np.ndarray):
+        """Book the executed part of mirrored orders; copiers removed since the allocation are skipped"""
+        found = [(index, self.rows[copier_id]) for index, copier_id in enumerate(copier_ids) if copier_id in self.rows]
+        if not found:
+            return
+        positions, rows = (np.array(column) for column in zip(*found))
+        quantities = quantities[positions]
+        notional = quantities * prices[positions]
+        held = self.holdings.get(fill.symbol)
+        if held is None:
+            held = self.holdings[fill.symbol] = np.zeros(len(self.amount))
+        if fill.side == 'buy':
+            self.remaining[rows] = np.maximum(self.remaining[rows] - notional, 0.0)
+            held[rows] += quantities
+        else:
+            self.remaining[rows] = np.minimum(self.remaining[rows] + notional, self.amount[rows])
+            held[rows] = np.maximum(held[rows] - quantities, 0.0)
+
+class CopyTradingEngine:
+    """
+    Event-driven copy trading
+
+    Executions of a leader's own orders are published onto a queue. A
+    consumer takes each event, sizes the orders of all the leader's
+    copiers at once with CopierTable.allocate and submits them as one
+    batch, recording the time from the leader's fill to the submission.
+    Once the batch has executed, settle books what each order filled.
+    """
+
+    def __init__(self, min_trade: float = 1.0, latency_window: int = 10_000):
+        self.min_trade = min_trade
+        self.tables: Dict[Hashable, CopierTable] = {}
+        self.events: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.latencies: deque = deque(maxlen=latency_window)
+        self.stats = {'leader_fills': 0, 'mirrored_orders': 0, 'largest_fanout': 0}
+
+    def add_copier(self, leader_id: Hashable, copier_id: Hashable, amount: float, ratio: float = 1.0,
+                   max_trade: Optional[float] = None):
+        if leader_id == copier_id:
+            raise ValueError("Cannot copy yourself")
+        with self.lock:
+            table = self.tables.setdefault(leader_id, CopierTable())
+            table.add(copier_id, amount, ratio, max_trade)
+
+    def remove_copier(self, leader_id: Hashable, copier_id: Hashable) -> Dict[str, Any]:
+        with self.lock:
+            return self.tables[leader_id].remove(copier_id)
+
+    def copier_count(self, leader_id: Hashable) -> int:
+        table = self.tables.get(leader_id)
+        return table.size if table else 0
+
+    def publish(self, fill: LeaderFill):
+        self.events.put(fill)
+
+    def allocate(self, fill: LeaderFill) -> Optional[Allocation]:
+        with self.lock:
+            table = self.tables.get(fill.leader_id)
+            if not table or not table.size:
+                return None
+            allocation = table.allocate(fill, self.min_trade)
+            self.stats['leader_fills'] += 1
+            self.stats['mirrored_orders'] += len(allocation.copier_ids)
+            self.stats['largest_fanout'] = max(self.stats['largest_fanout'], len(allocation.copier_ids))
+            return allocation
+
+    def settle(self, fill: LeaderFill, copier_ids: List[Hashable], quantities: Sequence[float],
+               prices: Sequence[float]):
+        """Record what the mirrored orders of a fill executed, as a quantity and price per copier"""
+        with self.lock:
+            table = self.tables.get(fill.leader_id)
+            if table:
+                table.settle(fill, copier_ids, np.asarray(quantities, dtype=float), np.asarray(prices, dtype=float))
+
+    def record_submission(self, fill: LeaderFill):
+        self.latencies.append(time.perf_counter() - fill.published_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = np.array(self.latencies)
+        return {
+            **self.stats,
+            'leaders': sum(1 for table in self.tables.values() if table.size),
+            'copiers': sum(table.size for table in self.tables.values()),
+            'queued_events': self.events.qsize(),
+            'fill_to_submit_ms': {
+                'count': len(latencies),
+                'p50': float(np.percentile(latencies, 50) * 1000) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99) * 1000) if len(latencies) else None,
+                'max': float(latencies.max() * 1000) if len(latencies) else None
+            }
+        }
@@ -18,6 +18,9 @@ from concurrent.futures import ThreadPoolExecutor
 import requests
 import redis
 
+from copy_trading_engine import CopyTradingEngine, LeaderFill
+from order_matching_engine import MatchingEngine, to_ticks
+
 logger = logging.getLogger(__name__)
 
 class AssetType:
@@ -69,6 +72,13 @@ class EToroTradingService:
         self.market_data = {}
         self.trading_signals = {}
         
+        # Resting orders indexed by trigger price; symbol -> (asset_type, last price matched)
+        self.matching_engine = MatchingEngine()
+        self.book_prices = {}
+        
+        # Copier allocations per leader, fed by leader fills as they execute
+        self.copy_engine = CopyTradingEngine()
+        
         # Asset universe
         self.available_assets = {
             AssetType.STOCKS: {
@@ -192,7 +202,7 @@ class EToroTradingService:
             while True:
                 try:
                     self._process_pending_orders()
-                    time.sleep(0.1)  # Process orders frequently
+                    time.sleep(0.1)  # Catch prices changed in place; cost is per symbol, not per order
                 except Exception as e:
                     logger.error(f"Order processing error: {str(e)}")
                     time.sleep(1)
@@ -205,11 +215,10 @@ class EToroTradingService:
         def process_copy_trading():
             while True:
                 try:
-                    self._process_copy_trading()
-                    time.sleep(5)  # Process copy trades every 5 seconds
+                    # Block until a leader fill is published
+                    self._mirror_fill(self.copy_engine.events.get())
                 except Exception as e:
                     logger.error(f"Copy trading error: {str(e)}")
-                    time.sleep(10)
         
         thread = threading.Thread(target=process_copy_trading, daemon=True)
         thread.start()
@@ -333,41 +342,24 @@ class EToroTradingService:
             if side == 'buy' and portfolio['available_balance'] < order_value:
                 raise ValueError("Insufficient balance")
             
-            # Create order
-            order_id = str(uuid.uuid4())
-            order = {
-                'order_id': order_id,
-                'trader_id': trader_id,
-                'asset_type': asset_type,
-                'symbol': symbol,
-                'side': side,
-                'quantity': quantity,
-                'order_type': order_type,
-                'price': order_data.get('price', current_price),
-                'stop_loss': order_data.get('stop_loss'),
-                'take_profit': order_data.get('take_profit'),
-                'leverage': order_data.get('leverage', 1),
-                'status': OrderStatus.PENDING,
-                'filled_quantity': Decimal('0'),
-                'average_price': Decimal('0'),
-                'commission': Decimal('0'),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            }
-            
-            # Store order
-            self.orders[order_id] = order
-            portfolio['orders'][order_id] = order
+            # Create and store order
+            order = self._create_order(trader_id, asset_type, symbol, side, quantity, order_type,
+                                       order_data.get('price', current_price), order_data.get('stop_loss'),
+                                       order_data.get('take_profit'), order_data.get('leverage', 1))
+            order_id = order['order_id']
             
             # Reserve balance for buy orders
             if side == 'buy':
                 portfolio['available_balance'] -= order_value
             
+            # Execute now if the order is already executable, otherwise rest it in the book
+            self._route_order(order)
+            
             logger.info(f"Order placed: {order_id} by trader {trader_id}")
             
             return {
                 'order_id': order_id,
-                'status': OrderStatus.PENDING,
+                'status': order['status'],
                 'message': 'Order placed successfully'
             }
             
@@ -375,16 +367,180 @@ class EToroTradingService:
             logger.error(f"Place order error: {str(e)}")
             raise
     
+    def _create_order(self, trader_id: str, asset_type: str, symbol: str, side: str, quantity: Decimal,
+                      order_type: str, price: Any, stop_loss: Any = None, take_profit: Any = None,
+                      leverage: int = 1) -> Dict[str, Any]:
+        """Create a pending order record and store it with the trader's portfolio"""
+        order_id = str(uuid.uuid4())
+        order = {
+            'order_id': order_id,
+            'trader_id': trader_id,
+            'asset_type': asset_type,
+            'symbol': symbol,
+            'side': side,
+            'quantity': quantity,
+            'order_type': order_type,
+            'price': price,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'leverage': leverage,
+            'status': OrderStatus.PENDING,
+            'filled_quantity': Decimal('0'),
+            'average_price': Decimal('0'),
+            'commission': Decimal('0'),
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+        self.orders[order_id] = order
+        self.portfolios[trader_id]['orders'][order_id] = order
+        return order
+    
+    def _route_order(self, order: Dict[str, Any], rest: bool = False):
+        """Hand an order to the matching engine and execute it if it fills straight away"""
+        asset_type = order['asset_type']
+        symbol = order['symbol']
+        market_price = to_ticks(self.available_assets[asset_type][symbol]['price'])
+        self.book_prices[symbol] = (asset_type, market_price)
+        trigger = None if order['order_type'] == OrderType.MARKET else to_ticks(order['price'])
+        fill = self.matching_engine.submit(order['order_id'], symbol, order['side'], order['order_type'],
+                                           trigger, float(order['quantity']), market_price, rest)
+        if fill is not None:
+            self._execute_fill(order)
+    
+    def _execute_fill(self, order: Dict[str, Any]):
+        """Run the execution for an order the book has triggered; rest it again if it did not execute"""
+        position_before = self._position_quantity(order['trader_id'], order['symbol'])
+        self._execute_order(order)
+        if order['status'] == OrderStatus.PENDING and order['order_type'] != OrderType.MARKET:
+            self._route_order(order, rest=True)
+        elif (order['status'] == OrderStatus.EXECUTED and 'copied_from' not in order
+              and self.copy_engine.copier_count(order['trader_id'])):
+            # Only a leader's own trades are mirrored, never trades that were themselves copied
+            price = self.available_assets[order['asset_type']][order['symbol']]['price']
+            self.copy_engine.publish(LeaderFill(
+                order['trader_id'], order['order_id'], order['asset_type'], order['symbol'], order['side'],
+                float(order['quantity']), float(price), float(self.portfolios[order['trader_id']]['equity']),
+                position_before, time.perf_counter()
+            ))
+    
+    def _position_quantity(self, trader_id: str, symbol: str) -> float:
+        """Quantity of symbol in a trader's open position, 0 without one"""
+        position = self.portfolios[trader_id]['positions'].get(symbol)
+        if position is None:
+            return 0.0
+        return float(position['quantity'] if isinstance(position, dict) else position)
+    
+    def _mirror_fill(self, fill: LeaderFill):
+        """Create every copier's order for a leader fill and submit them to the matching engine as one batch"""
+        allocation = self.copy_engine.allocate(fill)
+        if allocation is None or not allocation.copier_ids:
+            return
+        orders = []
+        for copier_id, quantity in zip(allocation.copier_ids, allocation.quantities.tolist()):
+            order = self._create_order(copier_id, fill.asset_type, fill.symbol, fill.side,
+                                       Decimal(str(round(quantity, 8))), OrderType.MARKET, Decimal(str(fill.price)))
+            order['copied_from'] = fill.order_id
+            orders.append(order)
+        fills = self.matching_engine.submit_batch([order['order_id'] for order in orders], fill.symbol, fill.side,
+                                                  OrderType.MARKET, [float(order['quantity']) for order in orders],
+                                                  market_price=to_ticks(fill.price))
+        self.copy_engine.record_submission(fill)
+        executed = []
+        for mirrored in fills:
+            order = self.orders[mirrored.key]
+            self._execute_fill(order)
+            if order['status'] in (OrderStatus.EXECUTED, OrderStatus.PARTIALLY_FILLED):
+                executed.append(order)
+
+        # Copier state follows what executed, so rejected orders and unfilled parts stay available
+        self.copy_engine.settle(
+            fill, [order['trader_id'] for order in executed],
+            [float(order['filled_quantity'] or order['quantity']) for order in executed],
+            [float(order['average_price'] or fill.price) for order in executed]
+        )
+    
+    def register_copier(self, copier_id: str, leader_id: str, amount: Any,
+                        settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Start copying a trader; amount is set aside from the copier's available balance"""
+        if copier_id not in self.traders or leader_id not in self.traders:
+            raise ValueError("Trader not found")
+        if not self.traders[leader_id]['allow_copying']:
+            raise ValueError("Trader does not allow copying")
+        amount = Decimal(str(amount))
+        portfolio = self.portfolios[copier_id]
+        if portfolio['available_balance'] < amount:
+            raise ValueError("Insufficient balance")
+        
+        settings = settings or {}
+        max_trade = settings.get('max_trade_amount')
+        self.copy_engine.add_copier(leader_id, copier_id, float(amount), float(settings.get('copy_ratio', 1.0)),
+                                    None if max_trade is None else float(max_trade))
+        portfolio['available_balance'] -= amount
+        
+        relationship_id = str(uuid.uuid4())
+        self.copy_relationships[relationship_id] = {
+            'relationship_id': relationship_id,
+            'copier_id': copier_id,
+            'leader_id': leader_id,
+            'amount': amount,
+            'settings': settings,
+            'status': 'active',
+            'created_at': datetime.utcnow()
+        }
+        leader_stats = self.traders[leader_id]['statistics']
+        leader_stats['copiers'] += 1
+        leader_stats['assets_under_management'] += amount
+        self.metrics['copy_relationships'] += 1
+        
+        return {
+            'relationship_id': relationship_id,
+            'status': 'active',
+            'message': 'Copy trading started'
+        }
+    
+    def unregister_copier(self, relationship_id: str) -> Dict[str, Any]:
+        """Stop copying; mirrored positions stay open and the unused amount returns to the balance"""
+        relationship = self.copy_relationships.get(relationship_id)
+        if relationship is None or relationship['status'] != 'active':
+            raise ValueError("Copy relationship not found")
+        
+        released = self.copy_engine.remove_copier(relationship['leader_id'], relationship['copier_id'])
+        self.portfolios[relationship['copier_id']]['available_balance'] += Decimal(str(round(released['remaining'], 8)))
+        relationship['status'] = 'stopped'
+        relationship['stopped_at'] = datetime.utcnow()
+        
+        leader_stats = self.traders[relationship['leader_id']]['statistics']
+        leader_stats['copiers'] -= 1
+        leader_stats['assets_under_management'] -= relationship['amount']
+        self.metrics['copy_relationships'] -= 1
+        
+        return {
+            'relationship_id': relationship_id,
+            'status': 'stopped',
+            'open_positions': released['holdings']
+        }
+    
+    def update_market_price(self, asset_type: str, symbol: str, price: Decimal) -> int:
+        """Set a price and execute the resting orders it triggers; returns the number triggered"""
+        self.available_assets[asset_type][symbol]['price'] = price
+        return self._match_symbol(asset_type, symbol, to_ticks(price))
+    
+    def _match_symbol(self, asset_type: str, symbol: str, price: int) -> int:
+        self.book_prices[symbol] = (asset_type, price)
+        fills = self.matching_engine.on_price(symbol, price)
+        for fill in fills:
+            order = self.orders.get(fill.key)
+            if order is not None and order['status'] == OrderStatus.PENDING:
+                self._execute_fill(order)
+        return len(fills)
+    
     def _process_pending_orders(self):
-        """Process pending orders"""
+        """Match the books of symbols whose price changed since the last pass"""
         try:
-            pending_orders = [
-                order for order in self.orders.values()
-                if order['status'] == OrderStatus.PENDING
-            ]
-            
-            for order in pending_orders:
-                self._execute_order(order)
+            for symbol, (asset_type, last_price) in list(self.book_prices.items()):
+                price = to_ticks(self.available_assets[asset_type][symbol]['price'])
+                if price != last_price:
+                    self._match_symbol(asset_type, symbol, price)
                 
         except Exception as e:
             logger.error(f"Process pending orders error: {str(e)}")
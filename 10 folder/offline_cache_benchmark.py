@@ -0,0 +1,110 @@
+"""
+Offline Cache Benchmarks
+Hit latency and eviction storms for the legacy single-tier cache against the two-tier CacheManager
+"""
+
+import gzip
+import os
+import pickle
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any
+
+from offline_capabilities import CacheManager, LocalDatabase
+
+class _LegacyCache:
+    """CacheManager before the memory tier: SELECT, UPDATE + commit and decode on every hit,
+    SUM(size_bytes) on every set and one DELETE + commit per evicted key"""
+
+    def __init__(self, db: LocalDatabase, max_cache_size: int):
+        self.connection = db.connection
+        self.max_cache_size = max_cache_size
+
+    def get(self, key: str) -> Any:
+        row = self.connection.execute("SELECT value, expiry_time FROM cache_entries WHERE key = ?",
+                                      (key,)).fetchone()
+        if not row:
+            return None
+        self.connection.execute("""
+            UPDATE cache_entries SET access_count = access_count + 1, last_accessed = ? WHERE key = ?
+        """, (datetime.now().isoformat(), key))
+        self.connection.commit()
+        return pickle.loads(gzip.decompress(row[0]))
+
+    def set(self, key: str, value: Any):
+        compressed = gzip.compress(pickle.dumps(value))
+        current_size = self.connection.execute("SELECT SUM(size_bytes) FROM cache_entries").fetchone()[0] or 0
+        if current_size + len(compressed) > self.max_cache_size:
+            bytes_to_free = current_size + len(compressed) - self.max_cache_size + self.max_cache_size * 0.1
+            freed = 0
+            for key_to_delete, size_bytes in self.connection.execute(
+                    "SELECT key, size_bytes FROM cache_entries ORDER BY last_accessed ASC").fetchall():
+                self.connection.execute("SELECT size_bytes FROM cache_entries WHERE key = ?", (key_to_delete,))
+                self.connection.execute("DELETE FROM cache_entries WHERE key = ?", (key_to_delete,))
+                self.connection.commit()
+                freed += size_bytes
+                if freed >= bytes_to_free:
+                    break
+        self.connection.execute("""
+            INSERT OR REPLACE INTO cache_entries (key, value, expiry_time, access_count, last_accessed, size_bytes)
+            VALUES (?, ?, NULL, 0, ?, ?)
+        """, (key, compressed, datetime.now().isoformat(), len(compressed)))
+        self.connection.commit()
+
+def _value(rng: random.Random, fields: int) -> Dict[str, Any]:
+    """A decoded record of the size offline payloads usually have"""
+    return {f"field_{i}": rng.random() for i in range(fields)} | {'tags': ['offline'] * 8}
+
+def benchmark_cache(entries: int = 5_000, lookups: int = 20_000, fields: int = 32,
+                    hot_fraction: float = 0.1, storm_inserts: int = 2_000,
+                    seed: int = 0) -> Dict[str, Any]:
+    """Hit latency on a skewed workload and cost of inserts that each force an eviction"""
+    rng = random.Random(seed)
+    values = [_value(rng, fields) for _ in range(entries)]
+    entry_size = len(gzip.compress(pickle.dumps(values[0])))
+    # 90% of lookups go to the hot set, which fits in the memory tier
+    hot = max(1, int(entries * hot_fraction))
+    keys = [rng.randrange(hot) if rng.random() < 0.9 else rng.randrange(entries) for _ in range(lookups)]
+    report = {}
+
+    for name in ('legacy', 'two_tier'):
+        with tempfile.TemporaryDirectory() as directory:
+            db = LocalDatabase(os.path.join(directory, "cache.db"))
+            if name == 'legacy':
+                cache = _LegacyCache(db, max_cache_size=1 << 40)
+            else:
+                cache = CacheManager(db, max_cache_size=1 << 40, max_memory_entries=hot * 2)
+
+            for index, value in enumerate(values):
+                cache.set(f"key-{index}", value)
+
+            start = time.perf_counter()
+            for index in keys:
+                cache.get(f"key-{index}")
+            hit_seconds = time.perf_counter() - start
+
+            # Eviction storm: cap the cache at its current size so inserts keep evicting
+            cache.max_cache_size = entries * entry_size
+            start = time.perf_counter()
+            for index in range(storm_inserts):
+                cache.set(f"storm-{index}", values[index % entries])
+            storm_seconds = time.perf_counter() - start
+
+            if name == 'two_tier':
+                cache.close()
+            db.connection.close()
+
+        report[name] = {
+            'hit_us': 1e6 * hit_seconds / lookups,
+            'storm_insert_ms': 1000 * storm_seconds / storm_inserts
+        }
+
+    report['hit_speedup'] = report['legacy']['hit_us'] / report['two_tier']['hit_us']
+    report['storm_speedup'] = report['legacy']['storm_insert_ms'] / report['two_tier']['storm_insert_ms']
+    return report
+
+if __name__ == "__main__":
+    for name, result in benchmark_cache().items():
+        print(f"{name}: {result}")
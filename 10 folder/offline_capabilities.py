@@ -11,7 +11,8 @@ import time
 import threading
 import queue
 import asyncio
-from typing import Dict, List, Optional, Any, Union, Callable
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Union, Callable, Iterator
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -21,6 +22,8 @@ import uuid
 import shutil
 from pathlib import Path
 
+from offline_codec import PayloadCodec
+
 class SyncStatus(Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
@@ -58,6 +61,32 @@ class OfflineData:
     last_modified: datetime
     size_bytes: int
 
+_UNDECODED = object()
+
+class LazyOfflineData(OfflineData):
+    """OfflineData whose content is decoded from the stored payload on first access"""
+    
+    def __init__(self, payload: bytes, codec_tag: Optional[str], codec: PayloadCodec, **fields):
+        self._payload = payload
+        self._codec_tag = codec_tag
+        self._codec = codec
+        super().__init__(content=_UNDECODED, **fields)
+    
+    @property
+    def content(self) -> Any:
+        if self._content is _UNDECODED:
+            self._content = self._codec.decode(self._payload, self._codec_tag)
+            self._payload = None
+        return self._content
+    
+    @content.setter
+    def content(self, value: Any):
+        self._content = value
+    
+    @property
+    def is_decoded(self) -> bool:
+        return self._content is not _UNDECODED
+
 @dataclass
 class SyncOperation:
     id: str
@@ -73,8 +102,13 @@ class SyncOperation:
 class LocalDatabase:
     """Local SQLite database for offline data storage"""
     
-    def __init__(self, db_path: str):
+    # Column order every row reader below relies on
+    DATA_COLUMNS = ("id, data_type, content, timestamp, checksum, version, user_id, "
+                    "sync_status, last_modified, size_bytes, codec")
+    
+    def __init__(self, db_path: str, codec: Optional[PayloadCodec] = None):
         self.db_path = db_path
+        self.codec = codec or PayloadCodec()
         self.connection = None
         self._initialize_database()
     
@@ -152,24 +186,28 @@ class LocalDatabase:
         for table_sql in tables:
             self.connection.execute(table_sql)
         
+        # Databases created before payloads carried a codec tag; NULL means pickle+gzip
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(offline_data)")}
+        if "codec" not in columns:
+            self.connection.execute("ALTER TABLE offline_data ADD COLUMN codec TEXT")
+        
         self.connection.commit()
     
     def store_data(self, data: OfflineData) -> bool:
         """Store data in local database"""
         try:
-            serialized_content = pickle.dumps(data.content)
-            compressed_content = gzip.compress(serialized_content)
+            payload, codec_tag = self.codec.encode(data.content, data.data_type.value)
             
             self.connection.execute("""
                 INSERT OR REPLACE INTO offline_data 
                 (id, data_type, content, timestamp, checksum, version, user_id, 
-                 sync_status, last_modified, size_bytes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 sync_status, last_modified, size_bytes, codec)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                data.id, data.data_type.value, compressed_content,
+                data.id, data.data_type.value, payload,
                 data.timestamp.isoformat(), data.checksum, data.version,
                 data.user_id, data.sync_status.value,
-                data.last_modified.isoformat(), data.size_bytes
+                data.last_modified.isoformat(), data.size_bytes, codec_tag
             ))
             
             self.connection.commit()
@@ -179,34 +217,18 @@ class LocalDatabase:
             print(f"Error storing data: {e}")
             return False
     
-    def retrieve_data(self, data_id: str) -> Optional[OfflineData]:
+    def retrieve_data(self, data_id: str, lazy: bool = False) -> Optional[OfflineData]:
         """Retrieve data from local database"""
         try:
-            cursor = self.connection.execute("""
-                SELECT * FROM offline_data WHERE id = ?
+            cursor = self.connection.execute(f"""
+                SELECT {self.DATA_COLUMNS} FROM offline_data WHERE id = ?
             """, (data_id,))
             
             row = cursor.fetchone()
             if not row:
                 return None
             
-            # Decompress and deserialize content
-            compressed_content = row[2]
-            serialized_content = gzip.decompress(compressed_content)
-            content = pickle.loads(serialized_content)
-            
-            return OfflineData(
-                id=row[0],
-                data_type=DataType(row[1]),
-                content=content,
-                timestamp=datetime.fromisoformat(row[3]),
-                checksum=row[4],
-                version=row[5],
-                user_id=row[6],
-                sync_status=SyncStatus(row[7]),
-                last_modified=datetime.fromisoformat(row[8]),
-                size_bytes=row[9]
-            )
+            return self._row_to_data(row, lazy)
             
         except Exception as e:
             print(f"Error retrieving data: {e}")
@@ -214,9 +236,22 @@ class LocalDatabase:
     
     def query_data(self, data_type: Optional[DataType] = None, 
                    user_id: Optional[str] = None,
-                   sync_status: Optional[SyncStatus] = None) -> List[OfflineData]:
+                   sync_status: Optional[SyncStatus] = None,
+                   lazy: bool = False) -> List[OfflineData]:
         """Query data with filters"""
-        query = "SELECT * FROM offline_data WHERE 1=1"
+        return list(self.iter_data(data_type, user_id, sync_status, lazy=lazy))
+    
+    def iter_data(self, data_type: Optional[DataType] = None,
+                  user_id: Optional[str] = None,
+                  sync_status: Optional[SyncStatus] = None,
+                  lazy: bool = True, batch_size: int = 256) -> Iterator[OfflineData]:
+        """Stream matching rows in batches of batch_size
+        
+        With lazy=True rows are LazyOfflineData and content is only decoded
+        when read, so metadata-only scans never touch the payloads. Eager
+        rows that fail to decode are skipped, as in query_data.
+        """
+        query = f"SELECT {self.DATA_COLUMNS} FROM offline_data WHERE 1=1"
         params = []
         
         if data_type:
@@ -231,35 +266,39 @@ class LocalDatabase:
             query += " AND sync_status = ?"
             params.append(sync_status.value)
         
-        cursor = self.connection.execute(query, params)
-        rows = cursor.fetchall()
-        
-        results = []
-        for row in rows:
-            try:
-                compressed_content = row[2]
-                serialized_content = gzip.decompress(compressed_content)
-                content = pickle.loads(serialized_content)
-                
-                data = OfflineData(
-                    id=row[0],
-                    data_type=DataType(row[1]),
-                    content=content,
-                    timestamp=datetime.fromisoformat(row[3]),
-                    checksum=row[4],
-                    version=row[5],
-                    user_id=row[6],
-                    sync_status=SyncStatus(row[7]),
-                    last_modified=datetime.fromisoformat(row[8]),
-                    size_bytes=row[9]
-                )
-                results.append(data)
-                
-            except Exception as e:
-                print(f"Error deserializing data: {e}")
-                continue
-        
-        return results
+        # A dedicated cursor so writes on the shared connection don't reset the scan
+        cursor = self.connection.cursor()
+        cursor.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    try:
+                        data = self._row_to_data(row, lazy)
+                    except Exception as e:
+                        print(f"Error deserializing data: {e}")
+                        continue
+                    yield data
+        finally:
+            cursor.close()
+    
+    def _row_to_data(self, row: tuple, lazy: bool) -> OfflineData:
+        fields = dict(
+            id=row[0],
+            data_type=DataType(row[1]),
+            timestamp=datetime.fromisoformat(row[3]),
+            checksum=row[4],
+            version=row[5],
+            user_id=row[6],
+            sync_status=SyncStatus(row[7]),
+            last_modified=datetime.fromisoformat(row[8]),
+            size_bytes=row[9]
+        )
+        if lazy:
+            return LazyOfflineData(row[2], row[10], self.codec, **fields)
+        return OfflineData(content=self.codec.decode(row[2], row[10]), **fields)
     
     def delete_data(self, data_id: str) -> bool:
         """Delete data from local database"""
@@ -287,50 +326,91 @@ class LocalDatabase:
         self.connection.commit()
 
 class CacheManager:
-    """Advanced caching system for offline functionality"""
+    """Advanced caching system for offline functionality
+
+    Two tiers: a bounded in-process LRU of decoded values in front of the
+    cache_entries table. Hits in memory skip the SELECT, decompression and
+    unpickling entirely; values in the memory tier are returned as-is, not
+    copied, so callers must not mutate them. Access counters are buffered
+    and written back in batches by a background flusher, the total cache
+    size is tracked incrementally, and eviction removes its victims with a
+    single DELETE.
+    """
     
-    def __init__(self, db: LocalDatabase, max_cache_size: int = 1024 * 1024 * 1024):  # 1GB default
+    def __init__(self, db: LocalDatabase, max_cache_size: int = 1024 * 1024 * 1024,  # 1GB default
+                 max_memory_entries: int = 1024, access_flush_batch: int = 256,
+                 access_flush_interval: float = 1.0):
         self.db = db
         self.max_cache_size = max_cache_size
+        self.max_memory_entries = max_memory_entries
+        self.access_flush_batch = access_flush_batch
+        self.access_flush_interval = access_flush_interval
         self.cache_stats = {
             'hits': 0,
+            'memory_hits': 0,
             'misses': 0,
             'evictions': 0,
+            'access_flushes': 0,
             'total_size': 0
         }
+        self.lock = threading.RLock()
+        
+        # key -> (value, expiry timestamp or None), most recently used last
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()
+        
+        # key -> (hits since last flush, last access time)
+        self.pending_access: Dict[str, tuple] = {}
+        
+        # Per-key sizes so the running total never needs a SUM over the table
+        self.entry_sizes: Dict[str, int] = dict(
+            self.db.connection.execute("SELECT key, size_bytes FROM cache_entries").fetchall()
+        )
+        self.cache_stats['total_size'] = sum(self.entry_sizes.values())
+        
+        self.stop_event = threading.Event()
+        self.flusher = threading.Thread(target=self._access_flusher, daemon=True)
+        self.flusher.start()
     
     def get(self, key: str) -> Optional[Any]:
         """Get item from cache"""
         try:
-            cursor = self.db.connection.execute("""
-                SELECT value, expiry_time FROM cache_entries WHERE key = ?
-            """, (key,))
-            
-            row = cursor.fetchone()
-            if not row:
-                self.cache_stats['misses'] += 1
-                return None
-            
-            # Check expiry
-            if row[1]:
-                expiry_time = datetime.fromisoformat(row[1])
-                if datetime.now() > expiry_time:
+            with self.lock:
+                now = time.time()
+                entry = self.memory.get(key)
+                if entry is not None:
+                    value, expiry = entry
+                    if expiry is not None and now > expiry:
+                        self.delete(key)
+                        self.cache_stats['misses'] += 1
+                        return None
+                    self.memory.move_to_end(key)
+                    self._record_access(key, now)
+                    self.cache_stats['hits'] += 1
+                    self.cache_stats['memory_hits'] += 1
+                    return value
+                
+                cursor = self.db.connection.execute("""
+                    SELECT value, expiry_time FROM cache_entries WHERE key = ?
+                """, (key,))
+                
+                row = cursor.fetchone()
+                if not row:
+                    self.cache_stats['misses'] += 1
+                    return None
+                
+                # Check expiry
+                expiry = datetime.fromisoformat(row[1]).timestamp() if row[1] else None
+                if expiry is not None and now > expiry:
                     self.delete(key)
                     self.cache_stats['misses'] += 1
                     return None
-            
-            # Update access statistics
-            self.db.connection.execute("""
-                UPDATE cache_entries 
-                SET access_count = access_count + 1, last_accessed = ?
-                WHERE key = ?
-            """, (datetime.now().isoformat(), key))
-            self.db.connection.commit()
-            
-            # Deserialize value
-            value = pickle.loads(gzip.decompress(row[0]))
-            self.cache_stats['hits'] += 1
-            return value
+                
+                # Deserialize value and promote it to the memory tier
+                value = pickle.loads(gzip.decompress(row[0]))
+                self._remember(key, value, expiry)
+                self._record_access(key, now)
+                self.cache_stats['hits'] += 1
+                return value
             
         except Exception as e:
             print(f"Cache get error: {e}")
@@ -348,19 +428,24 @@ class CacheManager:
             # Calculate expiry time
             expiry_time = None
             if ttl:
-                expiry_time = (datetime.now() + timedelta(seconds=ttl)).isoformat()
-            
-            # Check cache size and evict if necessary
-            self._ensure_cache_space(size_bytes)
+                expiry_time = datetime.now() + timedelta(seconds=ttl)
             
-            self.db.connection.execute("""
-                INSERT OR REPLACE INTO cache_entries 
-                (key, value, expiry_time, access_count, last_accessed, size_bytes)
-                VALUES (?, ?, ?, 0, ?, ?)
-            """, (key, compressed, expiry_time, datetime.now().isoformat(), size_bytes))
-            
-            self.db.connection.commit()
-            self.cache_stats['total_size'] += size_bytes
+            with self.lock:
+                # Check cache size and evict if necessary
+                self._ensure_cache_space(size_bytes - self.entry_sizes.get(key, 0))
+                
+                self.db.connection.execute("""
+                    INSERT OR REPLACE INTO cache_entries 
+                    (key, value, expiry_time, access_count, last_accessed, size_bytes)
+                    VALUES (?, ?, ?, 0, ?, ?)
+                """, (key, compressed, expiry_time.isoformat() if expiry_time else None,
+                      datetime.now().isoformat(), size_bytes))
+                
+                self.db.connection.commit()
+                self.pending_access.pop(key, None)
+                self.cache_stats['total_size'] += size_bytes - self.entry_sizes.get(key, 0)
+                self.entry_sizes[key] = size_bytes
+                self._remember(key, value, expiry_time.timestamp() if expiry_time else None)
             return True
             
         except Exception as e:
@@ -370,17 +455,13 @@ class CacheManager:
     def delete(self, key: str) -> bool:
         """Delete item from cache"""
         try:
-            # Get size before deletion
-            cursor = self.db.connection.execute("""
-                SELECT size_bytes FROM cache_entries WHERE key = ?
-            """, (key,))
-            row = cursor.fetchone()
-            
-            self.db.connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
-            self.db.connection.commit()
-            
-            if row:
-                self.cache_stats['total_size'] -= row[0]
+            with self.lock:
+                self.db.connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self.db.connection.commit()
+                
+                self.memory.pop(key, None)
+                self.pending_access.pop(key, None)
+                self.cache_stats['total_size'] -= self.entry_sizes.pop(key, 0)
             
             return True
             
@@ -388,14 +469,61 @@ class CacheManager:
             print(f"Cache delete error: {e}")
             return False
     
+    def flush_access_stats(self):
+        """Write buffered access counters to cache_entries in one transaction"""
+        with self.lock:
+            if not self.pending_access:
+                return
+            updates = [(count, last_accessed, key)
+                       for key, (count, last_accessed) in self.pending_access.items()]
+            self.pending_access.clear()
+            self.db.connection.executemany("""
+                UPDATE cache_entries 
+                SET access_count = access_count + ?, last_accessed = ?
+                WHERE key = ?
+            """, updates)
+            self.db.connection.commit()
+            self.cache_stats['access_flushes'] += 1
+    
+    def close(self):
+        """Stop the background flusher and write back pending access counters"""
+        self.stop_event.set()
+        self.flusher.join(timeout=5)
+        self.flush_access_stats()
+    
+    def _remember(self, key: str, value: Any, expiry: Optional[float]):
+        """Insert into the memory tier, dropping least recently used values past the bound"""
+        if self.max_memory_entries <= 0:
+            return
+        self.memory[key] = (value, expiry)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+    
+    def _record_access(self, key: str, now: float):
+        count, _ = self.pending_access.get(key, (0, None))
+        self.pending_access[key] = (count + 1, datetime.fromtimestamp(now).isoformat())
+        if len(self.pending_access) >= self.access_flush_batch:
+            self.flush_access_stats()
+    
+    def _access_flusher(self):
+        """Background worker writing access counters back every access_flush_interval"""
+        while not self.stop_event.wait(self.access_flush_interval):
+            try:
+                self.flush_access_stats()
+            except Exception as e:
+                print(f"Cache access flush error: {e}")
+    
     def _ensure_cache_space(self, required_bytes: int):
         """Ensure sufficient cache space by evicting old entries"""
-        current_size = self._get_current_cache_size()
+        current_size = self.cache_stats['total_size']
         
         if current_size + required_bytes > self.max_cache_size:
             # Evict least recently used entries
             bytes_to_free = (current_size + required_bytes) - self.max_cache_size + (self.max_cache_size * 0.1)  # 10% buffer
             
+            # Recency comes from last_accessed, so pending hits must land first
+            self.flush_access_stats()
             cursor = self.db.connection.execute("""
                 SELECT key, size_bytes FROM cache_entries 
                 ORDER BY last_accessed ASC
@@ -404,29 +532,42 @@ class CacheManager:
             freed_bytes = 0
             keys_to_delete = []
             
-            for row in cursor.fetchall():
-                keys_to_delete.append(row[0])
-                freed_bytes += row[1]
-                
-                if freed_bytes >= bytes_to_free:
+            while freed_bytes < bytes_to_free:
+                rows = cursor.fetchmany(256)
+                if not rows:
                     break
+                for key, size_bytes in rows:
+                    keys_to_delete.append(key)
+                    freed_bytes += size_bytes
+                    if freed_bytes >= bytes_to_free:
+                        break
+            cursor.close()
+            
+            # Delete selected keys in one statement
+            self.db.connection.execute("""
+                DELETE FROM cache_entries WHERE key IN (SELECT value FROM json_each(?))
+            """, (json.dumps(keys_to_delete),))
+            self.db.connection.commit()
             
-            # Delete selected keys
             for key in keys_to_delete:
-                self.delete(key)
-                self.cache_stats['evictions'] += 1
+                self.memory.pop(key, None)
+                self.pending_access.pop(key, None)
+                self.cache_stats['total_size'] -= self.entry_sizes.pop(key, 0)
+            self.cache_stats['evictions'] += len(keys_to_delete)
     
     def _get_current_cache_size(self) -> int:
         """Get current cache size"""
-        cursor = self.db.connection.execute("SELECT SUM(size_bytes) FROM cache_entries")
-        result = cursor.fetchone()[0]
-        return result if result else 0
+        return self.cache_stats['total_size']
     
     def clear(self):
         """Clear all cache entries"""
-        self.db.connection.execute("DELETE FROM cache_entries")
-        self.db.connection.commit()
-        self.cache_stats['total_size'] = 0
+        with self.lock:
+            self.db.connection.execute("DELETE FROM cache_entries")
+            self.db.connection.commit()
+            self.memory.clear()
+            self.pending_access.clear()
+            self.entry_sizes.clear()
+            self.cache_stats['total_size'] = 0
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -435,9 +576,13 @@ class CacheManager:
         
         return {
             'hits': self.cache_stats['hits'],
+            'memory_hits': self.cache_stats['memory_hits'],
             'misses': self.cache_stats['misses'],
             'hit_rate': hit_rate,
             'evictions': self.cache_stats['evictions'],
+            'memory_entries': len(self.memory),
+            'pending_access_updates': len(self.pending_access),
+            'access_flushes': self.cache_stats['access_flushes'],
             'current_size_bytes': current_size,
             'max_size_bytes': self.max_cache_size,
             'utilization': current_size / self.max_cache_size if self.max_cache_size > 0 else 0
@@ -470,5 +615,26 @@ class SyncManager:
             try:
                 priority, operation = self.sync_queue.get(timeout=1)
                 if self.is_online:
-                    sel
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+                    self._process_sync_operation(operation)
+                else:
+                    # Hold the operation until the connection is back
+                    self.sync_queue.put((priority, operation))
+                    time.sleep(1)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                print(f"Sync worker error: {e}")
+    
+    def _process_sync_operation(self, operation: SyncOperation):
+        """Hand an operation to the callback registered for its data type, retrying on failure"""
+        callback = self.sync_callbacks.get(operation.data_type)
+        if callback is None:
+            return
+        try:
+            if callback(operation):
+                return
+        except Exception as e:
+            print(f"Sync error for {operation.data_id}: {e}")
+        if operation.retry_count < operation.max_retries:
+            operation.retry_count += 1
+            self.sync_queue.put((operation.priority, operation))
@@ -0,0 +1,227 @@
+"""
+Offline Payload Codecs
+Tagged serializer and compressor pairs for LocalDatabase rows, chosen per data type
+"""
+
+import json
+import gzip
+import pickle
+import zlib
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+# Rows written before codecs were tagged
+LEGACY_CODEC = "pickle+gzip"
+
+_DATETIME_EXT = 1
+
+class CodecError(ValueError):
+    """A payload could not be encoded or decoded with the requested codec"""
+
+def _is_plain(value: Any, depth: int = 0) -> bool:
+    """True if value round-trips through msgpack/JSON unchanged
+
+    Tuples, sets, non-string keys and arbitrary objects would come back as
+    something else, so those payloads go to pickle instead.
+    """
+    if depth > 64:
+        return False
+    if value is None or type(value) in (str, int, float, bool, bytes, datetime):
+        return True
+    if type(value) is list:
+        return all(_is_plain(item, depth + 1) for item in value)
+    if type(value) is dict:
+        return all(type(key) is str and _is_plain(item, depth + 1) for key, item in value.items())
+    return False
+
+def _is_float_vector(value: Any) -> bool:
+    return type(value) is list and len(value) >= 16 and all(type(item) is float for item in value)
+
+# Serializers
+
+def _msgpack_default(value: Any):
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_DATETIME_EXT, value.isoformat().encode())
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == _DATETIME_EXT:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False)
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"$bytes": value.hex()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _escape_keys(value: Any) -> Any:
+    """Prefix dict keys starting with "$" with another "$" so they cannot be read back as type tags"""
+    if type(value) is dict:
+        return {("$" + key if key.startswith("$") else key): _escape_keys(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_escape_keys(item) for item in value]
+    return value
+
+def _json_object_hook(value: Dict[str, Any]):
+    if len(value) == 1:
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$bytes" in value:
+            return bytes.fromhex(value["$bytes"])
+    if any(key.startswith("$$") for key in value):
+        return {(key[1:] if key.startswith("$$") else key): item for key, item in value.items()}
+    return value
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(_escape_keys(value), default=_json_default, separators=(',', ':'),
+                      ensure_ascii=False).encode()
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data, object_hook=_json_object_hook)
+
+def _float64_dumps(value: List[float]) -> bytes:
+    return array('d', value).tobytes()
+
+def _float64_loads(data: bytes) -> List[float]:
+    values = array('d')
+    values.frombytes(data)
+    return values.tolist()
+
+def _raw_dumps(value: bytes) -> bytes:
+    return bytes(value)
+
+def _raw_loads(data: bytes) -> bytes:
+    return bytes(data)
+
+SERIALIZERS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "raw": (_raw_dumps, _raw_loads),
+    "f64": (_float64_dumps, _float64_loads),
+    "json": (_json_dumps, _json_loads),
+    "pickle": (pickle.dumps, pickle.loads)
+}
+if MSGPACK_AVAILABLE:
+    SERIALIZERS["msgpack"] = (_msgpack_dumps, _msgpack_loads)
+
+# Compressors
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes], int]] = {
+    "none": (lambda data, level: data, lambda data: data, 0),
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress, 1),
+    "gzip": (lambda data, level: gzip.compress(data, level), gzip.decompress, 1)
+}
+if ZSTD_AVAILABLE:
+    COMPRESSORS["zstd"] = (_zstd_compress, _zstd_decompress, 3)
+if LZ4_AVAILABLE:
+    COMPRESSORS["lz4"] = (lambda data, level: lz4.frame.compress(data, compression_level=level),
+                          lz4.frame.decompress, 0)
+
+def best_compressor() -> str:
+    """Fastest good compressor installed: zstd, then lz4, then zlib"""
+    for name in ("zstd", "lz4", "zlib"):
+        if name in COMPRESSORS:
+            return name
+    return "zlib"
+
+class PayloadCodec:
+    """
+    Encodes offline payloads as (blob, tag), tag being "serializer+compressor"
+
+    The serializer is picked from the content: bytes are stored raw, long
+    float lists as packed float64, plain dict/list/scalar trees with msgpack
+    (JSON when msgpack is not installed), and anything else with pickle.
+    Pickle is the only serializer that can run code on load; with
+    allow_pickle=False such payloads are rejected on write and pickle-tagged
+    rows, including legacy ones, are refused on read.
+
+    Compression uses the fastest available compressor at a low level and is
+    skipped for small payloads and for data types whose content is usually
+    already compressed (media).
+    """
+
+    def __init__(self, compression: str = "auto", level: Optional[int] = None, allow_pickle: bool = True,
+                 min_compress_size: int = 256, uncompressed_types: Tuple[str, ...] = ("media",)):
+        self.compression = best_compressor() if compression == "auto" else compression
+        if self.compression not in COMPRESSORS:
+            raise CodecError(f"Compressor {self.compression} is not available")
+        self.level = COMPRESSORS[self.compression][2] if level is None else level
+        self.allow_pickle = allow_pickle
+        self.min_compress_size = min_compress_size
+        self.uncompressed_types = set(uncompressed_types)
+        self.structured = "msgpack" if MSGPACK_AVAILABLE else "json"
+
+    def choose_serializer(self, content: Any) -> str:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return "raw"
+        if _is_float_vector(content):
+            return "f64"
+        if _is_plain(content):
+            return self.structured
+        if not self.allow_pickle:
+            raise CodecError(f"{type(content).__name__} payload needs pickle, which is disabled")
+        return "pickle"
+
+    def encode(self, content: Any, data_type: Optional[str] = None) -> Tuple[bytes, str]:
+        serializer = self.choose_serializer(content)
+        try:
+            data = SERIALIZERS[serializer][0](content)
+        except (TypeError, ValueError, OverflowError):
+            # e.g. integers wider than 64 bits for msgpack
+            if serializer != self.structured or not self.allow_pickle:
+                raise
+            serializer = "pickle"
+            data = pickle.dumps(content)
+
+        compressor = self.compression
+        if len(data) < self.min_compress_size or data_type in self.uncompressed_types:
+            compressor = "none"
+        else:
+            compressed = COMPRESSORS[compressor][0](data, self.level)
+            # Incompressible payloads are cheaper to store as they are
+            if len(compressed) >= len(data):
+                compressor = "none"
+            else:
+                data = compressed
+        return data, f"{serializer}+{compressor}"
+
+    def decode(self, blob: bytes, tag: Optional[str]) -> Any:
+        serializer, _, compressor = (tag or LEGACY_CODEC).partition("+")
+        if serializer == "pickle" and not self.allow_pickle:
+            raise CodecError("Refusing to unpickle payload with allow_pickle=False")
+        if serializer not in SERIALIZERS:
+            raise CodecError(f"Serializer {serializer} is not available")
+        if compressor not in COMPRESSORS:
+            raise CodecError(f"Compressor {compressor} is not available")
+        return SERIALIZERS[serializer][1](COMPRESSORS[compressor][1](blob))
@@ -0,0 +1,118 @@
+"""
+Order Matching Benchmarks
+Polling every pending order against the per-symbol trigger-price books, with a million resting orders
+"""
+
+import resource
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from order_matching_engine import FALLING, SIDES, TRIGGER_DIRECTIONS, MatchingEngine, to_ticks
+
+SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'BTC', 'ETH', 'EURUSD', 'GOLD']
+ORDER_TYPES = ['limit', 'stop_loss', 'take_profit']
+
+def _random_orders(count: int, prices: Dict[str, float], rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    symbols = rng.integers(0, len(SYMBOLS), count)
+    sides = rng.integers(0, 2, count)
+    order_types = rng.integers(0, len(ORDER_TYPES), count)
+    base = np.array([prices[symbol] for symbol in SYMBOLS])[symbols]
+    # Triggers up to 5% away on the side that has not been crossed yet, so every order rests
+    falling = np.array([[TRIGGER_DIRECTIONS[(order_type, side)] == FALLING for side in (SIDES['buy'], SIDES['sell'])]
+                        for order_type in ORDER_TYPES])[order_types, sides]
+    offsets = rng.uniform(0.0001, 0.05, count)
+    return {
+        'symbol': symbols,
+        'side': sides,
+        'order_type': order_types,
+        'trigger': np.round(base * np.where(falling, 1 - offsets, 1 + offsets), 2),
+        'quantity': rng.uniform(1, 100, count).round(2)
+    }
+
+def _legacy_pass(orders: List[Dict[str, Any]], prices: Dict[str, float]) -> int:
+    """One _process_pending_orders pass: list every pending order, then check each against its price"""
+    pending = [order for order in orders if order['status'] == 'pending']
+    executed = 0
+    for order in pending:
+        price = prices[order['symbol']]
+        if TRIGGER_DIRECTIONS[(order['order_type'], SIDES[order['side']])] == FALLING:
+            should_execute = price <= order['price']
+        else:
+            should_execute = price >= order['price']
+        if should_execute:
+            order['status'] = 'executed'
+            executed += 1
+    return executed
+
+def benchmark_order_matching(resting: int = 1_000_000, ticks: int = 200_000, legacy_orders: int = 200_000,
+                             seed: int = 0) -> Dict[str, Any]:
+    """Order load rate, tick rate and memory of the books, and the cost of one legacy polling pass"""
+    rng = np.random.default_rng(seed)
+    prices = {symbol: float(price) for symbol, price in zip(SYMBOLS, rng.uniform(1, 5000, len(SYMBOLS)).round(2))}
+    report: Dict[str, Any] = {'resting_orders': resting, 'ticks': ticks}
+
+    batch = _random_orders(legacy_orders, prices, rng)
+    orders = [{'symbol': SYMBOLS[s], 'side': 'buy' if side == 0 else 'sell', 'order_type': ORDER_TYPES[t],
+               'price': p, 'status': 'pending'}
+              for s, side, t, p in zip(batch['symbol'], batch['side'], batch['order_type'], batch['trigger'])]
+    start = time.perf_counter()
+    _legacy_pass(orders, prices)
+    elapsed = time.perf_counter() - start
+    report['legacy'] = {'orders': legacy_orders, 'pass_ms': round(elapsed * 1000, 1),
+                        'pass_ms_at_resting': round(elapsed * 1000 * resting / legacy_orders, 1)}
+
+    batch = _random_orders(resting, prices, rng)
+    triggers = np.round(batch['trigger'] * 100).astype(np.int64) * 10 ** 6
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    engine = MatchingEngine(capacity=resting)
+    for symbol, price in prices.items():
+        engine.on_price(symbol, to_ticks(price))
+    sides = ('buy', 'sell')
+    start = time.perf_counter()
+    # Load in slices so the benchmark's own Python lists stay small next to the books
+    for first in range(0, resting, 100_000):
+        part = slice(first, first + 100_000)
+        for key, s, side, t, trigger, quantity in zip(range(first, first + 100_000), batch['symbol'][part].tolist(),
+                                                      batch['side'][part].tolist(),
+                                                      batch['order_type'][part].tolist(), triggers[part].tolist(),
+                                                      batch['quantity'][part].tolist()):
+            engine.submit(key, SYMBOLS[s], sides[side], ORDER_TYPES[t], trigger, quantity)
+    elapsed = time.perf_counter() - start
+    report['submit'] = {'orders_per_second': round(resting / elapsed),
+                        'resting_after_load': engine.get_stats()['resting_orders'],
+                        'rss_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1)}
+
+    # Random walk of one basis point per tick on a random symbol
+    tick_symbols = rng.integers(0, len(SYMBOLS), ticks).tolist()
+    moves = rng.normal(0, 1e-4, ticks)
+    paths = {symbol: prices[symbol] for symbol in SYMBOLS}
+    tick_prices = []
+    for s, move in zip(tick_symbols, moves.tolist()):
+        symbol = SYMBOLS[s]
+        paths[symbol] *= 1 + move
+        tick_prices.append(int(paths[symbol] * 10 ** 8))
+    latencies = np.empty(ticks)
+    fills = 0
+    start = time.perf_counter()
+    for index, (s, price) in enumerate(zip(tick_symbols, tick_prices)):
+        tick_start = time.perf_counter()
+        fills += len(engine.on_price(SYMBOLS[s], price))
+        latencies[index] = time.perf_counter() - tick_start
+    elapsed = time.perf_counter() - start
+    report['ticks_result'] = {
+        'ticks_per_second': round(ticks / elapsed),
+        'fills': fills,
+        'tick_p50_us': round(float(np.percentile(latencies, 50)) * 1e6, 1),
+        'tick_p99_us': round(float(np.percentile(latencies, 99)) * 1e6, 1),
+        'tick_max_ms': round(float(latencies.max()) * 1000, 2)
+    }
+    report['stats'] = engine.get_stats()
+    return report
+
+if __name__ == "__main__":
+    resting = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for name, result in benchmark_order_matching(resting=resting).items():
+        print(f"{name}: {result}")
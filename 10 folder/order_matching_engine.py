@@ -0,0 +1,290 @@
+"""
+Order Matching Engine
+Per-symbol books of resting orders indexed by trigger price, matched on price ticks and on new orders
+"""
+
+import heapq
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Prices are kept as integer ticks so book keys compare exactly and cheaply
+PRICE_SCALE = 10 ** 8
+
+BUY, SELL = 0, 1
+SIDES = {'buy': BUY, 'sell': SELL}
+
+# A resting order fires when the price falls to its trigger or rises to it
+FALLING, RISING = 0, 1
+
+# (order type, side) -> trigger direction, for the OrderType values of etoro_trading_service
+TRIGGER_DIRECTIONS = {
+    ('limit', BUY): FALLING,
+    ('limit', SELL): RISING,
+    ('stop_loss', BUY): RISING,
+    ('stop_loss', SELL): FALLING,
+    ('take_profit', BUY): FALLING,
+    ('take_profit', SELL): RISING
+}
+MARKET = 'market'
+TRAILING_STOP = 'trailing_stop'
+TRAILING = 2
+
+def to_ticks(price: Any) -> int:
+    return int((Decimal(str(price)) * PRICE_SCALE).to_integral_value())
+
+class Fill(NamedTuple):
+    key: Hashable
+    symbol: str
+    side: int
+    quantity: float
+    price: int
+
+class OrderStore:
+    """
+    Resting orders as parallel numpy arrays rather than a dict per order
+
+    A slot holds the book, side, trigger direction, trigger price in ticks
+    and quantity of one order. Slots go back on a free list when an order
+    fills or is cancelled, so the arrays only grow with the peak number of
+    resting orders.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.book = np.zeros(capacity, dtype=np.int32)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.trigger = np.zeros(capacity, dtype=np.int64)
+        self.quantity = np.zeros(capacity, dtype=np.float64)
+        self.keys: List[Optional[Hashable]] = [None] * capacity
+        self.free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def _grow(self):
+        capacity = len(self.keys)
+        for name in ('book', 'side', 'direction', 'trigger', 'quantity'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(capacity, dtype=array.dtype)]))
+        self.keys.extend([None] * capacity)
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def allocate(self, key: Hashable, book: int, side: int, direction: int, trigger: int, quantity: float) -> int:
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.book[slot] = book
+        self.side[slot] = side
+        self.direction[slot] = direction
+        self.trigger[slot] = trigger
+        self.quantity[slot] = quantity
+        self.keys[slot] = key
+        return slot
+
+    def release(self, slot: int):
+        self.keys[slot] = None
+        self.free.append(slot)
+
+    def __len__(self) -> int:
+        return len(self.keys) - len(self.free)
+
+class OrderBook:
+    """
+    Resting orders of one symbol
+
+    Each trigger direction keeps price levels (ticks -> list of slots in
+    arrival order) and a heap of level prices: a max-heap for orders that fire on
+    a falling price, a min-heap for those that fire on a rising one. A
+    tick pops only the levels it crosses, so its cost follows the number
+    of orders it triggers rather than the number resting. Levels emptied
+    by cancellation stay in place until the price crosses them.
+
+    Trailing stops move with the price, so they sit in a separate dict of
+    slot -> best price seen and are checked on every tick.
+    """
+
+    def __init__(self, index: int, symbol: str):
+        self.index = index
+        self.symbol = symbol
+        self.levels: tuple = ({}, {})
+        self.heaps: tuple = ([], [])
+        self.trailing: Dict[int, int] = {}
+        self.last_price: Optional[int] = None
+
+    def add(self, slot: int, direction: int, ticks: int):
+        levels = self.levels[direction]
+        level = levels.get(ticks)
+        if level is None:
+            level = levels[ticks] = []
+            heapq.heappush(self.heaps[direction], -ticks if direction == FALLING else ticks)
+        level.append(slot)
+
+    def remove(self, slot: int, direction: int, ticks: int):
+        if direction == TRAILING:
+            del self.trailing[slot]
+        else:
+            self.levels[direction][ticks].remove(slot)
+
+    def crossed(self, price: int, store: OrderStore) -> List[int]:
+        """Slots triggered by a move to price, best trigger first and FIFO within a level"""
+        triggered: List[int] = []
+        heap, levels = self.heaps[FALLING], self.levels[FALLING]
+        while heap and -heap[0] >= price:
+            level = levels.pop(-heapq.heappop(heap), None)
+            if level:
+                triggered.extend(level)
+        heap, levels = self.heaps[RISING], self.levels[RISING]
+        while heap and heap[0] <= price:
+            level = levels.pop(heapq.heappop(heap), None)
+            if level:
+                triggered.extend(level)
+
+        if self.trailing:
+            fired = []
+            for slot, best in self.trailing.items():
+                # trigger holds the trailing distance
+                if store.side[slot] == SELL:
+                    best = max(best, price)
+                    if price <= best - store.trigger[slot]:
+                        fired.append(slot)
+                else:
+                    best = min(best, price)
+                    if price >= best + store.trigger[slot]:
+                        fired.append(slot)
+                self.trailing[slot] = best
+            for slot in fired:
+                del self.trailing[slot]
+            triggered.extend(fired)
+        return triggered
+
+class MatchingEngine:
+    """
+    Books of resting orders for every symbol
+
+    submit() fills an order straight away when it is a market order or its
+    trigger is already crossed by the last price, and rests it otherwise.
+    on_price() records a new price for a symbol and returns the fills it
+    triggers. Fills are reported at the tick price, as the service executes
+    against the market price.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.store = OrderStore(capacity)
+        self.books: Dict[str, OrderBook] = {}
+        self.book_list: List[OrderBook] = []
+        self.slots: Dict[Hashable, int] = {}
+        self.lock = threading.RLock()
+        self.stats = {'submitted': 0, 'filled': 0, 'cancelled': 0, 'ticks': 0}
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(len(self.book_list), symbol)
+            self.book_list.append(book)
+        return book
+
+    def submit(self, key: Hashable, symbol: str, side: str, order_type: str, trigger: Optional[int],
+               quantity: float, market_price: Optional[int] = None, rest: bool = False) -> Optional[Fill]:
+        """
+        Place an order; trigger and market_price are in ticks
+
+        Returns the fill when the order executes immediately and None when it
+        rests. With rest=True a crossed order rests anyway and waits for the
+        next tick that crosses it. For a trailing stop, trigger is the
+        initial stop price and the order trails at that distance from
+        market_price.
+        """
+        with self.lock:
+            return self._submit(key, symbol, side, order_type, trigger, quantity, market_price, rest)
+
+    def submit_batch(self, keys: Sequence[Hashable], symbol: str, side: str, order_type: str,
+                     quantities: Sequence[float], triggers: Optional[Sequence[int]] = None,
+                     market_price: Optional[int] = None) -> List[Fill]:
+        """Submit many orders for one symbol and side under a single lock; returns the immediate fills"""
+        with self.lock:
+            if order_type == MARKET:
+                # Nothing rests, so the whole batch fills at the last price
+                book = self.book(symbol)
+                if market_price is not None:
+                    book.last_price = market_price
+                price = book.last_price
+                if price is None:
+                    raise ValueError(f"No price for {symbol}")
+                self.stats['submitted'] += len(keys)
+                self.stats['filled'] += len(keys)
+                side_code = SIDES[side]
+                return [Fill(key, symbol, side_code, quantity, price) for key, quantity in zip(keys, quantities)]
+
+            triggers = [None] * len(keys) if triggers is None else triggers
+            fills = [self._submit(key, symbol, side, order_type, trigger, quantity, market_price)
+                     for key, quantity, trigger in zip(keys, quantities, triggers)]
+            return [fill for fill in fills if fill is not None]
+
+    def _submit(self, key: Hashable, symbol: str, side: str, order_type: str, trigger: Optional[int],
+                quantity: float, market_price: Optional[int] = None, rest: bool = False) -> Optional[Fill]:
+        side_code = SIDES[side]
+        self.stats['submitted'] += 1
+        book = self.book(symbol)
+        if market_price is not None:
+            book.last_price = market_price
+        price = book.last_price
+
+        if order_type == MARKET:
+            if price is None:
+                raise ValueError(f"No price for {symbol}")
+            self.stats['filled'] += 1
+            return Fill(key, symbol, side_code, quantity, price)
+
+        if order_type == TRAILING_STOP:
+            if price is None:
+                raise ValueError(f"No price for {symbol}")
+            slot = self.store.allocate(key, book.index, side_code, TRAILING, abs(price - trigger), quantity)
+            book.trailing[slot] = price
+            self.slots[key] = slot
+            return None
+
+        direction = TRIGGER_DIRECTIONS.get((order_type, side_code))
+        if direction is None:
+            raise ValueError(f"Unsupported order type: {order_type}")
+        if not rest and price is not None and (price <= trigger if direction == FALLING else price >= trigger):
+            self.stats['filled'] += 1
+            return Fill(key, symbol, side_code, quantity, price)
+        slot = self.store.allocate(key, book.index, side_code, direction, trigger, quantity)
+        book.add(slot, direction, trigger)
+        self.slots[key] = slot
+        return None
+
+    def on_price(self, symbol: str, price: int) -> List[Fill]:
+        with self.lock:
+            self.stats['ticks'] += 1
+            book = self.book(symbol)
+            book.last_price = price
+            store = self.store
+            fills = []
+            for slot in book.crossed(price, store):
+                key = store.keys[slot]
+                fills.append(Fill(key, symbol, int(store.side[slot]), float(store.quantity[slot]), price))
+                del self.slots[key]
+                store.release(slot)
+            self.stats['filled'] += len(fills)
+            return fills
+
+    def cancel(self, key: Hashable) -> bool:
+        with self.lock:
+            slot = self.slots.pop(key, None)
+            if slot is None:
+                return False
+            store = self.store
+            self.book_list[store.book[slot]].remove(slot, int(store.direction[slot]), int(store.trigger[slot]))
+            store.release(slot)
+            self.stats['cancelled'] += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.stats,
+                'resting_orders': len(self.store),
+                'books': len(self.books),
+                'price_levels': sum(len(levels) for book in self.book_list for levels in book.levels)
+            }
@@ -0,0 +1,309 @@
+"""
+Mesh Routing Graph
+Incrementally built CSR adjacency with landmark (ALT) A* routing and a versioned route cache
+"""
+
+import heapq
+import math
+import threading
+import numpy as np
+from array import array
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+class RoutingGraph:
+    """
+    Undirected weighted graph for repeated shortest-path queries
+
+    Edges are appended to flat buffers as the topology grows; the CSR arrays
+    (``indptr``, ``indices``, ``weights``) are rebuilt from them in O(E) on
+    the first query after a change, instead of rebuilding a graph on every
+    query. Every change bumps ``version``.
+
+    Point-to-point queries run A* with ALT lower bounds: exact distances
+    from a few far-apart landmark nodes bound the remaining distance via the
+    triangle inequality. Landmark distances are only valid for the version
+    they were computed on, so after a change queries fall back to Dijkstra
+    until ``landmark_rebuild_after`` of them have run, which keeps a growing
+    mesh from recomputing landmarks on every insert. Paths are cached in an
+    LRU of ``cache_size`` entries that is dropped when the version changes.
+    """
+
+    def __init__(self, landmarks: int = 8, cache_size: int = 4096,
+                 landmark_rebuild_after: int = 16):
+        self.landmark_count = landmarks
+        self.cache_size = cache_size
+        self.landmark_rebuild_after = landmark_rebuild_after
+
+        self.node_ids: List[Hashable] = []
+        self.node_index: Dict[Hashable, int] = {}
+        self.edge_sources = array('q')
+        self.edge_targets = array('q')
+        self.edge_weights = array('d')
+        self.version = 0
+        self.lock = threading.RLock()
+
+        # Derived state, each tagged with the version it was built for
+        self.csr: Optional[Tuple[List[int], List[int], List[float]]] = None
+        self.csr_version = -1
+        self.landmark_nodes: List[int] = []
+        self.landmark_distances: List[Tuple[float, ...]] = []  # per node, one entry per landmark
+        self.landmark_version = -1
+        self.stale_queries = 0
+        self.route_cache: "OrderedDict[Tuple[Hashable, Hashable], List[Hashable]]" = OrderedDict()
+        self.cache_version = 0
+        self.stats = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __contains__(self, node_id: Hashable) -> bool:
+        return node_id in self.node_index
+
+    def add_node(self, node_id: Hashable) -> int:
+        with self.lock:
+            index = self.node_index.get(node_id)
+            if index is None:
+                index = len(self.node_ids)
+                self.node_index[node_id] = index
+                self.node_ids.append(node_id)
+                self.version += 1
+            return index
+
+    def add_edge(self, node1_id: Hashable, node2_id: Hashable, weight: float):
+        """Add an undirected edge; parallel edges are allowed and the lightest wins"""
+        with self.lock:
+            source, target = self.add_node(node1_id), self.add_node(node2_id)
+            self.edge_sources.extend((source, target))
+            self.edge_targets.extend((target, source))
+            self.edge_weights.extend((weight, weight))
+            self.version += 1
+
+    def shortest_path(self, source_id: Hashable, destination_id: Hashable) -> List[Hashable]:
+        """Lightest path as a list of node IDs, or [] when unreachable"""
+        with self.lock:
+            if source_id not in self.node_index or destination_id not in self.node_index:
+                return []
+            cached = self._cached(source_id, destination_id)
+            if cached is not None:
+                return list(cached)
+
+            source, destination = self.node_index[source_id], self.node_index[destination_id]
+            if self._landmarks_ready():
+                path = self._astar(source, destination)
+            else:
+                _, parents = self._dijkstra(source, {destination})
+                path = self._unwind(parents, source, destination)
+            self._remember(source_id, destination_id, path)
+            return list(path)
+
+    def shortest_paths(self, pairs: Iterable[Tuple[Hashable, Hashable]]) -> List[List[Hashable]]:
+        """Paths for many (source, destination) pairs
+
+        Pairs sharing a source are answered from one Dijkstra search that
+        stops once all of that source's destinations are settled.
+        """
+        pairs = list(pairs)
+        with self.lock:
+            results: List[Optional[List[Hashable]]] = [None] * len(pairs)
+            by_source: Dict[Hashable, List[int]] = defaultdict(list)
+            for position, (source_id, destination_id) in enumerate(pairs):
+                if source_id not in self.node_index or destination_id not in self.node_index:
+                    results[position] = []
+                    continue
+                cached = self._cached(source_id, destination_id)
+                if cached is not None:
+                    results[position] = list(cached)
+                else:
+                    by_source[source_id].append(position)
+
+            for source_id, positions in by_source.items():
+                destination_ids = {pairs[position][1] for position in positions}
+                if len(destination_ids) == 1:
+                    path = self.shortest_path(source_id, next(iter(destination_ids)))
+                    for position in positions:
+                        results[position] = list(path)
+                    continue
+
+                source = self.node_index[source_id]
+                _, parents = self._dijkstra(source, {self.node_index[d] for d in destination_ids})
+                paths = {}
+                for destination_id in destination_ids:
+                    paths[destination_id] = self._unwind(parents, source, self.node_index[destination_id])
+                    self._remember(source_id, destination_id, paths[destination_id])
+                for position in positions:
+                    results[position] = list(paths[pairs[position][1]])
+            return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'nodes': len(self.node_ids),
+                'edges': len(self.edge_weights) // 2,
+                'version': self.version,
+                'landmarks': len(self.landmark_nodes),
+                'landmarks_current': self.landmark_version == self.version,
+                'cached_routes': len(self.route_cache),
+                **self.stats
+            }
+
+    # Search
+
+    def _adjacency(self) -> Tuple[List[int], List[int], List[float]]:
+        """CSR arrays for the current version, as lists for fast scalar access"""
+        if self.csr_version != self.version:
+            n_nodes = len(self.node_ids)
+            # array('q') is always 64-bit, unlike 'l', which is 32-bit on Windows
+            sources = np.frombuffer(self.edge_sources, dtype=np.int64)
+            order = np.argsort(sources, kind='stable')
+            indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+            indices = np.frombuffer(self.edge_targets, dtype=np.int64)[order]
+            weights = np.frombuffer(self.edge_weights, dtype=np.float64)[order]
+            self.csr = (indptr.tolist(), indices.tolist(), weights.tolist())
+            self.csr_version = self.version
+            self.stats['csr_builds'] += 1
+        return self.csr
+
+    def _dijkstra(self, source: int, targets: Optional[set] = None) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Distances and parents from source, stopping once every target is settled"""
+        indptr, indices, weights = self._adjacency()
+        distances = {source: 0.0}
+        parents = {source: source}
+        settled = set()
+        remaining = set(targets) if targets is not None else None
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                candidate = distance + weights[edge]
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    parents[neighbour] = node
+                    heapq.heappush(heap, (candidate, neighbour))
+        self.stats['dijkstra_searches'] += 1
+        return distances, parents
+
+    def _astar(self, source: int, destination: int) -> List[Hashable]:
+        indptr, indices, weights = self._adjacency()
+        landmark_distances = self.landmark_distances
+        target_vector = landmark_distances[destination]
+
+        def lower_bound(node: int) -> float:
+            bound = 0.0
+            for to_target, to_node in zip(target_vector, landmark_distances[node]):
+                if to_target != to_node:
+                    gap = abs(to_target - to_node)  # inf when in different components
+                    if gap > bound:
+                        bound = gap
+            return bound
+
+        if lower_bound(source) == math.inf:  # a landmark reaches only one endpoint
+            self.stats['astar_searches'] += 1
+            return []
+        distances = {source: 0.0}
+        parents = {source: source}
+        settled = set()
+        heap = [(lower_bound(source), source)]
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            if node == destination:
+                self.stats['astar_searches'] += 1
+                return self._unwind(parents, source, destination)
+            settled.add(node)
+            distance = distances[node]
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                candidate = distance + weights[edge]
+                if candidate < distances.get(neighbour, math.inf):
+                    estimate = candidate + lower_bound(neighbour)
+                    if estimate == math.inf:
+                        continue
+                    distances[neighbour] = candidate
+                    parents[neighbour] = node
+                    heapq.heappush(heap, (estimate, neighbour))
+        self.stats['astar_searches'] += 1
+        return []
+
+    def _unwind(self, parents: Dict[int, int], source: int, destination: int) -> List[Hashable]:
+        if destination not in parents:
+            return []
+        path = [destination]
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return [self.node_ids[node] for node in path]
+
+    # Landmarks
+
+    def _landmarks_ready(self) -> bool:
+        if self.landmark_count <= 0 or len(self.node_ids) < 2:
+            return False
+        if self.landmark_version == self.version:
+            return True
+        self.stale_queries += 1
+        if self.stale_queries < self.landmark_rebuild_after:
+            return False
+        self._build_landmarks()
+        return True
+
+    def _build_landmarks(self):
+        """Farthest-point landmarks with exact distances to every node
+
+        The first landmark is the best-connected node and each later one the
+        node farthest from those chosen within what they reach, so landmarks
+        spread over the largest component instead of isolated nodes.
+        """
+        indptr, _, _ = self._adjacency()
+        n_nodes = len(self.node_ids)
+        columns: List[List[float]] = []
+        nearest_landmark = [math.inf] * n_nodes
+        landmark = int(np.argmax(np.diff(indptr)))
+        chosen = []
+        for _ in range(min(self.landmark_count, n_nodes)):
+            distances, _ = self._dijkstra(landmark)
+            columns.append([distances.get(node, math.inf) for node in range(n_nodes)])
+            chosen.append(landmark)
+            for node, distance in distances.items():
+                if distance < nearest_landmark[node]:
+                    nearest_landmark[node] = distance
+            landmark = max(range(n_nodes),
+                           key=lambda node: nearest_landmark[node] if nearest_landmark[node] < math.inf else -1.0)
+            if not nearest_landmark[landmark] > 0.0:
+                break
+
+        self.landmark_nodes = chosen
+        self.landmark_distances = list(zip(*columns))
+        self.landmark_version = self.version
+        self.stale_queries = 0
+        self.stats['landmark_builds'] += 1
+
+    # Route cache
+
+    def _cached(self, source_id: Hashable, destination_id: Hashable) -> Optional[List[Hashable]]:
+        if self.cache_version != self.version:
+            self.route_cache.clear()
+            self.cache_version = self.version
+            return None
+        path = self.route_cache.get((source_id, destination_id))
+        if path is not None:
+            self.route_cache.move_to_end((source_id, destination_id))
+            self.stats['cache_hits'] += 1
+        return path
+
+    def _remember(self, source_id: Hashable, destination_id: Hashable, path: List[Hashable]):
+        if self.cache_size <= 0:
+            return
+        self.route_cache[(source_id, destination_id)] = path
+        if len(self.route_cache) > self.cache_size:
+            self.route_cache.popitem(last=False)
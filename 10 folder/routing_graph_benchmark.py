@@ -0,0 +1,121 @@
+"""
+Routing Graph Benchmarks
+Per-call graph rebuild routing against the persistent routing graph on growing meshes
+"""
+
+import heapq
+import math
+import time
+import numpy as np
+from collections import defaultdict
+from typing import Dict, Any, List, Sequence, Tuple
+
+from routing_graph import RoutingGraph
+from spatial_index import SpatialIndex
+
+def _build_mesh(size: int, extent: float, connection_range: float,
+                rng: np.random.Generator) -> Tuple[RoutingGraph, Dict[int, List[Tuple[int, float]]]]:
+    """Random mesh wired like SmartMesh: every pair within range, weight latency + 1000/bandwidth"""
+    points = rng.uniform(0, extent, size=(size, 3))
+    graph = RoutingGraph()
+    connections = defaultdict(list)
+    index = SpatialIndex(cell_size=connection_range)
+    for node, point in enumerate(points):
+        graph.add_node(node)
+        for other in index.query_radius(tuple(point), connection_range):
+            distance = math.dist(point, points[other])
+            strength = max(0.1, 1.0 - distance / 100.0)
+            weight = distance * 0.01 + 1000 / (strength * 1000)
+            graph.add_edge(node, other, weight)
+            connections[node].append((other, weight))
+            connections[other].append((node, weight))
+        index.insert(node, tuple(point))
+    return graph, connections
+
+def _legacy_find_path(connections: Dict[int, List[Tuple[int, float]]], source: int, destination: int) -> List[int]:
+    """find_optimal_path before the routing graph: rebuild the whole graph, then Dijkstra
+
+    A plain dict stands in for the networkx.Graph, so this understates the
+    old per-call cost.
+    """
+    graph = defaultdict(dict)
+    for node, edges in connections.items():
+        for target, weight in edges:
+            graph[node][target] = weight
+            graph[target][node] = weight
+
+    distances, parents, heap = {source: 0.0}, {source: source}, [(0.0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if node == destination:
+            path = [node]
+            while path[-1] != source:
+                path.append(parents[path[-1]])
+            return path[::-1]
+        if distance > distances[node]:
+            continue
+        for target, weight in graph[node].items():
+            if distance + weight < distances.get(target, math.inf):
+                distances[target] = distance + weight
+                parents[target] = node
+                heapq.heappush(heap, (distance + weight, target))
+    return []
+
+def benchmark_routing(sizes: Sequence[int] = (1_000, 5_000, 20_000), extent: float = 1_500.0,
+                      connection_range: float = 100.0, queries: int = 200, legacy_queries: int = 10,
+                      seed: int = 0) -> Dict[str, Any]:
+    """Per mesh size: legacy, first-query, landmark A*, cached and batched routing latency"""
+    rng = np.random.default_rng(seed)
+    report = {}
+
+    for size in sizes:
+        graph, connections = _build_mesh(size, extent, connection_range, rng)
+        pairs = [tuple(pair) for pair in rng.integers(0, size, size=(queries, 2)).tolist()]
+
+        start = time.perf_counter()
+        for source, destination in pairs[:legacy_queries]:
+            _legacy_find_path(connections, source, destination)
+        legacy_seconds = time.perf_counter() - start
+
+        # Dijkstra over the CSR arrays until the landmarks are built
+        start = time.perf_counter()
+        for source, destination in pairs[:graph.landmark_rebuild_after - 1]:
+            graph.shortest_path(source, destination)
+        dijkstra_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        graph._build_landmarks()
+        landmark_seconds = time.perf_counter() - start
+
+        graph.route_cache.clear()
+        start = time.perf_counter()
+        for source, destination in pairs:
+            graph.shortest_path(source, destination)
+        astar_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for source, destination in pairs:
+            graph.shortest_path(source, destination)
+        cached_seconds = time.perf_counter() - start
+
+        # One source fanning out to many destinations
+        graph.route_cache.clear()
+        fan_out = [(pairs[0][0], destination) for _, destination in pairs]
+        start = time.perf_counter()
+        graph.shortest_paths(fan_out)
+        batch_seconds = time.perf_counter() - start
+
+        report[size] = {
+            'edges': graph.get_stats()['edges'],
+            'legacy_query_ms': 1000 * legacy_seconds / legacy_queries,
+            'dijkstra_query_ms': 1000 * dijkstra_seconds / (graph.landmark_rebuild_after - 1),
+            'landmark_build_seconds': landmark_seconds,
+            'astar_query_ms': 1000 * astar_seconds / queries,
+            'cached_query_ms': 1000 * cached_seconds / queries,
+            'batch_fan_out_ms_per_pair': 1000 * batch_seconds / queries
+        }
+    return report
+
+if __name__ == "__main__":
+    for size, result in benchmark_routing().items():
+        print(f"{size} nodes: {result}")
@@ -0,0 +1,342 @@
+"""
+3D Spatial Index
+Incrementally maintained grid hashing over a bulk-built numpy KD-tree for radius and k-nearest queries
+"""
+
+import heapq
+import math
+import threading
+import numpy as np
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float, float]
+
+class KDTree:
+    """
+    Static KD-tree over an (n, 3) array
+
+    Built once from a bulk load by median splits on the widest axis, down to
+    leaves of ``leaf_size`` points. Points are stored in leaf order, so a
+    leaf (or a subtree entirely inside the query sphere) is one contiguous
+    slice scored with numpy. Node bounds are kept as Python tuples because
+    traversal is dominated by per-node overhead.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 32):
+        points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        order = np.arange(len(points))
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.children: List[Optional[Tuple[int, int]]] = []
+        self.lows: List[Point] = []
+        self.highs: List[Point] = []
+
+        if len(points):
+            stack = [self._add_node(points, order, 0, len(points))]
+            while stack:
+                node = stack.pop()
+                start, end = self.starts[node], self.ends[node]
+                if end - start <= leaf_size:
+                    continue
+                extent = np.subtract(self.highs[node], self.lows[node])
+                axis = int(np.argmax(extent))
+                if extent[axis] == 0:
+                    continue  # all points coincide
+                middle = (start + end) // 2
+                segment = order[start:end]
+                order[start:end] = segment[np.argpartition(points[segment, axis], middle - start)]
+                left = self._add_node(points, order, start, middle)
+                right = self._add_node(points, order, middle, end)
+                self.children[node] = (left, right)
+                stack.extend((left, right))
+
+        self.order = order
+        self.points = points[order]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query_radius(self, center: Point, radius: float) -> np.ndarray:
+        """Positions (in the bulk-load input) of points within radius of center"""
+        if not len(self.points):
+            return np.empty(0, dtype=np.int64)
+        radius_sq = radius * radius
+        center_array = np.asarray(center, dtype=np.float64)
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._min_distance_sq(center, node) > radius_sq:
+                continue
+            start, end = self.starts[node], self.ends[node]
+            if self._max_distance_sq(center, node) <= radius_sq:
+                found.append(self.order[start:end])
+                continue
+            children = self.children[node]
+            if children is None:
+                distances = np.sum((self.points[start:end] - center_array) ** 2, axis=1)
+                found.append(self.order[start:end][distances <= radius_sq])
+            else:
+                stack.extend(children)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def query_nearest(self, center: Point, k: int,
+                      accept: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances) of the k nearest points, nearest first
+
+        ``accept`` is an optional boolean mask over input positions; rejected
+        points (e.g. deleted ones) are skipped.
+        """
+        if not len(self.points) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        center_array = np.asarray(center, dtype=np.float64)
+        best_positions = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float64)
+        bound = math.inf
+        heap = [(0.0, 0)]
+        while heap:
+            distance_sq, node = heapq.heappop(heap)
+            if distance_sq > bound:
+                break
+            children = self.children[node]
+            if children is not None:
+                for child in children:
+                    child_distance = self._min_distance_sq(center, child)
+                    if child_distance <= bound:
+                        heapq.heappush(heap, (child_distance, child))
+                continue
+            start, end = self.starts[node], self.ends[node]
+            positions = self.order[start:end]
+            distances = np.sum((self.points[start:end] - center_array) ** 2, axis=1)
+            if accept is not None:
+                keep = accept[positions]
+                positions, distances = positions[keep], distances[keep]
+            best_positions = np.concatenate([best_positions, positions])
+            best_distances = np.concatenate([best_distances, distances])
+            if len(best_distances) > k:
+                top = np.argpartition(best_distances, k - 1)[:k]
+                best_positions, best_distances = best_positions[top], best_distances[top]
+            if len(best_distances) == k:
+                bound = float(best_distances.max())
+        ranked = np.argsort(best_distances, kind='stable')
+        return best_positions[ranked], np.sqrt(best_distances[ranked])
+
+    def _add_node(self, points: np.ndarray, order: np.ndarray, start: int, end: int) -> int:
+        segment = points[order[start:end]]
+        self.starts.append(start)
+        self.ends.append(end)
+        self.children.append(None)
+        self.lows.append(tuple(segment.min(axis=0).tolist()))
+        self.highs.append(tuple(segment.max(axis=0).tolist()))
+        return len(self.starts) - 1
+
+    def _min_distance_sq(self, center: Point, node: int) -> float:
+        total = 0.0
+        for value, low, high in zip(center, self.lows[node], self.highs[node]):
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return total
+
+    def _max_distance_sq(self, center: Point, node: int) -> float:
+        total = 0.0
+        for value, low, high in zip(center, self.lows[node], self.highs[node]):
+            total += max(value - low, high - value) ** 2
+        return total
+
+class SpatialIndex:
+    """
+    Incrementally maintained 3D point index keyed by arbitrary hashable keys
+
+    Bulk loads build a ``KDTree``. Later inserts go to a hash grid of
+    ``cell_size`` cubes, which answers queries for recent points by
+    visiting only the cells the query touches. Once the grid holds more than
+    ``rebuild_fraction`` of the tree (and at least ``min_rebuild`` points)
+    everything is rebuilt into a fresh tree, so inserts cost amortised
+    O(log n) and the grid never dominates a query. Removed keys are masked until the next rebuild.
+
+    Query results are returned in insertion order, so callers that used to
+    scan a list keep their ordering.
+    """
+
+    def __init__(self, cell_size: float = 50.0, rebuild_fraction: float = 0.25,
+                 min_rebuild: int = 4096, leaf_size: int = 32):
+        self.cell_size = cell_size
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self.leaf_size = leaf_size
+
+        self.points = np.empty((1024, 3), dtype=np.float64)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.keys: List[Any] = []
+        self.slots: Dict[Hashable, int] = {}
+
+        self.tree = KDTree(np.empty((0, 3)))  # covers slots [0, len(self.tree))
+        self.grid: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+        self.grid_size = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.slots
+
+    def bulk_load(self, keys: Sequence[Hashable], points: np.ndarray):
+        """Insert many points at once and rebuild the tree over everything"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        with self.lock:
+            for key in keys:
+                if key in self.slots:
+                    self._remove(key)
+            first = len(self.keys)
+            self._ensure_capacity(first + len(points))
+            self.points[first:first + len(points)] = points
+            self.alive[first:first + len(points)] = True
+            for offset, key in enumerate(keys):
+                self.slots[key] = first + offset
+                self.keys.append(key)
+            self._rebuild()
+
+    def insert(self, key: Hashable, point: Point):
+        """Insert or move a point"""
+        with self.lock:
+            if key in self.slots:
+                self._remove(key)
+            slot = len(self.keys)
+            self._ensure_capacity(slot + 1)
+            self.points[slot] = point
+            self.alive[slot] = True
+            self.slots[key] = slot
+            self.keys.append(key)
+            self.grid[self._cell(point)].append(slot)
+            self.grid_size += 1
+            if self.grid_size > max(self.min_rebuild, self.rebuild_fraction * len(self.tree)):
+                self._rebuild()
+
+    def remove(self, key: Hashable) -> bool:
+        with self.lock:
+            if key not in self.slots:
+                return False
+            self._remove(key)
+            return True
+
+    def query_radius(self, center: Point, radius: float) -> List[Any]:
+        """Keys of points within radius of center"""
+        with self.lock:
+            return [self.keys[slot] for slot in self._radius_slots(center, radius).tolist()]
+
+    def query_radius_with_distances(self, center: Point, radius: float) -> List[Tuple[Any, float]]:
+        with self.lock:
+            slots = self._radius_slots(center, radius)
+            distances = np.sqrt(np.sum((self.points[slots] - np.asarray(center)) ** 2, axis=1))
+            return [(self.keys[slot], float(distance)) for slot, distance in zip(slots, distances)]
+
+    def nearest(self, center: Point, k: int = 1) -> List[Tuple[Any, float]]:
+        """The k nearest (key, distance) pairs, nearest first"""
+        with self.lock:
+            if k <= 0 or not self.slots:
+                return []
+            center = tuple(float(value) for value in center)
+            positions, distances = self.tree.query_nearest(center, k, accept=self.alive)
+            candidates = list(zip(positions.tolist(), distances.tolist()))
+
+            # Grid points can only beat the tree's k-th distance if they lie within it
+            radius = distances[-1] if len(distances) == k else None
+            if self.grid_size:
+                if radius is None:
+                    grid_slots = self._all_grid_slots()
+                else:
+                    grid_slots = self._grid_slots(center, radius)
+                grid_distances = np.sqrt(np.sum((self.points[grid_slots] - np.asarray(center)) ** 2, axis=1))
+                candidates.extend(zip(grid_slots.tolist(), grid_distances.tolist()))
+
+            candidates.sort(key=lambda item: (item[1], item[0]))
+            return [(self.keys[slot], distance) for slot, distance in candidates[:k]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'points': len(self.slots),
+                'tree_points': len(self.tree),
+                'grid_points': self.grid_size,
+                'grid_cells': len(self.grid),
+                'dead_slots': len(self.keys) - len(self.slots)
+            }
+
+    def _radius_slots(self, center: Point, radius: float) -> np.ndarray:
+        center = tuple(float(value) for value in center)
+        slots = self.tree.query_radius(center, radius)
+        slots = slots[self.alive[slots]]
+        if self.grid_size:
+            slots = np.concatenate([slots, self._grid_slots(center, radius)])
+        return np.sort(slots)
+
+    def _grid_slots(self, center: Point, radius: float) -> np.ndarray:
+        """Live grid slots within radius, visiting only overlapping cells"""
+        low = self._cell(tuple(value - radius for value in center))
+        high = self._cell(tuple(value + radius for value in center))
+        n_cells = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+
+        if n_cells > len(self.grid):
+            candidates = self._all_grid_slots()
+        else:
+            slots = []
+            for x in range(low[0], high[0] + 1):
+                for y in range(low[1], high[1] + 1):
+                    for z in range(low[2], high[2] + 1):
+                        cell = self.grid.get((x, y, z))
+                        if cell:
+                            slots.extend(cell)
+            candidates = np.asarray(slots, dtype=np.int64)
+
+        if not len(candidates):
+            return candidates
+        distances = np.sum((self.points[candidates] - np.asarray(center)) ** 2, axis=1)
+        return candidates[distances <= radius * radius]
+
+    def _all_grid_slots(self) -> np.ndarray:
+        slots = [slot for cell in self.grid.values() for slot in cell]
+        return np.asarray(slots, dtype=np.int64)
+
+    def _remove(self, key: Hashable):
+        slot = self.slots.pop(key)
+        self.alive[slot] = False
+        cell = self.grid.get(self._cell(tuple(self.points[slot])))
+        if cell is not None and slot in cell:
+            cell.remove(slot)
+            self.grid_size -= 1
+            if not cell:
+                del self.grid[self._cell(tuple(self.points[slot]))]
+
+    def _rebuild(self):
+        """Fold grid points into a new tree and drop removed slots"""
+        live = np.flatnonzero(self.alive[:len(self.keys)])
+        keys = [self.keys[slot] for slot in live]
+        points = self.points[live].copy()
+
+        self.points[:len(live)] = points
+        self.alive[:] = False
+        self.alive[:len(live)] = True
+        self.keys = keys
+        self.slots = {key: slot for slot, key in enumerate(keys)}
+        self.tree = KDTree(points, self.leaf_size)
+        self.grid = defaultdict(list)
+        self.grid_size = 0
+
+    def _cell(self, point: Point) -> Tuple[int, int, int]:
+        size = self.cell_size
+        return (math.floor(point[0] / size), math.floor(point[1] / size), math.floor(point[2] / size))
+
+    def _ensure_capacity(self, n_slots: int):
+        if n_slots <= len(self.alive):
+            return
+        capacity = max(n_slots, 2 * len(self.alive))
+        points = np.empty((capacity, 3), dtype=np.float64)
+        points[:len(self.points)] = self.points
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.points, self.alive = points, alive
@@ -0,0 +1,68 @@
+"""
+Spatial Index Benchmarks
+Bulk load, incremental insert and query latency of the 3D spatial index against linear scans
+"""
+
+import math
+import time
+import numpy as np
+from typing import Dict, Any, List, Sequence, Tuple
+
+from spatial_index import SpatialIndex
+
+def _legacy_radius_scan(points: List[Tuple[float, float, float]], center: Tuple[float, float, float],
+                        radius: float) -> List[int]:
+    """The per-block distance loop get_blocks_in_radius used before the index"""
+    return [i for i, point in enumerate(points) if math.dist(point, center) <= radius]
+
+def benchmark_spatial_index(sizes: Sequence[int] = (10_000, 100_000, 1_000_000),
+                            extent: float = 10_000.0, radius: float = 150.0, k: int = 10,
+                            queries: int = 200, legacy_queries: int = 5,
+                            incremental: int = 20_000, seed: int = 0) -> Dict[str, Any]:
+    """Per block count: bulk load, incremental inserts, radius and k-nearest queries"""
+    rng = np.random.default_rng(seed)
+    report = {}
+
+    for size in sizes:
+        points = rng.uniform(0, extent, size=(size, 3))
+        centers = [tuple(center) for center in rng.uniform(0, extent, size=(queries, 3))]
+
+        index = SpatialIndex(cell_size=radius)
+        start = time.perf_counter()
+        index.bulk_load(list(range(size)), points)
+        bulk_seconds = time.perf_counter() - start
+
+        extra = rng.uniform(0, extent, size=(incremental, 3))
+        start = time.perf_counter()
+        for offset, point in enumerate(extra):
+            index.insert(size + offset, tuple(point))
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = sum(len(index.query_radius(center, radius)) for center in centers)
+        radius_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for center in centers:
+            index.nearest(center, k)
+        nearest_seconds = time.perf_counter() - start
+
+        point_list = [tuple(point) for point in np.vstack([points, extra]).tolist()]
+        start = time.perf_counter()
+        for center in centers[:legacy_queries]:
+            _legacy_radius_scan(point_list, center, radius)
+        legacy_seconds = time.perf_counter() - start
+
+        report[size] = {
+            'bulk_load_seconds': bulk_seconds,
+            'inserts_per_sec': incremental / insert_seconds,
+            'radius_query_ms': 1000 * radius_seconds / queries,
+            'mean_radius_hits': hits / queries,
+            'nearest_query_ms': 1000 * nearest_seconds / queries,
+            'legacy_radius_query_ms': 1000 * legacy_seconds / legacy_queries
+        }
+    return report
+
+if __name__ == "__main__":
+    for size, result in benchmark_spatial_index().items():
+        print(f"{size} blocks: {result}")
@@ -0,0 +1,504 @@
+"""
+Streaming Dataset Analysis
+One-pass, mergeable column statistics for datasets larger than memory, read in chunks or memory-mapped
+"""
+
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from sklearn.ensemble import IsolationForest
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang, Liberty)
+
+    Level h holds items standing for 2 ** h values each. A full level is
+    sorted and every other item, from a random offset, moves up a level.
+    Capacities shrink by 2/3 per level below the top, so memory is about
+    3k items whatever the stream length. The rank error is around 1.7 / k of
+    the count with high probability, so tail counts read from the sketch
+    are off by up to about that many rows. Batches are handled with numpy
+    sorts rather than item by item.
+    """
+
+    def __init__(self, k: int = 2000, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.count += values.size
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _capacity(self, level: int) -> int:
+        return max(2, int(math.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                grew = level + 1 == len(self.levels)
+                if grew:
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                promoted = items[:len(items) - len(leftover)][int(self.rng.integers(2))::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # A new top level shrinks every capacity below it
+                level = 0 if grew else level + 1
+            else:
+                level += 1
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** height) for height, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        if not self.count:
+            return [math.nan] * len(qs)
+        items, cumulative = self._weighted()
+        targets = np.asarray(qs) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(items) - 1)
+        return items[positions].tolist()
+
+    def ranks(self, values: Sequence[float]) -> np.ndarray:
+        """Estimated number of stream values <= each of values"""
+        if not self.count:
+            return np.zeros(len(values))
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(items, values, side='right')
+        ranks = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0)
+        return ranks * self.count / cumulative[-1]
+
+class HyperLogLog:
+    """Distinct count of 64-bit hashes in 2 ** precision one-byte registers; merging is a max"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        bits = 64 - self.precision
+        # Position of the leftmost 1 in the remaining bits
+        leading = np.where(remainder > 0, bits - np.floor(np.log2(np.maximum(remainder, 1).astype(np.float64))),
+                           bits + 1)
+        np.maximum.at(self.registers, index, leading.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return m * math.log(m / empty)
+        return float(raw)
+
+class ColumnMoments:
+    """Per-column count, mean and central moments M2..M4, NaN-aware and merged pairwise (Pebay)"""
+
+    def __init__(self, width: int):
+        self.count = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.m3 = np.zeros(width)
+        self.m4 = np.zeros(width)
+        self.minimum = np.full(width, np.inf)
+        self.maximum = np.full(width, -np.inf)
+
+    def update(self, values: np.ndarray):
+        present = ~np.isnan(values)
+        count = present.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0.0)
+        deviation = np.where(present, values - mean, 0.0)
+        squared = deviation * deviation
+        other = ColumnMoments(values.shape[1])
+        other.count, other.mean = count, mean
+        other.m2 = squared.sum(axis=0)
+        other.m3 = (squared * deviation).sum(axis=0)
+        other.m4 = (squared * squared).sum(axis=0)
+        if values.size:
+            with np.errstate(invalid='ignore'):
+                other.minimum = np.where(count > 0, np.nanmin(np.where(present, values, np.inf), axis=0), np.inf)
+                other.maximum = np.where(count > 0, np.nanmax(np.where(present, values, -np.inf), axis=0), -np.inf)
+        self.merge(other)
+
+    def merge(self, other: 'ColumnMoments'):
+        na, nb = self.count, other.count
+        n = na + nb
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            safe = np.where(n > 0, n, 1.0)
+            m2 = self.m2 + other.m2 + delta ** 2 * na * nb / safe
+            m3 = (self.m3 + other.m3 + delta ** 3 * na * nb * (na - nb) / safe ** 2
+                  + 3 * delta * (na * other.m2 - nb * self.m2) / safe)
+            m4 = (self.m4 + other.m4 + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / safe ** 3
+                  + 6 * delta ** 2 * (na * na * other.m2 + nb * nb * self.m2) / safe ** 2
+                  + 4 * delta * (na * other.m3 - nb * self.m3) / safe)
+            self.mean = np.where(n > 0, self.mean + delta * nb / safe, 0.0)
+        self.m2, self.m3, self.m4, self.count = m2, m3, m4, n
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+
+    def std(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    def skewness(self) -> np.ndarray:
+        """Adjusted Fisher-Pearson skew, as pandas.Series.skew"""
+        n = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+            return np.where(n > 2, np.sqrt(n * (n - 1)) / (n - 2) * g1, np.nan)
+
+    def kurtosis(self) -> np.ndarray:
+        """Unbiased excess kurtosis, as pandas.Series.kurtosis"""
+        n = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            value = (n * (n + 1) * (n - 1) * self.m4 / ((n - 2) * (n - 3) * self.m2 ** 2)
+                     - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+            return np.where(n > 3, value, np.nan)
+
+class CoMoments:
+    """
+    Pairwise-complete correlation sums, as DataFrame.corr() computes them
+
+    For each column pair it keeps the count of rows where both are present
+    and the sums of x, x^2 and xy over those rows, all as k x k matrix
+    products per chunk. Values are shifted by pilot means first so the
+    sums stay well conditioned.
+    """
+
+    def __init__(self, shifts: np.ndarray):
+        width = len(shifts)
+        self.shifts = shifts
+        self.n = np.zeros((width, width))
+        self.sum_x = np.zeros((width, width))
+        self.sum_xx = np.zeros((width, width))
+        self.sum_xy = np.zeros((width, width))
+
+    def update(self, values: np.ndarray):
+        present = (~np.isnan(values)).astype(np.float64)
+        shifted = np.where(present > 0, values - self.shifts, 0.0)
+        self.n += present.T @ present
+        # sum_x[i, j]: sum of column i over rows where j is also present
+        self.sum_x += shifted.T @ present
+        self.sum_xx += (shifted * shifted).T @ present
+        self.sum_xy += shifted.T @ shifted
+
+    def merge(self, other: 'CoMoments'):
+        self.n += other.n
+        self.sum_x += other.sum_x
+        self.sum_xx += other.sum_xx
+        self.sum_xy += other.sum_xy
+
+    def correlation(self) -> np.ndarray:
+        n, sx, sxx, sxy = self.n, self.sum_x, self.sum_xx, self.sum_xy
+        sy, syy = sx.T, sxx.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        result[n < 2] = np.nan
+        return np.clip(result, -1.0, 1.0)
+
+class StreamingAnalysis:
+    """
+    Partial analysis of some rows of a dataset
+
+    update() folds in a chunk, merge() folds in another partial built with
+    the same layout, and finalize() turns the result into the sections
+    DataAnalysisEngine.analyze_dataset reports. Every part is bounded in
+    size, so partials can be built in worker processes and merged in any
+    order.
+
+    The layout comes from a pilot chunk: numeric columns, the shifts for
+    the correlation sums and, when scikit-learn is available, an
+    IsolationForest fitted on the pilot that scores every later row.
+    """
+
+    def __init__(self, layout: Dict[str, Any]):
+        self.layout = layout
+        width = len(layout['numeric_columns'])
+        self.rows = 0
+        self.missing = np.zeros(len(layout['columns']), dtype=np.int64)
+        self.moments = ColumnMoments(width)
+        self.comoments = CoMoments(layout['shifts'])
+        self.sketches = [KLLSketch(layout['sketch_k'], seed=column) for column in range(width)]
+        self.distinct_rows = HyperLogLog(precision=16)
+        self.isolation_anomalies = 0
+        self.memory_usage = 0
+
+    def update(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        columns, numeric_columns = self.layout['columns'], self.layout['numeric_columns']
+        chunk = chunk.reindex(columns=columns)
+        self.rows += len(chunk)
+        self.missing += chunk.isnull().sum().to_numpy(dtype=np.int64)
+        self.memory_usage += int(chunk.memory_usage(deep=True).sum())
+        self.distinct_rows.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+
+        values = chunk[numeric_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        self.moments.update(values)
+        self.comoments.update(values)
+        for column, sketch in enumerate(self.sketches):
+            sketch.update(values[:, column])
+        model = self.layout.get('isolation_forest')
+        if model is not None:
+            self.isolation_anomalies += int(np.count_nonzero(model.predict(np.nan_to_num(values)) == -1))
+
+    def merge(self, other: 'StreamingAnalysis'):
+        self.rows += other.rows
+        self.missing += other.missing
+        self.memory_usage += other.memory_usage
+        self.moments.merge(other.moments)
+        self.comoments.merge(other.comoments)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        self.distinct_rows.merge(other.distinct_rows)
+        self.isolation_anomalies += other.isolation_anomalies
+
+    def finalize(self, strong_threshold: float = 0.7) -> Dict[str, Any]:
+        layout, moments = self.layout, self.moments
+        names = layout['numeric_columns']
+        std = moments.std()
+        quartiles = [sketch.quantiles([0.25, 0.5, 0.75]) for sketch in self.sketches]
+
+        descriptive, outliers, z_outliers = {}, {}, {}
+        for column, name in enumerate(names):
+            q1, median, q3 = quartiles[column]
+            count = moments.count[column]
+            descriptive[name] = {
+                'count': float(count), 'mean': float(moments.mean[column]), 'std': float(std[column]),
+                'min': float(moments.minimum[column]) if count else math.nan, '25%': q1, '50%': median, '75%': q3,
+                'max': float(moments.maximum[column]) if count else math.nan
+            }
+            # Outlier counts are ranks read back from the sketch, so no second pass
+            iqr = q3 - q1
+            lower_bound, upper_bound = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            below, at_or_below_upper = self.sketches[column].ranks([np.nextafter(lower_bound, -np.inf), upper_bound])
+            outlier_count = int(round(below + count - at_or_below_upper))
+            outliers[name] = {
+                'count': outlier_count,
+                'percentage': outlier_count / self.rows * 100 if self.rows else 0.0,
+                'lower_bound': lower_bound,
+                'upper_bound': upper_bound
+            }
+            mean = moments.mean[column]
+            below, at_or_below_upper = self.sketches[column].ranks(
+                [np.nextafter(mean - 3 * std[column], -np.inf), mean + 3 * std[column]])
+            z_outliers[name] = int(round(below + count - at_or_below_upper))
+
+        correlation = self.comoments.correlation()
+        upper_i, upper_j = np.triu_indices(len(names), k=1)
+        pair_values = correlation[upper_i, upper_j]
+        strong = np.abs(pair_values) > strong_threshold
+        strong_correlations = [
+            {
+                'variable1': names[i],
+                'variable2': names[j],
+                'correlation': float(value),
+                'strength': 'strong' if abs(value) > 0.8 else 'moderate'
+            }
+            for i, j, value in zip(upper_i[strong], upper_j[strong], pair_values[strong])
+        ]
+
+        distinct = min(self.distinct_rows.estimate(), self.rows)
+        return {
+            'dataset_info': {
+                'shape': (self.rows, len(layout['columns'])),
+                'columns': layout['columns'],
+                'dtypes': layout['dtypes'],
+                'memory_usage': self.memory_usage,
+                'missing_values': dict(zip(layout['columns'], self.missing.tolist())),
+                'duplicate_rows_estimate': int(max(0, round(self.rows - distinct)))
+            },
+            'statistical_summary': {
+                'descriptive_stats': descriptive,
+                'skewness': dict(zip(names, moments.skewness().tolist())),
+                'kurtosis': dict(zip(names, moments.kurtosis().tolist())),
+                'outlier_detection': outliers
+            },
+            'correlation_analysis': {
+                'correlation_matrix': {
+                    name: dict(zip(names, correlation[:, column].tolist())) for column, name in enumerate(names)
+                },
+                'strong_correlations': strong_correlations,
+                'multicollinearity_warning': len(strong_correlations) > 0
+            },
+            'anomaly_detection': {
+                'isolation_forest_anomalies': self.isolation_anomalies if layout.get('isolation_forest') else None,
+                'statistical_outliers_by_column': z_outliers
+            }
+        }
+
+# Chunk sources
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith(('.parquet', '.pq'))
+
+def _is_arrow(path: str) -> bool:
+    return path.endswith(('.arrow', '.feather', '.ipc'))
+
+def iter_chunks(source: Union[str, pd.DataFrame, Iterable[pd.DataFrame]], chunksize: int = 100_000,
+                columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    DataFrames of about chunksize rows from a CSV, Parquet or Arrow IPC path,
+    an in-memory DataFrame or an iterable of DataFrames
+
+    Parquet and Arrow files are memory-mapped and read a record batch at a
+    time.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    elif isinstance(source, str) and (_is_parquet(source) or _is_arrow(source)):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to stream Parquet and Arrow files")
+        if _is_parquet(source):
+            batches = pq.ParquetFile(source, memory_map=True).iter_batches(batch_size=chunksize, columns=columns)
+        else:
+            batches = _arrow_batches(source)
+        for batch in batches:
+            yield batch.to_pandas()
+    elif isinstance(source, str):
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+    else:
+        yield from source
+
+def _arrow_batches(path: str):
+    reader = pa_ipc.open_file(pa.memory_map(path))
+    for index in range(reader.num_record_batches):
+        yield reader.get_batch(index)
+
+def _csv_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a CSV after its header into byte ranges that start and end on line boundaries"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        handle.readline()
+        start = handle.tell()
+        bounds = [start]
+        for part in range(1, parts):
+            handle.seek(max(start + (size - start) * part // parts, bounds[-1]))
+            handle.readline()
+            bounds.append(min(handle.tell(), size))
+    bounds.append(size)
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+def _csv_range_chunks(path: str, header: List[str], start: int, end: int,
+                      block_bytes: int = 64 << 20) -> Iterator[pd.DataFrame]:
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while handle.tell() < end:
+            block = handle.read(min(block_bytes, end - handle.tell()))
+            if handle.tell() < end:
+                block += handle.readline()  # finish the last line
+            yield pd.read_csv(io.BytesIO(block), names=header, header=None)
+
+def _analyze_shard(layout: Dict[str, Any], shard: Tuple) -> StreamingAnalysis:
+    partial = StreamingAnalysis(layout)
+    kind = shard[0]
+    if kind == 'csv':
+        _, path, start, end = shard
+        chunks = _csv_range_chunks(path, layout['columns'], start, end)
+    else:
+        _, path, row_groups, chunksize = shard
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path, memory_map=True)
+                  .iter_batches(batch_size=chunksize, row_groups=row_groups))
+    for chunk in chunks:
+        partial.update(chunk)
+    return partial
+
+def build_layout(pilot: pd.DataFrame, sketch_k: int = 2000, isolation_forest: bool = True) -> Dict[str, Any]:
+    numeric = pilot.select_dtypes(include=[np.number])
+    layout = {
+        'columns': list(pilot.columns),
+        'dtypes': {column: str(dtype) for column, dtype in pilot.dtypes.items()},
+        'numeric_columns': list(numeric.columns),
+        'shifts': numeric.mean().fillna(0.0).to_numpy(dtype=np.float64),
+        'sketch_k': sketch_k,
+        'isolation_forest': None
+    }
+    if isolation_forest and SKLEARN_AVAILABLE and not numeric.empty:
+        layout['isolation_forest'] = IsolationForest(contamination=0.1, random_state=42).fit(
+            numeric.fillna(0).to_numpy(dtype=np.float64))
+    return layout
+
+def analyze_source(source: Union[str, pd.DataFrame, Iterable[pd.DataFrame]], chunksize: int = 100_000,
+                   workers: int = 1, sketch_k: int = 2000, isolation_forest: bool = True) -> Dict[str, Any]:
+    """
+    Analyze a dataset in one pass without loading it whole
+
+    With workers > 1, CSV files are split into line-aligned byte ranges and
+    Parquet files into row groups, each analysed in its own process and
+    merged. Parallel CSV reading assumes no quoted newlines inside fields.
+    Other sources are read sequentially in chunks.
+    """
+    chunks = iter_chunks(source, chunksize)
+    pilot = next(chunks, None)
+    if pilot is None:
+        raise ValueError("Dataset is empty")
+    layout = build_layout(pilot, sketch_k, isolation_forest)
+
+    shards = None
+    if workers > 1 and isinstance(source, str):
+        if _is_parquet(source) and PYARROW_AVAILABLE:
+            groups = list(range(pq.ParquetFile(source, memory_map=True).num_row_groups))
+            shards = [('parquet', source, groups[part::workers], chunksize)
+                      for part in range(workers) if groups[part::workers]]
+        elif not _is_arrow(source):
+            shards = [('csv', source, start, end) for start, end in _csv_ranges(source, workers)]
+
+    if shards:
+        total = StreamingAnalysis(layout)
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            for partial in pool.map(_analyze_shard, [layout] * len(shards), shards):
+                total.merge(partial)
+    else:
+        total = StreamingAnalysis(layout)
+        total.update(pilot)
+        for chunk in chunks:
+            total.update(chunk)
+    results = total.finalize()
+    results['streaming'] = {'chunksize': chunksize, 'workers': len(shards) if shards else 1, 'sketch_k': sketch_k}
+    return results
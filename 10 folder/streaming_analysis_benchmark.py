@@ -0,0 +1,93 @@
+"""
+Streaming Analysis Benchmarks
+In-memory DataFrame analysis against one-pass chunked analysis of the same CSV file
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from streaming_analysis import analyze_source
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def _write_dataset(path: str, rows: int, seed: int, block: int = 100_000):
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, block):
+        size = min(block, rows - start)
+        frame = pd.DataFrame({
+            'revenue': rng.normal(100, 15, size),
+            'latency': rng.exponential(3, size),
+            'users': rng.integers(0, 1000, size),
+            'region': rng.choice(['eu', 'us', 'apac'], size)
+        })
+        frame['cost'] = frame['revenue'] * 0.6 + rng.normal(0, 5, size)
+        frame.to_csv(path, mode='a', header=start == 0, index=False)
+
+def _legacy_analysis(data: pd.DataFrame) -> Dict[str, Any]:
+    """The describe, corr, IQR and IsolationForest steps of DataAnalysisEngine.analyze_dataset"""
+    numeric = data.select_dtypes(include=[np.number])
+    correlation = numeric.corr()
+    strong = []
+    for i in range(len(correlation.columns)):
+        for j in range(i + 1, len(correlation.columns)):
+            if abs(correlation.iloc[i, j]) > 0.7:
+                strong.append((correlation.columns[i], correlation.columns[j]))
+    outliers = {}
+    for column in numeric.columns:
+        q1, q3 = numeric[column].quantile(0.25), numeric[column].quantile(0.75)
+        iqr = q3 - q1
+        outliers[column] = int(((numeric[column] < q1 - 1.5 * iqr) | (numeric[column] > q3 + 1.5 * iqr)).sum())
+    anomalies = IsolationForest(contamination=0.1, random_state=42).fit_predict(numeric.fillna(0))
+    return {'describe': numeric.describe(), 'skew': numeric.skew(), 'strong': strong, 'outliers': outliers,
+            'duplicates': int(data.duplicated().sum()), 'anomalies': int(np.sum(anomalies == -1))}
+
+def benchmark_streaming_analysis(rows: int = 2_000_000, workers: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """Wall time, peak memory and quartile error of both paths; streaming runs first so its peak RSS is its own"""
+    report: Dict[str, Any] = {'rows': rows}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'dataset.csv')
+        _write_dataset(path, rows, seed)
+        report['file_mb'] = round(os.path.getsize(path) / 2 ** 20, 1)
+        baseline = _peak_rss_mb()
+
+        start = time.perf_counter()
+        streamed = analyze_source(path, workers=workers)
+        report['streaming'] = {'seconds': round(time.perf_counter() - start, 2), 'workers': workers,
+                               'peak_rss_mb': _peak_rss_mb(), 'baseline_rss_mb': baseline}
+
+        start = time.perf_counter()
+        legacy = _legacy_analysis(pd.read_csv(path))
+        report['in_memory'] = {'seconds': round(time.perf_counter() - start, 2), 'peak_rss_mb': _peak_rss_mb()}
+
+    stats = streamed['statistical_summary']
+    report['max_quartile_error'] = {
+        column: float(max(abs(stats['descriptive_stats'][column][q] - legacy['describe'][column][q])
+                          for q in ('25%', '50%', '75%')))
+        for column in legacy['describe'].columns
+    }
+    report['max_mean_error'] = float(max(
+        abs(stats['descriptive_stats'][column]['mean'] - legacy['describe'][column]['mean'])
+        for column in legacy['describe'].columns
+    ))
+    report['outliers'] = {column: (stats['outlier_detection'][column]['count'], exact)
+                          for column, exact in legacy['outliers'].items()}
+    report['duplicates'] = (streamed['dataset_info']['duplicate_rows_estimate'], legacy['duplicates'])
+    report['isolation_forest_anomalies'] = (streamed['anomaly_detection']['isolation_forest_anomalies'],
+                                            legacy['anomalies'])
+    return report
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    for name, result in benchmark_streaming_analysis(rows=rows, workers=workers).items():
+        print(f"{name}: {result}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Copy Trading Engine Tests
+Copier balances and holdings follow the executed mirrored orders
+"""
+
+import unittest
+
+from copy_trading_engine import CopyTradingEngine, LeaderFill
+
+def leader_fill(side: str, quantity: float, price: float = 100.0, position: float = 0.0) -> LeaderFill:
+    return LeaderFill('leader', f'{side}-{quantity}', 'stocks', 'AAPL', side, quantity, price, 10_000.0, position, 0.0)
+
+class TestSettlement(unittest.TestCase):
+    """Allocation sizes orders; only settle moves remaining and holdings"""
+
+    def setUp(self):
+        self.engine = CopyTradingEngine()
+        self.engine.add_copier('leader', 'a', 1000.0)
+        self.engine.add_copier('leader', 'b', 1000.0)
+        self.table = self.engine.tables['leader']
+
+    def test_unsettled_allocation_changes_nothing(self):
+        allocation = self.engine.allocate(leader_fill('buy', 10))
+        self.assertEqual(allocation.copier_ids, ['a', 'b'])
+        self.assertEqual(allocation.quantities.tolist(), [1.0, 1.0])
+        self.assertEqual(self.table.remaining[:2].tolist(), [1000.0, 1000.0])
+
+    def test_partial_fill_and_rejection(self):
+        fill = leader_fill('buy', 10)
+        self.engine.allocate(fill)
+        # a filled half at a worse price, b's order was rejected
+        self.engine.settle(fill, ['a'], [0.5], [110.0])
+        self.assertEqual(self.table.remaining[:2].tolist(), [945.0, 1000.0])
+        self.assertEqual(self.table.holdings['AAPL'][:2].tolist(), [0.5, 0.0])
+
+        # The leader closes everything; only a has a position to close
+        sell = leader_fill('sell', 10, 120.0, position=10)
+        allocation = self.engine.allocate(sell)
+        self.assertEqual(allocation.copier_ids, ['a'])
+        self.engine.settle(sell, allocation.copier_ids, allocation.quantities, [120.0])
+        self.assertEqual(self.table.remaining[:2].tolist(), [1000.0, 1000.0])
+        self.assertEqual(self.table.holdings['AAPL'][:2].tolist(), [0.0, 0.0])
+
+    def test_removed_copier_is_skipped(self):
+        fill = leader_fill('buy', 10)
+        allocation = self.engine.allocate(fill)
+        self.engine.remove_copier('leader', 'a')
+        self.engine.settle(fill, allocation.copier_ids, allocation.quantities, [100.0, 100.0])
+        self.assertEqual(self.table.copier_ids, ['b'])
+        self.assertEqual(self.table.remaining[0], 900.0)
+
+class TestLeaderPosition(unittest.TestCase):
+    """A sell closes the fraction of the leader's whole position, not only of the buys seen while copied"""
+
+    def setUp(self):
+        self.engine = CopyTradingEngine()
+        self.engine.add_copier('leader', 'a', 1000.0)
+        buy = leader_fill('buy', 10, position=100)
+        allocation = self.engine.allocate(buy)
+        self.engine.settle(buy, allocation.copier_ids, allocation.quantities, [100.0])
+
+    def test_partial_close_of_older_position(self):
+        allocation = self.engine.allocate(leader_fill('sell', 10, position=110))
+        self.assertAlmostEqual(allocation.quantities[0], 10 / 110)
+
+    def test_sell_sized_by_position_not_by_buys_seen(self):
+        # Before the fix the copier's mirrored 1.0 was closed in full, as 10 of the 10 bought while copied
+        sell = leader_fill('sell', 55, position=110)
+        allocation = self.engine.allocate(sell)
+        self.engine.settle(sell, allocation.copier_ids, allocation.quantities, [100.0])
+        self.assertAlmostEqual(self.engine.tables['leader'].holdings['AAPL'][0], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Offline Codec Tests
+Round trips of LocalDatabase payloads through every structured serializer
+"""
+
+import unittest
+from datetime import datetime
+
+from offline_codec import MSGPACK_AVAILABLE, PayloadCodec
+
+class TestReservedKeys(unittest.TestCase):
+    """User dicts whose keys look like the JSON type tags come back unchanged"""
+
+    PAYLOADS = [
+        {"$datetime": "not a date"},
+        {"$bytes": "zz"},
+        {"$$bytes": "00", "$other": 1, "plain": 2},
+        {"nested": [{"$datetime": "2024-01-01T00:00:00"}], "when": datetime(2024, 1, 2, 3, 4, 5)},
+        {"blob": b"\x00\x01", "$bytes": b"\x02"}
+    ]
+
+    def _round_trip(self, structured: str):
+        codec = PayloadCodec(compression="none")
+        codec.structured = structured
+        for payload in self.PAYLOADS:
+            blob, tag = codec.encode(payload)
+            self.assertEqual(tag, f"{structured}+none")
+            self.assertEqual(codec.decode(blob, tag), payload)
+
+    def test_json(self):
+        self._round_trip("json")
+
+    @unittest.skipUnless(MSGPACK_AVAILABLE, "msgpack is not installed")
+    def test_msgpack(self):
+        self._round_trip("msgpack")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Routing Graph Tests
+Batched shortest paths independent of the route cache size
+"""
+
+import unittest
+
+from routing_graph import RoutingGraph
+
+class TestShortestPaths(unittest.TestCase):
+    """Pairs sharing a source are answered from their own search, not read back from the cache"""
+
+    def _line(self, cache_size: int) -> RoutingGraph:
+        graph = RoutingGraph(cache_size=cache_size)
+        for node in range(6):
+            graph.add_edge(node, node + 1, 1.0)
+        return graph
+
+    def test_cache_smaller_than_batch(self):
+        for cache_size in (0, 2, 4096):
+            paths = self._line(cache_size).shortest_paths([(0, 6), (0, 5), (0, 4)])
+            self.assertEqual(paths, [list(range(7)), list(range(6)), list(range(5))], cache_size)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 import json
 import random
 import time
+from src.services.trending import get_tracker, record_search
 
 advanced_search_bp = Blueprint('advanced_search', __name__)
 
@@ -220,6 +221,7 @@ def advanced_search():
         return jsonify({'error': f'Invalid category. Supported: {search_engine.search_categories}'}), 400
     
     results = search_engine.enhanced_search(query, category, user_id, ai_enhance)
+    record_search(query, 'advanced_searches', category=category)
     
     return jsonify({
         'status': 'search_complete',
@@ -334,28 +336,32 @@ def get_user_rewards(user_id):
 
 @advanced_search_bp.route('/trending')
 def get_trending_searches():
+    tracker = get_tracker('advanced_searches')
+    ranked = tracker.top(50)
     trending_topics = [
-        {'query': 'quantum computing breakthrough', 'category': 'academic', 'searches': 15420},
-        {'query': 'bitcoin price prediction', 'category': 'blockchain', 'searches': 12890},
-        {'query': 'GPT-5 release date', 'category': 'ai_models', 'searches': 11250},
-        {'query': 'rust programming tutorial', 'category': 'code', 'searches': 9870},
-        {'query': 'climate change research', 'category': 'academic', 'searches': 8640},
-        {'query': 'ethereum merge effects', 'category': 'blockchain', 'searches': 7530},
-        {'query': 'machine learning datasets', 'category': 'ai_models', 'searches': 6420},
-        {'query': 'react best practices', 'category': 'code', 'searches': 5890}
+        {'query': entry['key'][0], 'category': entry['key'][1], 'searches': entry['count']}
+        for entry in ranked[:8]
     ]
     
+    category_searches = {}
+    for entry in ranked:
+        category = entry['key'][1]
+        category_searches[category] = category_searches.get(category, 0) + entry['count']
+    
+    # Emerging: searched far more in the latest bucket than their window average
+    buckets = len(tracker.bucket_sketches)
+    emerging = sorted(
+        (entry for entry in ranked if entry['recent_count'] >= 5),
+        key=lambda entry: entry['recent_count'] * buckets / entry['count'],
+        reverse=True
+    )
+    
     return jsonify({
         'trending_searches': trending_topics,
         'time_period': '24 hours',
-        'total_searches': sum([t['searches'] for t in trending_topics]),
-        'top_categories': ['academic', 'blockchain', 'ai_models', 'code'],
-        'emerging_topics': [
-            'quantum machine learning',
-            'decentralized AI',
-            'sustainable blockchain',
-            'edge computing'
-        ]
+        'total_searches': tracker.window_total(),
+        'top_categories': sorted(category_searches, key=category_searches.get, reverse=True)[:4],
+        'emerging_topics': list(dict.fromkeys(entry['key'][0] for entry in emerging))[:4]
     })
 
 @advanced_search_bp.route('/analytics')
@@ -12,6 +12,9 @@ from src.routes.posts import posts_bp
 from src.routes.social import social_bp
 from src.routes.search import search_bp
 from src.routes.notifications import notifications_bp
+from src.services.search_index import init_search_index
+from src.services.typeahead import init_typeahead
+from src.services.trending import init_trending
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -60,9 +63,12 @@ def health_check():
         'version': '2.0.0'
     })
 
-# Initialize database
+# Initialize database, the search index, typeahead suggestions and trending counters
 with app.app_context():
     db.create_all()
+    init_search_index()
+    init_typeahead(os.path.join(os.path.dirname(__file__), 'database', 'typeahead.json.gz'))
+    init_trending()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
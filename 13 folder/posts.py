@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User, Post, Comment, Like
+from src.services.trending import get_post_tracker
 from datetime import datetime
 import re
 
@@ -259,18 +260,17 @@ def delete_post(post_id):
 
 @posts_bp.route('/trending', methods=['GET'])
 def get_trending_posts():
-    """Get trending posts based on engagement"""
+    """Get trending posts based on time-decayed engagement"""
     try:
-        # Get posts with high engagement in the last 24 hours
-        from datetime import datetime, timedelta
-        yesterday = datetime.utcnow() - timedelta(days=1)
+        limit = min(request.args.get('limit', 20, type=int), 50)
         
-        trending_posts = Post.query.filter(
-            Post.created_at >= yesterday,
+        # Precomputed top-k from the engagement counters, loaded in rank order
+        ranked = get_post_tracker().top(limit)
+        rows = {post.id: post for post in Post.query.filter(
+            Post.id.in_([entry['key'] for entry in ranked]),
             Post.is_public == True
-        ).order_by(
-            (Post.likes_count + Post.comments_count + Post.shares_count).desc()
-        ).limit(20).all()
+        ).all()} if ranked else {}
+        trending_posts = [rows[entry['key']] for entry in ranked if entry['key'] in rows]
         
         return jsonify({
             'trending_posts': [post.to_dict() for post in trending_posts]
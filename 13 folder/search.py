@@ -1,9 +1,34 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db, User, Post
-from sqlalchemy import or_, and_
+from src.services.search_index import get_search_backend, search_hashtags as find_hashtags, recent_posts_for_hashtag
+from src.services.typeahead import get_typeahead
+from src.services.trending import get_tracker, record_search
 
 search_bp = Blueprint('search', __name__)
 
+def _load_in_order(model, ids):
+    """Fetch rows by id in one query, keeping the index's ranking"""
+    if not ids:
+        return []
+    rows = {row.id: row for row in model.query.filter(model.id.in_(ids)).all()}
+    return [rows[row_id] for row_id in ids if row_id in rows]
+
+def _record_search(query):
+    """Count a search that found something, for trending terms and suggestions"""
+    record_search(query)
+    get_typeahead().record_term(query)
+
+def _pagination(page, per_page, total):
+    pages = (total + per_page - 1) // per_page if per_page else 0
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
+
 @search_bp.route('/users', methods=['GET'])
 def search_users():
     """Search for users by username, full name, or bio"""
@@ -18,35 +43,21 @@ def search_users():
         if len(query) < 2:
             return jsonify({'error': 'Search query must be at least 2 characters'}), 400
         
-        # Search in username, full_name, and bio
-        search_pattern = f'%{query}%'
-        users = User.query.filter(
-            and_(
-                User.is_active == True,
-                or_(
-                    User.username.ilike(search_pattern),
-                    User.full_name.ilike(search_pattern),
-                    User.bio.ilike(search_pattern)
-                )
-            )
-        ).order_by(
-            User.followers_count.desc(),  # Popular users first
-            User.username.asc()
-        ).paginate(
-            page=page, per_page=per_page, error_out=False
+        # Ranked match on username, full_name and bio from the search index
+        sort = request.args.get('sort', 'relevance')
+        page = max(page, 1)
+        ids, total = get_search_backend().search_users(
+            db.session.connection(), query, per_page, (page - 1) * per_page, sort
         )
+        users = _load_in_order(User, ids)
+        if total:
+            _record_search(query)
         
         return jsonify({
-            'users': [user.to_public_dict() for user in users.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': users.total,
-                'pages': users.pages,
-                'has_next': users.has_next,
-                'has_prev': users.has_prev
-            },
-            'query': query
+            'users': [user.to_public_dict() for user in users],
+            'pagination': _pagination(page, per_page, total),
+            'query': query,
+            'sort': sort
         }), 200
         
     except Exception as e:
@@ -66,31 +77,21 @@ def search_posts():
         if len(query) < 2:
             return jsonify({'error': 'Search query must be at least 2 characters'}), 400
         
-        # Search in post content
-        search_pattern = f'%{query}%'
-        posts = Post.query.filter(
-            and_(
-                Post.is_public == True,
-                Post.content.ilike(search_pattern)
-            )
-        ).order_by(
-            (Post.likes_count + Post.comments_count + Post.shares_count).desc(),  # Popular posts first
-            Post.created_at.desc()
-        ).paginate(
-            page=page, per_page=per_page, error_out=False
+        # Ranked match on post content from the search index
+        sort = request.args.get('sort', 'relevance')
+        page = max(page, 1)
+        ids, total = get_search_backend().search_posts(
+            db.session.connection(), query, per_page, (page - 1) * per_page, sort
         )
+        posts = _load_in_order(Post, ids)
+        if total:
+            _record_search(query)
         
         return jsonify({
-            'posts': [post.to_dict() for post in posts.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': posts.total,
-                'pages': posts.pages,
-                'has_next': posts.has_next,
-                'has_prev': posts.has_prev
-            },
-            'query': query
+            'posts': [post.to_dict() for post in posts],
+            'pagination': _pagination(page, per_page, total),
+            'query': query,
+            'sort': sort
         }), 200
         
     except Exception as e:
@@ -108,33 +109,16 @@ def search_all():
         if len(query) < 2:
             return jsonify({'error': 'Search query must be at least 2 characters'}), 400
         
-        search_pattern = f'%{query}%'
-        
-        # Search users (limit to top 10)
-        users = User.query.filter(
-            and_(
-                User.is_active == True,
-                or_(
-                    User.username.ilike(search_pattern),
-                    User.full_name.ilike(search_pattern),
-                    User.bio.ilike(search_pattern)
-                )
-            )
-        ).order_by(
-            User.followers_count.desc(),
-            User.username.asc()
-        ).limit(10).all()
+        backend = get_search_backend()
+        connection = db.session.connection()
         
-        # Search posts (limit to top 10)
-        posts = Post.query.filter(
-            and_(
-                Post.is_public == True,
-                Post.content.ilike(search_pattern)
-            )
-        ).order_by(
-            (Post.likes_count + Post.comments_count + Post.shares_count).desc(),
-            Post.created_at.desc()
-        ).limit(10).all()
+        # Top 10 users and top 10 posts by relevance
+        user_ids, _ = backend.search_users(connection, query, 10)
+        post_ids, _ = backend.search_posts(connection, query, 10)
+        users = _load_in_order(User, user_ids)
+        posts = _load_in_order(Post, post_ids)
+        if users or posts:
+            _record_search(query)
         
         return jsonify({
             'users': [user.to_public_dict() for user in users],
@@ -148,20 +132,14 @@ def search_all():
 
 @search_bp.route('/trending', methods=['GET'])
 def get_trending_searches():
-    """Get trending search terms (mock data for now)"""
+    """Get trending search terms from the streaming search counters"""
     try:
-        # In a real implementation, this would track actual search queries
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        
+        # Precomputed top-k, ranked by time-decayed search volume
         trending_searches = [
-            {'term': 'AI Revolution', 'count': 15200},
-            {'term': 'Text2Robot', 'count': 8900},
-            {'term': 'DeFi Protocols', 'count': 6100},
-            {'term': 'Quantum Computing', 'count': 4500},
-            {'term': 'Blockchain Technology', 'count': 3800},
-            {'term': 'Machine Learning', 'count': 3200},
-            {'term': 'Cryptocurrency', 'count': 2900},
-            {'term': 'Virtual Reality', 'count': 2400},
-            {'term': 'Robotics Engineering', 'count': 2100},
-            {'term': 'Data Science', 'count': 1800}
+            {'term': entry['key'], 'count': entry['count'], 'score': entry['score']}
+            for entry in get_tracker('searches').top(limit)
         ]
         
         return jsonify({
@@ -187,42 +165,23 @@ def search_hashtags():
         if len(query) < 2:
             return jsonify({'error': 'Hashtag must be at least 2 characters'}), 400
         
-        # Search for hashtags in post content
-        hashtag_pattern = f'%#{query}%'
-        posts = Post.query.filter(
-            and_(
-                Post.is_public == True,
-                Post.content.ilike(hashtag_pattern)
-            )
-        ).order_by(
-            Post.created_at.desc()
-        ).limit(50).all()
-        
-        # Extract hashtags from posts (simplified)
-        hashtags = {}
-        for post in posts:
-            import re
-            found_hashtags = re.findall(r'#(\w+)', post.content.lower())
-            for hashtag in found_hashtags:
-                if query.lower() in hashtag:
-                    if hashtag not in hashtags:
-                        hashtags[hashtag] = {'count': 0, 'posts': []}
-                    hashtags[hashtag]['count'] += 1
-                    if len(hashtags[hashtag]['posts']) < 5:  # Limit posts per hashtag
-                        hashtags[hashtag]['posts'].append(post.to_dict())
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(request.args.get('per_page', 20, type=int), 50)
         
-        # Sort by count
-        sorted_hashtags = sorted(hashtags.items(), key=lambda x: x[1]['count'], reverse=True)
+        # Most used tags starting with the query, from the hashtag table
+        hashtags, total = find_hashtags(query, per_page, (page - 1) * per_page)
         
         return jsonify({
             'hashtags': [
                 {
-                    'tag': tag,
-                    'count': data['count'],
-                    'recent_posts': data['posts']
+                    'tag': hashtag.tag,
+                    'count': hashtag.post_count,
+                    'last_used_at': hashtag.last_used_at.isoformat() if hashtag.last_used_at else None,
+                    'recent_posts': [post.to_dict() for post in recent_posts_for_hashtag(hashtag.id)]
                 }
-                for tag, data in sorted_hashtags[:20]  # Top 20 hashtags
+                for hashtag in hashtags
             ],
+            'pagination': _pagination(page, per_page, total),
             'query': f'#{query}'
         }), 200
         
@@ -238,33 +197,14 @@ def get_search_suggestions():
         if not query or len(query) < 2:
             return jsonify({'suggestions': []}), 200
         
-        search_pattern = f'{query}%'
-        
-        # Get username suggestions
-        user_suggestions = db.session.query(User.username).filter(
-            and_(
-                User.is_active == True,
-                User.username.ilike(search_pattern)
-            )
-        ).limit(5).all()
-        
-        # Get full name suggestions
-        name_suggestions = db.session.query(User.full_name).filter(
-            and_(
-                User.is_active == True,
-                User.full_name.ilike(search_pattern)
-            )
-        ).limit(5).all()
-        
-        suggestions = []
-        suggestions.extend([username[0] for username in user_suggestions])
-        suggestions.extend([name[0] for name in name_suggestions])
+        limit = min(request.args.get('limit', 10, type=int), 20)
         
-        # Remove duplicates and limit
-        suggestions = list(set(suggestions))[:10]
+        # Ranked completions from the in-memory typeahead index
+        results = get_typeahead().suggest(query, limit)
         
         return jsonify({
-            'suggestions': suggestions,
+            'suggestions': [result['text'] for result in results],
+            'results': results,
             'query': query
         }), 200
         
@@ -0,0 +1,139 @@
+"""
+Search Benchmarks
+ILIKE '%q%' scans and per-request hashtag extraction against the FTS5 index and hashtag table
+"""
+
+import itertools
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import create_engine, select, text
+
+from src.models.user import db, Hashtag
+from src.services.search_index import SQLiteFTSBackend, rebuild_hashtags
+
+TOPICS = ("quantum computing blockchain robotics machine learning defi protocols virtual reality data science "
+          "climate energy health music travel football cooking startup design security privacy cloud").split()
+# Zipf-distributed filler vocabulary: a few words are everywhere, most are rare
+VOCABULARY = [f"w{i}" for i in range(50000)]
+VOCABULARY_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+TAGS = ["ai", "quantum", "web3", "robotics", "ml", "defi", "vr", "datascience", "climate", "startup"] + \
+       [f"topic{i}" for i in range(990)]
+
+def _populate(connection, posts: int, users: int, rng: random.Random):
+    now = datetime.utcnow()
+    connection.execute(text(
+        'INSERT INTO "user" (id, username, email, password_hash, full_name, bio, is_active, followers_count) '
+        'VALUES (:id, :username, :email, \'x\', :full_name, :bio, 1, :followers)'
+    ), [{'id': i, 'username': f"user{i}", 'email': f"user{i}@example.com",
+         'full_name': f"{rng.choice(TOPICS).title()} {rng.choice(TOPICS).title()}",
+         'bio': ' '.join(rng.choices(TOPICS, k=8)), 'followers': rng.randrange(10000)}
+        for i in range(1, users + 1)])
+
+    cumulative = list(itertools.accumulate(VOCABULARY_WEIGHTS))
+    batch = []
+    for i in range(1, posts + 1):
+        words = rng.choices(VOCABULARY, cum_weights=cumulative, k=rng.randrange(8, 30))
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), ' '.join(rng.sample(TOPICS, 2)))
+        tags = ' '.join('#' + tag for tag in rng.choices(TAGS, weights=[50] * 10 + [1] * 990, k=rng.randrange(0, 3)))
+        batch.append({'id': i, 'user_id': rng.randrange(1, users + 1), 'content': f"{' '.join(words)} {tags}",
+                      'likes': rng.randrange(500), 'created_at': now - timedelta(minutes=i)})
+        if len(batch) == 50000:
+            _insert_posts(connection, batch)
+            batch = []
+    if batch:
+        _insert_posts(connection, batch)
+
+def _insert_posts(connection, batch):
+    connection.execute(text(
+        'INSERT INTO post (id, user_id, content, likes_count, comments_count, shares_count, is_public, created_at) '
+        'VALUES (:id, :user_id, :content, :likes, 0, 0, 1, :created_at)'
+    ), batch)
+
+def _legacy_post_search(connection, query: str, limit: int = 20):
+    pattern = f'%{query}%'
+    total = connection.execute(text("SELECT count(*) FROM post WHERE is_public = 1 AND content LIKE :q"),
+                               {'q': pattern}).scalar()
+    ids = connection.execute(text(
+        "SELECT id FROM post WHERE is_public = 1 AND content LIKE :q "
+        "ORDER BY (likes_count + comments_count + shares_count) DESC, created_at DESC LIMIT :limit"
+    ), {'q': pattern, 'limit': limit}).scalars().all()
+    return ids, total
+
+def _legacy_hashtag_search(connection, query: str):
+    rows = connection.execute(text(
+        "SELECT content FROM post WHERE is_public = 1 AND content LIKE :q ORDER BY created_at DESC LIMIT 50"
+    ), {'q': f'%#{query}%'}).scalars().all()
+    counts: Dict[str, int] = {}
+    for content in rows:
+        for tag in re.findall(r'#(\w+)', content.lower()):
+            if query in tag:
+                counts[tag] = counts.get(tag, 0) + 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:20]
+
+def _indexed_hashtag_search(connection, prefix: str):
+    hashtags = Hashtag.__table__
+    return connection.execute(
+        select(hashtags.c.tag, hashtags.c.post_count)
+        .where(hashtags.c.tag >= prefix, hashtags.c.tag < prefix + '\uffff', hashtags.c.post_count > 0)
+        .order_by(hashtags.c.post_count.desc()).limit(20)
+    ).all()
+
+def _time(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return 1000 * (time.perf_counter() - start) / repeats
+
+def benchmark_search(posts: int = 1_000_000, users: int = 50_000,
+                     queries: Sequence[str] = ("quantum", "machine learning", "secur", "w5000", "w1", "zzzz"),
+                     repeats: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Per query: legacy LIKE scan and FTS5 latency (ms), plus hashtag search and index build cost"""
+    rng = random.Random(seed)
+    backend = SQLiteFTSBackend()
+    report: Dict[str, Any] = {'posts': posts}
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'search.db')}")
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            _populate(connection, posts, users, rng)
+
+            start = time.perf_counter()
+            backend.create(connection)
+            backend.rebuild(connection)
+            report['fts_build_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            rebuild_hashtags(connection)
+            report['hashtag_build_seconds'] = time.perf_counter() - start
+
+            for query in queries:
+                report[query] = {
+                    'matches': backend.search_posts(connection, query, 20)[1],
+                    'like_scan_ms': _time(lambda: _legacy_post_search(connection, query), repeats),
+                    'fts_relevance_ms': _time(lambda: backend.search_posts(connection, query, 20), repeats),
+                    'fts_popular_ms': _time(lambda: backend.search_posts(connection, query, 20, sort='popular'),
+                                            repeats),
+                    'fts_users_ms': _time(lambda: backend.search_users(connection, query, 20), repeats)
+                }
+
+            for prefix in ("qu", "topic1"):
+                report[f"#{prefix}"] = {
+                    'legacy_regex_ms': _time(lambda: _legacy_hashtag_search(connection, prefix), repeats),
+                    'hashtag_table_ms': _time(lambda: _indexed_hashtag_search(connection, prefix), repeats)
+                }
+        engine.dispose()
+    return report
+
+if __name__ == "__main__":
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for name, result in benchmark_search(posts=posts).items():
+        print(f"{name}: {result}")
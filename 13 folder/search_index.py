@@ -0,0 +1,503 @@
+"""
+Search Index
+Incrementally maintained full-text index for users and posts, and normalized hashtag counts
+"""
+
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from src.models.user import db, User, Post, Hashtag, PostHashtag
+
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+TOKEN_PATTERN = re.compile(r'\w+')
+
+USER_FIELDS = ('username', 'full_name', 'bio')
+# Relevance weight of each user field: a username hit outranks a bio hit
+USER_FIELD_WEIGHTS = (10.0, 5.0, 1.0)
+
+MAX_QUERY_TERMS = 8
+MAX_HASHTAG_LENGTH = 100
+
+def extract_hashtags(content: Optional[str]) -> List[str]:
+    """Distinct lowercase hashtags in order of first use, without the '#'"""
+    tags = []
+    for tag in HASHTAG_PATTERN.findall((content or '').lower()):
+        if len(tag) <= MAX_HASHTAG_LENGTH and tag not in tags:
+            tags.append(tag)
+    return tags
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall((value or '').lower())
+
+def user_fields(user: User) -> Tuple[str, str, str]:
+    return (user.username or '', user.full_name or '', user.bio or '')
+
+class SearchBackend:
+    """
+    Interface of an incrementally maintained user and post index
+
+    Results are returned as (ids, total) with the ids in rank order, and
+    only include active users and public posts. sort is 'relevance' or
+    'popular' (followers for users, engagement for posts).
+
+    Transactional backends write through the flushing connection, so the
+    index commits and rolls back with the rows it describes. The others are
+    handed the changes once the session has committed.
+    """
+
+    transactional = True
+
+    def create(self, connection):
+        pass
+
+    def is_empty(self, connection) -> bool:
+        raise NotImplementedError
+
+    def rebuild(self, connection):
+        raise NotImplementedError
+
+    def index_user(self, connection, user_id: int, fields: Sequence[str]):
+        raise NotImplementedError
+
+    def remove_user(self, connection, user_id: int):
+        raise NotImplementedError
+
+    def index_post(self, connection, post_id: int, content: str):
+        raise NotImplementedError
+
+    def remove_post(self, connection, post_id: int):
+        raise NotImplementedError
+
+    def search_users(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        raise NotImplementedError
+
+    def search_posts(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        raise NotImplementedError
+
+class SQLiteFTSBackend(SearchBackend):
+    """FTS5 tables in the application database, keyed by user and post id"""
+
+    TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+    USER_ORDER = {
+        'relevance': "bm25(user_search, {}, {}, {}), u.followers_count DESC".format(*USER_FIELD_WEIGHTS),
+        'popular': "u.followers_count DESC, u.username ASC"
+    }
+    POST_ORDER = {
+        'relevance': "bm25(post_search), p.created_at DESC",
+        'popular': "(p.likes_count + p.comments_count + p.shares_count) DESC, p.created_at DESC"
+    }
+
+    @staticmethod
+    def is_supported(connection) -> bool:
+        try:
+            options = {row[0] for row in connection.execute(text("PRAGMA compile_options"))}
+        except Exception:
+            return False
+        return 'ENABLE_FTS5' in options
+
+    @staticmethod
+    def match_expression(query: str) -> Optional[str]:
+        """Every term must match, each as a prefix: 'quant comp' finds 'Quantum Computing'"""
+        terms = tokenize(query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def create(self, connection):
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS user_search USING fts5(username, full_name, bio, {self.TOKENIZER})"
+        ))
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5(content, {self.TOKENIZER})"
+        ))
+
+    def is_empty(self, connection) -> bool:
+        return connection.execute(text("SELECT rowid FROM post_search LIMIT 1")).first() is None and \
+            connection.execute(text("SELECT rowid FROM user_search LIMIT 1")).first() is None
+
+    def rebuild(self, connection):
+        connection.execute(text("DELETE FROM user_search"))
+        connection.execute(text("DELETE FROM post_search"))
+        connection.execute(text(
+            'INSERT INTO user_search(rowid, username, full_name, bio) '
+            'SELECT id, username, full_name, coalesce(bio, \'\') FROM "user"'
+        ))
+        connection.execute(text("INSERT INTO post_search(rowid, content) SELECT id, content FROM post"))
+
+    def index_user(self, connection, user_id: int, fields: Sequence[str]):
+        self.remove_user(connection, user_id)
+        connection.execute(
+            text("INSERT INTO user_search(rowid, username, full_name, bio) VALUES (:id, :username, :full_name, :bio)"),
+            {'id': user_id, 'username': fields[0], 'full_name': fields[1], 'bio': fields[2]}
+        )
+
+    def remove_user(self, connection, user_id: int):
+        connection.execute(text("DELETE FROM user_search WHERE rowid = :id"), {'id': user_id})
+
+    def index_post(self, connection, post_id: int, content: str):
+        self.remove_post(connection, post_id)
+        connection.execute(text("INSERT INTO post_search(rowid, content) VALUES (:id, :content)"),
+                           {'id': post_id, 'content': content})
+
+    def remove_post(self, connection, post_id: int):
+        connection.execute(text("DELETE FROM post_search WHERE rowid = :id"), {'id': post_id})
+
+    def search_users(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        return self._search(connection, query, limit, offset,
+                            'user_search JOIN "user" u ON u.id = user_search.rowid',
+                            'user_search MATCH :match AND u.is_active = 1', 'u.id',
+                            self.USER_ORDER.get(sort, self.USER_ORDER['relevance']))
+
+    def search_posts(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        return self._search(connection, query, limit, offset,
+                            'post_search JOIN post p ON p.id = post_search.rowid',
+                            'post_search MATCH :match AND p.is_public = 1', 'p.id',
+                            self.POST_ORDER.get(sort, self.POST_ORDER['relevance']))
+
+    def _search(self, connection, query: str, limit: int, offset: int, source: str, where: str,
+                key: str, order: str) -> Tuple[List[int], int]:
+        match = self.match_expression(query)
+        if match is None:
+            return [], 0
+        total = connection.execute(text(f"SELECT count(*) FROM {source} WHERE {where}"),
+                                   {'match': match}).scalar()
+        if not total or offset >= total:
+            return [], total or 0
+        ids = connection.execute(
+            text(f"SELECT {key} FROM {source} WHERE {where} ORDER BY {order} LIMIT :limit OFFSET :offset"),
+            {'match': match, 'limit': limit, 'offset': offset}
+        ).scalars().all()
+        return list(ids), total
+
+class _MemoryIndex:
+    """Weighted postings for one document kind, with prefix lookups over a sorted vocabulary"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.documents: Dict[int, Set[str]] = {}
+        self.vocabulary: List[str] = []
+        self.vocabulary_dirty = False
+
+    def add(self, doc_id: int, weighted_fields: Sequence[Tuple[str, float]]):
+        self.remove(doc_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for value, weight in weighted_fields:
+            for token in tokenize(value):
+                weights[token] += weight
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.vocabulary_dirty = True
+            self.postings[token][doc_id] = weight
+        self.documents[doc_id] = set(weights)
+
+    def remove(self, doc_id: int):
+        for token in self.documents.pop(doc_id, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[token]
+                    self.vocabulary_dirty = True
+
+    def search(self, terms: List[str]) -> Dict[int, float]:
+        """Score every document matching all terms as prefixes, tf weight x idf"""
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+        total = max(1, len(self.documents))
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            term_scores: Dict[int, float] = defaultdict(float)
+            start = bisect.bisect_left(self.vocabulary, term)
+            for token in self.vocabulary[start:bisect.bisect_left(self.vocabulary, term + '\uffff')]:
+                postings = self.postings[token]
+                idf = math.log(1 + total / len(postings))
+                for doc_id, weight in postings.items():
+                    term_scores[doc_id] += weight * idf
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items()
+                          if doc_id in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+class MemorySearchBackend(SearchBackend):
+    """
+    In-process inverted index for databases without a full-text engine
+
+    The index is rebuilt from the tables at startup and kept current from
+    committed changes. Visibility and popularity still come from SQL, one
+    query per search over the matching ids.
+    """
+
+    transactional = False
+
+    def __init__(self):
+        self.users = _MemoryIndex()
+        self.posts = _MemoryIndex()
+        self.lock = threading.Lock()
+
+    def is_empty(self, connection) -> bool:
+        return not self.users.documents and not self.posts.documents
+
+    def rebuild(self, connection):
+        with self.lock:
+            self.users = _MemoryIndex()
+            self.posts = _MemoryIndex()
+            for row in connection.execute(select(User.id, User.username, User.full_name, User.bio)):
+                self.users.add(row[0], list(zip(row[1:], USER_FIELD_WEIGHTS)))
+            for row in connection.execute(select(Post.id, Post.content)).yield_per(10000):
+                self.posts.add(row[0], [(row[1], 1.0)])
+
+    def index_user(self, connection, user_id: int, fields: Sequence[str]):
+        with self.lock:
+            self.users.add(user_id, list(zip(fields, USER_FIELD_WEIGHTS)))
+
+    def remove_user(self, connection, user_id: int):
+        with self.lock:
+            self.users.remove(user_id)
+
+    def index_post(self, connection, post_id: int, content: str):
+        with self.lock:
+            self.posts.add(post_id, [(content, 1.0)])
+
+    def remove_post(self, connection, post_id: int):
+        with self.lock:
+            self.posts.remove(post_id)
+
+    def search_users(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        with self.lock:
+            scores = self.users.search(tokenize(query)[:MAX_QUERY_TERMS])
+        if not scores:
+            return [], 0
+        rows = connection.execute(
+            select(User.id, User.followers_count, User.username)
+            .where(User.id.in_(list(scores)), User.is_active == True)
+        ).all()
+        if sort == 'popular':
+            rows.sort(key=lambda row: (-(row[1] or 0), row[2]))
+        else:
+            rows.sort(key=lambda row: (-scores[row[0]], -(row[1] or 0)))
+        return [row[0] for row in rows[offset:offset + limit]], len(rows)
+
+    def search_posts(self, connection, query: str, limit: int, offset: int = 0,
+                     sort: str = 'relevance') -> Tuple[List[int], int]:
+        with self.lock:
+            scores = self.posts.search(tokenize(query)[:MAX_QUERY_TERMS])
+        if not scores:
+            return [], 0
+        engagement = Post.likes_count + Post.comments_count + Post.shares_count
+        rows = connection.execute(
+            select(Post.id, engagement, Post.created_at)
+            .where(Post.id.in_(list(scores)), Post.is_public == True)
+        ).all()
+        if sort == 'popular':
+            rows.sort(key=lambda row: (row[1] or 0, row[2] or datetime.min), reverse=True)
+        else:
+            rows.sort(key=lambda row: (scores[row[0]], row[2] or datetime.min), reverse=True)
+        return [row[0] for row in rows[offset:offset + limit]], len(rows)
+
+# Hashtags
+
+def sync_post_hashtags(connection, post_id: int, tags: Sequence[str], used_at: Optional[datetime] = None):
+    """Point a post at exactly these tags, keeping every Hashtag.post_count in step"""
+    hashtags, links = Hashtag.__table__, PostHashtag.__table__
+    current = dict(connection.execute(
+        select(hashtags.c.tag, hashtags.c.id)
+        .select_from(links.join(hashtags, hashtags.c.id == links.c.hashtag_id))
+        .where(links.c.post_id == post_id)
+    ).all())
+
+    removed = [current[tag] for tag in current if tag not in tags]
+    if removed:
+        connection.execute(links.delete().where(links.c.post_id == post_id, links.c.hashtag_id.in_(removed)))
+        connection.execute(hashtags.update().where(hashtags.c.id.in_(removed))
+                           .values(post_count=hashtags.c.post_count - 1))
+
+    added = [tag for tag in tags if tag not in current]
+    if not added:
+        return
+    known = dict(connection.execute(select(hashtags.c.tag, hashtags.c.id).where(hashtags.c.tag.in_(added))).all())
+    missing = [tag for tag in added if tag not in known]
+    if missing:
+        now = datetime.utcnow()
+        connection.execute(hashtags.insert(), [{'tag': tag, 'post_count': 0, 'created_at': now} for tag in missing])
+        known.update(connection.execute(
+            select(hashtags.c.tag, hashtags.c.id).where(hashtags.c.tag.in_(missing))
+        ).all())
+    ids = [known[tag] for tag in added]
+    connection.execute(links.insert(), [{'post_id': post_id, 'hashtag_id': hashtag_id} for hashtag_id in ids])
+    connection.execute(hashtags.update().where(hashtags.c.id.in_(ids))
+                       .values(post_count=hashtags.c.post_count + 1, last_used_at=used_at or datetime.utcnow()))
+
+def rebuild_hashtags(connection, batch_size: int = 10000):
+    """Recount every tag from public post content"""
+    hashtags, links = Hashtag.__table__, PostHashtag.__table__
+    connection.execute(links.delete())
+    connection.execute(hashtags.delete())
+
+    tag_ids: Dict[str, int] = {}
+    counts: Dict[str, int] = defaultdict(int)
+    last_used: Dict[str, datetime] = {}
+    pending_links = []
+    rows = connection.execute(select(Post.id, Post.content, Post.created_at).where(Post.is_public == True))
+    for partition in rows.yield_per(batch_size).partitions():
+        new_tags = []
+        for post_id, content, created_at in partition:
+            for tag in extract_hashtags(content):
+                if tag not in tag_ids and tag not in counts:
+                    new_tags.append(tag)
+                counts[tag] += 1
+                if created_at and (tag not in last_used or created_at > last_used[tag]):
+                    last_used[tag] = created_at
+                pending_links.append((post_id, tag))
+        if new_tags:
+            connection.execute(hashtags.insert(), [{'tag': tag, 'post_count': 0} for tag in new_tags])
+            tag_ids.update(connection.execute(
+                select(hashtags.c.tag, hashtags.c.id).where(hashtags.c.tag.in_(new_tags))
+            ).all())
+        if pending_links:
+            connection.execute(links.insert(), [{'post_id': post_id, 'hashtag_id': tag_ids[tag]}
+                                                for post_id, tag in pending_links])
+            pending_links = []
+
+    if counts:
+        connection.execute(
+            hashtags.update().where(hashtags.c.tag == bindparam('b_tag'))
+            .values(post_count=bindparam('b_count'), last_used_at=bindparam('b_last_used')),
+            [{'b_tag': tag, 'b_count': count, 'b_last_used': last_used.get(tag)} for tag, count in counts.items()]
+        )
+
+def search_hashtags(prefix: str, limit: int, offset: int = 0) -> Tuple[List[Hashtag], int]:
+    """Tags starting with prefix, most used first"""
+    prefix = prefix.lower().lstrip('#')
+    matches = Hashtag.query.filter(
+        Hashtag.tag >= prefix,
+        Hashtag.tag < prefix + '\uffff',
+        Hashtag.post_count > 0
+    )
+    total = matches.count()
+    tags = matches.order_by(Hashtag.post_count.desc(), Hashtag.tag.asc()).offset(offset).limit(limit).all()
+    return tags, total
+
+def recent_posts_for_hashtag(hashtag_id: int, limit: int = 5) -> List[Post]:
+    return Post.query.join(PostHashtag, PostHashtag.post_id == Post.id).filter(
+        PostHashtag.hashtag_id == hashtag_id,
+        Post.is_public == True
+    ).order_by(Post.created_at.desc()).limit(limit).all()
+
+# Model hooks
+
+def _changed(target, fields: Sequence[str]) -> bool:
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+def _apply(backend: SearchBackend, target, operation: str, connection, *args):
+    """Run an index operation now, or after commit for non-transactional backends"""
+    if backend.transactional:
+        getattr(backend, operation)(connection, *args)
+        return
+    session = Session.object_session(target)
+    if session is None:
+        getattr(backend, operation)(connection, *args)
+    else:
+        session.info.setdefault('search_index_ops', []).append((operation, args))
+
+def _register_hooks(backend: SearchBackend):
+    @event.listens_for(User, 'after_insert')
+    def user_inserted(mapper, connection, target):
+        _apply(backend, target, 'index_user', connection, target.id, user_fields(target))
+
+    @event.listens_for(User, 'after_update')
+    def user_updated(mapper, connection, target):
+        # Follower and login bookkeeping updates don't touch indexed text
+        if _changed(target, USER_FIELDS):
+            _apply(backend, target, 'index_user', connection, target.id, user_fields(target))
+
+    @event.listens_for(User, 'after_delete')
+    def user_deleted(mapper, connection, target):
+        _apply(backend, target, 'remove_user', connection, target.id)
+
+    @event.listens_for(Post, 'after_insert')
+    def post_inserted(mapper, connection, target):
+        _apply(backend, target, 'index_post', connection, target.id, target.content or '')
+        if target.is_public is not False:
+            sync_post_hashtags(connection, target.id, extract_hashtags(target.content), target.created_at)
+
+    @event.listens_for(Post, 'after_update')
+    def post_updated(mapper, connection, target):
+        # Likes, comments and shares only bump counters
+        if _changed(target, ('content',)):
+            _apply(backend, target, 'index_post', connection, target.id, target.content or '')
+        if _changed(target, ('content', 'is_public')):
+            tags = extract_hashtags(target.content) if target.is_public is not False else []
+            sync_post_hashtags(connection, target.id, tags, target.updated_at)
+
+    @event.listens_for(Post, 'before_delete')
+    def post_deleting(mapper, connection, target):
+        # Before the row goes, so foreign keys on post_hashtag never block the delete
+        sync_post_hashtags(connection, target.id, [])
+
+    @event.listens_for(Post, 'after_delete')
+    def post_deleted(mapper, connection, target):
+        _apply(backend, target, 'remove_post', connection, target.id)
+
+    if not backend.transactional:
+        @event.listens_for(Session, 'after_commit')
+        def apply_committed(session):
+            operations = session.info.pop('search_index_ops', [])
+            for operation, args in operations:
+                getattr(backend, operation)(None, *args)
+
+        @event.listens_for(Session, 'after_rollback')
+        def discard_rolled_back(session):
+            session.info.pop('search_index_ops', None)
+
+_backend: Optional[SearchBackend] = None
+_backend_lock = threading.Lock()
+
+def init_search_index(backend: Optional[SearchBackend] = None) -> SearchBackend:
+    """Create the index, fill it from existing rows if empty, and hook it to User and Post
+
+    Call once inside an app context after db.create_all(); the FTS5 backend
+    is used on SQLite builds that have it, the in-memory one elsewhere.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            return _backend
+        with db.engine.begin() as connection:
+            if backend is None:
+                if db.engine.dialect.name == 'sqlite' and SQLiteFTSBackend.is_supported(connection):
+                    backend = SQLiteFTSBackend()
+                else:
+                    backend = MemorySearchBackend()
+            backend.create(connection)
+            if backend.is_empty(connection):
+                backend.rebuild(connection)
+            has_posts = connection.execute(select(Post.id).limit(1)).first() is not None
+            has_tags = connection.execute(select(func.count()).select_from(Hashtag.__table__)).scalar()
+            if has_posts and not has_tags:
+                rebuild_hashtags(connection)
+        _register_hooks(backend)
+        _backend = backend
+        return backend
+
+def get_search_backend() -> SearchBackend:
+    return _backend or init_search_index()
@@ -0,0 +1,294 @@
+"""
+Trending Service
+Streaming counters for search terms and post engagement with continuously maintained top-k
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.models.user import db, Post
+
+class CountMinSketch:
+    """
+    Approximate counts in fixed memory: depth rows of width counters
+
+    Estimates never undercount; with conservative update, an overcount
+    comes only from keys colliding in every row. Row positions come from
+    double hashing of the key's hash, so each add costs depth index
+    computations whatever the number of distinct keys.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.counters = [0.0] * (width * depth)
+
+    def _positions(self, key: Hashable) -> List[int]:
+        hashed = hash(key) & 0xFFFFFFFFFFFFFFFF
+        first, second = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        return [row * self.width + (first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, key: Hashable, weight: float = 1.0) -> float:
+        """Add weight to key and return its new estimate"""
+        positions = self._positions(key)
+        counters = self.counters
+        estimate = min(counters[position] for position in positions) + weight
+        # Conservative update: raise only the counters that would fall below the new estimate
+        for position in positions:
+            if counters[position] < estimate:
+                counters[position] = estimate
+        return estimate
+
+    def estimate(self, key: Hashable) -> float:
+        counters = self.counters
+        return min(counters[position] for position in self._positions(key))
+
+    def scale(self, factor: float):
+        self.counters = [counter * factor for counter in self.counters]
+
+    def clear(self):
+        self.counters = [0.0] * (self.width * self.depth)
+
+class TrendingTracker:
+    """
+    Top-k keys by time-decayed weight, updated in O(1) per event
+
+    Scores use forward decay: an event at time t is added with weight
+    w * 2 ** ((t - landmark) / half_life), so stored scores never need
+    decaying and their order is the order of the decayed scores. When the
+    multiplier grows large everything is rescaled and the landmark moved.
+
+    A count-min sketch holds the decayed score of every key; a heavy-hitter
+    table keeps the capacity best candidates, and a key replaces the weakest
+    candidate once its estimate passes it. A ring of per-bucket sketches
+    covers the sliding window, giving each top key its raw count over the
+    window and in the latest bucket; keys with nothing left in the window
+    drop out of the results.
+    """
+
+    RESCALE_EXPONENT = 48
+
+    def __init__(self, capacity: int = 200, half_life: float = 6 * 3600, window: float = 24 * 3600,
+                 buckets: int = 24, width: int = 4096, depth: int = 4, refresh_interval: float = 1.0):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.bucket_seconds = window / buckets
+        self.refresh_interval = refresh_interval
+        self.scores = CountMinSketch(width, depth)
+        self.bucket_sketches = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.bucket_numbers = [-1] * buckets
+        self.bucket_totals = [0.0] * buckets
+        self.candidates: Dict[Hashable, float] = {}
+        self.labels: Dict[Hashable, Any] = {}
+        self.weakest: Optional[Hashable] = None
+        self.landmark = time.time()
+        self.events = 0
+        self.cached_at = 0.0
+        self.cached_limit = 0
+        self.cached_top: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def add(self, key: Hashable, weight: float = 1.0, now: Optional[float] = None, label: Any = None):
+        if weight <= 0:
+            return
+        now = time.time() if now is None else now
+        with self.lock:
+            exponent = (now - self.landmark) / self.half_life
+            if exponent > self.RESCALE_EXPONENT:
+                self._rescale(now)
+                exponent = 0.0
+            estimate = self.scores.add(key, weight * 2.0 ** exponent)
+            self._add_to_bucket(key, weight, now)
+            self.events += 1
+
+            if key in self.candidates:
+                self.candidates[key] = estimate
+                if key == self.weakest:
+                    self._find_weakest()
+            elif len(self.candidates) < self.capacity:
+                self.candidates[key] = estimate
+                if self.weakest is None or estimate < self.candidates[self.weakest]:
+                    self.weakest = key
+            elif estimate > self.candidates[self.weakest]:
+                del self.candidates[self.weakest]
+                self.labels.pop(self.weakest, None)
+                self.candidates[key] = estimate
+                self._find_weakest()
+            else:
+                return
+            if label is not None:
+                self.labels[key] = label
+
+    def discard(self, key: Hashable):
+        """Stop reporting key, e.g. a deleted post; it returns if it keeps getting events"""
+        with self.lock:
+            if self.candidates.pop(key, None) is not None:
+                self.labels.pop(key, None)
+                if key == self.weakest:
+                    self._find_weakest()
+                self.cached_at = 0.0
+
+    def top(self, limit: int = 20, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Best keys as {'key', 'score', 'count', 'recent_count', 'label'}, score in decayed events"""
+        wall_clock = now is None
+        now = time.time() if now is None else now
+        with self.lock:
+            # Reads within refresh_interval of the last one share its result
+            if wall_clock and limit <= self.cached_limit and now - self.cached_at < self.refresh_interval:
+                return self.cached_top[:limit]
+            decay = 2.0 ** (-(now - self.landmark) / self.half_life)
+            current = int(now // self.bucket_seconds)
+            live = [(bucket, sketch) for bucket, sketch in zip(self.bucket_numbers, self.bucket_sketches)
+                    if current - len(self.bucket_sketches) < bucket <= current]
+            ranked = []
+            for key, score in sorted(self.candidates.items(), key=lambda item: item[1], reverse=True):
+                count = sum(sketch.estimate(key) for _, sketch in live)
+                if count <= 0:
+                    continue
+                recent = sum(sketch.estimate(key) for bucket, sketch in live if bucket == current)
+                ranked.append({'key': key, 'score': round(score * decay, 3), 'count': int(count),
+                               'recent_count': int(recent), 'label': self.labels.get(key)})
+                if len(ranked) == limit:
+                    break
+            if wall_clock:
+                self.cached_top, self.cached_limit = ranked, limit
+                self.cached_at = now
+            return ranked[:limit]
+
+    def window_total(self, now: Optional[float] = None) -> int:
+        """Events inside the sliding window, across all keys"""
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self.lock:
+            return int(sum(total for bucket, total in zip(self.bucket_numbers, self.bucket_totals)
+                           if current - len(self.bucket_numbers) < bucket <= current))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'events': self.events,
+                'candidates': len(self.candidates),
+                'capacity': self.capacity,
+                'sketch_counters': self.scores.width * self.scores.depth * (1 + len(self.bucket_sketches))
+            }
+
+    def _add_to_bucket(self, key: Hashable, weight: float, now: float):
+        bucket = int(now // self.bucket_seconds)
+        slot = bucket % len(self.bucket_sketches)
+        if self.bucket_numbers[slot] != bucket:
+            if bucket < self.bucket_numbers[slot]:
+                return  # older than the window
+            self.bucket_sketches[slot].clear()
+            self.bucket_numbers[slot] = bucket
+            self.bucket_totals[slot] = 0.0
+        self.bucket_sketches[slot].add(key, weight)
+        self.bucket_totals[slot] += weight
+
+    def _find_weakest(self):
+        # O(capacity), only when the weakest candidate changes
+        self.weakest = min(self.candidates, key=self.candidates.get) if self.candidates else None
+
+    def _rescale(self, now: float):
+        factor = 2.0 ** (-(now - self.landmark) / self.half_life)
+        self.scores.scale(factor)
+        self.candidates = {key: score * factor for key, score in self.candidates.items()}
+        self.landmark = now
+
+def normalize_term(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+_trackers: Dict[str, TrendingTracker] = {}
+_trackers_lock = threading.Lock()
+
+def get_tracker(name: str, **options) -> TrendingTracker:
+    """Process-wide tracker per name; options apply on first use"""
+    with _trackers_lock:
+        if name not in _trackers:
+            _trackers[name] = TrendingTracker(**options)
+        return _trackers[name]
+
+def record_search(query: str, tracker: str = 'searches', category: Optional[str] = None):
+    """Count a search; with a category the key is (term, category), so each category is counted apart"""
+    term = normalize_term(query)
+    if 2 <= len(term) <= 100:
+        get_tracker(tracker).add(term if category is None else (term, category))
+
+# Post engagement
+
+ENGAGEMENT_WEIGHTS = {'likes_count': 1.0, 'comments_count': 1.0, 'shares_count': 1.0}
+
+def _timestamp(value: Optional[datetime]) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds() if value else time.time()
+
+def _register_post_hooks(tracker: TrendingTracker):
+    def _queue(target, change: Tuple):
+        session = Session.object_session(target)
+        if session is not None:
+            session.info.setdefault('trending_changes', []).append(change)
+
+    def post_updated(mapper, connection, target):
+        state = inspect(target)
+        if target.is_public is False:
+            if state.attrs.is_public.history.has_changes():
+                _queue(target, ('discard', target.id))
+            return
+        # Unlikes lower the stored counts but not the decayed history
+        weight = 0.0
+        for field, field_weight in ENGAGEMENT_WEIGHTS.items():
+            history = state.attrs[field].history
+            if history.deleted and history.added:
+                weight += field_weight * max((history.added[0] or 0) - (history.deleted[0] or 0), 0)
+        if weight > 0:
+            _queue(target, ('add', target.id, weight))
+
+    def post_deleted(mapper, connection, target):
+        _queue(target, ('discard', target.id))
+
+    event.listen(Post, 'after_update', post_updated)
+    event.listen(Post, 'after_delete', post_deleted)
+
+    @event.listens_for(Session, 'after_commit')
+    def apply_committed(session):
+        for change in session.info.pop('trending_changes', []):
+            if change[0] == 'add':
+                tracker.add(change[1], change[2])
+            else:
+                tracker.discard(change[1])
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard_rolled_back(session):
+        session.info.pop('trending_changes', None)
+
+_posts_initialized = False
+_posts_lock = threading.Lock()
+
+def init_trending() -> TrendingTracker:
+    """Start post engagement tracking inside an app context
+
+    The counters are in memory, so on start the tracker is seeded with the
+    engagement of public posts created within the window, as of their
+    creation time.
+    """
+    global _posts_initialized
+    tracker = get_tracker('posts')
+    with _posts_lock:
+        if _posts_initialized:
+            return tracker
+        since = datetime.utcnow() - timedelta(seconds=tracker.bucket_seconds * len(tracker.bucket_sketches))
+        engagement = sum(getattr(Post, field) * weight for field, weight in ENGAGEMENT_WEIGHTS.items())
+        rows = db.session.execute(
+            select(Post.id, Post.created_at, engagement)
+            .where(Post.created_at >= since, Post.is_public == True, engagement > 0)
+        ).all()
+        for post_id, created_at, weight in rows:
+            tracker.add(post_id, float(weight), now=_timestamp(created_at))
+        _register_post_hooks(tracker)
+        _posts_initialized = True
+    return tracker
+
+def get_post_tracker() -> TrendingTracker:
+    return get_tracker('posts') if _posts_initialized else init_trending()
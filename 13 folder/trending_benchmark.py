@@ -0,0 +1,78 @@
+"""
+Trending Benchmarks
+Per-request ORDER BY over the last day's posts against the streaming top-k, and heavy-hitter accuracy
+"""
+
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict
+
+from src.services.trending import TrendingTracker
+
+def _legacy_trending(connection, since: float):
+    return connection.execute(
+        "SELECT id FROM post WHERE created_at >= ? AND is_public = 1 "
+        "ORDER BY (likes_count + comments_count + shares_count) DESC LIMIT 20", (since,)
+    ).fetchall()
+
+def benchmark_trending(posts: int = 500_000, events: int = 1_000_000, terms: int = 100_000,
+                       seed: int = 0) -> Dict[str, Any]:
+    """Trending read latency, per-event update cost and top-20 recall against exact counts"""
+    rng = random.Random(seed)
+    now = time.time()
+    report: Dict[str, Any] = {'posts': posts, 'events': events}
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'posts.db'))
+        connection.execute("CREATE TABLE post (id INTEGER PRIMARY KEY, likes_count INTEGER, comments_count INTEGER, "
+                           "shares_count INTEGER, is_public BOOLEAN, created_at REAL)")
+        connection.execute("CREATE INDEX ix_post_created_at ON post (created_at)")
+        # A quarter of the posts fall inside the last day
+        connection.executemany("INSERT INTO post VALUES (?, ?, ?, ?, 1, ?)", (
+            (i, rng.randrange(500), rng.randrange(50), rng.randrange(20), now - rng.uniform(0, 4 * 86400))
+            for i in range(1, posts + 1)))
+        connection.commit()
+        start = time.perf_counter()
+        for _ in range(5):
+            _legacy_trending(connection, now - 86400)
+        report['legacy_query_ms'] = round(200 * (time.perf_counter() - start), 2)
+        connection.close()
+
+    # Zipf-distributed search terms arriving over one day
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(terms)))
+    stream = rng.choices(range(terms), cum_weights=cumulative, k=events)
+    timestamps = sorted(now - 86400 + rng.uniform(0, 86400) for _ in range(events))
+
+    tracker = TrendingTracker()
+    start = time.perf_counter()
+    for term, timestamp in zip(stream, timestamps):
+        tracker.add(f"term{term}", now=timestamp)
+    report['update_us_per_event'] = round(1e6 * (time.perf_counter() - start) / events, 2)
+
+    start = time.perf_counter()
+    top = tracker.top(20, now=now)
+    report['top_uncached_ms'] = round(1000 * (time.perf_counter() - start), 2)
+    start = time.perf_counter()
+    for _ in range(1000):
+        tracker.top(20)
+    report['top_cached_us'] = round(1000 * (time.perf_counter() - start), 2)
+
+    # Recall against exact decayed counts
+    exact = Counter()
+    for term, timestamp in zip(stream, timestamps):
+        exact[f"term{term}"] += 2.0 ** ((timestamp - now) / tracker.half_life)
+    expected = {term for term, _ in exact.most_common(20)}
+    report['top20_recall'] = len(expected & {entry['key'] for entry in top}) / 20
+    report['memory_counters'] = tracker.get_stats()['sketch_counters']
+    return report
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for name, result in benchmark_trending(events=events).items():
+        print(f"{name}: {result}")
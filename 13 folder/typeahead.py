@@ -0,0 +1,523 @@
+"""
+Typeahead Service
+In-memory prefix index over users, hashtags and search terms with cached top-k completions
+"""
+
+import atexit
+import bisect
+import gzip
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.models.user import db, User, Post, Hashtag
+from src.services.search_index import extract_hashtags
+
+SNAPSHOT_VERSION = 1
+
+class PrefixIndex:
+    """
+    Completions for one kind of term, ranked by weight
+
+    Keys are kept in a sorted list, so a prefix maps to one contiguous
+    range. Small ranges are scanned per query; prefixes whose range exceeds
+    scan_limit (short, popular prefixes) get their top cache_size keys
+    cached, and each upsert or removal patches only the cached prefixes of
+    its own key. A cache entry that can no longer be patched exactly is
+    dropped and recomputed on next use.
+    """
+
+    def __init__(self, cache_size: int = 20, scan_limit: int = 128):
+        self.cache_size = cache_size
+        self.scan_limit = scan_limit
+        self.weights: Dict[str, float] = {}
+        self.payloads: Dict[str, Tuple[str, Any]] = {}  # key -> (display text, reference)
+        self.keys: List[str] = []
+        self.top: Dict[str, List[Tuple[float, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @staticmethod
+    def make_key(text: str, reference: Any) -> str:
+        # NUL sorts before any character, so a key stays inside its text's prefix ranges
+        return f"{text}\x00{reference}"
+
+    def bulk_load(self, items: Iterable[Tuple[str, str, Any, float]]):
+        """Replace the contents with (text, display, reference, weight) items in one sort"""
+        self.weights, self.payloads = {}, {}
+        for text, display, reference, weight in items:
+            key = self.make_key(text, reference)
+            self.weights[key] = weight
+            self.payloads[key] = (display, reference)
+        self.keys = sorted(self.weights)
+        self.top = {}
+
+    def upsert(self, text: str, display: str, reference: Any, weight: float):
+        key = self.make_key(text, reference)
+        previous = self.weights.get(key)
+        if previous is None:
+            bisect.insort(self.keys, key)
+        self.weights[key] = weight
+        self.payloads[key] = (display, reference)
+        if previous == weight:
+            return
+
+        for prefix in self._cached_prefixes(text):
+            ranked = self.top[prefix]
+            index = next((i for i, (_, ranked_key) in enumerate(ranked) if ranked_key == key), None)
+            if index is not None:
+                del ranked[index]
+                # It may now rank below keys the cache never held
+                if len(ranked) + 1 >= self.cache_size and (not ranked or weight < ranked[-1][0]):
+                    del self.top[prefix]
+                    continue
+            elif len(ranked) >= self.cache_size and weight <= ranked[-1][0]:
+                continue
+            self._insert_ranked(ranked, weight, key)
+            del ranked[self.cache_size:]
+
+    def remove(self, text: str, reference: Any):
+        key = self.make_key(text, reference)
+        if self.weights.pop(key, None) is None:
+            return
+        self.payloads.pop(key, None)
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+        for prefix in self._cached_prefixes(text):
+            if any(ranked_key == key for _, ranked_key in self.top[prefix]):
+                del self.top[prefix]
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[float, str, Any]]:
+        """Top (weight, display, reference) for keys starting with prefix"""
+        ranked = self.top.get(prefix)
+        if ranked is None:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+            if end - start <= self.scan_limit:
+                ranked = heapq.nlargest(limit, ((self.weights[key], key) for key in self.keys[start:end]))
+            else:
+                ranked = heapq.nlargest(self.cache_size,
+                                        ((self.weights[key], key) for key in self.keys[start:end]))
+                self.top[prefix] = ranked
+        return [(weight, *self.payloads[key]) for weight, key in ranked[:limit]]
+
+    def _cached_prefixes(self, text: str) -> List[str]:
+        if not self.top:
+            return []
+        return [text[:length] for length in range(1, len(text) + 1) if text[:length] in self.top]
+
+    @staticmethod
+    def _insert_ranked(ranked: List[Tuple[float, str]], weight: float, key: str):
+        """Insert keeping ranked in descending (weight, key) order"""
+        low, high = 0, len(ranked)
+        while low < high:
+            middle = (low + high) // 2
+            if ranked[middle] > (weight, key):
+                low = middle + 1
+            else:
+                high = middle
+        ranked.insert(low, (weight, key))
+
+class TypeaheadService:
+    """
+    Top-k completions across usernames, full names, hashtags and search terms
+
+    Each kind has its own PrefixIndex weighted in its own unit (followers,
+    posts using the tag, times searched); results are merged on
+    boost * log1p(weight). A leading '@' restricts to users and '#' to
+    hashtags. Users match on username and on every word of their full name.
+
+    The index is kept current from committed User and Post changes and is
+    snapshotted to disk, so a restart serves suggestions from the snapshot
+    while a background rebuild reconciles it with the database. Changes
+    made while a rebuild reads are logged and replayed onto what it loads,
+    except hashtag deltas: the counts it read may already include them, so
+    the tags they touch are read again after loading.
+
+    Search terms are capped at max_terms; past the cap the least searched
+    tenth is evicted.
+    """
+
+    BOOSTS = {'user': 1.0, 'hashtag': 1.2, 'term': 1.5}
+
+    def __init__(self, snapshot_path: Optional[str] = None, snapshot_interval: float = 300.0,
+                 cache_size: int = 20, max_terms: int = 100_000):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.indexes = {kind: PrefixIndex(cache_size=cache_size) for kind in self.BOOSTS}
+        self.users: Dict[int, Tuple[str, str, int, bool]] = {}  # id -> (username, full_name, followers, active)
+        self.hashtags: Dict[str, int] = {}
+        self.terms: Dict[str, float] = {}
+        self.max_terms = max_terms
+        self.replay: Optional[List[Tuple]] = None  # changes logged while a rebuild reads
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.snapshot_thread: Optional[threading.Thread] = None
+
+    # Queries
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        query = ' '.join(query.lower().split())
+        kinds = list(self.BOOSTS)
+        if query.startswith('@'):
+            query, kinds = query[1:], ['user']
+        elif query.startswith('#'):
+            query, kinds = query[1:], ['hashtag']
+        if not query:
+            return []
+
+        candidates = []
+        with self.lock:
+            for kind in kinds:
+                boost = self.BOOSTS[kind]
+                for weight, display, reference in self.indexes[kind].complete(query, min(limit * 2, self.indexes[kind].cache_size)):
+                    candidates.append((boost * math.log1p(max(weight, 0.0)), kind, display, reference))
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[2]))
+
+        suggestions, seen = [], set()
+        for score, kind, display, reference in candidates:
+            # A user matching on both username and full name is one suggestion
+            identity = (kind, reference) if kind == 'user' else ('text', display.lower().lstrip('#'))
+            if identity in seen:
+                continue
+            seen.add(identity)
+            suggestion = {'text': display, 'type': kind, 'score': round(score, 4)}
+            if kind == 'user':
+                suggestion['id'] = reference
+                suggestion['username'] = self.users.get(reference, (display,))[0]
+            suggestions.append(suggestion)
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+    # Updates
+
+    def upsert_user(self, user_id: int, username: str, full_name: Optional[str], followers: int,
+                    active: bool = True):
+        texts = self._user_texts(username, full_name) if active else []
+        with self.lock:
+            self._log(('user', user_id, username, full_name, followers, active))
+            # Follower changes keep the same keys and only move weights
+            self._remove_user_entries(user_id, keep=frozenset(text for text, _ in texts))
+            self.users[user_id] = (username, full_name or '', followers or 0, bool(active))
+            for text, display in texts:
+                self.indexes['user'].upsert(text, display, user_id, followers or 0)
+            self.dirty = True
+
+    def remove_user(self, user_id: int):
+        with self.lock:
+            self._log(('remove_user', user_id))
+            self._remove_user_entries(user_id)
+            self.users.pop(user_id, None)
+            self.dirty = True
+
+    def adjust_hashtag(self, tag: str, delta: int):
+        with self.lock:
+            self._log(('hashtag', tag, delta))
+            self._set_hashtag(tag, self.hashtags.get(tag, 0) + delta)
+
+    def set_hashtag_counts(self, counts: Iterable[Tuple[str, int]]):
+        """Overwrite the post counts of tags, e.g. with values just read from the database"""
+        with self.lock:
+            for tag, count in counts:
+                self._set_hashtag(tag, count)
+
+    def record_term(self, term: str, weight: float = 1.0):
+        """Count a search for term; repeated searches raise its rank"""
+        term = ' '.join(term.lower().split())
+        if len(term) < 2 or len(term) > 100:
+            return
+        with self.lock:
+            self.set_term_weight(term, self.terms.get(term, 0.0) + weight)
+
+    def set_term_weight(self, term: str, weight: float):
+        with self.lock:
+            self._log(('term', term, weight))
+            if weight > 0:
+                self.terms[term] = weight
+                self.indexes['term'].upsert(term, term, term, weight)
+                if len(self.terms) > self.max_terms:
+                    self._evict_terms()
+            else:
+                self.terms.pop(term, None)
+                self.indexes['term'].remove(term, term)
+            self.dirty = True
+
+    def apply(self, change: Tuple):
+        """Apply one committed change as queued by the mapper hooks"""
+        if change[0] == 'user':
+            self.upsert_user(*change[1:])
+        elif change[0] == 'remove_user':
+            self.remove_user(change[1])
+        elif change[0] == 'hashtag':
+            self.adjust_hashtag(change[1], change[2])
+        else:
+            self.set_term_weight(change[1], change[2])
+
+    # Bulk loading
+
+    def load(self, users: Iterable[Sequence], hashtags: Iterable[Sequence], terms: Iterable[Sequence]) -> Set[str]:
+        """Replace everything: users as (id, username, full_name, followers, active)
+
+        Returns the tags whose count changed while a rebuild read. Their
+        deltas are not replayed, as the counts read may already include
+        them; the caller re-reads those counts instead.
+        """
+        users = {row[0]: (row[1], row[2] or '', row[3] or 0, bool(row[4])) for row in users}
+        hashtags = {tag: count for tag, count in hashtags if count > 0}
+        terms = {term: weight for term, weight in terms if weight > 0}
+
+        user_index, hashtag_index, term_index = (PrefixIndex(self.indexes[kind].cache_size)
+                                                 for kind in ('user', 'hashtag', 'term'))
+        user_index.bulk_load((text, display, user_id, followers)
+                             for user_id, (username, full_name, followers, active) in users.items() if active
+                             for text, display in self._user_texts(username, full_name))
+        hashtag_index.bulk_load((tag, f"#{tag}", tag, count) for tag, count in hashtags.items())
+        term_index.bulk_load((term, term, term, weight) for term, weight in terms.items())
+
+        with self.lock:
+            self.users, self.hashtags, self.terms = users, hashtags, terms
+            self.indexes = {'user': user_index, 'hashtag': hashtag_index, 'term': term_index}
+            # Users and terms are logged as absolute values, so replaying them is idempotent
+            replay, self.replay = self.replay, None
+            stale_tags = set()
+            for change in replay or ():
+                if change[0] == 'hashtag':
+                    stale_tags.add(change[1])
+                else:
+                    self.apply(change)
+            self.dirty = True
+        self.ready.set()
+        return stale_tags
+
+    def rebuild(self, connection):
+        """Reload users and hashtags from the database; search terms are kept"""
+        with self.lock:
+            terms = list(self.terms.items())
+            self.replay = []
+        try:
+            users = connection.execute(
+                select(User.id, User.username, User.full_name, User.followers_count, User.is_active)
+            ).all()
+            hashtags = connection.execute(select(Hashtag.tag, Hashtag.post_count)).all()
+        except Exception:
+            with self.lock:
+                self.replay = None
+            raise
+        stale_tags = self.load(users, hashtags, terms)
+        if stale_tags:
+            counts = dict(connection.execute(
+                select(Hashtag.tag, Hashtag.post_count).where(Hashtag.tag.in_(stale_tags))
+            ).all())
+            self.set_hashtag_counts((tag, counts.get(tag, 0)) for tag in stale_tags)
+
+    # Snapshots
+
+    def save_snapshot(self, path: Optional[str] = None):
+        path = path or self.snapshot_path
+        if not path:
+            return
+        with self.lock:
+            snapshot = {
+                'version': SNAPSHOT_VERSION,
+                'created_at': time.time(),
+                'users': [[user_id, *fields] for user_id, fields in self.users.items()],
+                'hashtags': list(self.hashtags.items()),
+                'terms': list(self.terms.items())
+            }
+            self.dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with gzip.open(temporary, 'wt', encoding='utf-8', compresslevel=1) as handle:
+            json.dump(snapshot, handle, separators=(',', ':'))
+        os.replace(temporary, path)
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            return False
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return False
+        self.load(snapshot['users'], snapshot['hashtags'], snapshot['terms'])
+        return True
+
+    def start_snapshots(self):
+        """Snapshot every snapshot_interval seconds while there are changes, and at exit"""
+        if not self.snapshot_path or self.snapshot_thread is not None:
+            return
+
+        def snapshot_worker():
+            while not self.stop_event.wait(self.snapshot_interval):
+                if self.dirty:
+                    try:
+                        self.save_snapshot()
+                    except OSError as e:
+                        print(f"Typeahead snapshot failed: {e}")
+
+        self.snapshot_thread = threading.Thread(target=snapshot_worker, name="typeahead-snapshot", daemon=True)
+        self.snapshot_thread.start()
+        atexit.register(self.close)
+
+    def close(self):
+        self.stop_event.set()
+        if self.dirty and self.ready.is_set():
+            self.save_snapshot()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'users': len(self.users),
+                'hashtags': len(self.hashtags),
+                'terms': len(self.terms),
+                'keys': {kind: len(index) for kind, index in self.indexes.items()},
+                'cached_prefixes': {kind: len(index.top) for kind, index in self.indexes.items()},
+                'ready': self.ready.is_set()
+            }
+
+    @staticmethod
+    def _user_texts(username: str, full_name: Optional[str]) -> List[Tuple[str, str]]:
+        texts = [(username.lower(), username)]
+        words = (full_name or '').lower().split()
+        for start in range(len(words)):
+            texts.append((' '.join(words[start:]), full_name))
+        return texts
+
+    def _set_hashtag(self, tag: str, count: int):
+        if count > 0:
+            self.hashtags[tag] = count
+            self.indexes['hashtag'].upsert(tag, f"#{tag}", tag, count)
+        else:
+            self.hashtags.pop(tag, None)
+            self.indexes['hashtag'].remove(tag, tag)
+        self.dirty = True
+
+    def _log(self, change: Tuple):
+        if self.replay is not None:
+            self.replay.append(change)
+
+    def _evict_terms(self):
+        """Drop the least searched terms down to 90% of max_terms and re-sort the rest once"""
+        excess = len(self.terms) - int(self.max_terms * 0.9)
+        for term in heapq.nsmallest(excess, self.terms, key=self.terms.get):
+            del self.terms[term]
+            self._log(('term', term, 0.0))
+        index = self.indexes['term']
+        index.bulk_load((term, term, term, weight) for term, weight in self.terms.items())
+
+    def _remove_user_entries(self, user_id: int, keep: frozenset = frozenset()):
+        previous = self.users.get(user_id)
+        if previous is not None and previous[3]:
+            for text, _ in self._user_texts(previous[0], previous[1]):
+                if text not in keep:
+                    self.indexes['user'].remove(text, user_id)
+
+# Change events
+
+USER_FIELDS = ('username', 'full_name', 'followers_count', 'is_active')
+
+def _history(target, field: str):
+    history = inspect(target).attrs[field].history
+    return history.deleted[0] if history.deleted else getattr(target, field)
+
+def _post_tags(content: Optional[str], is_public: Optional[bool]) -> set:
+    return set(extract_hashtags(content)) if is_public is not False else set()
+
+def _queue(target, change: Tuple):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('typeahead_changes', []).append(change)
+
+def _register_hooks(service: TypeaheadService):
+    def user_inserted(mapper, connection, target):
+        _queue(target, ('user', target.id, target.username, target.full_name,
+                        target.followers_count, target.is_active is not False))
+
+    def user_updated(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in USER_FIELDS):
+            user_inserted(mapper, connection, target)
+
+    def user_deleted(mapper, connection, target):
+        _queue(target, ('remove_user', target.id))
+
+    def post_inserted(mapper, connection, target):
+        for tag in _post_tags(target.content, target.is_public):
+            _queue(target, ('hashtag', tag, 1))
+
+    def post_updated(mapper, connection, target):
+        old = _post_tags(_history(target, 'content'), _history(target, 'is_public'))
+        new = _post_tags(target.content, target.is_public)
+        for tag in new - old:
+            _queue(target, ('hashtag', tag, 1))
+        for tag in old - new:
+            _queue(target, ('hashtag', tag, -1))
+
+    def post_deleted(mapper, connection, target):
+        for tag in _post_tags(target.content, target.is_public):
+            _queue(target, ('hashtag', tag, -1))
+
+    event.listen(User, 'after_insert', user_inserted)
+    event.listen(User, 'after_update', user_updated)
+    event.listen(User, 'after_delete', user_deleted)
+    event.listen(Post, 'after_insert', post_inserted)
+    event.listen(Post, 'after_update', post_updated)
+    event.listen(Post, 'after_delete', post_deleted)
+
+    @event.listens_for(Session, 'after_commit')
+    def apply_committed(session):
+        for change in session.info.pop('typeahead_changes', []):
+            service.apply(change)
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard_rolled_back(session):
+        session.info.pop('typeahead_changes', None)
+
+_service: Optional[TypeaheadService] = None
+_service_lock = threading.Lock()
+
+def init_typeahead(snapshot_path: Optional[str] = None) -> TypeaheadService:
+    """Start the typeahead service inside an app context, after init_search_index
+
+    With a snapshot on disk suggestions are served from it right away and
+    the database reload runs in the background; otherwise the reload runs
+    before returning. Hooks are registered first so that no commit made
+    during the reload is missed.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None:
+            return _service
+        service = TypeaheadService(snapshot_path)
+        engine = db.engine
+
+        def reconcile():
+            with engine.connect() as connection:
+                service.rebuild(connection)
+
+        _register_hooks(service)
+        if service.load_snapshot():
+            threading.Thread(target=reconcile, name="typeahead-rebuild", daemon=True).start()
+        else:
+            reconcile()
+        service.start_snapshots()
+        _service = service
+        return service
+
+def get_typeahead() -> TypeaheadService:
+    return _service or init_typeahead()
@@ -0,0 +1,99 @@
+"""
+Typeahead Benchmarks
+Per-keystroke ILIKE 'q%' lookups against the in-memory prefix index, plus update and snapshot cost
+"""
+
+import os
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from src.services.typeahead import TypeaheadService
+
+FIRST_NAMES = "alice bob carol dave erin frank grace heidi ivan judy mallory oscar peggy quinn rupert sybil".split()
+LAST_NAMES = "quantum stone rivers north fisher hale moreno khan ito novak silva berg".split()
+
+def _random_word(rng: random.Random, low: int = 4, high: int = 12) -> str:
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randrange(low, high)))
+
+def _legacy_suggestions(connection, query: str) -> List[str]:
+    pattern = f'{query}%'
+    usernames = connection.execute(
+        "SELECT username FROM user WHERE is_active = 1 AND username LIKE ? LIMIT 5", (pattern,)).fetchall()
+    names = connection.execute(
+        "SELECT full_name FROM user WHERE is_active = 1 AND full_name LIKE ? LIMIT 5", (pattern,)).fetchall()
+    return list({row[0] for row in usernames + names})[:10]
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'p50_us': round(1e6 * samples[len(samples) // 2], 1),
+        'p99_us': round(1e6 * samples[int(len(samples) * 0.99)], 1)
+    }
+
+def _time_each(function, arguments) -> List[float]:
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def benchmark_typeahead(users: int = 200_000, hashtags: int = 20_000, terms: int = 20_000,
+                        queries: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """Suggestion latency for the legacy LIKE queries and the prefix index, and index maintenance cost"""
+    rng = random.Random(seed)
+    user_rows = [(i, f"{_random_word(rng)}{i}", f"{rng.choice(FIRST_NAMES).title()} {rng.choice(LAST_NAMES).title()}",
+                  int(rng.paretovariate(1.2)), True) for i in range(1, users + 1)]
+    hashtag_rows = [(_random_word(rng, 2, 10), int(rng.paretovariate(1.1))) for _ in range(hashtags)]
+    term_rows = [(f"{_random_word(rng)} {_random_word(rng)}", float(int(rng.paretovariate(1.3))))
+                 for _ in range(terms)]
+    # What people type: short prefixes of real names and tags
+    typed = [rng.choice(user_rows)[rng.choice((1, 2))].lower()[:rng.randrange(2, 6)] for _ in range(queries)]
+    report: Dict[str, Any] = {'users': users, 'hashtags': hashtags, 'terms': terms}
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'users.db'))
+        connection.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, username TEXT, full_name TEXT, "
+                           "followers_count INTEGER, is_active BOOLEAN)")
+        connection.executemany("INSERT INTO user VALUES (?, ?, ?, ?, ?)", user_rows)
+        connection.commit()
+        report['legacy_like'] = _percentiles(_time_each(lambda query: _legacy_suggestions(connection, query),
+                                                        typed[:200]))
+        connection.close()
+
+        service = TypeaheadService(os.path.join(directory, 'typeahead.json.gz'))
+        start = time.perf_counter()
+        service.load(user_rows, hashtag_rows, term_rows)
+        report['load_seconds'] = round(time.perf_counter() - start, 3)
+
+        report['cold_prefix_index'] = _percentiles(_time_each(service.suggest, typed))
+        report['warm_prefix_index'] = _percentiles(_time_each(service.suggest, typed))
+
+        updates = [rng.randrange(1, users + 1) for _ in range(queries)]
+        report['follower_update'] = _percentiles(_time_each(
+            lambda user_id: service.upsert_user(user_id, *user_rows[user_id - 1][1:3], rng.randrange(10000)),
+            updates))
+        report['hashtag_update'] = _percentiles(_time_each(
+            lambda tag: service.adjust_hashtag(tag, 1), [rng.choice(hashtag_rows)[0] for _ in range(queries)]))
+        report['after_updates'] = _percentiles(_time_each(service.suggest, typed))
+
+        start = time.perf_counter()
+        service.save_snapshot()
+        report['snapshot_save_seconds'] = round(time.perf_counter() - start, 3)
+        report['snapshot_bytes'] = os.path.getsize(service.snapshot_path)
+
+        restarted = TypeaheadService(service.snapshot_path)
+        start = time.perf_counter()
+        restarted.load_snapshot()
+        report['snapshot_load_seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    for name, result in benchmark_typeahead(users=users).items():
+        print(f"{name}: {result}")
@@ -223,3 +223,32 @@ class Follow(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+
+
+class Hashtag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tag = db.Column(db.String(100), unique=True, nullable=False, index=True)  # lowercase, without '#'
+    
+    # Public posts currently using the tag
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+    last_used_at = db.Column(db.DateTime)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tag': self.tag,
+            'post_count': self.post_count,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
+
+
+class PostHashtag(db.Model):
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    hashtag_id = db.Column(db.Integer, db.ForeignKey('hashtag.id', ondelete='CASCADE'), primary_key=True)
+    
+    # The primary key leads with post_id; tag lookups need hashtag_id first
+    __table_args__ = (
+        db.Index('ix_post_hashtag_hashtag_post', 'hashtag_id', 'post_id'),
+    )